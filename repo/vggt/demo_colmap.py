@@ -20,7 +20,6 @@ torch.backends.cudnn.deterministic = False
 import argparse
 from pathlib import Path
 import trimesh
-import pycolmap
 
 
 from vggt.models.vggt import VGGT
@@ -29,7 +28,9 @@ from vggt.utils.pose_enc import pose_encoding_to_extri_intri
 from vggt.utils.geometry import unproject_depth_map_to_point_map
 from vggt.utils.helper import create_pixel_coordinate_grid, randomly_limit_trues
 from vggt.dependency.track_predict import predict_tracks
-from vggt.dependency.np_to_pycolmap import batch_np_matrix_to_pycolmap, batch_np_matrix_to_pycolmap_wo_track
+from vggt.dependency.colmap_writer import write_colmap, write_colmap_wo_track
+from vggt.dependency.bundle_adjustment import build_observation_mask, bundle_adjust
+from vggt.utils.backbones import backbone_registry
 
 
 # TODO: add support for masks
@@ -50,6 +51,13 @@ def parse_args():
     )
     parser.add_argument("--shared_camera", action="store_true", default=False, help="Use shared camera for all images")
     parser.add_argument("--camera_type", type=str, default="SIMPLE_PINHOLE", help="Camera type for reconstruction")
+    parser.add_argument(
+        "--ba_solver",
+        type=str,
+        default="pycolmap",
+        choices=["pycolmap", "torch"],
+        help="Bundle adjuster: pycolmap, or the built-in torch LM solver (no pycolmap needed)",
+    )
     parser.add_argument("--vis_thresh", type=float, default=0.2, help="Visibility threshold for tracks")
     parser.add_argument("--query_frame_num", type=int, default=8, help="Number of frames to query")
     parser.add_argument("--max_query_pts", type=int, default=4096, help="Maximum number of query points")
@@ -139,6 +147,9 @@ def demo_fn(args):
     extrinsic, intrinsic, depth_map, depth_conf = run_VGGT(model, images, dtype, vggt_fixed_resolution)
     points_3d = unproject_depth_map_to_point_map(depth_map, extrinsic, intrinsic)
 
+    sparse_reconstruction_dir = os.path.join(args.scene_dir, "sparse")
+    os.makedirs(sparse_reconstruction_dir, exist_ok=True)
+
     if args.use_ba:
         image_size = np.array(images.shape[-2:])
         scale = img_load_resolution / vggt_fixed_resolution
@@ -163,34 +174,94 @@ def demo_fn(args):
                 fine_tracking=args.fine_tracking,
             )
 
-            torch.cuda.empty_cache()
+            # Free DINOv2 and the tracker before BA (also empties the CUDA cache)
+            backbone_registry.evict_unused()
 
         # rescale the intrinsic matrix from 518 to 1024
         intrinsic[:, :2, :] *= scale
         track_mask = pred_vis_scores > args.vis_thresh
 
-        # TODO: radial distortion, iterative BA, masks
-        reconstruction, valid_track_mask = batch_np_matrix_to_pycolmap(
-            points_3d,
-            extrinsic,
-            intrinsic,
-            pred_tracks,
-            image_size,
-            masks=track_mask,
-            max_reproj_error=args.max_reproj_error,
-            shared_camera=shared_camera,
-            camera_type=args.camera_type,
-            points_rgb=points_rgb,
-        )
+        if args.ba_solver == "torch":
+            # TODO: iterative BA, masks
+            track_mask, valid_track_mask = build_observation_mask(
+                points_3d, extrinsic, intrinsic, pred_tracks, masks=track_mask, max_reproj_error=args.max_reproj_error
+            )
+            if track_mask.sum(1).min() < 64:
+                raise ValueError("No reconstruction can be built with BA")
+
+            pred_tracks, track_mask = pred_tracks[:, valid_track_mask], track_mask[:, valid_track_mask]
+            points_rgb = points_rgb[valid_track_mask]
+            points_3d, extrinsic, intrinsic, extra_params, ba_summary = bundle_adjust(
+                points_3d[valid_track_mask],
+                extrinsic,
+                intrinsic,
+                pred_tracks,
+                track_mask,
+                camera_type=args.camera_type,
+                shared_camera=shared_camera,
+            )
+            print(
+                f"BA cost {ba_summary['initial_cost']:.4g} -> {ba_summary['final_cost']:.4g} "
+                f"in {ba_summary['num_iterations']} iterations"
+            )
+
+            intrinsic, pred_tracks, image_size = rescale_to_original_resolution(
+                intrinsic, pred_tracks, np.arange(len(pred_tracks))[:, None], original_coords.cpu().numpy(),
+                img_size=img_load_resolution,
+            )
+
+            print(f"Saving reconstruction to {args.scene_dir}/sparse")
+            write_colmap(
+                sparse_reconstruction_dir,
+                points_3d,
+                extrinsic,
+                intrinsic,
+                pred_tracks,
+                track_mask,
+                image_size,
+                image_names=base_image_path_list,
+                shared_camera=shared_camera,
+                camera_type=args.camera_type,
+                extra_params=extra_params,
+                points_rgb=points_rgb,
+            )
+        else:
+            # pycolmap is only needed for the pycolmap solver, the other models are written directly
+            import pycolmap
+            from vggt.dependency.np_to_pycolmap import batch_np_matrix_to_pycolmap
+
+            # TODO: radial distortion, iterative BA, masks
+            reconstruction, valid_track_mask = batch_np_matrix_to_pycolmap(
+                points_3d,
+                extrinsic,
+                intrinsic,
+                pred_tracks,
+                image_size,
+                masks=track_mask,
+                max_reproj_error=args.max_reproj_error,
+                shared_camera=shared_camera,
+                camera_type=args.camera_type,
+                points_rgb=points_rgb,
+            )
 
-        if reconstruction is None:
-            raise ValueError("No reconstruction can be built with BA")
+            if reconstruction is None:
+                raise ValueError("No reconstruction can be built with BA")
 
-        # Bundle Adjustment
-        ba_options = pycolmap.BundleAdjustmentOptions()
-        pycolmap.bundle_adjustment(reconstruction, ba_options)
+            # Bundle Adjustment
+            ba_options = pycolmap.BundleAdjustmentOptions()
+            pycolmap.bundle_adjustment(reconstruction, ba_options)
 
-        reconstruction_resolution = img_load_resolution
+            reconstruction = rename_colmap_recons_and_rescale_camera(
+                reconstruction,
+                base_image_path_list,
+                original_coords.cpu().numpy(),
+                img_size=img_load_resolution,
+                shift_point2d_to_original_res=True,
+                shared_camera=shared_camera,
+            )
+
+            print(f"Saving reconstruction to {args.scene_dir}/sparse")
+            reconstruction.write(sparse_reconstruction_dir)
     else:
         conf_thres_value = args.conf_thres_value
         max_points_for_colmap = 100000  # randomly sample 3D points
@@ -217,34 +288,26 @@ def demo_fn(args):
         points_xyf = points_xyf[conf_mask]
         points_rgb = points_rgb[conf_mask]
 
-        print("Converting to COLMAP format")
-        reconstruction = batch_np_matrix_to_pycolmap_wo_track(
+        intrinsic, points_xy, image_size = rescale_to_original_resolution(
+            intrinsic, points_xyf[:, :2], points_xyf[:, 2].astype(np.int64), original_coords.cpu().numpy(),
+            img_size=vggt_fixed_resolution,
+        )
+        points_xyf = np.concatenate([points_xy, points_xyf[:, 2:]], axis=-1)
+
+        print(f"Saving reconstruction to {args.scene_dir}/sparse")
+        write_colmap_wo_track(
+            sparse_reconstruction_dir,
             points_3d,
             points_xyf,
             points_rgb,
             extrinsic,
             intrinsic,
             image_size,
+            image_names=base_image_path_list,
             shared_camera=shared_camera,
             camera_type=camera_type,
         )
 
-        reconstruction_resolution = vggt_fixed_resolution
-
-    reconstruction = rename_colmap_recons_and_rescale_camera(
-        reconstruction,
-        base_image_path_list,
-        original_coords.cpu().numpy(),
-        img_size=reconstruction_resolution,
-        shift_point2d_to_original_res=True,
-        shared_camera=shared_camera,
-    )
-
-    print(f"Saving reconstruction to {args.scene_dir}/sparse")
-    sparse_reconstruction_dir = os.path.join(args.scene_dir, "sparse")
-    os.makedirs(sparse_reconstruction_dir, exist_ok=True)
-    reconstruction.write(sparse_reconstruction_dir)
-
     # Save point cloud for fast visualization
     trimesh.PointCloud(points_3d, colors=points_rgb).export(os.path.join(args.scene_dir, "sparse/points.ply"))
 
@@ -292,6 +355,37 @@ def rename_colmap_recons_and_rescale_camera(
     return reconstruction
 
 
+def rescale_to_original_resolution(intrinsic, points_xy, frame_idx, original_coords, img_size):
+    """
+    NumPy counterpart of rename_colmap_recons_and_rescale_camera for the feedforward and BA arrays.
+
+    Maps intrinsics and 2D points from the padded&resized img_size square back to each original image.
+    The principal point is reset to the image center; radial distortion is unaffected by the resize.
+
+    Args:
+        intrinsic: Nx3x3
+        points_xy: ...x2 pixel locations, e.g. Px2 feedforward points or NxPx2 tracks
+        frame_idx: frame index of every point, broadcastable to points_xy.shape[:-1]
+
+    Returns:
+        intrinsic: Nx3x3 rescaled intrinsics
+        points_xy: ...x2 in original image coordinates
+        image_size: Nx2 original width and height
+    """
+    real_image_size = original_coords[:, -2:]
+    top_left = original_coords[:, :2]
+    resize_ratio = real_image_size.max(axis=-1) / img_size
+
+    intrinsic = intrinsic.copy()
+    intrinsic[:, 0, 0] *= resize_ratio
+    intrinsic[:, 1, 1] *= resize_ratio
+    intrinsic[:, :2, 2] = real_image_size / 2
+
+    points_xy = (points_xy - top_left[frame_idx]) * resize_ratio[frame_idx, None]
+
+    return intrinsic, points_xy, real_image_size
+
+
 if __name__ == "__main__":
     args = parse_args()
     with torch.no_grad():
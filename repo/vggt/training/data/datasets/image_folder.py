@@ -0,0 +1,197 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+import os
+import os.path as osp
+import logging
+import random
+
+import numpy as np
+
+from data.dataset_util import *
+from data.base_dataset import BaseDataset
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class ImageFolderDataset(BaseDataset):
+    """
+    Unlabeled image sequences, one sub-folder of IMAGE_DIR per scene (frames sorted by name).
+
+    Used for distillation, where the targets come from a teacher model. The geometry
+    fields of the batch (depths, extrinsics, intrinsics, points) are placeholders:
+    zero depth, identity extrinsics and a centred pinhole with focal = max(H, W),
+    so the batch has the same layout as the annotated datasets.
+    """
+    def __init__(
+        self,
+        common_conf,
+        split: str = "train",
+        IMAGE_DIR: str = None,
+        min_num_images: int = 2,
+        len_train: int = 100000,
+        len_test: int = 10000,
+        expand_ratio: int = 8,
+    ):
+        """
+        Initialize the ImageFolderDataset.
+
+        Args:
+            common_conf: Configuration object with common settings.
+            split (str): Dataset split, either 'train' or 'test'.
+            IMAGE_DIR (str): Directory with one sub-folder of images per scene.
+            min_num_images (int): Minimum number of images per scene.
+            len_train (int): Length of the training dataset.
+            len_test (int): Length of the test dataset.
+            expand_ratio (int): Range for expanding nearby image selection.
+        Raises:
+            ValueError: If IMAGE_DIR is not specified or holds no scene.
+        """
+        super().__init__(common_conf=common_conf)
+
+        self.debug = common_conf.debug
+        self.training = common_conf.training
+        self.get_nearby = common_conf.get_nearby
+        self.inside_random = common_conf.inside_random
+        self.allow_duplicate_img = common_conf.allow_duplicate_img
+
+        if IMAGE_DIR is None:
+            raise ValueError("IMAGE_DIR must be specified.")
+
+        if split == "train":
+            self.len_train = len_train
+        elif split == "test":
+            self.len_train = len_test
+        else:
+            raise ValueError(f"Invalid split: {split}")
+
+        logging.info(f"IMAGE_DIR is {IMAGE_DIR}")
+
+        self.IMAGE_DIR = IMAGE_DIR
+        self.expand_ratio = expand_ratio
+        self.data_store = {}
+        for seq_name in sorted(os.listdir(IMAGE_DIR)):
+            seq_dir = osp.join(IMAGE_DIR, seq_name)
+            if not osp.isdir(seq_dir):
+                continue
+            frames = sorted(f for f in os.listdir(seq_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+            if len(frames) >= min_num_images:
+                self.data_store[seq_name] = frames
+
+        self.sequence_list = list(self.data_store.keys())
+        self.sequence_list_len = len(self.sequence_list)
+        if self.sequence_list_len == 0:
+            raise ValueError(f"No scene with at least {min_num_images} images in {IMAGE_DIR}")
+
+        status = "Training" if self.training else "Testing"
+        logging.info(f"{status}: ImageFolder Data size: {self.sequence_list_len}")
+        logging.info(f"{status}: ImageFolder Data dataset length: {len(self)}")
+
+    def get_data(
+        self,
+        seq_index: int = None,
+        img_per_seq: int = None,
+        seq_name: str = None,
+        ids: list = None,
+        aspect_ratio: float = 1.0,
+    ) -> dict:
+        """
+        Retrieve data for a specific sequence.
+
+        Args:
+            seq_index (int): Index of the sequence to retrieve.
+            img_per_seq (int): Number of images per sequence.
+            seq_name (str): Name of the sequence.
+            ids (list): Specific IDs to retrieve.
+            aspect_ratio (float): Aspect ratio for image processing.
+
+        Returns:
+            dict: A batch of images with placeholder geometry.
+        """
+        if self.inside_random and self.training:
+            seq_index = random.randint(0, self.sequence_list_len - 1)
+
+        if seq_name is None:
+            seq_name = self.sequence_list[seq_index]
+
+        frames = self.data_store[seq_name]
+        num_images = len(frames)
+
+        if ids is None:
+            ids = np.random.choice(num_images, img_per_seq, replace=self.allow_duplicate_img)
+
+        if self.get_nearby:
+            ids = self.get_nearby_ids(ids, num_images, expand_ratio=self.expand_ratio)
+
+        target_image_shape = self.get_target_shape(aspect_ratio)
+
+        images = []
+        depths = []
+        cam_points = []
+        world_points = []
+        point_masks = []
+        extrinsics = []
+        intrinsics = []
+        original_sizes = []
+
+        for image_idx in ids:
+            image_filepath = osp.join(self.IMAGE_DIR, seq_name, frames[image_idx])
+            image = read_image_cv2(image_filepath)
+
+            original_size = np.array(image.shape[:2])
+            height, width = original_size
+            depth_map = np.zeros((height, width), dtype=np.float32)
+            extri_opencv = np.eye(4)[:3]
+            intri_opencv = np.array(
+                [[max(height, width), 0, width / 2], [0, max(height, width), height / 2], [0, 0, 1]],
+                dtype=np.float64,
+            )
+
+            (
+                image,
+                depth_map,
+                extri_opencv,
+                intri_opencv,
+                world_coords_points,
+                cam_coords_points,
+                point_mask,
+                _,
+            ) = self.process_one_image(
+                image,
+                depth_map,
+                extri_opencv,
+                intri_opencv,
+                original_size,
+                target_image_shape,
+                filepath=image_filepath,
+            )
+
+            images.append(image)
+            depths.append(depth_map)
+            extrinsics.append(extri_opencv)
+            intrinsics.append(intri_opencv)
+            cam_points.append(cam_coords_points)
+            world_points.append(world_coords_points)
+            point_masks.append(point_mask)
+            original_sizes.append(original_size)
+
+        set_name = "image_folder"
+
+        batch = {
+            "seq_name": set_name + "_" + seq_name,
+            "ids": ids,
+            "frame_num": len(extrinsics),
+            "images": images,
+            "depths": depths,
+            "extrinsics": extrinsics,
+            "intrinsics": intrinsics,
+            "cam_points": cam_points,
+            "world_points": world_points,
+            "point_masks": point_masks,
+            "original_sizes": original_sizes,
+        }
+        return batch
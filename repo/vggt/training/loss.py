@@ -78,6 +78,162 @@ class MultitaskLoss(torch.nn.Module):
         return loss_dict
 
 
+@dataclass(eq=False)
+class DistillationLoss(torch.nn.Module):
+    """
+    Loss for distilling a VGGT teacher into a smaller student.
+
+    The targets are the teacher predictions in batch["teacher"] (see Trainer._step), so the
+    ground-truth geometry of the batch is not used:
+    - Camera loss: every student pose encoding against the final teacher pose encoding
+    - Depth / point loss: the confidence-weighted regression loss of MultitaskLoss, restricted
+      to the pixels where the teacher confidence is above a per-frame quantile
+    - Token loss (optional): relation matching of the aggregated tokens
+    """
+    def __init__(self, camera=None, depth=None, point=None, tokens=None, **kwargs):
+        super().__init__()
+        self.camera = camera
+        self.depth = depth
+        self.point = point
+        self.tokens = tokens
+
+    def forward(self, predictions, batch) -> torch.Tensor:
+        """
+        Compute the total distillation loss.
+
+        Args:
+            predictions: Dict containing student predictions (and "aggregated_tokens_list" for the token loss)
+            batch: Dict containing the teacher predictions under "teacher"
+
+        Returns:
+            Dict containing individual losses and total objective
+        """
+        teacher = batch["teacher"]
+        total_loss = 0
+        loss_dict = {}
+
+        if self.camera is not None and "pose_enc_list" in predictions:
+            camera_loss_dict = compute_camera_distill_loss(predictions, teacher, **self.camera)
+            total_loss = total_loss + camera_loss_dict["loss_camera"] * self.camera["weight"]
+            loss_dict.update(camera_loss_dict)
+
+        if self.depth is not None and "depth" in predictions:
+            mask = teacher_confidence_mask(teacher["depth_conf"], self.depth.get("conf_quantile", 0.0))
+            targets = {"depths": teacher["depth"][..., 0], "point_masks": mask}
+            depth_loss_dict = compute_depth_loss(predictions, targets, **self.depth)
+            depth_loss = sum(depth_loss_dict[f"loss_{name}_depth"] for name in ("conf", "reg", "grad"))
+            total_loss = total_loss + depth_loss * self.depth["weight"]
+            loss_dict.update(depth_loss_dict)
+
+        if self.point is not None and "world_points" in predictions:
+            mask = teacher_confidence_mask(teacher["world_points_conf"], self.point.get("conf_quantile", 0.0))
+            targets = {"world_points": teacher["world_points"], "point_masks": mask}
+            point_loss_dict = compute_point_loss(predictions, targets, **self.point)
+            point_loss = sum(point_loss_dict[f"loss_{name}_point"] for name in ("conf", "reg", "grad"))
+            total_loss = total_loss + point_loss * self.point["weight"]
+            loss_dict.update(point_loss_dict)
+
+        if self.tokens is not None and self.tokens["weight"] > 0:
+            token_loss_dict = compute_token_relation_loss(
+                predictions["aggregated_tokens_list"], teacher["aggregated_tokens_list"],
+                teacher["patch_start_idx"], **self.tokens
+            )
+            total_loss = total_loss + token_loss_dict["loss_tokens"] * self.tokens["weight"]
+            loss_dict.update(token_loss_dict)
+
+        loss_dict["objective"] = total_loss
+
+        return loss_dict
+
+
+def teacher_confidence_mask(conf, quantile=0.0):
+    """
+    Mask of the pixels whose teacher confidence is at least the per-frame quantile.
+
+    Args:
+        conf: (B, S, H, W) teacher confidence
+        quantile: Fraction of the least confident pixels of each frame to drop (0 keeps all)
+    """
+    conf = conf.detach().float()
+    if quantile <= 0:
+        return torch.ones_like(conf, dtype=torch.bool)
+    threshold = torch.quantile(conf.flatten(2), quantile, dim=-1)
+    return conf >= threshold[..., None, None]
+
+
+def compute_camera_distill_loss(
+    pred_dict,              # student predictions dict, contains pose encodings
+    teacher,                # teacher predictions dict
+    loss_type="l1",         # "l1" or "l2" loss
+    gamma=0.6,              # temporal decay weight for multi-stage training
+    weight_trans=1.0,       # weight for translation loss
+    weight_rot=1.0,         # weight for rotation loss
+    weight_focal=0.5,       # weight for focal length loss
+    **kwargs
+):
+    pred_pose_encodings = pred_dict['pose_enc_list']
+    # Every student stage regresses the final (most refined) teacher pose encoding
+    target_pose_encoding = teacher['pose_enc'].detach().float()
+    n_stages = len(pred_pose_encodings)
+
+    total_loss_T = total_loss_R = total_loss_FL = 0
+    for stage_idx in range(n_stages):
+        stage_weight = gamma ** (n_stages - stage_idx - 1)
+        loss_T_stage, loss_R_stage, loss_FL_stage = camera_loss_single(
+            pred_pose_encodings[stage_idx], target_pose_encoding, loss_type=loss_type
+        )
+        total_loss_T += loss_T_stage * stage_weight
+        total_loss_R += loss_R_stage * stage_weight
+        total_loss_FL += loss_FL_stage * stage_weight
+
+    avg_loss_T = total_loss_T / n_stages
+    avg_loss_R = total_loss_R / n_stages
+    avg_loss_FL = total_loss_FL / n_stages
+
+    total_camera_loss = (
+        avg_loss_T * weight_trans +
+        avg_loss_R * weight_rot +
+        avg_loss_FL * weight_focal
+    )
+
+    return {
+        "loss_camera": total_camera_loss,
+        "loss_T": avg_loss_T,
+        "loss_R": avg_loss_R,
+        "loss_FL": avg_loss_FL
+    }
+
+
+def compute_token_relation_loss(student_tokens, teacher_tokens, patch_start_idx, token_stride=4, **kwargs):
+    """
+    Relation distillation of the aggregated tokens.
+
+    Student and teacher tokens have different widths, so the loss matches their pairwise
+    cosine similarities instead: a (P, P) matrix per frame that does not depend on the width.
+    Student layer i is paired with the teacher layer at the same relative depth.
+
+    Args:
+        student_tokens: List of (B, S, N, 2C_s) student aggregator outputs
+        teacher_tokens: List of (B, S, N, 2C_t) teacher aggregator outputs
+        patch_start_idx: Index of the first patch token (camera and register tokens come before)
+        token_stride: Keep every token_stride-th patch token to bound the (P, P) matrices
+    """
+    num_student, num_teacher = len(student_tokens), len(teacher_tokens)
+    loss = 0
+    for i in range(num_student):
+        j = round((i + 1) * num_teacher / num_student) - 1
+        student = token_relations(student_tokens[i][:, :, patch_start_idx::token_stride])
+        teacher = token_relations(teacher_tokens[j][:, :, patch_start_idx::token_stride].detach())
+        loss = loss + F.mse_loss(student, teacher)
+    return {"loss_tokens": loss / num_student}
+
+
+def token_relations(tokens):
+    """(B, S, P, C) tokens -> (B, S, P, P) cosine similarities."""
+    tokens = F.normalize(tokens.float(), dim=-1)
+    return tokens @ tokens.transpose(-1, -2)
+
+
 def compute_camera_loss(
     pred_dict,              # predictions dict, contains pose encodings
     batch_data,             # ground truth and mask batch dict
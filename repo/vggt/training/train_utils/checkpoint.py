@@ -10,6 +10,7 @@ from typing import (
     Any,
     Dict,
     List,
+    Optional,
 )
 
 import torch
@@ -52,10 +53,12 @@ class DDPCheckpointSaver:
     def save_checkpoint(
         self,
         model: nn.Module,
+        model_state_dict: Optional[Dict[str, Any]] = None,
         **kwargs: Any,
     ) -> None:
         checkpoint = dict(**kwargs)
-        checkpoint["model"] = model.state_dict()
+        # A partial state dict (e.g. LoRA adapters only) replaces the full model weights
+        checkpoint["model"] = model.state_dict() if model_state_dict is None else model_state_dict
 
         if self.worker_id == 0:
             for ckpt_name in self.checkpoint_names:
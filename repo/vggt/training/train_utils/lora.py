@@ -0,0 +1,131 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+import logging
+import math
+from typing import Any, Dict, List
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from wcmatch import fnmatch
+
+from train_utils.freeze import GLOB_FLAGS, _check_every_pattern_used
+from vggt.utils.lora import merge_lora_update_
+
+# State dict keys of the adapter weights end with these names
+LORA_PARAM_NAMES = ("lora_A", "lora_B")
+
+
+class LoRALinear(nn.Linear):
+    """nn.Linear with a trainable low-rank update: y = x W^T + b + (alpha / r) * x A^T B^T.
+
+    The base ``weight`` / ``bias`` keep their state dict names, so pretrained
+    checkpoints load unchanged. ``lora_B`` starts at zero, so training starts
+    from the pretrained function.
+    """
+
+    def __init__(self, in_features: int, out_features: int, rank: int, alpha: float = 1.0,
+                 dropout: float = 0.0, bias: bool = True, device=None, dtype=None):
+        super().__init__(in_features, out_features, bias=bias, device=device, dtype=dtype)
+        if rank < 1:
+            raise ValueError(f"LoRA rank must be >= 1, got {rank}")
+        self.rank = rank
+        self.scaling = alpha / rank
+        self.lora_A = nn.Parameter(torch.empty(rank, in_features, device=device, dtype=dtype))
+        self.lora_B = nn.Parameter(torch.zeros(out_features, rank, device=device, dtype=dtype))
+        self.lora_dropout = nn.Dropout(dropout) if dropout > 0 else nn.Identity()
+        nn.init.kaiming_uniform_(self.lora_A, a=math.sqrt(5))
+
+    @classmethod
+    def from_linear(cls, linear: nn.Linear, rank: int, alpha: float = 1.0,
+                    dropout: float = 0.0) -> "LoRALinear":
+        """Wrap an existing layer, sharing (not copying) its weight and bias."""
+        lora = cls(linear.in_features, linear.out_features, rank, alpha, dropout,
+                   bias=linear.bias is not None, device=linear.weight.device, dtype=linear.weight.dtype)
+        lora.weight = linear.weight
+        lora.bias = linear.bias
+        return lora
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        out = F.linear(x, self.weight, self.bias)
+        return out + F.linear(F.linear(self.lora_dropout(x), self.lora_A), self.lora_B) * self.scaling
+
+    @torch.no_grad()
+    def merged(self) -> nn.Linear:
+        """Plain nn.Linear with the low-rank update folded into the weight."""
+        linear = nn.Linear(self.in_features, self.out_features, bias=self.bias is not None,
+                           device=self.weight.device, dtype=self.weight.dtype)
+        linear.weight.copy_(self.weight)
+        merge_lora_update_(linear.weight, self.lora_A, self.lora_B, self.scaling)
+        if self.bias is not None:
+            linear.bias.copy_(self.bias)
+        return linear
+
+
+def apply_lora(model: nn.Module, patterns: List[str], rank: int = 16, alpha: float = 32.0,
+               dropout: float = 0.0) -> List[str]:
+    """Replace the nn.Linear layers whose *name* matches *patterns* with LoRALinear.
+
+    Every other parameter of *model* is frozen (``requires_grad = False``);
+    only the adapters are trained. Unfreeze modules afterwards to train them too.
+
+    Example
+    -------
+    >>> apply_lora(model, ["aggregator.global_blocks.*.attn.qkv", "aggregator.global_blocks.*.attn.proj"])
+
+    Returns
+    -------
+    list[str]
+        Names of the adapted layers.
+    """
+    targets = [
+        name for name, mod in model.named_modules()
+        if isinstance(mod, nn.Linear) and not isinstance(mod, LoRALinear)
+        and any(fnmatch.fnmatch(name, p, flags=GLOB_FLAGS) for p in patterns)
+    ]
+    _check_every_pattern_used(set(targets), patterns)
+
+    for p in model.parameters():
+        p.requires_grad = False
+
+    for name in targets:
+        parent_name, _, child_name = name.rpartition(".")
+        parent = model.get_submodule(parent_name)
+        setattr(parent, child_name, LoRALinear.from_linear(getattr(parent, child_name), rank, alpha, dropout))
+
+    trainable = sum(p.numel() for p in model.parameters() if p.requires_grad)
+    total = sum(p.numel() for p in model.parameters())
+    logging.info(f"LoRA adapters on {len(targets)} layers: {trainable} / {total} parameters trainable")
+    return targets
+
+
+def lora_state_dict(model: nn.Module, include_trainable: bool = True) -> Dict[str, torch.Tensor]:
+    """State dict holding only the adapter weights (and, optionally, every other trainable parameter).
+
+    Parameters that were left trainable next to the adapters (e.g. unfrozen heads)
+    cannot be rebuilt from the base checkpoint, so they are kept by default.
+    """
+    state_dict = model.state_dict()
+    trainable = {name for name, p in model.named_parameters() if p.requires_grad} if include_trainable else set()
+    return {
+        k: v for k, v in state_dict.items()
+        if k.rsplit(".", 1)[-1] in LORA_PARAM_NAMES or k in trainable
+    }
+
+
+def lora_config(rank: int, alpha: float, layers: List[str]) -> Dict[str, Any]:
+    """Metadata stored next to the adapter weights, used to merge them at load time."""
+    return {"rank": rank, "alpha": alpha, "scaling": alpha / rank, "layers": list(layers)}
+
+
+def merge_lora(model: nn.Module) -> nn.Module:
+    """Fold every LoRALinear of *model* back into a plain nn.Linear (in place)."""
+    for name, mod in list(model.named_modules()):
+        if isinstance(mod, LoRALinear):
+            parent_name, _, child_name = name.rpartition(".")
+            setattr(model.get_submodule(parent_name), child_name, mod.merged())
+    return model
@@ -39,6 +39,7 @@ from train_utils.distributed import get_machine_local_and_dist_rank
 from train_utils.freeze import freeze_modules
 from train_utils.general import set_seeds
 from train_utils.logging import setup_logging
+from train_utils.lora import apply_lora, lora_config, lora_state_dict
 from train_utils.normalization import normalize_camera_extrinsics_and_points_batch
 from train_utils.optimizer import construct_optimizers
 
@@ -77,6 +78,8 @@ class Trainer:
         loss: Optional[Dict[str, Any]] = None,
         env_variables: Optional[Dict[str, Any]] = None,
         accum_steps: int = 1,
+        lora: Optional[Dict[str, Any]] = None,
+        distill: Optional[Dict[str, Any]] = None,
         **kwargs,
     ):
         """
@@ -100,6 +103,10 @@ class Trainer:
             loss: Hydra config for the loss function.
             env_variables: Dictionary of environment variables to set.
             accum_steps: Number of steps to accumulate gradients before an optimizer step.
+            lora: Hydra config for parameter-efficient fine-tuning with LoRA adapters.
+                  When enabled, only the adapters (and optionally the heads) are trained and saved.
+            distill: Hydra config for knowledge distillation. When enabled, a frozen teacher model
+                     provides the training targets and the ground truth of the batch is not used.
         """
         self._setup_env_variables(env_variables)
         self._setup_timers()
@@ -111,6 +118,8 @@ class Trainer:
         self.logging_conf = logging
         self.checkpoint_conf = checkpoint
         self.optim_conf = optim
+        self.lora_conf = lora
+        self.distill_conf = distill
 
         # Store hyperparameters
         self.accum_steps = accum_steps
@@ -147,6 +156,8 @@ class Trainer:
 
         # Move model to the correct device
         self.model.to(self.device)
+        if self.teacher is not None:
+            self.teacher.to(self.device)
         self.time_elapsed_meter = DurationMeter("Time Elapsed", self.device, ":.4f")
 
         # Construct optimizers (after moving model to device)
@@ -156,6 +167,10 @@ class Trainer:
         # Load checkpoint if available or specified
         if self.checkpoint_conf.resume_checkpoint_path is not None:
             self._load_resuming_checkpoint(self.checkpoint_conf.resume_checkpoint_path)
+            # Adapter checkpoints only hold the adapters, so resume them on top of the base weights
+            ckpt_path = get_resume_checkpoint(self.checkpoint_conf.save_dir) if self.lora_layers else None
+            if ckpt_path is not None:
+                self._load_resuming_checkpoint(ckpt_path)
         else:   
             ckpt_path = get_resume_checkpoint(self.checkpoint_conf.save_dir)
             if ckpt_path is not None:
@@ -262,6 +277,16 @@ class Trainer:
                 f"[Done] Freezing modules: {self.optim_conf.frozen_module_names} on rank {self.distributed_rank}"
             )
 
+        # Parameter-efficient fine-tuning: train low-rank adapters on top of frozen base weights
+        self.lora_layers = None
+        if self.lora_conf is not None and self.lora_conf.get("enabled", False):
+            self._setup_lora()
+
+        # Knowledge distillation: a frozen teacher provides the targets
+        self.teacher = None
+        if self.distill_conf is not None and self.distill_conf.get("enabled", False):
+            self._setup_distillation()
+
         # Log model summary on rank 0
         if self.rank == 0:
             model_summary_path = os.path.join(self.logging_conf.log_dir, "model.txt")
@@ -270,6 +295,60 @@ class Trainer:
 
         logging.info("Successfully initialized training components.")
 
+    def _setup_lora(self):
+        """Adds LoRA adapters, freezes the patch embed and (unless train_heads is set) the heads."""
+        self.lora_layers = apply_lora(
+            self.model,
+            patterns=list(self.lora_conf.target_modules),
+            rank=self.lora_conf.rank,
+            alpha=self.lora_conf.alpha,
+            dropout=self.lora_conf.get("dropout", 0.0),
+        )
+        heads = [name for name in ("camera_head", "depth_head", "point_head", "track_head")
+                 if getattr(self.model, name, None) is not None]
+        if self.lora_conf.get("train_heads", False):
+            for name in heads:
+                getattr(self.model, name).requires_grad_(True)
+            frozen = ["aggregator.patch_embed"]
+        else:
+            frozen = ["aggregator.patch_embed"] + heads
+        self.model = freeze_modules(self.model, patterns=frozen)
+
+        trainable = sum(p.numel() for p in self.model.parameters() if p.requires_grad)
+        logging.info(f"LoRA fine-tuning: {trainable} trainable parameters, frozen {frozen}")
+
+    def _setup_distillation(self):
+        """Builds the frozen teacher and, for the token loss, captures the aggregator outputs of both models."""
+        self.teacher = instantiate(self.distill_conf.teacher, _recursive_=False)
+        ckpt_path = self.distill_conf.teacher_checkpoint_path
+        logging.info(f"Loading distillation teacher from {ckpt_path}")
+        with g_pathmgr.open(ckpt_path, "rb") as f:
+            checkpoint = torch.load(f, map_location="cpu")
+        teacher_state_dict = checkpoint["model"] if "model" in checkpoint else checkpoint
+        # strict=False: the checkpoint may hold heads the teacher does not use (e.g. the track head)
+        missing, _ = self.teacher.load_state_dict(teacher_state_dict, strict=False)
+        if missing:
+            raise KeyError(f"Teacher checkpoint is missing weights: {missing[:5]}")
+        self.teacher.eval()
+        self.teacher.requires_grad_(False)
+
+        # Hooks keep the latest aggregator outputs (tokens list, patch_start_idx) of each model
+        self.student_tokens = {}
+        self.teacher_tokens = {}
+        if self.loss_conf.get("tokens") is not None and self.loss_conf.tokens.weight > 0:
+            self.model.aggregator.register_forward_hook(self._token_hook(self.student_tokens))
+            self.teacher.aggregator.register_forward_hook(self._token_hook(self.teacher_tokens))
+
+        student = sum(p.numel() for p in self.model.parameters())
+        teacher = sum(p.numel() for p in self.teacher.parameters())
+        logging.info(f"Distillation: {student} student parameters, {teacher} teacher parameters")
+
+    @staticmethod
+    def _token_hook(store: Dict[str, Any]):
+        def hook(module, inputs, output):
+            store["aggregated_tokens_list"], store["patch_start_idx"] = output
+        return hook
+
     def _setup_dataloaders(self):
         """Initializes train and validation datasets and dataloaders."""
         self.train_dataset = None
@@ -335,6 +414,18 @@ class Trainer:
         if self.optim_conf.amp.enabled:
             checkpoint_content["scaler"] = self.scaler.state_dict()
 
+        model = self.model
+        if isinstance(model, torch.nn.parallel.DistributedDataParallel):
+            model = model.module
+
+        # LoRA checkpoints hold only the adapters (and other trainable weights), merged at load time
+        model_state_dict = None
+        if self.lora_layers:
+            model_state_dict = lora_state_dict(model)
+            checkpoint_content["lora"] = lora_config(
+                self.lora_conf.rank, self.lora_conf.alpha, self.lora_layers
+            )
+
         # Save the checkpoint for DDP only
         saver = DDPCheckpointSaver(
             checkpoint_folder,
@@ -343,11 +434,9 @@ class Trainer:
             epoch=epoch,
         )
 
-        if isinstance(self.model, torch.nn.parallel.DistributedDataParallel):
-            model = self.model.module
-
         saver.save_checkpoint(
             model=model,
+            model_state_dict=model_state_dict,
             ema_models = None,
             skip_saving_parameters=[],
             **checkpoint_content,
@@ -717,6 +806,10 @@ class Trainer:
         if self.data_conf.train.common_config.repeat_batch:
             batch = self._apply_batch_repetition(batch)
         
+        # Distillation targets come from the teacher, the geometry of the batch is a placeholder
+        if self.teacher is not None:
+            return batch
+
         # Normalize camera extrinsics and points. The function returns new tensors.
         normalized_extrinsics, normalized_cam_points, normalized_world_points, normalized_depths = \
             normalize_camera_extrinsics_and_points_batch(
@@ -744,6 +837,14 @@ class Trainer:
         """
         # Forward pass
         y_hat = model(images=batch["images"])
+
+        # Teacher targets for distillation
+        if self.teacher is not None:
+            with torch.no_grad():
+                batch["teacher"] = {**self.teacher(images=batch["images"]), **self.teacher_tokens}
+            y_hat.update(self.student_tokens)
+            self.teacher_tokens.clear()
+            self.student_tokens.clear()
         
         # Loss computation
         loss_dict = self.loss(y_hat, batch)
@@ -0,0 +1,477 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Batched Levenberg-Marquardt bundle adjustment in torch.
+
+Works directly on the dense track arrays used by demo_colmap.py (tracks: NxPx2, masks: NxP) instead of a
+pycolmap object graph. Residuals and Jacobians are evaluated for all (frame, track) pairs at once, the
+3D points are eliminated with a Schur complement, and the reduced camera system is solved densely
+(it has at most N * (6 + k) unknowns).
+"""
+
+import numpy as np
+import torch
+
+from .projection import project_3D_points_np
+
+
+# Camera parameters refined per model, in COLMAP order
+CAMERA_PARAM_NAMES = {
+    "SIMPLE_PINHOLE": ("f", "cx", "cy"),
+    "PINHOLE": ("fx", "fy", "cx", "cy"),
+    "SIMPLE_RADIAL": ("f", "cx", "cy", "k"),
+}
+
+
+def build_observation_mask(points3d, extrinsics, intrinsics, tracks, masks=None, max_reproj_error=None):
+    """
+    Select the observations used for BA, with the same rules as batch_np_matrix_to_pycolmap.
+
+    Points behind a camera are also dropped from that camera.
+
+    Args:
+        points3d: Px3
+        extrinsics: Nx3x4
+        intrinsics: Nx3x3
+        tracks: NxPx2
+        masks: NxP, optional visibility mask
+        max_reproj_error: Drop observations whose initial reprojection error is larger (pixels)
+
+    Returns:
+        masks: NxP observations used for BA
+        valid_mask: P, tracks with at least two observations
+    """
+    if max_reproj_error is not None:
+        projected_points_2d, projected_points_cam = project_3D_points_np(points3d, extrinsics, intrinsics)
+        reproj_mask = np.linalg.norm(projected_points_2d - tracks, axis=-1) < max_reproj_error
+        reproj_mask &= projected_points_cam[:, -1] > 0
+        masks = reproj_mask if masks is None else np.logical_and(masks, reproj_mask)
+
+    assert masks is not None
+
+    # a track is invalid if without two inliers
+    valid_mask = masks.sum(0) >= 2
+    return masks & valid_mask[None], valid_mask
+
+
+def bundle_adjust(
+    points3d,
+    extrinsics,
+    intrinsics,
+    tracks,
+    masks,
+    camera_type="SIMPLE_PINHOLE",
+    extra_params=None,
+    shared_camera=False,
+    huber_scale=1.0,
+    refine_focal_length=True,
+    refine_principal_point=False,
+    refine_extra_params=True,
+    fixed_frames=(0,),
+    max_iterations=50,
+    function_tolerance=1e-6,
+    initial_damping=1e-4,
+    chunk_size=8192,
+    verbose=False,
+):
+    """
+    Jointly refine camera poses, intrinsics and 3D points by minimizing the robust reprojection error.
+
+    The cost is 0.5 * sum of Huber(||r||^2) over the observations, with r the pixel residual of a track
+    in a frame, mirroring pycolmap.bundle_adjustment with a Huber loss. Gauge freedom is removed by
+    keeping the poses of `fixed_frames` constant; scale is left to the damping.
+
+    Args:
+        points3d: Px3 world points
+        extrinsics: Nx3x4 camera from world (OpenCV convention)
+        intrinsics: Nx3x3
+        tracks: NxPx2 observed pixel locations
+        masks: NxP, True where a track is observed in a frame
+        camera_type: "SIMPLE_PINHOLE", "PINHOLE" or "SIMPLE_RADIAL"
+        extra_params: Nx1 initial radial distortion for SIMPLE_RADIAL (zeros if None)
+        shared_camera: Refine a single set of intrinsics (initialized from the first frame) for all frames
+        huber_scale: Residual norm (pixels) above which the loss becomes linear
+        refine_focal_length, refine_principal_point, refine_extra_params: Which intrinsics to refine
+        fixed_frames: Indices of frames whose poses are held constant
+        max_iterations: Maximum number of LM iterations
+        function_tolerance: Stop when the relative cost decrease of an accepted step is below this
+        initial_damping: Initial LM damping factor
+        chunk_size: Number of tracks linearized at once, bounds the memory of the Jacobians
+        verbose: Print the cost of every iteration
+
+    Returns:
+        points3d: Px3 refined points
+        extrinsics: Nx3x4 refined poses
+        intrinsics: Nx3x3 refined intrinsics
+        extra_params: Nx1 refined distortion for SIMPLE_RADIAL, otherwise None
+        summary: dict with initial_cost, final_cost, num_iterations and num_observations
+
+        Arrays are returned as numpy if points3d was numpy, otherwise as torch tensors.
+    """
+    if camera_type not in CAMERA_PARAM_NAMES:
+        raise ValueError(f"Camera type {camera_type} is not supported yet")
+
+    return_numpy = isinstance(points3d, np.ndarray)
+    points3d, extrinsics, intrinsics, tracks = (
+        _as_float64(x) for x in (points3d, extrinsics, intrinsics, tracks)
+    )
+    masks = torch.as_tensor(masks, dtype=torch.bool)
+    N, P, _ = tracks.shape
+    assert extrinsics.shape == (N, 3, 4) and intrinsics.shape == (N, 3, 3) and points3d.shape == (P, 3)
+
+    state = {
+        "R": extrinsics[:, :3, :3].clone(),
+        "t": extrinsics[:, :3, 3].clone(),
+        "points": points3d.clone(),
+        "params": _intrinsics_to_params(intrinsics, camera_type, extra_params),
+    }
+    if shared_camera:
+        state["params"] = state["params"][:1].expand(N, -1).clone()
+
+    # Map the free global parameters to the per-frame blocks [rotation (3), translation (3), camera params (k)]
+    selection = _parameter_selection(
+        N, camera_type, shared_camera, fixed_frames,
+        refine_focal_length, refine_principal_point, refine_extra_params,
+    )
+
+    problem = {
+        "tracks": tracks,
+        "masks": masks,
+        "camera_type": camera_type,
+        "huber_scale": huber_scale,
+        "chunks": [slice(start, min(start + chunk_size, P)) for start in range(0, P, chunk_size)],
+    }
+
+    cost = _evaluate_cost(problem, state)
+    initial_cost = cost
+    damping = initial_damping
+    num_iterations = 0
+    linearization = _linearize(problem, state)
+    for num_iterations in range(1, max_iterations + 1):
+        delta_cam, delta_points = _solve_step(linearization, selection, damping)
+        candidate = _apply_step(state, delta_cam, delta_points)
+        new_cost = _evaluate_cost(problem, candidate)
+
+        if verbose:
+            print(f"BA iteration {num_iterations}: cost {cost:.6g} -> {new_cost:.6g}, damping {damping:.1e}")
+
+        if new_cost < cost:
+            converged = (cost - new_cost) <= function_tolerance * cost
+            state, cost = candidate, new_cost
+            damping = max(damping / 10, 1e-12)
+            if converged:
+                break
+            linearization = _linearize(problem, state)
+        else:
+            damping *= 10
+            if damping > 1e12:
+                break
+
+    extrinsics = torch.cat([state["R"], state["t"][..., None]], dim=-1)
+    intrinsics, extra_params = _params_to_intrinsics(state["params"], camera_type)
+    summary = {
+        "initial_cost": initial_cost,
+        "final_cost": cost,
+        "num_iterations": num_iterations,
+        "num_observations": int(masks.sum()),
+    }
+
+    outputs = (state["points"], extrinsics, intrinsics, extra_params)
+    if return_numpy:
+        outputs = tuple(x.numpy() if x is not None else None for x in outputs)
+    return (*outputs, summary)
+
+
+def _as_float64(x):
+    return torch.as_tensor(np.asarray(x) if not isinstance(x, torch.Tensor) else x).detach().cpu().double()
+
+
+def _intrinsics_to_params(intrinsics, camera_type, extra_params=None):
+    """Nx3x3 intrinsics (and Nx1 extra params) to Nxk camera parameters, as in _build_pycolmap_intri"""
+    fx, fy = intrinsics[:, 0, 0], intrinsics[:, 1, 1]
+    cx, cy = intrinsics[:, 0, 2], intrinsics[:, 1, 2]
+    if camera_type == "PINHOLE":
+        return torch.stack([fx, fy, cx, cy], dim=-1)
+
+    params = [(fx + fy) / 2, cx, cy]
+    if camera_type == "SIMPLE_RADIAL":
+        k = torch.zeros_like(fx) if extra_params is None else _as_float64(extra_params).reshape(-1)[: len(fx)]
+        params.append(k)
+    return torch.stack(params, dim=-1)
+
+
+def _params_to_intrinsics(params, camera_type):
+    """Nxk camera parameters to Nx3x3 intrinsics and Nx1 extra params (SIMPLE_RADIAL only)"""
+    intrinsics = torch.zeros(len(params), 3, 3, dtype=params.dtype)
+    if camera_type == "PINHOLE":
+        intrinsics[:, 0, 0], intrinsics[:, 1, 1] = params[:, 0], params[:, 1]
+        intrinsics[:, 0, 2], intrinsics[:, 1, 2] = params[:, 2], params[:, 3]
+    else:
+        intrinsics[:, 0, 0] = intrinsics[:, 1, 1] = params[:, 0]
+        intrinsics[:, 0, 2], intrinsics[:, 1, 2] = params[:, 1], params[:, 2]
+    intrinsics[:, 2, 2] = 1
+    extra_params = params[:, 3:4].clone() if camera_type == "SIMPLE_RADIAL" else None
+    return intrinsics, extra_params
+
+
+def _parameter_selection(
+    N, camera_type, shared_camera, fixed_frames, refine_focal_length, refine_principal_point, refine_extra_params
+):
+    """
+    Selection matrix A of shape (N * (6 + k), D) such that the per-frame block update is A @ delta.
+
+    A shared camera maps the same global intrinsic parameters into every frame block.
+    """
+    names = CAMERA_PARAM_NAMES[camera_type]
+    k = len(names)
+    refined = {
+        "f": refine_focal_length,
+        "fx": refine_focal_length,
+        "fy": refine_focal_length,
+        "cx": refine_principal_point,
+        "cy": refine_principal_point,
+        "k": refine_extra_params,
+    }
+    fixed_frames = {int(i) % N for i in fixed_frames}
+
+    rows, cols = [], []
+    pose_frames = [fidx for fidx in range(N) if fidx not in fixed_frames]
+    for col, fidx in enumerate(pose_frames):
+        rows.extend(fidx * (6 + k) + j for j in range(6))
+        cols.extend(col * 6 + j for j in range(6))
+    num_pose = 6 * len(pose_frames)
+
+    free_params = [j for j, name in enumerate(names) if refined[name]]
+    for fidx in range(N):
+        camera_offset = num_pose + (0 if shared_camera else fidx * len(free_params))
+        for col, j in enumerate(free_params):
+            rows.append(fidx * (6 + k) + 6 + j)
+            cols.append(camera_offset + col)
+
+    selection = torch.zeros(N * (6 + k), max(cols, default=-1) + 1, dtype=torch.float64)
+    selection[rows, cols] = 1
+    return selection
+
+
+def _skew(v):
+    zeros = torch.zeros_like(v[..., 0])
+    x, y, z = v.unbind(-1)
+    return torch.stack(
+        [
+            torch.stack([zeros, -z, y], dim=-1),
+            torch.stack([z, zeros, -x], dim=-1),
+            torch.stack([-y, x, zeros], dim=-1),
+        ],
+        dim=-2,
+    )
+
+
+def _so3_exp(omega):
+    """Rodrigues' formula for a batch of rotation vectors (...x3 -> ...x3x3)"""
+    theta = omega.norm(dim=-1, keepdim=True)[..., None]
+    K = _skew(omega)
+    small = theta < 1e-8
+    theta = torch.where(small, torch.ones_like(theta), theta)
+    A = torch.where(small, torch.ones_like(theta), torch.sin(theta) / theta)
+    B = torch.where(small, torch.full_like(theta, 0.5), (1 - torch.cos(theta)) / theta**2)
+    eye = torch.eye(3, dtype=omega.dtype).expand_as(K)
+    return eye + A * K + B * (K @ K)
+
+
+def _project(points_cam, params, camera_type):
+    """
+    Project camera-space points to pixels with the Jacobians.
+
+    Args:
+        points_cam: ...x3
+        params: ...xk camera parameters
+
+    Returns:
+        pixels: ...x2
+        d_points: ...x2x3 derivative w.r.t. points_cam
+        d_params: ...x2xk derivative w.r.t. params
+    """
+    x, y, z = points_cam.unbind(-1)
+    inv_z = 1 / z
+    u, v = x * inv_z, y * inv_z
+    zeros, ones = torch.zeros_like(u), torch.ones_like(u)
+
+    # d(u, v) / d(x, y, z)
+    d_uv = torch.stack(
+        [torch.stack([inv_z, zeros, -u * inv_z], dim=-1), torch.stack([zeros, inv_z, -v * inv_z], dim=-1)], dim=-2
+    )
+
+    if camera_type == "SIMPLE_RADIAL":
+        k = params[..., 3]
+        r2 = u * u + v * v
+        radial = 1 + k * r2
+        ud, vd = u * radial, v * radial
+        d_distortion = torch.stack(
+            [
+                torch.stack([radial + 2 * k * u * u, 2 * k * u * v], dim=-1),
+                torch.stack([2 * k * u * v, radial + 2 * k * v * v], dim=-1),
+            ],
+            dim=-2,
+        )
+        d_uv = d_distortion @ d_uv
+    else:
+        ud, vd = u, v
+
+    if camera_type == "PINHOLE":
+        fx, fy, cx, cy = params.unbind(-1)
+        d_params = torch.stack(
+            [torch.stack([ud, zeros, ones, zeros], dim=-1), torch.stack([zeros, vd, zeros, ones], dim=-1)], dim=-2
+        )
+    else:
+        fx = fy = params[..., 0]
+        cx, cy = params[..., 1], params[..., 2]
+        d_params = [torch.stack([ud, ones, zeros], dim=-1), torch.stack([vd, zeros, ones], dim=-1)]
+        if camera_type == "SIMPLE_RADIAL":
+            d_params = [
+                torch.cat([d_params[0], (fx * u * r2)[..., None]], dim=-1),
+                torch.cat([d_params[1], (fy * v * r2)[..., None]], dim=-1),
+            ]
+        d_params = torch.stack(d_params, dim=-2)
+
+    pixels = torch.stack([fx * ud + cx, fy * vd + cy], dim=-1)
+    d_points = d_uv * torch.stack([fx, fy], dim=-1)[..., None]
+    return pixels, d_points, d_params
+
+
+def _residuals(problem, state, chunk, with_jacobians=False):
+    """
+    Weighted residuals of the tracks in `chunk` for all frames.
+
+    Returns:
+        residuals: Nxpx2
+        weights: Nxp, Huber IRLS weights (zero for unused observations)
+        cost: Nxp, Huber cost of every observation
+        and, if with_jacobians, the Nxpx2x(6+k) camera block and Nxpx2x3 point Jacobians
+    """
+    R, t, points, params = state["R"], state["t"], state["points"][chunk], state["params"]
+    points_cam = torch.einsum("nij,pj->npi", R, points) + t[:, None]
+    pixels, d_points, d_params = _project(points_cam, params[:, None], problem["camera_type"])
+
+    residuals = pixels - problem["tracks"][:, chunk]
+    valid = problem["masks"][:, chunk] & (points_cam[..., 2] > 1e-8)
+    residuals = torch.where(valid[..., None], residuals, torch.zeros_like(residuals))
+
+    # Huber loss on the squared residual norm, as in Ceres' HuberLoss
+    squared_norm = (residuals**2).sum(-1)
+    norm = squared_norm.sqrt()
+    scale = problem["huber_scale"]
+    inlier = norm <= scale
+    cost = torch.where(inlier, squared_norm, 2 * scale * norm - scale**2) * valid
+    weights = torch.where(inlier, torch.ones_like(norm), scale / norm.clamp(min=1e-12)) * valid
+
+    if not with_jacobians:
+        return residuals, weights, cost
+
+    # Left perturbation of the pose: points_cam' = exp(omega) @ points_cam + delta_t
+    eye = torch.eye(3, dtype=R.dtype).expand(*points_cam.shape[:-1], 3, 3)
+    d_pose = torch.cat([-_skew(points_cam), eye], dim=-1)
+    J_cam = torch.cat([d_points @ d_pose, d_params], dim=-1)
+    J_points = d_points @ R[:, None]
+    return residuals, weights, cost, J_cam, J_points
+
+
+def _evaluate_cost(problem, state):
+    return sum(0.5 * _residuals(problem, state, chunk)[2].sum().item() for chunk in problem["chunks"])
+
+
+def _linearize(problem, state):
+    """
+    Blocks of the Gauss-Newton system J^T W J and J^T W r, accumulated over chunks of tracks.
+
+    Returns per chunk the point blocks V (px3x3), point gradients (px3) and camera-point blocks W (Nxpx(6+k)x3),
+    plus the per-frame camera blocks U (Nx(6+k)x(6+k)) and camera gradients (Nx(6+k)).
+    """
+    N, c = state["R"].shape[0], 6 + state["params"].shape[-1]
+    U = torch.zeros(N, c, c, dtype=torch.float64)
+    g_cam = torch.zeros(N, c, dtype=torch.float64)
+    point_blocks = []
+
+    for chunk in problem["chunks"]:
+        residuals, weights, _, J_cam, J_points = _residuals(problem, state, chunk, with_jacobians=True)
+        p = J_points.shape[1]
+        J_cam_w = J_cam * weights[..., None, None]
+        J_points_w = J_points * weights[..., None, None]
+
+        # Per-frame reductions over all tracks and both residual rows as batched matmuls
+        J_cam_w_rows = J_cam_w.reshape(N, p * 2, c).transpose(1, 2)
+        U += J_cam_w_rows @ J_cam.reshape(N, p * 2, c)
+        g_cam += (J_cam_w_rows @ residuals.reshape(N, p * 2, 1))[..., 0]
+
+        # Per-track reductions over all frames
+        J_points_w_rows = J_points_w.transpose(0, 1).reshape(p, N * 2, 3).transpose(1, 2)
+        V = J_points_w_rows @ J_points.transpose(0, 1).reshape(p, N * 2, 3)
+        g_points = (J_points_w_rows @ residuals.transpose(0, 1).reshape(p, N * 2, 1))[..., 0]
+
+        # Camera-point blocks: sum of the outer products of the two residual rows
+        W = J_cam_w[..., 0, :, None] * J_points[..., 0, None, :] + J_cam_w[..., 1, :, None] * J_points[..., 1, None, :]
+        point_blocks.append((V, g_points, W))
+
+    return U, g_cam, point_blocks
+
+
+def _solve_step(linearization, selection, damping):
+    """
+    Solve the damped normal equations (J^T W J + damping * diag) delta = -J^T W r with a Schur complement.
+
+    The point blocks (3x3 per track) are eliminated first; the reduced camera system is dense.
+    """
+    U, g_cam, point_blocks = linearization
+    N, c = g_cam.shape
+    schur = torch.zeros(N * c, N * c, dtype=torch.float64)
+    g_reduced = g_cam.clone()
+    point_inverses = []
+
+    for V, g_points, W in point_blocks:
+        p = V.shape[0]
+        # Damped inverse of the point blocks; unobserved points get an identity block and no update
+        V_damped = V + damping * torch.diag_embed(V.diagonal(dim1=-2, dim2=-1)) + 1e-12 * torch.eye(3)
+        V_inv = torch.linalg.inv(V_damped)
+        Y = W @ V_inv[None]
+
+        Y_flat = Y.permute(0, 2, 1, 3).reshape(N * c, p * 3)
+        W_flat = W.permute(0, 2, 1, 3).reshape(N * c, p * 3)
+        schur -= Y_flat @ W_flat.T
+        g_reduced -= (Y_flat @ g_points.reshape(p * 3, 1)).reshape(N, c)
+        point_inverses.append(V_inv)
+
+    # Reduced camera system over the free global parameters
+    U_global = selection.T @ torch.block_diag(*U) @ selection
+    H = U_global + selection.T @ schur @ selection
+    H = H + damping * torch.diag(U_global.diagonal()) + 1e-12 * torch.eye(len(H), dtype=H.dtype)
+    g = selection.T @ g_reduced.reshape(-1)
+    if len(g) > 0:
+        L, info = torch.linalg.cholesky_ex(H)
+        if info == 0:
+            delta = torch.cholesky_solve(-g[:, None], L)[:, 0]
+        else:
+            delta = torch.linalg.lstsq(H, -g[:, None]).solution[:, 0]
+    else:
+        delta = g
+    delta_cam = (selection @ delta).reshape(N, c)
+
+    # Back-substitute the point updates
+    delta_points = []
+    for (V, g_points, W), V_inv in zip(point_blocks, point_inverses):
+        rhs = g_points + (W.permute(1, 3, 0, 2).reshape(V.shape[0], 3, N * c) @ delta_cam.reshape(N * c, 1))[..., 0]
+        delta_points.append(-(V_inv @ rhs[..., None])[..., 0])
+
+    return delta_cam, torch.cat(delta_points) if delta_points else torch.zeros(0, 3, dtype=torch.float64)
+
+
+def _apply_step(state, delta_cam, delta_points):
+    rotation = _so3_exp(delta_cam[:, :3])
+    return {
+        "R": rotation @ state["R"],
+        "t": (rotation @ state["t"][..., None])[..., 0] + delta_cam[:, 3:6],
+        "points": state["points"] + delta_points,
+        "params": state["params"] + delta_cam[:, 6:],
+    }
@@ -0,0 +1,408 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Write COLMAP sparse models (cameras, images, points3D) directly from NumPy arrays.
+
+This is the dependency-free counterpart of batch_np_matrix_to_pycolmap(_wo_track) + Reconstruction.write:
+no pycolmap objects are built, and the per-point records are written with structured-array bulk writes.
+
+See https://colmap.github.io/format.html for the file formats.
+"""
+
+import os
+
+import numpy as np
+
+
+CAMERA_MODEL_IDS = {"SIMPLE_PINHOLE": 0, "PINHOLE": 1, "SIMPLE_RADIAL": 2}
+
+_POINT2D_DTYPE = np.dtype([("xy", "<f8", (2,)), ("point3D_id", "<u8")])
+
+
+def write_colmap_wo_track(
+    output_dir,
+    points3d,
+    points_xyf,
+    points_rgb,
+    extrinsics,
+    intrinsics,
+    image_size,
+    image_names=None,
+    shared_camera=False,
+    camera_type="PINHOLE",
+    binary=True,
+):
+    """
+    Write a COLMAP sparse model where every 3D point is observed by the pixel it was unprojected from.
+
+    Produces the same model as batch_np_matrix_to_pycolmap_wo_track followed by Reconstruction.write,
+    without pycolmap. Do NOT use this for BA.
+
+    Args:
+        output_dir: Directory to write cameras/images/points3D into (created if missing)
+        points3d: Px3 world points
+        points_xyf: Px3, with x, y pixel coordinates and frame indices
+        points_rgb: Px3 uint8 colors
+        extrinsics: Nx3x4 camera from world (OpenCV convention)
+        intrinsics: Nx3x3
+        image_size: (2,) width and height shared by all frames, or (N, 2) per frame
+        image_names: N image names, defaults to image_{id}
+        shared_camera: Write a single camera (from the first frame) for all images
+        camera_type: "PINHOLE" or "SIMPLE_PINHOLE"
+        binary: Write the .bin files, otherwise the .txt files
+
+    Returns:
+        dict: Number of cameras, images, points3D and observations written
+    """
+    N = len(extrinsics)
+    P = len(points3d)
+    assert len(points_xyf) == P and len(points_rgb) == P
+
+    point_frame = points_xyf[:, 2].astype(np.int64)
+    if P > 0 and (point_frame.min() < 0 or point_frame.max() >= N):
+        raise ValueError(f"Frame indices of points_xyf must be in [0, {N})")
+
+    # Every point is observed once, by the pixel it was unprojected from; group the observations by frame
+    obs_point = np.argsort(point_frame, kind="stable")
+
+    return _write_model(
+        output_dir,
+        points3d,
+        points_rgb,
+        point_frame[obs_point],
+        obs_point,
+        points_xyf[obs_point, :2],
+        extrinsics,
+        intrinsics,
+        image_size,
+        image_names=image_names,
+        shared_camera=shared_camera,
+        camera_type=camera_type,
+        binary=binary,
+    )
+
+
+def write_colmap(
+    output_dir,
+    points3d,
+    extrinsics,
+    intrinsics,
+    tracks,
+    masks,
+    image_size,
+    image_names=None,
+    shared_camera=False,
+    camera_type="SIMPLE_PINHOLE",
+    extra_params=None,
+    points_rgb=None,
+    binary=True,
+):
+    """
+    Write a COLMAP sparse model with tracks, e.g. after bundle adjustment.
+
+    Produces the same model as batch_np_matrix_to_pycolmap followed by Reconstruction.write, without
+    pycolmap. All P points are written (id = track index + 1); filter the tracks beforehand.
+
+    Args:
+        output_dir: Directory to write cameras/images/points3D into (created if missing)
+        points3d: Px3 world points
+        extrinsics: Nx3x4 camera from world (OpenCV convention)
+        intrinsics: Nx3x3
+        tracks: NxPx2 pixel locations of the tracks
+        masks: NxP, True where a track is observed in a frame
+        image_size: (2,) width and height shared by all frames, or (N, 2) per frame
+        image_names: N image names, defaults to image_{id}
+        shared_camera: Write a single camera (from the first frame) for all images
+        camera_type: "PINHOLE", "SIMPLE_PINHOLE" or "SIMPLE_RADIAL"
+        extra_params: Nx1 radial distortion for SIMPLE_RADIAL
+        points_rgb: Px3 uint8 colors, zeros if None
+        binary: Write the .bin files, otherwise the .txt files
+
+    Returns:
+        dict: Number of cameras, images, points3D and observations written
+    """
+    P = len(points3d)
+    assert tracks.shape[:2] == masks.shape and masks.shape[1] == P
+    if points_rgb is None:
+        points_rgb = np.zeros((P, 3), dtype=np.uint8)
+
+    # Frame-major observations, as in batch_np_matrix_to_pycolmap
+    obs_frame, obs_point = np.nonzero(masks)
+
+    return _write_model(
+        output_dir,
+        points3d,
+        points_rgb,
+        obs_frame,
+        obs_point,
+        tracks[obs_frame, obs_point],
+        extrinsics,
+        intrinsics,
+        image_size,
+        image_names=image_names,
+        shared_camera=shared_camera,
+        camera_type=camera_type,
+        extra_params=extra_params,
+        binary=binary,
+    )
+
+
+def _write_model(
+    output_dir,
+    points3d,
+    points_rgb,
+    obs_frame,
+    obs_point,
+    obs_xy,
+    extrinsics,
+    intrinsics,
+    image_size,
+    image_names=None,
+    shared_camera=False,
+    camera_type="PINHOLE",
+    extra_params=None,
+    binary=True,
+):
+    """
+    Write cameras, images and points3D from observations sorted by frame.
+
+    obs_frame, obs_point and obs_xy (M, M and Mx2) list the frame index, point index and pixel location of every
+    observation; within a frame, their order defines the point2D indices.
+    """
+    if camera_type not in CAMERA_MODEL_IDS:
+        raise ValueError(f"Camera type {camera_type} is not supported yet")
+
+    N = len(extrinsics)
+    P = len(points3d)
+    assert len(intrinsics) == N
+    if image_names is None:
+        image_names = [f"image_{fidx + 1}" for fidx in range(N)]
+
+    image_size = np.broadcast_to(np.asarray(image_size), (N, 2))
+    params = _camera_params(intrinsics, camera_type, extra_params)
+    num_cameras = 1 if shared_camera else N
+    camera_ids = np.ones(N, dtype=np.int64) if shared_camera else np.arange(1, N + 1)
+
+    # point2D_idx is the position of an observation among the observations of its frame
+    counts = np.bincount(obs_frame, minlength=N)
+    frame_starts = np.concatenate([[0], np.cumsum(counts)])
+    point2D_idx = np.arange(len(obs_frame)) - frame_starts[obs_frame]
+
+    # Track elements grouped by point, in frame order within a track
+    track_order = np.argsort(obs_point, kind="stable")
+
+    cameras = {
+        "camera_id": np.arange(1, num_cameras + 1),
+        "width": image_size[:num_cameras, 0],
+        "height": image_size[:num_cameras, 1],
+        "params": params[:num_cameras],
+    }
+    images = {
+        "image_id": np.arange(1, N + 1),
+        "qvec": rotmat_to_qvec(extrinsics[:, :3, :3]),
+        "tvec": extrinsics[:, :3, 3],
+        "camera_id": camera_ids,
+        "name": image_names,
+        # NOTE point3D_id start by 1
+        "points2D": [
+            (obs_xy[start:end], obs_point[start:end] + 1) for start, end in zip(frame_starts[:-1], frame_starts[1:])
+        ],
+    }
+    points = {
+        "point3D_id": np.arange(1, P + 1),
+        "xyz": points3d,
+        "rgb": points_rgb,
+        "track_length": np.bincount(obs_point, minlength=P),
+        "image_id": obs_frame[track_order] + 1,
+        "point2D_idx": point2D_idx[track_order],
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    if binary:
+        _write_cameras_binary(os.path.join(output_dir, "cameras.bin"), cameras, CAMERA_MODEL_IDS[camera_type])
+        _write_images_binary(os.path.join(output_dir, "images.bin"), images)
+        _write_points3D_binary(os.path.join(output_dir, "points3D.bin"), points)
+    else:
+        _write_cameras_text(os.path.join(output_dir, "cameras.txt"), cameras, camera_type)
+        _write_images_text(os.path.join(output_dir, "images.txt"), images)
+        _write_points3D_text(os.path.join(output_dir, "points3D.txt"), points)
+
+    return {"num_cameras": num_cameras, "num_images": N, "num_points3D": P, "num_observations": len(obs_frame)}
+
+
+def rotmat_to_qvec(R):
+    """
+    Convert rotation matrices to COLMAP quaternions (scalar-first, w >= 0).
+
+    Args:
+        R: ...x3x3 rotation matrices
+
+    Returns:
+        ...x4 quaternions in (w, x, y, z) order
+    """
+    R = np.asarray(R, dtype=np.float64)
+    # Same naming as COLMAP's rotmat2qvec, which unpacks R.flat
+    Rxx, Ryx, Rzx = R[..., 0, 0], R[..., 0, 1], R[..., 0, 2]
+    Rxy, Ryy, Rzy = R[..., 1, 0], R[..., 1, 1], R[..., 1, 2]
+    Rxz, Ryz, Rzz = R[..., 2, 0], R[..., 2, 1], R[..., 2, 2]
+    K = np.stack(
+        [
+            np.stack([Rxx - Ryy - Rzz, Ryx + Rxy, Rzx + Rxz, Ryz - Rzy], axis=-1),
+            np.stack([Ryx + Rxy, Ryy - Rxx - Rzz, Rzy + Ryz, Rzx - Rxz], axis=-1),
+            np.stack([Rzx + Rxz, Rzy + Ryz, Rzz - Rxx - Ryy, Rxy - Ryx], axis=-1),
+            np.stack([Ryz - Rzy, Rzx - Rxz, Rxy - Ryx, Rxx + Ryy + Rzz], axis=-1),
+        ],
+        axis=-2,
+    ) / 3.0
+    # The quaternion is the eigenvector of the largest eigenvalue, stored as (x, y, z, w)
+    _, eigvecs = np.linalg.eigh(K)
+    qvec = eigvecs[..., [3, 0, 1, 2], -1]
+    return np.where(qvec[..., :1] < 0, -qvec, qvec)
+
+
+def _camera_params(intrinsics, camera_type, extra_params=None):
+    """Batched counterpart of _build_pycolmap_intri: Nx3x3 intrinsics to Nxk camera parameters"""
+    fx, fy = intrinsics[:, 0, 0], intrinsics[:, 1, 1]
+    cx, cy = intrinsics[:, 0, 2], intrinsics[:, 1, 2]
+    if camera_type == "PINHOLE":
+        params = [fx, fy, cx, cy]
+    else:
+        params = [(fx + fy) / 2, cx, cy]
+    if camera_type == "SIMPLE_RADIAL":
+        params.append(np.zeros_like(fx) if extra_params is None else np.asarray(extra_params)[:, 0])
+    return np.stack(params, axis=-1).astype(np.float64)
+
+
+def _count_bytes(count):
+    return np.array(count, dtype="<u8").tobytes()
+
+
+def _write_cameras_binary(path, cameras, model_id):
+    dtype = np.dtype(
+        [
+            ("camera_id", "<i4"),
+            ("model_id", "<i4"),
+            ("width", "<u8"),
+            ("height", "<u8"),
+            ("params", "<f8", (cameras["params"].shape[-1],)),
+        ]
+    )
+    records = np.empty(len(cameras["camera_id"]), dtype=dtype)
+    records["camera_id"] = cameras["camera_id"]
+    records["model_id"] = model_id
+    records["width"] = cameras["width"]
+    records["height"] = cameras["height"]
+    records["params"] = cameras["params"]
+    with open(path, "wb") as fid:
+        fid.write(_count_bytes(len(records)))
+        fid.write(records.tobytes())
+
+
+def _write_images_binary(path, images):
+    header_dtype = np.dtype([("image_id", "<u4"), ("qvec", "<f8", (4,)), ("tvec", "<f8", (3,)), ("camera_id", "<u4")])
+    with open(path, "wb") as fid:
+        fid.write(_count_bytes(len(images["image_id"])))
+        for i, (points_xy, point3D_ids) in enumerate(images["points2D"]):
+            header = np.empty(1, dtype=header_dtype)
+            header["image_id"] = images["image_id"][i]
+            header["qvec"] = images["qvec"][i]
+            header["tvec"] = images["tvec"][i]
+            header["camera_id"] = images["camera_id"][i]
+            fid.write(header.tobytes())
+            fid.write(images["name"][i].encode("utf-8") + b"\x00")
+
+            points2D = np.empty(len(point3D_ids), dtype=_POINT2D_DTYPE)
+            points2D["xy"] = points_xy
+            points2D["point3D_id"] = point3D_ids
+            fid.write(_count_bytes(len(points2D)))
+            fid.write(points2D.tobytes())
+
+
+def _track_length_groups(points):
+    """Split the points into groups of equal track length, so each group is one fixed-size record array"""
+    track_starts = np.concatenate([[0], np.cumsum(points["track_length"])])
+    for track_length in np.unique(points["track_length"]):
+        idx = np.nonzero(points["track_length"] == track_length)[0]
+        elements = track_starts[idx, None] + np.arange(track_length)
+        yield int(track_length), idx, elements
+
+
+def _write_points3D_binary(path, points):
+    with open(path, "wb") as fid:
+        fid.write(_count_bytes(len(points["point3D_id"])))
+        for track_length, idx, elements in _track_length_groups(points):
+            dtype = np.dtype(
+                [
+                    ("point3D_id", "<u8"),
+                    ("xyz", "<f8", (3,)),
+                    ("rgb", "u1", (3,)),
+                    ("error", "<f8"),
+                    ("track_length", "<u8"),
+                    ("track", [("image_id", "<u4"), ("point2D_idx", "<u4")], (track_length,)),
+                ]
+            )
+            records = np.empty(len(idx), dtype=dtype)
+            records["point3D_id"] = points["point3D_id"][idx]
+            records["xyz"] = points["xyz"][idx]
+            records["rgb"] = points["rgb"][idx]
+            # Same as a freshly added point in COLMAP: no reprojection error yet
+            records["error"] = -1.0
+            records["track_length"] = track_length
+            records["track"]["image_id"] = points["image_id"][elements]
+            records["track"]["point2D_idx"] = points["point2D_idx"][elements]
+            fid.write(records.tobytes())
+
+
+def _write_cameras_text(path, cameras, camera_type):
+    num_params = cameras["params"].shape[-1]
+    with open(path, "w") as fid:
+        fid.write("# Camera list with one line of data per camera:\n")
+        fid.write("#   CAMERA_ID, MODEL, WIDTH, HEIGHT, PARAMS[]\n")
+        fid.write(f"# Number of cameras: {len(cameras['camera_id'])}\n")
+        for camera_id, width, height, params in zip(
+            cameras["camera_id"], cameras["width"], cameras["height"], cameras["params"]
+        ):
+            fid.write(f"{camera_id} {camera_type} {int(width)} {int(height)} ")
+            fid.write(" ".join(["%.17g"] * num_params) % tuple(params) + "\n")
+
+
+def _write_images_text(path, images):
+    num_observations = sum(len(point3D_ids) for _, point3D_ids in images["points2D"])
+    with open(path, "w") as fid:
+        fid.write("# Image list with two lines of data per image:\n")
+        fid.write("#   IMAGE_ID, QW, QX, QY, QZ, TX, TY, TZ, CAMERA_ID, NAME\n")
+        fid.write("#   POINTS2D[] as (X, Y, POINT3D_ID)\n")
+        fid.write(f"# Number of images: {len(images['image_id'])}, observations: {num_observations}\n")
+        for i, (points_xy, point3D_ids) in enumerate(images["points2D"]):
+            pose = np.concatenate([images["qvec"][i], images["tvec"][i]])
+            fid.write(f"{images['image_id'][i]} " + " ".join(["%.17g"] * 7) % tuple(pose))
+            fid.write(f" {images['camera_id'][i]} {images['name'][i]}\n")
+
+            points2D = np.column_stack([points_xy, point3D_ids]).ravel().tolist()
+            fid.write(" ".join(["%.17g %.17g %d"] * len(point3D_ids)) % tuple(points2D) + "\n")
+
+
+def _write_points3D_text(path, points):
+    num_points = len(points["point3D_id"])
+    mean_track_length = points["track_length"].mean() if num_points > 0 else 0
+    with open(path, "w") as fid:
+        fid.write("# 3D point list with one line of data per point:\n")
+        fid.write("#   POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK[] as (IMAGE_ID, POINT2D_IDX)\n")
+        fid.write(f"# Number of points: {num_points}, mean track length: {mean_track_length:g}\n")
+        for track_length, idx, elements in _track_length_groups(points):
+            track = np.stack([points["image_id"][elements], points["point2D_idx"][elements]], axis=-1)
+            columns = [
+                points["point3D_id"][idx],
+                points["xyz"][idx],
+                points["rgb"][idx],
+                np.full(len(idx), -1.0),
+                track.reshape(len(idx), -1),
+            ]
+            # One formatting pass per group instead of a Python loop per point
+            rows = np.column_stack(columns).ravel().tolist()
+            row_format = "%d %.17g %.17g %.17g %d %d %d %.17g" + " %d %d" * track_length + "\n"
+            fid.write(row_format * len(idx) % tuple(rows))
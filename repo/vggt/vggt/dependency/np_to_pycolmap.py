@@ -85,7 +85,14 @@ def batch_np_matrix_to_pycolmap(
         rgb = points_rgb[vidx] if points_rgb is not None else np.zeros(3)
         reconstruction.add_point3D(points3d[vidx], pycolmap.Track(), rgb)
 
-    num_points3D = len(valid_idx)
+    # Observations (frame, point3D) that enter BA, in frame-major order
+    # Points outside max_points3D_val are kept in the reconstruction but not observed
+    in_range = (points3d[valid_idx] < max_points3D_val).all(axis=-1)
+    observed = masks[:, valid_idx] & in_range[None]
+    obs_frame, obs_point = np.nonzero(observed)
+    obs_point2D_idx, frame_starts = _point2D_indices(obs_frame, N)
+    obs_xy = tracks[obs_frame, valid_idx[obs_point]]
+
     camera = None
     # frame idx
     for fidx in range(N):
@@ -109,28 +116,10 @@ def batch_np_matrix_to_pycolmap(
             id=fidx + 1, name=f"image_{fidx + 1}", camera_id=camera.camera_id, cam_from_world=cam_from_world
         )
 
-        points2D_list = []
-
-        point2D_idx = 0
-
         # NOTE point3D_id start by 1
-        for point3D_id in range(1, num_points3D + 1):
-            original_track_idx = valid_idx[point3D_id - 1]
-
-            if (reconstruction.points3D[point3D_id].xyz < max_points3D_val).all():
-                if masks[fidx][original_track_idx]:
-                    # It seems we don't need +0.5 for BA
-                    point2D_xy = tracks[fidx][original_track_idx]
-                    # Please note when adding the Point2D object
-                    # It not only requires the 2D xy location, but also the id to 3D point
-                    points2D_list.append(pycolmap.Point2D(point2D_xy, point3D_id))
-
-                    # add element
-                    track = reconstruction.points3D[point3D_id].track
-                    track.add_element(fidx + 1, point2D_idx)
-                    point2D_idx += 1
-
-        assert point2D_idx == len(points2D_list)
+        # It seems we don't need +0.5 for BA
+        start, end = frame_starts[fidx], frame_starts[fidx + 1]
+        points2D_list = _build_points2D(obs_xy[start:end], obs_point[start:end] + 1)
 
         try:
             image.points2D = pycolmap.ListPoint2D(points2D_list)
@@ -142,6 +131,9 @@ def batch_np_matrix_to_pycolmap(
         # add image
         reconstruction.add_image(image)
 
+    # add elements, one batch per track
+    _add_track_elements(reconstruction, obs_point + 1, obs_frame + 1, obs_point2D_idx)
+
     return reconstruction, valid_mask
 
 
@@ -234,6 +226,13 @@ def batch_np_matrix_to_pycolmap_wo_track(
     for vidx in range(P):
         reconstruction.add_point3D(points3d[vidx], pycolmap.Track(), points_rgb[vidx])
 
+    # Every point is observed once, in the frame given by its third coordinate
+    point_frame = points_xyf[:, 2].astype(np.int32)
+    in_frames = np.nonzero((point_frame >= 0) & (point_frame < N))[0]
+    order = in_frames[np.argsort(point_frame[in_frames], kind="stable")]
+    obs_frame = point_frame[order]
+    obs_point2D_idx, frame_starts = _point2D_indices(obs_frame, N)
+
     camera = None
     # frame idx
     for fidx in range(N):
@@ -257,25 +256,8 @@ def batch_np_matrix_to_pycolmap_wo_track(
             id=fidx + 1, name=f"image_{fidx + 1}", camera_id=camera.camera_id, cam_from_world=cam_from_world
         )
 
-        points2D_list = []
-
-        point2D_idx = 0
-
-        points_belong_to_fidx = points_xyf[:, 2].astype(np.int32) == fidx
-        points_belong_to_fidx = np.nonzero(points_belong_to_fidx)[0]
-
-        for point3D_batch_idx in points_belong_to_fidx:
-            point3D_id = point3D_batch_idx + 1
-            point2D_xyf = points_xyf[point3D_batch_idx]
-            point2D_xy = point2D_xyf[:2]
-            points2D_list.append(pycolmap.Point2D(point2D_xy, point3D_id))
-
-            # add element
-            track = reconstruction.points3D[point3D_id].track
-            track.add_element(fidx + 1, point2D_idx)
-            point2D_idx += 1
-
-        assert point2D_idx == len(points2D_list)
+        frame_points = order[frame_starts[fidx] : frame_starts[fidx + 1]]
+        points2D_list = _build_points2D(points_xyf[frame_points, :2], frame_points + 1)
 
         try:
             image.points2D = pycolmap.ListPoint2D(points2D_list)
@@ -287,9 +269,53 @@ def batch_np_matrix_to_pycolmap_wo_track(
         # add image
         reconstruction.add_image(image)
 
+    _add_track_elements(reconstruction, order + 1, obs_frame + 1, obs_point2D_idx)
+
     return reconstruction
 
 
+def _point2D_indices(obs_frame, num_frames):
+    """
+    Index of each observation among the points2D of its frame.
+
+    Args:
+        obs_frame: (M,) frame index of each observation, sorted in ascending order
+        num_frames: Number of frames N
+
+    Returns:
+        point2D_idx: (M,) position of each observation within its frame
+        frame_starts: (N + 1,) offsets so frame f owns observations frame_starts[f]:frame_starts[f + 1]
+    """
+    counts = np.bincount(obs_frame, minlength=num_frames)
+    frame_starts = np.concatenate([[0], np.cumsum(counts)])
+    point2D_idx = np.arange(len(obs_frame)) - frame_starts[obs_frame]
+    return point2D_idx, frame_starts
+
+
+def _build_points2D(points_xy, point3D_ids):
+    """Build the Point2D objects of one frame, linking each xy location to its 3D point id."""
+    points_xy = np.asarray(points_xy, dtype=np.float64)
+    return [pycolmap.Point2D(xy, point3D_id) for xy, point3D_id in zip(points_xy, point3D_ids.tolist())]
+
+
+def _add_track_elements(reconstruction, point3D_ids, image_ids, point2D_idx):
+    """
+    Add the track elements of all observations, grouped so each track is extended once.
+
+    Within a track, elements keep the order of the input observations (ascending image id).
+    """
+    if len(point3D_ids) == 0:
+        return
+    order = np.argsort(point3D_ids, kind="stable")
+    point3D_ids, image_ids, point2D_idx = point3D_ids[order], image_ids[order], point2D_idx[order]
+    track_ids, track_starts = np.unique(point3D_ids, return_index=True)
+    track_ends = np.append(track_starts[1:], len(point3D_ids))
+    image_ids, point2D_idx = image_ids.tolist(), point2D_idx.tolist()
+    for point3D_id, start, end in zip(track_ids.tolist(), track_starts.tolist(), track_ends.tolist()):
+        elements = [pycolmap.TrackElement(image_ids[i], point2D_idx[i]) for i in range(start, end)]
+        reconstruction.points3D[point3D_id].track.add_elements(elements)
+
+
 def _build_pycolmap_intri(fidx, intrinsics, camera_type, extra_params=None):
     """
     Helper function to get camera parameters based on camera type.
@@ -9,7 +9,7 @@ import torch.nn as nn
 from einops import rearrange, repeat
 
 from .blocks import EfficientUpdateFormer, CorrBlock
-from .utils import sample_features4d, get_2d_embedding, get_2d_sincos_pos_embed
+from .utils import bilinear_sampler, sample_features4d, get_2d_embedding, get_2d_sincos_pos_embed
 
 
 class BaseTrackerPredictor(nn.Module):
@@ -23,6 +23,7 @@ class BaseTrackerPredictor(nn.Module):
         use_spaceatt=True,
         depth=6,
         fine=False,
+        corr_mode="volume",
     ):
         super(BaseTrackerPredictor, self).__init__()
         """
@@ -37,6 +38,8 @@ class BaseTrackerPredictor(nn.Module):
         self.corr_radius = corr_radius
         self.hidden_size = hidden_size
         self.fine = fine
+        # "volume" or "local", see CorrBlock
+        self.corr_mode = corr_mode
 
         self.flows_emb_dim = latent_dim // 2
         self.transformer_dim = self.corr_levels * (self.corr_radius * 2 + 1) ** 2 + self.latent_dim * 2
@@ -68,11 +71,16 @@ class BaseTrackerPredictor(nn.Module):
         if not self.fine:
             self.vis_predictor = nn.Sequential(nn.Linear(self.latent_dim, 1))
 
-    def forward(self, query_points, fmaps=None, iters=4, return_feat=False, down_ratio=1):
+    def forward(self, query_points, fmaps=None, iters=4, return_feat=False, down_ratio=1, query_index=None):
         """
         query_points: B x N x 2, the number of batches, tracks, and xy
         fmaps: B x S x C x HH x WW, the number of batches, frames, and feature dimension.
                 note HH and WW is the size of feature maps instead of original images
+        query_index: B x N, the reference frame of every query point. Defaults to frame 0 for all queries.
+                The update transformer has no temporal position, so when all queries share one query
+                frame this is equivalent to moving that frame to the front, without reordering the
+                frames or fmaps. Space attention mixes the tracks, so queries from different frames
+                tracked in one call are not equivalent to tracking each frame on its own.
         """
         B, N, D = query_points.shape
         B, S, C, HH, WW = fmaps.shape
@@ -92,7 +100,17 @@ class BaseTrackerPredictor(nn.Module):
         coords = query_points.clone().reshape(B, 1, N, 2).repeat(1, S, 1, 1)
 
         # Sample/extract the features of the query points in the query frame
-        query_track_feat = sample_features4d(fmaps[:, 0], coords[:, 0])
+        if query_index is None:
+            query_track_feat = sample_features4d(fmaps[:, 0], coords[:, 0])
+            is_query = torch.zeros(1, S, 1, 1, dtype=torch.bool, device=fmaps.device)
+            is_query[:, 0] = True
+        else:
+            # Sample B x C x S x HH x WW at the (frame, x, y) triplets of the queries
+            query_txy = torch.cat([query_index[..., None].to(query_points.dtype), query_points], dim=-1)
+            query_track_feat = bilinear_sampler(fmaps.transpose(1, 2), query_txy[:, :, None, None])
+            query_track_feat = query_track_feat.reshape(B, C, N).transpose(1, 2)
+            is_query = torch.arange(S, device=fmaps.device)[None, :, None] == query_index[:, None]
+            is_query = is_query[..., None]
 
         # init track feats by query feats
         track_feats = query_track_feat.unsqueeze(1).repeat(1, S, 1, 1)  # B, S, N, C
@@ -101,7 +119,7 @@ class BaseTrackerPredictor(nn.Module):
 
         # Construct the correlation block
 
-        fcorr_fn = CorrBlock(fmaps, num_levels=self.corr_levels, radius=self.corr_radius)
+        fcorr_fn = CorrBlock(fmaps, num_levels=self.corr_levels, radius=self.corr_radius, corr_mode=self.corr_mode)
 
         coord_preds = []
 
@@ -121,7 +139,7 @@ class BaseTrackerPredictor(nn.Module):
             fcorrs_ = fcorrs.permute(0, 2, 1, 3).reshape(B * N, S, corrdim)
 
             # Movement of current coords relative to query points
-            flows = (coords - coords[:, 0:1]).permute(0, 2, 1, 3).reshape(B * N, S, 2)
+            flows = (coords - query_points[:, None]).permute(0, 2, 1, 3).reshape(B * N, S, 2)
 
             flows_emb = get_2d_embedding(flows, self.flows_emb_dim, cat_coords=False)
 
@@ -142,7 +160,7 @@ class BaseTrackerPredictor(nn.Module):
             # 2D positional embed
             # TODO: this can be much simplified
             pos_embed = get_2d_sincos_pos_embed(self.transformer_dim, grid_size=(HH, WW)).to(query_points.device)
-            sampled_pos_emb = sample_features4d(pos_embed.expand(B, -1, -1, -1), coords[:, 0])
+            sampled_pos_emb = sample_features4d(pos_embed.expand(B, -1, -1, -1), query_points)
             sampled_pos_emb = rearrange(sampled_pos_emb, "b n c -> (b n) c").unsqueeze(1)
 
             x = transformer_input + sampled_pos_emb
@@ -167,9 +185,9 @@ class BaseTrackerPredictor(nn.Module):
             # B x S x N x 2
             coords = coords + delta_coords_.reshape(B, N, S, 2).permute(0, 2, 1, 3)
 
-            # Force coord0 as query
+            # Force the coords in the query frames as query
             # because we assume the query points should not be changed
-            coords[:, 0] = coords_backup[:, 0]
+            coords = torch.where(is_query, coords_backup, coords)
 
             # The predicted tracks are in the original image scale
             if down_ratio > 1:
@@ -262,7 +262,18 @@ class EfficientUpdateFormer(nn.Module):
 
 
 class CorrBlock:
-    def __init__(self, fmaps, num_levels=4, radius=4, multiple_track_feats=False, padding_mode="zeros"):
+    def __init__(
+        self, fmaps, num_levels=4, radius=4, multiple_track_feats=False, padding_mode="zeros", corr_mode="volume"
+    ):
+        """
+        corr_mode: "volume" builds the correlation volumes of the targets with the whole feature maps in corr()
+            and samples them in sample(). "local" only keeps the targets in corr(), and sample() correlates them
+            with the features sampled in the (2r+1)^2 window of every track. Both give the same result,
+            "local" needs far less memory when there are many tracks and large feature maps.
+        """
+        if corr_mode not in ("volume", "local"):
+            raise ValueError(f"Unknown corr_mode {corr_mode}, expected 'volume' or 'local'")
+
         B, S, C, H, W = fmaps.shape
         self.S, self.C, self.H, self.W = S, C, H, W
         self.padding_mode = padding_mode
@@ -270,6 +281,7 @@ class CorrBlock:
         self.radius = radius
         self.fmaps_pyramid = []
         self.multiple_track_feats = multiple_track_feats
+        self.corr_mode = corr_mode
 
         self.fmaps_pyramid.append(fmaps)
         for i in range(self.num_levels - 1):
@@ -287,9 +299,6 @@ class CorrBlock:
         H, W = self.H, self.W
         out_pyramid = []
         for i in range(self.num_levels):
-            corrs = self.corrs_pyramid[i]  # B, S, N, H, W
-            *_, H, W = corrs.shape
-
             dx = torch.linspace(-r, r, 2 * r + 1)
             dy = torch.linspace(-r, r, 2 * r + 1)
             delta = torch.stack(torch.meshgrid(dy, dx, indexing="ij"), axis=-1).to(coords.device)
@@ -298,6 +307,13 @@ class CorrBlock:
             delta_lvl = delta.view(1, 2 * r + 1, 2 * r + 1, 2)
             coords_lvl = centroid_lvl + delta_lvl
 
+            if self.corr_mode == "local":
+                out_pyramid.append(self._local_corr(self.targets_pyramid[i], self.fmaps_pyramid[i], coords_lvl))
+                continue
+
+            corrs = self.corrs_pyramid[i]  # B, S, N, H, W
+            *_, H, W = corrs.shape
+
             corrs = bilinear_sampler(corrs.reshape(B * S * N, 1, H, W), coords_lvl, padding_mode=self.padding_mode)
             corrs = corrs.view(B, S, N, -1)
 
@@ -317,6 +333,11 @@ class CorrBlock:
 
         fmap1 = targets
 
+        if self.corr_mode == "local":
+            # The correlations are computed in sample(), only for the windows around the tracks
+            self.targets_pyramid = list(targets_split) if self.multiple_track_feats else [targets] * self.num_levels
+            return
+
         self.corrs_pyramid = []
         for i, fmaps in enumerate(self.fmaps_pyramid):
             *_, H, W = fmaps.shape
@@ -327,3 +348,22 @@ class CorrBlock:
             corrs = corrs.view(B, S, N, H, W)  # B S N (H W) -> B S N H W
             corrs = corrs / torch.sqrt(torch.tensor(C).float())
             self.corrs_pyramid.append(corrs)
+
+    def _local_corr(self, fmap1, fmaps, coords_lvl):
+        """
+        Correlate the targets fmap1 (B, S, N, C) with the features of fmaps (B, S, C, H, W)
+        sampled at the window coordinates coords_lvl (B*S*N, 2r+1, 2r+1, 2).
+        Returns B, S, N, (2r+1)^2, the same as sampling the correlation volume at coords_lvl.
+        """
+        B, S, C, H, W = fmaps.shape
+        N = fmap1.shape[2]
+        R = 2 * self.radius + 1
+
+        # Sample the window features: (B*S) x C x (N*R) x R
+        window_coords = coords_lvl.reshape(B * S, N * R, R, 2)
+        window_feats = bilinear_sampler(fmaps.reshape(B * S, C, H, W), window_coords, padding_mode=self.padding_mode)
+        window_feats = window_feats.reshape(B, S, C, N, R * R)
+
+        # One dot product per window position instead of one per pixel
+        corrs = torch.einsum("bsnc,bscnk->bsnk", fmap1, window_feats)
+        return corrs / torch.sqrt(torch.tensor(C).float())
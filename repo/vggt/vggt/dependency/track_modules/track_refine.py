@@ -20,7 +20,16 @@ from typing import Union, Tuple
 
 
 def refine_track(
-    images, fine_fnet, fine_tracker, coarse_pred, compute_score=False, pradius=15, sradius=2, fine_iters=6, chunk=40960
+    images,
+    fine_fnet,
+    fine_tracker,
+    coarse_pred,
+    compute_score=False,
+    pradius=15,
+    sradius=2,
+    fine_iters=6,
+    chunk=40960,
+    query_index=None,
 ):
     """
     Refines the tracking of images using a fine track predictor and a fine feature network.
@@ -34,6 +43,7 @@ def refine_track(
         compute_score (bool, optional): Whether to compute the score. Defaults to False.
         pradius (int, optional): The radius of a patch. Defaults to 15.
         sradius (int, optional): The search radius. Defaults to 2.
+        query_index (torch.Tensor, optional): BxN query frame of every track. Defaults to the first frame.
 
     Returns:
         torch.Tensor: The refined tracks.
@@ -50,9 +60,12 @@ def refine_track(
     # Given the raidus of a patch, compute the patch size
     psize = pradius * 2 + 1
 
-    # Note that we assume the first frame is the query frame
-    # so the 2D locations of the first frame are the query points
-    query_points = coarse_pred[:, 0]
+    # The 2D locations of the query frame are the query points
+    # (the first frame unless query_index says otherwise)
+    if query_index is None:
+        query_index = torch.zeros(B, N, dtype=torch.long, device=coarse_pred.device)
+    query_gather_index = query_index[:, None, :, None].expand(-1, -1, -1, 2)
+    query_points = coarse_pred.gather(1, query_gather_index)[:, 0]
 
     # Given 2D positions, we can use grid_sample to extract patches
     # but it takes too much memory.
@@ -65,58 +78,40 @@ def refine_track(
     # and right bottom: (143.16, 267.78).
     # However, we record the floored left top: (113, 237)
     # and the offset (0.16, 0.78)
-    # Then what we need is just unfolding the images like in CNN,
-    # picking the content at [(113, 237), (143, 267)].
-    # Such operations are highly optimized at pytorch
+    # Then what we need is just gathering the pixels
+    # at [(113, 237), (143, 267)], see extract_patches() below.
     # (well if you really want to use interpolation, check the function extract_glimpse() below)
 
-    with torch.no_grad():
-        content_to_extract = images.reshape(B * S, 3, H, W)
-        C_in = content_to_extract.shape[1]
-
-        # Please refer to https://pytorch.org/docs/stable/generated/torch.nn.Unfold.html
-        # for the detailed explanation of unfold()
-        # Here it runs sliding windows (psize x psize) to build patches
-        # The shape changes from
-        # (B*S)x C_in x H x W to (B*S)x C_in x H_new x W_new x Psize x Psize
-        # where Psize is the size of patch
-        content_to_extract = content_to_extract.unfold(2, psize, 1).unfold(3, psize, 1)
-
     # Floor the coarse predictions to get integers and save the fractional/decimal
     track_int = coarse_pred.floor().int()
     track_frac = coarse_pred - track_int
 
     # Note the points represent the center of patches
     # now we get the location of the top left corner of patches
-    # because the ouput of pytorch unfold are indexed by top left corner
     topleft = track_int - pradius
     topleft_BSN = topleft.clone()
 
-    # clamp the values so that we will not go out of indexes
-    # NOTE: (VERY IMPORTANT: This operation ASSUMES H=W).
-    # You need to seperately clamp x and y if H!=W
-    topleft = topleft.clamp(0, H - psize)
-
-    # Reshape from BxSxNx2 -> (B*S)xNx2
-    topleft = topleft.reshape(B * S, N, 2)
+    # clamp the values so that the patches stay inside the images
+    topleft = torch.stack([topleft[..., 0].clamp(0, W - psize), topleft[..., 1].clamp(0, H - psize)], dim=-1)
 
-    # Prepare batches for indexing, shape: (B*S)xN
-    batch_indices = torch.arange(B * S)[:, None].expand(-1, N).to(content_to_extract.device)
+    # Reshape from BxSxNx2 -> (B*S*N)x2, with the frame of every patch
+    topleft = topleft.reshape(B * S * N, 2)
+    frame_indices = torch.arange(B * S, device=images.device).repeat_interleave(N)
 
-    # extracted_patches: (B*S) x N x C_in x Psize x Psize
-    extracted_patches = content_to_extract[batch_indices, :, topleft[..., 1], topleft[..., 0]]
-
-    if chunk < 0:
-        # Extract image patches based on top left corners
-        # Feed patches to fine fent for features
-        patch_feat = fine_fnet(extracted_patches.reshape(B * S * N, C_in, psize, psize))
-    else:
-        patches = extracted_patches.reshape(B * S * N, C_in, psize, psize)
+    # Only the patches of one chunk are in memory at a time,
+    # so memory scales with the chunk size instead of the image area
+    content_to_extract = images.reshape(B * S, 3, H, W)
+    chunk = max(B * S * N, 1) if chunk < 0 else chunk
 
-        patch_feat_list = []
-        for p in torch.split(patches, chunk):
-            patch_feat_list += [fine_fnet(p)]
-        patch_feat = torch.cat(patch_feat_list, 0)
+    patch_feat_list = []
+    for start in range(0, B * S * N, chunk):
+        with torch.no_grad():
+            # patches: chunk x C_in x Psize x Psize
+            patches = extract_patches(
+                content_to_extract, frame_indices[start : start + chunk], topleft[start : start + chunk], psize
+            )
+        patch_feat_list += [fine_fnet(patches)]
+    patch_feat = torch.cat(patch_feat_list, 0)
 
     C_out = patch_feat.shape[1]
 
@@ -130,12 +125,16 @@ def refine_track(
     # instead of the image top left corner now
     # patch_query_points: N x 1 x 2
     # only 1 here because for each patch we only have 1 query point
-    patch_query_points = track_frac[:, 0] + pradius
+    patch_query_points = track_frac.gather(1, query_gather_index)[:, 0] + pradius
     patch_query_points = patch_query_points.reshape(B * N, 2).unsqueeze(1)
 
     # Feed the PATCH query points and tracks into fine tracker
     fine_pred_track_lists, _, _, query_point_feat = fine_tracker(
-        query_points=patch_query_points, fmaps=patch_feat, iters=fine_iters, return_feat=True
+        query_points=patch_query_points,
+        fmaps=patch_feat,
+        iters=fine_iters,
+        return_feat=True,
+        query_index=query_index.reshape(B * N, 1),
     )
 
     # relative the patch top left
@@ -150,16 +149,43 @@ def refine_track(
 
     # relative to the image top left
     refined_tracks = fine_pred_track_lists[-1].clone()
-    refined_tracks[:, 0] = query_points
+    refined_tracks.scatter_(1, query_gather_index, query_points[:, None])
 
     score = None
 
     if compute_score:
+        # compute_score_fn assumes the first frame is the query frame
         score = compute_score_fn(query_point_feat, patch_feat, fine_pred_track, sradius, psize, B, N, S, C_out)
 
     return refined_tracks, score
 
 
+def extract_patches(images, frame_indices, topleft, psize):
+    """
+    Gather square patches from images, reading only the pixels inside the patches.
+
+    Args:
+        images (torch.Tensor): F x C x H x W images.
+        frame_indices (torch.Tensor): M, the image of every patch.
+        topleft (torch.Tensor): M x 2, the integer xy of the top left corners. Patches must lie inside the images.
+        psize (int): The patch size.
+
+    Returns:
+        torch.Tensor: M x C x Psize x Psize patches.
+    """
+    W = images.shape[-1]
+    offsets = torch.arange(psize, device=images.device)
+    rows = topleft[:, 1, None].long() + offsets
+    cols = topleft[:, 0, None].long() + offsets
+
+    # Index the flattened pixels, M x Psize x Psize
+    pixel_indices = rows[:, :, None] * W + cols[:, None, :]
+    patches = images.flatten(2)[frame_indices[:, None, None], :, pixel_indices]
+
+    # M x Psize x Psize x C -> M x C x Psize x Psize
+    return patches.permute(0, 3, 1, 2).contiguous()
+
+
 def refine_track_v0(
     images, fine_fnet, fine_tracker, coarse_pred, compute_score=False, pradius=15, sradius=2, fine_iters=6
 ):
@@ -6,13 +6,11 @@
 
 import torch
 import numpy as np
+from ..utils.backbones import backbone
 from .vggsfm_utils import (
-    build_vggsfm_tracker,
     generate_rank_by_dino,
     initialize_feature_extractors,
     extract_keypoints,
-    calculate_index_mappings,
-    switch_tensor_order,
     predict_tracks_in_chunks,
 )
 
@@ -47,7 +45,8 @@ def predict_tracks(
         max_query_pts: Maximum number of query points. Default is 2048.
         query_frame_num: Number of query frames to use. Default is 5.
         keypoint_extractor: Method for keypoint extraction. Default is "aliked+sp".
-        max_points_num: Maximum number of points to process at once. Default is 163840.
+        max_points_num: Budget of tracked points (frames x query points) per tracker call. The queries of
+            each query frame are split into calls under this budget. Default is 163840.
         fine_tracking: Whether to use fine tracking. Default is True.
         complete_non_vis: Whether to augment non-visible frames. Default is True.
 
@@ -61,36 +60,28 @@ def predict_tracks(
 
     device = images.device
     dtype = images.dtype
-    tracker = build_vggsfm_tracker().to(device, dtype)
-
-    # Find query frames
-    query_frame_indexes = generate_rank_by_dino(images, query_frame_num=query_frame_num, device=device)
-
-    # Add the first image to the front if not already present
-    if 0 in query_frame_indexes:
-        query_frame_indexes.remove(0)
-    query_frame_indexes = [0, *query_frame_indexes]
-
-    # TODO: add the functionality to handle the masks
-    keypoint_extractors = initialize_feature_extractors(
-        max_query_pts, extractor_method=keypoint_extractor, device=device
-    )
-
-    pred_tracks = []
-    pred_vis_scores = []
-    pred_confs = []
-    pred_points_3d = []
-    pred_colors = []
+    with backbone("vggsfm_tracker", device, dtype) as tracker:
+        # Find query frames
+        query_frame_indexes = generate_rank_by_dino(images, query_frame_num=query_frame_num, device=device)
+
+        # Add the first image to the front if not already present
+        if 0 in query_frame_indexes:
+            query_frame_indexes.remove(0)
+        query_frame_indexes = [0, *query_frame_indexes]
+
+        # TODO: add the functionality to handle the masks
+        keypoint_extractors = initialize_feature_extractors(
+            max_query_pts, extractor_method=keypoint_extractor, device=device
+        )
 
-    fmaps_for_tracker = tracker.process_images_to_fmaps(images)
+        fmaps_for_tracker = tracker.process_images_to_fmaps(images)
 
-    if fine_tracking:
-        print("For faster inference, consider disabling fine_tracking")
+        if fine_tracking:
+            print("For faster inference, consider disabling fine_tracking")
 
-    for query_index in query_frame_indexes:
-        print(f"Predicting tracks for query frame {query_index}")
-        pred_track, pred_vis, pred_conf, pred_point_3d, pred_color = _forward_on_query(
-            query_index,
+        print(f"Predicting tracks for query frames {query_frame_indexes}")
+        pred_tracks, pred_vis_scores, pred_confs, pred_points_3d, pred_colors = _forward_on_queries(
+            query_frame_indexes,
             images,
             conf,
             points_3d,
@@ -102,31 +93,25 @@ def predict_tracks(
             device,
         )
 
-        pred_tracks.append(pred_track)
-        pred_vis_scores.append(pred_vis)
-        pred_confs.append(pred_conf)
-        pred_points_3d.append(pred_point_3d)
-        pred_colors.append(pred_color)
-
-    if complete_non_vis:
-        pred_tracks, pred_vis_scores, pred_confs, pred_points_3d, pred_colors = _augment_non_visible_frames(
-            pred_tracks,
-            pred_vis_scores,
-            pred_confs,
-            pred_points_3d,
-            pred_colors,
-            images,
-            conf,
-            points_3d,
-            fmaps_for_tracker,
-            keypoint_extractors,
-            tracker,
-            max_points_num,
-            fine_tracking,
-            min_vis=500,
-            non_vis_thresh=0.1,
-            device=device,
-        )
+        if complete_non_vis:
+            pred_tracks, pred_vis_scores, pred_confs, pred_points_3d, pred_colors = _augment_non_visible_frames(
+                pred_tracks,
+                pred_vis_scores,
+                pred_confs,
+                pred_points_3d,
+                pred_colors,
+                images,
+                conf,
+                points_3d,
+                fmaps_for_tracker,
+                keypoint_extractors,
+                tracker,
+                max_points_num,
+                fine_tracking,
+                min_vis=500,
+                non_vis_thresh=0.1,
+                device=device,
+            )
 
     pred_tracks = np.concatenate(pred_tracks, axis=1)
     pred_vis_scores = np.concatenate(pred_vis_scores, axis=1)
@@ -140,8 +125,8 @@ def predict_tracks(
     return pred_tracks, pred_vis_scores, pred_confs, pred_points_3d, pred_colors
 
 
-def _forward_on_query(
-    query_index,
+def _forward_on_queries(
+    query_indexes,
     images,
     conf,
     points_3d,
@@ -153,27 +138,87 @@ def _forward_on_query(
     device,
 ):
     """
-    Process a single query frame for track prediction.
+    Track the keypoints of several query frames, sharing the feature maps.
+
+    The coarse tracker's space attention mixes the tracks of a call, so each call only holds the queries
+    of one query frame, chunked as max_points_num allows. The frames and feature maps are used in their
+    original order, so nothing is reordered or copied per query frame.
 
     Args:
-        query_index: Index of the query frame
+        query_indexes: List of query frame indices
         images: Tensor of shape [S, 3, H, W] containing the input images
         conf: Confidence tensor
         points_3d: 3D points tensor
         fmaps_for_tracker: Feature maps for the tracker
         keypoint_extractors: Initialized feature extractors
         tracker: VGG-SFM tracker
-        max_points_num: Maximum number of points to process at once
+        max_points_num: Budget of tracked points (frames x query points) per tracker call
         fine_tracking: Whether to use fine tracking
         device: Device to use for computation
 
     Returns:
+        Lists with one entry per query frame of
         pred_track: Predicted tracks
         pred_vis: Visibility scores for the tracks
         pred_conf: Confidence scores for the tracks
         pred_point_3d: 3D points for the tracks
         pred_color: Point colors for the tracks (0, 255)
     """
+    frame_num = images.shape[0]
+
+    queries = [
+        _extract_queries(query_index, images, conf, points_3d, keypoint_extractors, device)
+        for query_index in query_indexes
+    ]
+    query_nums = [query_points.shape[1] for query_points, *_ in queries]
+
+    query_points_list, query_index_list = [], []
+    for query_frame, (query_points, *_) in zip(query_indexes, queries):
+        all_points_num = frame_num * query_points.shape[1]
+
+        # Don't need to be scared, this is just chunking to make GPU happy
+        num_splits = max((all_points_num + max_points_num - 1) // max_points_num, 1)
+
+        for split_points in torch.chunk(query_points, num_splits, dim=1):
+            query_points_list.append(split_points)
+            query_index_list.append(torch.full(split_points.shape[:2], query_frame, dtype=torch.long, device=device))
+
+    pred_track, pred_vis, _ = predict_tracks_in_chunks(
+        tracker,
+        images[None],
+        query_points_list,
+        fmaps_for_tracker[None],
+        fine_tracking=fine_tracking,
+        query_index_list=query_index_list,
+    )
+
+    # Split the stacked tracks back per query frame
+    split_indices = np.cumsum(query_nums)[:-1]
+    pred_tracks = np.split(pred_track.squeeze(0).float().cpu().numpy(), split_indices, axis=1)
+    pred_vis_scores = np.split(pred_vis.squeeze(0).float().cpu().numpy(), split_indices, axis=1)
+    pred_confs, pred_points_3d, pred_colors = ([query[i] for query in queries] for i in (1, 2, 3))
+
+    return pred_tracks, pred_vis_scores, pred_confs, pred_points_3d, pred_colors
+
+
+def _extract_queries(query_index, images, conf, points_3d, keypoint_extractors, device):
+    """
+    Extract the query points of a query frame, with their colors and, if given, confidence and 3D points.
+
+    Args:
+        query_index: Index of the query frame
+        images: Tensor of shape [S, 3, H, W] containing the input images
+        conf: Confidence tensor
+        points_3d: 3D points tensor
+        keypoint_extractors: Initialized feature extractors
+        device: Device to use for computation
+
+    Returns:
+        query_points: Tensor of shape [1, N, 2] with the query points
+        pred_conf: Confidence scores for the tracks
+        pred_point_3d: 3D points for the tracks
+        pred_color: Point colors for the tracks (0, 255)
+    """
     frame_num, _, height, width = images.shape
 
     query_image = images[query_index]
@@ -210,31 +255,7 @@ def _forward_on_query(
         pred_conf = None
         pred_point_3d = None
 
-    reorder_index = calculate_index_mappings(query_index, frame_num, device=device)
-
-    images_feed, fmaps_feed = switch_tensor_order([images, fmaps_for_tracker], reorder_index, dim=0)
-    images_feed = images_feed[None]  # add batch dimension
-    fmaps_feed = fmaps_feed[None]  # add batch dimension
-
-    all_points_num = images_feed.shape[1] * query_points.shape[1]
-
-    # Don't need to be scared, this is just chunking to make GPU happy
-    if all_points_num > max_points_num:
-        num_splits = (all_points_num + max_points_num - 1) // max_points_num
-        query_points = torch.chunk(query_points, num_splits, dim=1)
-    else:
-        query_points = [query_points]
-
-    pred_track, pred_vis, _ = predict_tracks_in_chunks(
-        tracker, images_feed, query_points, fmaps_feed, fine_tracking=fine_tracking
-    )
-
-    pred_track, pred_vis = switch_tensor_order([pred_track, pred_vis], reorder_index, dim=1)
-
-    pred_track = pred_track.squeeze(0).float().cpu().numpy()
-    pred_vis = pred_vis.squeeze(0).float().cpu().numpy()
-
-    return pred_track, pred_vis, pred_conf, pred_point_3d, pred_color
+    return query_points, pred_conf, pred_point_3d, pred_color
 
 
 def _augment_non_visible_frames(
@@ -308,25 +329,24 @@ def _augment_non_visible_frames(
 
         last_query = non_vis_frames[0]
 
-        # Run the tracker for every selected frame
-        for query_index in query_frame_list:
-            new_track, new_vis, new_conf, new_point_3d, new_color = _forward_on_query(
-                query_index,
-                images,
-                conf,
-                points_3d,
-                fmaps_for_tracker,
-                cur_extractors,
-                tracker,
-                max_points_num,
-                fine_tracking,
-                device,
-            )
-            pred_tracks.append(new_track)
-            pred_vis_scores.append(new_vis)
-            pred_confs.append(new_conf)
-            pred_points_3d.append(new_point_3d)
-            pred_colors.append(new_color)
+        # Track all selected frames, sharing the feature maps
+        new_tracks, new_vis, new_confs, new_points_3d, new_colors = _forward_on_queries(
+            query_frame_list,
+            images,
+            conf,
+            points_3d,
+            fmaps_for_tracker,
+            cur_extractors,
+            tracker,
+            max_points_num,
+            fine_tracking,
+            device,
+        )
+        pred_tracks.extend(new_tracks)
+        pred_vis_scores.extend(new_vis)
+        pred_confs.extend(new_confs)
+        pred_points_3d.extend(new_points_3d)
+        pred_colors.extend(new_colors)
 
         if final_trial:
             break  # Stop after final attempt
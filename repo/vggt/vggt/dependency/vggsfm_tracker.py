@@ -56,7 +56,15 @@ class TrackerPredictor(nn.Module):
         )
 
     def forward(
-        self, images, query_points, fmaps=None, coarse_iters=6, inference=True, fine_tracking=True, fine_chunk=40960
+        self,
+        images,
+        query_points,
+        fmaps=None,
+        coarse_iters=6,
+        inference=True,
+        fine_tracking=True,
+        fine_chunk=40960,
+        query_index=None,
     ):
         """
         Args:
@@ -66,6 +74,8 @@ class TrackerPredictor(nn.Module):
             coarse_iters (int, optional): Number of iterations for coarse prediction. Defaults to 6.
             inference (bool, optional): Whether to perform inference. Defaults to True.
             fine_tracking (bool, optional): Whether to perform fine tracking. Defaults to True.
+            query_index (torch.Tensor, optional): The frame each query point lies in, with a shape of B x N.
+                Defaults to None, i.e., all query points are in the first frame.
 
         Returns:
             tuple: A tuple containing fine_pred_track, coarse_pred_track, pred_vis, and pred_score.
@@ -82,7 +92,11 @@ class TrackerPredictor(nn.Module):
 
         # Coarse prediction
         coarse_pred_track_lists, pred_vis = self.coarse_predictor(
-            query_points=query_points, fmaps=fmaps, iters=coarse_iters, down_ratio=self.coarse_down_ratio
+            query_points=query_points,
+            fmaps=fmaps,
+            iters=coarse_iters,
+            down_ratio=self.coarse_down_ratio,
+            query_index=query_index,
         )
         coarse_pred_track = coarse_pred_track_lists[-1]
 
@@ -92,7 +106,13 @@ class TrackerPredictor(nn.Module):
         if fine_tracking:
             # Refine the coarse prediction
             fine_pred_track, pred_score = refine_track(
-                images, self.fine_fnet, self.fine_predictor, coarse_pred_track, compute_score=False, chunk=fine_chunk
+                images,
+                self.fine_fnet,
+                self.fine_predictor,
+                coarse_pred_track,
+                compute_score=False,
+                chunk=fine_chunk,
+                query_index=query_index,
             )
 
             if inference:
@@ -15,6 +15,8 @@ import torch.nn.functional as F
 from lightglue import ALIKED, SIFT, SuperPoint
 
 from .vggsfm_tracker import TrackerPredictor
+from ..utils.backbones import backbone, backbone_registry
+from ..utils.sampling import farthest_point_sampling
 
 # Suppress verbose logging from dependencies
 logging.getLogger("dinov2").setLevel(logging.WARNING)
@@ -28,10 +30,13 @@ _RESNET_STD = [0.229, 0.224, 0.225]
 
 def build_vggsfm_tracker(model_path=None):
     """
-    Build and initialize the VGGSfM tracker.
+    Build and initialize a private copy of the VGGSfM tracker.
+
+    predict_tracks shares the tracker through vggt.utils.backbones instead.
 
     Args:
-        model_path: Path to the model weights file. If None, weights are downloaded from HuggingFace.
+        model_path: Path to the model weights file. If None, the local vggsfm_v2_tracker.pt of the
+            backbone registry is used (see BackboneRegistry.weight_dirs).
 
     Returns:
         Initialized tracker model in eval mode.
@@ -39,10 +44,8 @@ def build_vggsfm_tracker(model_path=None):
     tracker = TrackerPredictor()
 
     if model_path is None:
-        default_url = "https://huggingface.co/facebook/VGGSfM/resolve/main/vggsfm_v2_tracker.pt"
-        tracker.load_state_dict(torch.hub.load_state_dict_from_url(default_url))
-    else:
-        tracker.load_state_dict(torch.load(model_path))
+        model_path = backbone_registry.weight_path("vggsfm_tracker")
+    tracker.load_state_dict(torch.load(model_path, map_location="cpu"))
 
     tracker.eval()
     return tracker
@@ -68,17 +71,13 @@ def generate_rank_by_dino(
     # Resize images to the target size
     images = F.interpolate(images, (image_size, image_size), mode="bilinear", align_corners=False)
 
-    # Load DINO model
-    dino_v2_model = torch.hub.load("facebookresearch/dinov2", model_name)
-    dino_v2_model.eval()
-    dino_v2_model = dino_v2_model.to(device)
-
     # Normalize images using ResNet normalization
     resnet_mean = torch.tensor(_RESNET_MEAN, device=device).view(1, 3, 1, 1)
     resnet_std = torch.tensor(_RESNET_STD, device=device).view(1, 3, 1, 1)
     images_resnet_norm = (images - resnet_mean) / resnet_std
 
-    with torch.no_grad():
+    # DINO model, shared with the other users of the backbone registry
+    with backbone(model_name, device) as dino_v2_model, torch.no_grad():
         frame_feat = dino_v2_model(images_resnet_norm, is_training=True)
 
     # Process features based on similarity type
@@ -107,49 +106,13 @@ def generate_rank_by_dino(
     # Conduct FPS sampling starting from the most common frame
     fps_idx = farthest_point_sampling(distance_matrix, query_frame_num, most_common_frame_index)
 
-    # Clean up all tensors and models to free memory
+    # Free the intermediate tensors; DINOv2 stays cached in the registry until evict_unused()
     del frame_feat, frame_feat_norm, similarity_matrix, distance_matrix
-    del dino_v2_model
     torch.cuda.empty_cache()
 
     return fps_idx
 
 
-def farthest_point_sampling(distance_matrix, num_samples, most_common_frame_index=0):
-    """
-    Farthest point sampling algorithm to select diverse frames.
-
-    Args:
-        distance_matrix: Matrix of distances between frames
-        num_samples: Number of frames to select
-        most_common_frame_index: Index of the first frame to select
-
-    Returns:
-        List of selected frame indices
-    """
-    distance_matrix = distance_matrix.clamp(min=0)
-    N = distance_matrix.size(0)
-
-    # Initialize with the most common frame
-    selected_indices = [most_common_frame_index]
-    check_distances = distance_matrix[selected_indices]
-
-    while len(selected_indices) < num_samples:
-        # Find the farthest point from the current set of selected points
-        farthest_point = torch.argmax(check_distances)
-        selected_indices.append(farthest_point.item())
-
-        check_distances = distance_matrix[farthest_point]
-        # Mark already selected points to avoid selecting them again
-        check_distances[selected_indices] = 0
-
-        # Break if all points have been selected
-        if len(selected_indices) == N:
-            break
-
-    return selected_indices
-
-
 def calculate_index_mappings(query_index, S, device=None):
     """
     Construct an order that switches [query_index] and [0]
@@ -253,7 +216,14 @@ def extract_keypoints(query_image, extractors, round_keypoints=True):
 
 
 def predict_tracks_in_chunks(
-    track_predictor, images_feed, query_points_list, fmaps_feed, fine_tracking, num_splits=None, fine_chunk=40960
+    track_predictor,
+    images_feed,
+    query_points_list,
+    fmaps_feed,
+    fine_tracking,
+    num_splits=None,
+    fine_chunk=40960,
+    query_index_list=None,
 ):
     """
     Process a list of query points to avoid memory issues.
@@ -265,6 +235,8 @@ def predict_tracks_in_chunks(
         fmaps_feed (torch.Tensor): A tensor of feature maps for the tracker.
         fine_tracking (bool): Whether to perform fine tracking.
         num_splits (int, optional): Ignored when query_points_list is provided. Kept for backward compatibility.
+        query_index_list (list, optional): Matching (B, Ni) tensors with the frame of every query point.
+            Defaults to None, i.e., the queries are in the first frame.
 
     Returns:
         tuple: A tuple containing the concatenated predicted tracks, visibility, and scores.
@@ -284,10 +256,18 @@ def predict_tracks_in_chunks(
     pred_vis_list = []
     pred_score_list = []
 
-    for split_points in query_points_list:
+    if query_index_list is None:
+        query_index_list = [None] * len(query_points_list)
+
+    for split_points, split_index in zip(query_points_list, query_index_list):
         # Feed into track predictor for each split
         fine_pred_track, _, pred_vis, pred_score = track_predictor(
-            images_feed, split_points, fmaps=fmaps_feed, fine_tracking=fine_tracking, fine_chunk=fine_chunk
+            images_feed,
+            split_points,
+            fmaps=fmaps_feed,
+            fine_tracking=fine_tracking,
+            fine_chunk=fine_chunk,
+            query_index=split_index,
         )
         fine_pred_track_list.append(fine_pred_track)
         pred_vis_list.append(pred_vis)
@@ -70,14 +70,24 @@ class CameraHead(nn.Module):
         self.adaln_norm = nn.LayerNorm(dim_in, elementwise_affine=False, eps=1e-6)
         self.pose_branch = Mlp(in_features=dim_in, hidden_features=dim_in // 2, out_features=self.target_dim, drop=0)
 
-    def forward(self, aggregated_tokens_list: list, num_iterations: int = 4) -> list:
+    def forward(
+        self,
+        aggregated_tokens_list: list,
+        num_iterations: int = 4,
+        convergence_tol: float = None,
+        return_all: bool = True,
+    ) -> list:
         """
         Forward pass to predict camera parameters.
 
         Args:
             aggregated_tokens_list (list): List of token tensors from the network;
                 the last tensor is used for prediction.
-            num_iterations (int, optional): Number of iterative refinement steps. Defaults to 4.
+            num_iterations (int, optional): Maximum number of iterative refinement steps. Defaults to 4.
+            convergence_tol (float, optional): If set, stop refining once the largest absolute change of the
+                pose encoding in an iteration drops below this value. Defaults to None (always run all iterations).
+            return_all (bool, optional): If False, only the final encoding is kept (a list of length 1).
+                Defaults to True.
 
         Returns:
             list: A list of predicted camera encodings (post-activation) from each iteration.
@@ -89,20 +99,27 @@ class CameraHead(nn.Module):
         pose_tokens = tokens[:, :, 0]
         pose_tokens = self.token_norm(pose_tokens)
 
-        pred_pose_enc_list = self.trunk_fn(pose_tokens, num_iterations)
+        pred_pose_enc_list = self.trunk_fn(pose_tokens, num_iterations, convergence_tol, return_all)
         return pred_pose_enc_list
 
-    def trunk_fn(self, pose_tokens: torch.Tensor, num_iterations: int) -> list:
+    def trunk_fn(
+        self, pose_tokens: torch.Tensor, num_iterations: int, convergence_tol: float = None, return_all: bool = True
+    ) -> list:
         """
         Iteratively refine camera pose predictions.
 
         Args:
             pose_tokens (torch.Tensor): Normalized camera tokens with shape [B, S, C].
-            num_iterations (int): Number of refinement iterations.
+            num_iterations (int): Maximum number of refinement iterations.
+            convergence_tol (float, optional): Early-exit threshold on the max absolute pose encoding delta.
+            return_all (bool, optional): Whether to keep the encodings of every iteration or only the last.
 
         Returns:
-            list: List of activated camera encodings from each iteration.
+            list: List of activated camera encodings from each iteration (or only the last one).
         """
+        if num_iterations < 1:
+            raise ValueError(f"num_iterations must be >= 1, got {num_iterations}")
+
         B, S, C = pose_tokens.shape
         pred_pose_enc = None
         pred_pose_enc_list = []
@@ -127,17 +144,25 @@ class CameraHead(nn.Module):
             # Compute the delta update for the pose encoding.
             pred_pose_enc_delta = self.pose_branch(self.trunk_norm(pose_tokens_modulated))
 
+            converged = False
             if pred_pose_enc is None:
                 pred_pose_enc = pred_pose_enc_delta
             else:
                 pred_pose_enc = pred_pose_enc + pred_pose_enc_delta
+                # The first delta is the initial prediction itself, so convergence is only checked afterwards.
+                converged = convergence_tol is not None and pred_pose_enc_delta.abs().max() < convergence_tol
 
             # Apply final activation functions for translation, quaternion, and field-of-view.
             activated_pose = activate_pose(
                 pred_pose_enc, trans_act=self.trans_act, quat_act=self.quat_act, fl_act=self.fl_act
             )
+            if not return_all:
+                pred_pose_enc_list.clear()
             pred_pose_enc_list.append(activated_pose)
 
+            if converged:
+                break
+
         return pred_pose_enc_list
 
 
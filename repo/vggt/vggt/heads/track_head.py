@@ -26,6 +26,8 @@ class TrackHead(nn.Module):
         corr_levels=7,
         corr_radius=4,
         hidden_size=384,
+        intermediate_layer_idx=[4, 11, 17, 23],
+        corr_mode="volume",
     ):
         """
         Initialize the TrackHead module.
@@ -40,6 +42,9 @@ class TrackHead(nn.Module):
             corr_levels (int): Number of correlation pyramid levels
             corr_radius (int): Radius for correlation computation, controlling the search area.
             hidden_size (int): Size of hidden layers in the tracker network.
+            intermediate_layer_idx (List[int]): Indices of the aggregated tokens used by the feature extractor.
+            corr_mode (str): "volume" builds full correlation volumes, "local" correlates only the
+                windows around the tracks, which saves memory for many query points.
         """
         super().__init__()
 
@@ -54,6 +59,7 @@ class TrackHead(nn.Module):
             feature_only=True,  # Only output features, no activation
             down_ratio=2,  # Reduces spatial dimensions by factor of 2
             pos_embed=False,
+            intermediate_layer_idx=intermediate_layer_idx,
         )
 
         # Tracker module that predicts point trajectories
@@ -65,6 +71,7 @@ class TrackHead(nn.Module):
             corr_levels=corr_levels,
             corr_radius=corr_radius,
             hidden_size=hidden_size,
+            corr_mode=corr_mode,
         )
 
         self.iters = iters
@@ -88,12 +95,31 @@ class TrackHead(nn.Module):
                 - vis_scores (torch.Tensor): Visibility scores for tracked points.
                 - conf_scores (torch.Tensor): Confidence scores for tracked points (if predict_conf=True).
         """
-        B, S, _, H, W = images.shape
+        feature_maps = self.extract_features(aggregated_tokens_list, images, patch_start_idx)
+        return self.track(feature_maps, query_points, iters=iters)
 
-        # Extract features from tokens
-        # feature_maps has shape (B, S, C, H//2, W//2) due to down_ratio=2
-        feature_maps = self.feature_extractor(aggregated_tokens_list, images, patch_start_idx)
+    def extract_features(self, aggregated_tokens_list, images, patch_start_idx):
+        """
+        Extract the tracking feature maps. They only depend on the scene, so they can be
+        reused for any number of query point batches (see vggt.models.track_session).
+
+        Returns:
+            torch.Tensor: Feature maps of shape (B, S, C, H//2, W//2), due to down_ratio=2.
+        """
+        return self.feature_extractor(aggregated_tokens_list, images, patch_start_idx)
+
+    def track(self, feature_maps, query_points, iters=None):
+        """
+        Track query points through feature maps from extract_features.
 
+        Args:
+            feature_maps (torch.Tensor): Feature maps of shape (B, S, C, H//2, W//2).
+            query_points (torch.Tensor): Query points in the first frame, shape (B, N, 2), in pixels.
+            iters (int, optional): Number of refinement iterations. If None, uses self.iters.
+
+        Returns:
+            tuple: coord_preds, vis_scores and conf_scores, as in forward.
+        """
         # Use default iterations if not specified
         if iters is None:
             iters = self.iters
@@ -26,6 +26,7 @@ class BaseTrackerPredictor(nn.Module):
         depth=6,
         max_scale=518,
         predict_conf=True,
+        corr_mode="volume",
     ):
         super(BaseTrackerPredictor, self).__init__()
         """
@@ -42,6 +43,8 @@ class BaseTrackerPredictor(nn.Module):
         self.hidden_size = hidden_size
         self.max_scale = max_scale
         self.predict_conf = predict_conf
+        # "volume" or "local", see CorrBlock
+        self.corr_mode = corr_mode
 
         self.flows_emb_dim = latent_dim // 2
 
@@ -115,7 +118,7 @@ class BaseTrackerPredictor(nn.Module):
         # back up the init coords
         coords_backup = coords.clone()
 
-        fcorr_fn = CorrBlock(fmaps, num_levels=self.corr_levels, radius=self.corr_radius)
+        fcorr_fn = CorrBlock(fmaps, num_levels=self.corr_levels, radius=self.corr_radius, corr_mode=self.corr_mode)
 
         coord_preds = []
 
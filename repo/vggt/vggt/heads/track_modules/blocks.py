@@ -135,7 +135,9 @@ class EfficientUpdateFormer(nn.Module):
 
 
 class CorrBlock:
-    def __init__(self, fmaps, num_levels=4, radius=4, multiple_track_feats=False, padding_mode="zeros"):
+    def __init__(
+        self, fmaps, num_levels=4, radius=4, multiple_track_feats=False, padding_mode="zeros", corr_mode="volume"
+    ):
         """
         Build a pyramid of feature maps from the input.
 
@@ -144,13 +146,21 @@ class CorrBlock:
         radius: search radius for sampling correlation
         multiple_track_feats: if True, split the target features per pyramid level
         padding_mode: passed to grid_sample / bilinear_sampler
+        corr_mode: "volume" correlates the targets with the whole feature maps and samples the volume,
+            "local" samples the feature maps in the (2r+1)^2 window of every track and correlates only those.
+            Both give the same result since bilinear sampling is linear; "local" needs far less memory
+            when there are many tracks and large feature maps.
         """
+        if corr_mode not in ("volume", "local"):
+            raise ValueError(f"Unknown corr_mode {corr_mode}, expected 'volume' or 'local'")
+
         B, S, C, H, W = fmaps.shape
         self.S, self.C, self.H, self.W = S, C, H, W
         self.num_levels = num_levels
         self.radius = radius
         self.padding_mode = padding_mode
         self.multiple_track_feats = multiple_track_feats
+        self.corr_mode = corr_mode
 
         # Build pyramid: each level is half the spatial resolution of the previous
         self.fmaps_pyramid = [fmaps]  # level 0 is full resolution
@@ -201,10 +211,6 @@ class CorrBlock:
             # Choose appropriate target features.
             fmap1 = targets_split[i] if self.multiple_track_feats else targets  # shape: (B, S, N, C)
 
-            # Compute correlation directly
-            corrs = compute_corr_level(fmap1, fmap2s, C)
-            corrs = corrs.view(B, S, N, H, W)
-
             # Prepare sampling grid:
             # Scale down the coordinates for the current level.
             centroid_lvl = coords.reshape(B * S * N, 1, 1, 2) / (2**i)
@@ -214,6 +220,14 @@ class CorrBlock:
             # coords_lvl = centroid_lvl + delta_lvl   (broadcasted over grid)
             coords_lvl = centroid_lvl + delta_lvl.view(1, 2 * self.radius + 1, 2 * self.radius + 1, 2)
 
+            if self.corr_mode == "local":
+                out_pyramid.append(self._local_corr(fmap1, fmaps, coords_lvl))
+                continue
+
+            # Compute correlation directly
+            corrs = compute_corr_level(fmap1, fmap2s, C)
+            corrs = corrs.view(B, S, N, H, W)
+
             # Sample from the correlation volume using bilinear interpolation.
             # We reshape corrs to (B * S * N, 1, H, W) so grid_sample acts over each target.
             corrs_sampled = bilinear_sampler(
@@ -227,6 +241,31 @@ class CorrBlock:
         out = torch.cat(out_pyramid, dim=-1).contiguous()
         return out
 
+    def _local_corr(self, fmap1, fmaps, coords_lvl):
+        """
+        Correlate the targets with the features sampled in their windows only.
+
+        Args:
+          fmap1: Tensor (B, S, N, C) — target features.
+          fmaps: Tensor (B, S, C, H, W) — feature maps of one pyramid level.
+          coords_lvl: Tensor (B * S * N, 2r+1, 2r+1, 2) — window coordinates at this level.
+
+        Returns:
+          Tensor (B, S, N, (2r+1)^2), the same as sampling the correlation volume at coords_lvl.
+        """
+        B, S, C, H, W = fmaps.shape
+        N = fmap1.shape[2]
+        R = 2 * self.radius + 1
+
+        # Sample the window features: (B * S, C, N * R, R)
+        window_coords = coords_lvl.reshape(B * S, N * R, R, 2)
+        window_feats = bilinear_sampler(fmaps.reshape(B * S, C, H, W), window_coords, padding_mode=self.padding_mode)
+        window_feats = window_feats.reshape(B, S, C, N, R * R)
+
+        # One dot product per window position instead of one per pixel
+        corrs = torch.einsum("bsnc,bscnk->bsnk", fmap1, window_feats)
+        return corrs / math.sqrt(C)
+
 
 def compute_corr_level(fmap1, fmap2s, C):
     # fmap1: (B, S, N, C)
@@ -10,6 +10,7 @@
 import logging
 import os
 import warnings
+from typing import Tuple
 
 from torch import Tensor
 from torch import nn
@@ -47,7 +48,16 @@ class Attention(nn.Module):
         self.proj_drop = nn.Dropout(proj_drop)
         self.rope = rope
 
-    def forward(self, x: Tensor, pos=None) -> Tensor:
+    def project_qkv(self, x: Tensor, pos=None) -> Tuple[Tensor, Tensor, Tensor]:
+        """
+        Compute normalized, rotary-embedded queries, keys and values.
+
+        Exposed separately so that alternative attention patterns (e.g. anchor or ring attention)
+        can reuse the projections while choosing which keys each query sees.
+
+        Returns:
+            Tuple of q, k, v, each with shape (B, num_heads, N, head_dim).
+        """
         B, N, C = x.shape
         qkv = self.qkv(x).reshape(B, N, 3, self.num_heads, self.head_dim).permute(2, 0, 3, 1, 4)
         q, k, v = qkv.unbind(0)
@@ -57,6 +67,12 @@ class Attention(nn.Module):
             q = self.rope(q, pos)
             k = self.rope(k, pos)
 
+        return q, k, v
+
+    def forward(self, x: Tensor, pos=None) -> Tensor:
+        B, N, C = x.shape
+        q, k, v = self.project_qkv(x, pos=pos)
+
         if self.fused_attn:
             x = F.scaled_dot_product_attention(q, k, v, dropout_p=self.attn_drop.p if self.training else 0.0)
         else:
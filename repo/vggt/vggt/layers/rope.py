@@ -20,6 +20,12 @@ import torch.nn as nn
 import torch.nn.functional as F
 from typing import Dict, Tuple
 
+# torch.compiler.is_compiling was added in torch 2.3
+if hasattr(torch, "compiler") and hasattr(torch.compiler, "is_compiling"):
+    is_compiling = torch.compiler.is_compiling
+else:
+    is_compiling = torch._dynamo.is_compiling
+
 
 class PositionGetter:
     """Generates and caches 2D spatial positions for patches in a grid.
@@ -74,8 +80,11 @@ class RotaryPositionEmbedding2D(nn.Module):
         base_frequency: Base frequency for computing position embeddings.
         scaling_factor: Factor to scale the computed frequencies.
         frequency_cache: Cache for storing precomputed frequency components.
+        compile_max_position: Size of the frequency table used inside compiled graphs.
     """
 
+    compile_max_position: int = 1024
+
     def __init__(self, frequency: float = 100.0, scaling_factor: float = 1.0):
         """Initializes the 2D RoPE module."""
         super().__init__()
@@ -173,8 +182,12 @@ class RotaryPositionEmbedding2D(nn.Module):
         # Compute feature dimension for each spatial direction
         feature_dim = tokens.size(-1) // 2
 
-        # Get frequency components
-        max_position = int(positions.max()) + 1
+        # Get frequency components. Reading the max position is a graph break under torch.compile,
+        # so compiled graphs use a fixed-size table (its leading rows are identical).
+        if is_compiling():
+            max_position = self.compile_max_position
+        else:
+            max_position = int(positions.max()) + 1
         cos_comp, sin_comp = self._compute_frequency_components(feature_dim, max_position, tokens.device, tokens.dtype)
 
         # Split features for vertical and horizontal processing
@@ -116,7 +116,8 @@ class DinoVisionTransformer(nn.Module):
         if drop_path_uniform is True:
             dpr = [drop_path_rate] * depth
         else:
-            dpr = [x.item() for x in torch.linspace(0, drop_path_rate, depth)]  # stochastic depth decay rule
+            # stochastic depth decay rule (on CPU, so the model can be built on the meta device)
+            dpr = [x.item() for x in torch.linspace(0, drop_path_rate, depth, device="cpu")]
 
         if ffn_layer == "mlp":
             logger.info("using MLP layer as FFN")
@@ -5,6 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 
 import logging
+import math
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -15,6 +16,7 @@ from vggt.layers import PatchEmbed
 from vggt.layers.block import Block
 from vggt.layers.rope import RotaryPositionEmbedding2D, PositionGetter
 from vggt.layers.vision_transformer import vit_small, vit_base, vit_large, vit_giant2
+from vggt.utils.sampling import select_anchor_frames
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +49,14 @@ class Aggregator(nn.Module):
         qk_norm (bool): Whether to apply QK normalization.
         rope_freq (int): Base frequency for rotary embedding. -1 to disable.
         init_values (float): Init scale for layer scale.
+        global_pool_size (int): Inference only. If > 1, patch tokens are average-pooled by this factor
+            before each global block and the residual update is upsampled back ("coarse global, fine frame").
+            Camera and register tokens are never pooled. 1 keeps dense global attention.
+        global_num_anchors (int): Inference only. If > 0, global attention is restricted so that every frame
+            attends to its own tokens plus those of a few anchor frames, while anchor frames attend to all frames.
+            Anchors are chosen by farthest point sampling on mean patch-embed descriptors (frame 0 is always an
+            anchor) unless `global_anchor_idx` is set. Cost is O(S*A*P^2) instead of O(S^2*P^2).
+            Takes precedence over global_pool_size.
     """
 
     def __init__(
@@ -68,6 +78,8 @@ class Aggregator(nn.Module):
         qk_norm=True,
         rope_freq=100,
         init_values=0.01,
+        global_pool_size=1,
+        global_num_anchors=0,
     ):
         super().__init__()
 
@@ -115,6 +127,12 @@ class Aggregator(nn.Module):
         self.aa_order = aa_order
         self.patch_size = patch_size
         self.aa_block_size = aa_block_size
+        self.global_pool_size = global_pool_size
+        self.global_num_anchors = global_num_anchors
+        # Optional explicit anchor frame indices shared across the batch, overrides FPS selection
+        self.global_anchor_idx = None
+        # Number of non-anchor frames whose anchor-attention is computed at once
+        self.global_anchor_chunk_size = 8
 
         # Validate that depth is divisible by aa_block_size
         if self.depth % self.aa_block_size != 0:
@@ -192,6 +210,54 @@ class Aggregator(nn.Module):
                 The list of outputs from the attention blocks,
                 and the patch_start_idx indicating where patch tokens begin.
         """
+        B, S, _, H, W = images.shape
+        tokens, pos, anchor_idx, pooled_pos = self._prepare_tokens(images)
+        _, P, C = tokens.shape
+        patch_hw = (H // self.patch_size, W // self.patch_size)
+
+        frame_idx = 0
+        global_idx = 0
+        output_list = []
+
+        for _ in range(self.aa_block_num):
+            for attn_type in self.aa_order:
+                if attn_type == "frame":
+                    tokens, frame_idx, frame_intermediates = self._process_frame_attention(
+                        tokens, B, S, P, C, frame_idx, pos=pos
+                    )
+                elif attn_type == "global":
+                    tokens, global_idx, global_intermediates = self._process_global_attention(
+                        tokens,
+                        B,
+                        S,
+                        P,
+                        C,
+                        global_idx,
+                        pos=pos,
+                        patch_hw=patch_hw,
+                        pooled_pos=pooled_pos,
+                        anchor_idx=anchor_idx,
+                    )
+                else:
+                    raise ValueError(f"Unknown attention type: {attn_type}")
+
+            for i in range(len(frame_intermediates)):
+                # concat frame and global intermediates, [B x S x P x 2C]
+                concat_inter = torch.cat([frame_intermediates[i], global_intermediates[i]], dim=-1)
+                output_list.append(concat_inter)
+
+        del concat_inter
+        del frame_intermediates
+        del global_intermediates
+        return output_list, self.patch_start_idx
+
+    def _prepare_tokens(self, images: torch.Tensor):
+        """
+        Patch-embed the images and add camera / register tokens and RoPE positions.
+
+        Returns:
+            (tokens [B*S, P, C], pos [B*S, P, 2] or None, anchor_idx or None, pooled_pos or None)
+        """
         B, S, C_in, H, W = images.shape
 
         if C_in != 3:
@@ -209,6 +275,10 @@ class Aggregator(nn.Module):
 
         _, P, C = patch_tokens.shape
 
+        anchor_idx = None
+        if not self.training and (self.global_num_anchors > 0 or self.global_anchor_idx is not None):
+            anchor_idx = self._get_anchor_idx(patch_tokens.view(B, S, P, C), B, S)
+
         # Expand camera and register tokens to match batch size and sequence length
         camera_token = slice_expand_and_flatten(self.camera_token, B, S)
         register_token = slice_expand_and_flatten(self.register_token, B, S)
@@ -227,35 +297,12 @@ class Aggregator(nn.Module):
             pos_special = torch.zeros(B * S, self.patch_start_idx, 2).to(images.device).to(pos.dtype)
             pos = torch.cat([pos_special, pos], dim=1)
 
-        # update P because we added special tokens
-        _, P, C = tokens.shape
+        patch_hw = (H // self.patch_size, W // self.patch_size)
+        pooled_pos = None
+        if not self.training and self.global_pool_size > 1 and pos is not None:
+            pooled_pos = self._get_pooled_pos(B * S, patch_hw, images.device, pos.dtype)
 
-        frame_idx = 0
-        global_idx = 0
-        output_list = []
-
-        for _ in range(self.aa_block_num):
-            for attn_type in self.aa_order:
-                if attn_type == "frame":
-                    tokens, frame_idx, frame_intermediates = self._process_frame_attention(
-                        tokens, B, S, P, C, frame_idx, pos=pos
-                    )
-                elif attn_type == "global":
-                    tokens, global_idx, global_intermediates = self._process_global_attention(
-                        tokens, B, S, P, C, global_idx, pos=pos
-                    )
-                else:
-                    raise ValueError(f"Unknown attention type: {attn_type}")
-
-            for i in range(len(frame_intermediates)):
-                # concat frame and global intermediates, [B x S x P x 2C]
-                concat_inter = torch.cat([frame_intermediates[i], global_intermediates[i]], dim=-1)
-                output_list.append(concat_inter)
-
-        del concat_inter
-        del frame_intermediates
-        del global_intermediates
-        return output_list, self.patch_start_idx
+        return tokens, pos, anchor_idx, pooled_pos
 
     def _process_frame_attention(self, tokens, B, S, P, C, frame_idx, pos=None):
         """
@@ -281,7 +328,9 @@ class Aggregator(nn.Module):
 
         return tokens, frame_idx, intermediates
 
-    def _process_global_attention(self, tokens, B, S, P, C, global_idx, pos=None):
+    def _process_global_attention(
+        self, tokens, B, S, P, C, global_idx, pos=None, patch_hw=None, pooled_pos=None, anchor_idx=None
+    ):
         """
         Process global attention blocks. We keep tokens in shape (B, S*P, C).
         """
@@ -297,6 +346,12 @@ class Aggregator(nn.Module):
         for _ in range(self.aa_block_size):
             if self.training:
                 tokens = checkpoint(self.global_blocks[global_idx], tokens, pos, use_reentrant=self.use_reentrant)
+            elif anchor_idx is not None:
+                tokens = self._anchor_global_block(self.global_blocks[global_idx], tokens, B, S, P, C, anchor_idx, pos)
+            elif self.global_pool_size > 1:
+                tokens = self._pooled_global_block(
+                    self.global_blocks[global_idx], tokens, B, S, P, C, patch_hw, pos=pooled_pos
+                )
             else:
                 tokens = self.global_blocks[global_idx](tokens, pos=pos)
             global_idx += 1
@@ -304,6 +359,118 @@ class Aggregator(nn.Module):
 
         return tokens, global_idx, intermediates
 
+    def _get_pooled_pos(self, BS, patch_hw, device, dtype):
+        """
+        RoPE positions for the pooled global sequence, with shape (BS, patch_start_idx + h'*w', 2).
+
+        Pooled tokens are placed at the centre of the window they summarise, expressed in
+        full-resolution patch units, so relative distances match what the blocks were trained on.
+        """
+        k = self.global_pool_size
+        ph, pw = math.ceil(patch_hw[0] / k), math.ceil(patch_hw[1] / k)
+        pos = self.position_getter(BS, ph, pw, device=device) * k + k // 2
+        # special tokens keep position 0, patch positions are shifted by 1 (see forward)
+        pos = pos + 1
+        pos_special = torch.zeros(BS, self.patch_start_idx, 2, device=device, dtype=pos.dtype)
+        return torch.cat([pos_special, pos], dim=1).to(dtype)
+
+    def _pooled_global_block(self, block, tokens, B, S, P, C, patch_hw, pos=None):
+        """
+        Run one global block on average-pooled patch tokens and upsample the residual update.
+
+        Camera and register tokens are kept at full resolution. With a pool size of k the global
+        sequence shrinks by about k^2, and the attention cost by about k^4.
+
+        Returns:
+            torch.Tensor: Updated tokens with shape (B, S*P, C).
+        """
+        k = self.global_pool_size
+        h, w = patch_hw
+        n_special = self.patch_start_idx
+
+        tokens = tokens.view(B * S, P, C)
+        patches = tokens[:, n_special:].transpose(1, 2).reshape(B * S, C, h, w)
+        pooled = F.avg_pool2d(patches, kernel_size=k, stride=k, ceil_mode=True, count_include_pad=False)
+        ph, pw = pooled.shape[-2:]
+
+        coarse = torch.cat([tokens[:, :n_special], pooled.flatten(2).transpose(1, 2)], dim=1)
+        P_coarse = coarse.shape[1]
+        coarse = coarse.reshape(B, S * P_coarse, C)
+
+        if pos is not None:
+            pos = pos.reshape(B, S * P_coarse, 2)
+
+        update = (block(coarse, pos=pos) - coarse).view(B * S, P_coarse, C)
+
+        # Nearest-neighbour upsampling: every fine patch receives the update of its pooling window
+        patch_update = update[:, n_special:].transpose(1, 2).reshape(B * S, C, ph, pw)
+        patch_update = patch_update.repeat_interleave(k, dim=2).repeat_interleave(k, dim=3)[:, :, :h, :w]
+        update = torch.cat([update[:, :n_special], patch_update.flatten(2).transpose(1, 2)], dim=1)
+
+        return (tokens + update).view(B, S * P, C)
+
+    def _get_anchor_idx(self, patch_tokens, B, S):
+        """
+        Anchor frame indices with shape (B, A), either the explicit `global_anchor_idx`
+        or farthest point samples on the mean patch-embed token of each frame.
+        """
+        if self.global_anchor_idx is not None:
+            anchor_idx = torch.as_tensor(self.global_anchor_idx, dtype=torch.long, device=patch_tokens.device)
+            return anchor_idx.view(1, -1).expand(B, -1)
+
+        descriptors = patch_tokens.mean(dim=2)  # (B, S, C)
+        return select_anchor_frames(descriptors, self.global_num_anchors)
+
+    def _anchor_global_block(self, block, tokens, B, S, P, C, anchor_idx, pos=None):
+        """
+        Run one global block where non-anchor frames only attend to themselves and the anchor frames,
+        and anchor frames attend to every frame.
+
+        Returns:
+            torch.Tensor: Updated tokens with shape (B, S*P, C).
+        """
+        attn = block.attn
+        num_heads, head_dim = attn.num_heads, attn.head_dim
+
+        x = tokens.view(B, S * P, C)
+        frame_pos = None if pos is None else pos.view(B * S, P, 2)
+        # q/k/v projections are per token, so they can be computed frame by frame
+        q, k, v = attn.project_qkv(block.norm1(x).view(B * S, P, C), pos=frame_pos)
+        q, k, v = (t.view(B, S, num_heads, P, head_dim) for t in (q, k, v))
+
+        out = torch.empty(B, S, P, C, device=x.device, dtype=q.dtype)
+        chunk = max(1, self.global_anchor_chunk_size)
+
+        for b in range(B):
+            anchors = anchor_idx[b]
+            A = anchors.numel()
+            is_anchor = torch.zeros(S, dtype=torch.bool, device=x.device)
+            is_anchor[anchors] = True
+            others = torch.nonzero(~is_anchor).squeeze(1)
+
+            # Anchor frames: full global attention over all S*P keys
+            k_all = k[b].permute(1, 0, 2, 3).reshape(1, num_heads, S * P, head_dim)
+            v_all = v[b].permute(1, 0, 2, 3).reshape(1, num_heads, S * P, head_dim)
+            q_anchor = q[b, anchors].permute(1, 0, 2, 3).reshape(1, num_heads, A * P, head_dim)
+            anchor_out = F.scaled_dot_product_attention(q_anchor, k_all, v_all)
+            out[b, anchors] = anchor_out.view(num_heads, A, P, head_dim).permute(1, 2, 0, 3).reshape(A, P, C)
+
+            # Other frames: own frame plus anchor frames, chunked over frames to bound memory
+            k_anchor = k[b, anchors].permute(1, 0, 2, 3).reshape(1, num_heads, A * P, head_dim)
+            v_anchor = v[b, anchors].permute(1, 0, 2, 3).reshape(1, num_heads, A * P, head_dim)
+            for start in range(0, others.numel(), chunk):
+                frames = others[start : start + chunk]
+                n = frames.numel()
+                k_frames = torch.cat([k[b, frames], k_anchor.expand(n, -1, -1, -1)], dim=2)
+                v_frames = torch.cat([v[b, frames], v_anchor.expand(n, -1, -1, -1)], dim=2)
+                frame_out = F.scaled_dot_product_attention(q[b, frames], k_frames, v_frames)
+                out[b, frames] = frame_out.transpose(1, 2).reshape(n, P, C)
+
+        out = attn.proj_drop(attn.proj(out.view(B, S * P, C)))
+        x = x + block.ls1(out)
+        x = x + block.ls2(block.mlp(block.norm2(x)))
+        return x
+
 
 def slice_expand_and_flatten(token_tensor, B, S):
     """
@@ -0,0 +1,73 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+import torch
+
+
+class TrackSession:
+    """
+    A scene session for interactive tracking.
+
+    The first query runs the aggregator and the TrackHead feature extractor once and keeps the
+    resulting feature maps; every later batch of query points only runs the tracker iterations.
+    The aggregated tokens are not kept, only the (B, S, C, H//2, W//2) feature maps.
+
+    Calls run under the caller's grad / autocast context, e.g.:
+
+        session = TrackSession(model, images)
+        with torch.no_grad():
+            tracks, vis, conf = session.track(query_points)
+            more_tracks, _, _ = session.track(more_query_points)
+    """
+
+    def __init__(self, model, images: torch.Tensor):
+        """
+        Args:
+            model (VGGT): Model with a track head.
+            images (torch.Tensor): Images with shape [S, 3, H, W] or [B, S, 3, H, W], in range [0, 1].
+        """
+        if model.track_head is None:
+            raise ValueError("TrackSession needs a model with a track head")
+
+        # If without batch dimension, add it
+        if len(images.shape) == 4:
+            images = images.unsqueeze(0)
+
+        self.model = model
+        self.images = images
+        self._feature_maps = None
+
+    @property
+    def feature_maps(self) -> torch.Tensor:
+        """The cached track feature maps, computed on first use"""
+        if self._feature_maps is None:
+            aggregated_tokens_list, patch_start_idx = self.model.aggregator(self.images)
+            self._feature_maps = self.model.track_head.extract_features(
+                aggregated_tokens_list, self.images, patch_start_idx
+            )
+        return self._feature_maps
+
+    def track(self, query_points: torch.Tensor, iters=None):
+        """
+        Track query points of the first frame through the scene.
+
+        Args:
+            query_points (torch.Tensor): Query points in pixel coordinates, shape [N, 2] or [B, N, 2].
+            iters (int, optional): Number of refinement iterations, the track head default if None.
+
+        Returns:
+            tuple: The track list of every iteration ([B, S, N, 2] each), visibility and confidence
+                scores ([B, S, N]), as returned by TrackHead.
+        """
+        if len(query_points.shape) == 2:
+            query_points = query_points.unsqueeze(0)
+        query_points = query_points.to(self.images.device)
+
+        return self.model.track_head.track(self.feature_maps, query_points, iters=iters)
+
+    def clear(self):
+        """Drop the cached feature maps"""
+        self._feature_maps = None
@@ -16,15 +16,37 @@ from vggt.heads.track_head import TrackHead
 
 class VGGT(nn.Module, PyTorchModelHubMixin):
     def __init__(self, img_size=518, patch_size=14, embed_dim=1024,
-                 enable_camera=True, enable_point=True, enable_depth=True, enable_track=True):
+                 enable_camera=True, enable_point=True, enable_depth=True, enable_track=True,
+                 depth=24, num_heads=16, patch_embed="dinov2_vitl14_reg"):
         super().__init__()
 
-        self.aggregator = Aggregator(img_size=img_size, patch_size=patch_size, embed_dim=embed_dim)
+        # depth / num_heads / patch_embed build smaller (e.g. distilled) models. The patch embed
+        # width must match embed_dim: 384 for dinov2_vits14_reg, 768 for dinov2_vitb14_reg.
+        self.aggregator = Aggregator(img_size=img_size, patch_size=patch_size, embed_dim=embed_dim,
+                                     depth=depth, num_heads=num_heads, patch_embed=patch_embed)
+
+        # The DPT heads read the same relative depths as [4, 11, 17, 23] in the 24-block model
+        layer_idx = [depth * i // 24 for i in (4, 11, 17, 23)]
 
         self.camera_head = CameraHead(dim_in=2 * embed_dim) if enable_camera else None
-        self.point_head = DPTHead(dim_in=2 * embed_dim, output_dim=4, activation="inv_log", conf_activation="expp1") if enable_point else None
-        self.depth_head = DPTHead(dim_in=2 * embed_dim, output_dim=2, activation="exp", conf_activation="expp1") if enable_depth else None
-        self.track_head = TrackHead(dim_in=2 * embed_dim, patch_size=patch_size) if enable_track else None
+        self.point_head = DPTHead(dim_in=2 * embed_dim, output_dim=4, activation="inv_log", conf_activation="expp1",
+                                  intermediate_layer_idx=layer_idx) if enable_point else None
+        self.depth_head = DPTHead(dim_in=2 * embed_dim, output_dim=2, activation="exp", conf_activation="expp1",
+                                  intermediate_layer_idx=layer_idx) if enable_depth else None
+        self.track_head = TrackHead(dim_in=2 * embed_dim, patch_size=patch_size,
+                                    intermediate_layer_idx=layer_idx) if enable_track else None
+
+        # Inference-time camera head refinement options (see CameraHead.forward)
+        self.camera_num_iterations = 4
+        self.camera_convergence_tol = None
+        # If False, only the final pose encoding is kept and "pose_enc_list" is not returned in eval mode
+        self.keep_pose_enc_list = True
+
+        # Inference-time output options. Lean outputs drop the echoed "images" and "pose_enc_list",
+        # output_dtype (e.g. torch.float16) casts depth and world points. Confidences keep their dtype,
+        # as the expp1 activation can exceed the fp16 range.
+        self.lean_outputs = False
+        self.output_dtype = None
 
     def forward(self, images: torch.Tensor, query_points: torch.Tensor = None):
         """
@@ -40,11 +62,14 @@ class VGGT(nn.Module, PyTorchModelHubMixin):
         Returns:
             dict: A dictionary containing the following predictions:
                 - pose_enc (torch.Tensor): Camera pose encoding with shape [B, S, 9] (from the last iteration)
+                - pose_enc_list (list[torch.Tensor]): Pose encodings of every iteration
+                  (omitted in eval mode when keep_pose_enc_list is False or lean_outputs is True)
                 - depth (torch.Tensor): Predicted depth maps with shape [B, S, H, W, 1]
                 - depth_conf (torch.Tensor): Confidence scores for depth predictions with shape [B, S, H, W]
                 - world_points (torch.Tensor): 3D world coordinates for each pixel with shape [B, S, H, W, 3]
                 - world_points_conf (torch.Tensor): Confidence scores for world points with shape [B, S, H, W]
                 - images (torch.Tensor): Original input images, preserved for visualization
+                  (omitted when lean_outputs is True)
 
                 If query_points is provided, also includes:
                 - track (torch.Tensor): Point tracks with shape [B, S, N, 2] (from the last iteration), in pixel coordinates
@@ -64,9 +89,16 @@ class VGGT(nn.Module, PyTorchModelHubMixin):
 
         with torch.cuda.amp.autocast(enabled=False):
             if self.camera_head is not None:
-                pose_enc_list = self.camera_head(aggregated_tokens_list)
+                keep_all = self.training or (self.keep_pose_enc_list and not self.lean_outputs)
+                pose_enc_list = self.camera_head(
+                    aggregated_tokens_list,
+                    num_iterations=self.camera_num_iterations,
+                    convergence_tol=None if self.training else self.camera_convergence_tol,
+                    return_all=keep_all,
+                )
                 predictions["pose_enc"] = pose_enc_list[-1]  # pose encoding of the last iteration
-                predictions["pose_enc_list"] = pose_enc_list
+                if keep_all:
+                    predictions["pose_enc_list"] = pose_enc_list
                 
             if self.depth_head is not None:
                 depth, depth_conf = self.depth_head(
@@ -90,7 +122,12 @@ class VGGT(nn.Module, PyTorchModelHubMixin):
             predictions["vis"] = vis
             predictions["conf"] = conf
 
-        if not self.training:
+        if not self.training and self.output_dtype is not None:
+            for key in ("depth", "world_points"):
+                if key in predictions:
+                    predictions[key] = predictions[key].to(self.output_dtype)
+
+        if not self.training and not self.lean_outputs:
             predictions["images"] = images  # store the images for visualization during inference
 
         return predictions
@@ -0,0 +1,190 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""
+Process-wide registry of pretrained backbones (DINOv2 and the VGGSfM tracker).
+
+Models are built from the architectures in this repo and loaded from local weight files, so neither network
+access nor torch.hub code downloads are needed. Every (name, device, dtype) is loaded lazily on first use and
+then shared by all callers. Callers hold a reference with acquire/release (or the `backbone` context manager);
+a released model stays cached until evict_unused() frees the models nobody holds.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+import torch
+
+
+_DINOV2_URL = "https://dl.fbaipublicfiles.com/dinov2"
+
+
+def _build_dinov2(arch, num_register_tokens=0, ffn_layer="mlp"):
+    """DINOv2 with the same settings as the official torch.hub entry points"""
+    from ..layers import vision_transformer
+
+    kwargs = dict(
+        img_size=518,
+        patch_size=14,
+        init_values=1.0,
+        ffn_layer=ffn_layer,
+        block_chunks=0,
+        num_register_tokens=num_register_tokens,
+    )
+    if num_register_tokens > 0:
+        kwargs.update(interpolate_antialias=True, interpolate_offset=0.0)
+    return getattr(vision_transformer, arch)(**kwargs)
+
+
+def _build_vggsfm_tracker():
+    from ..dependency.vggsfm_tracker import TrackerPredictor
+
+    return TrackerPredictor()
+
+
+class BackboneRegistry:
+    """Lazily loaded, reference counted pretrained models shared by the whole process"""
+
+    def __init__(self):
+        self._specs = {}
+        self._models = {}
+        self._refs = {}
+        self._weight_dirs = []
+        self._lock = threading.RLock()
+
+    def register(self, name, build_fn, weight_file, url=None):
+        """
+        Register a model.
+
+        Args:
+            name (str): Model name used by acquire/release.
+            build_fn (callable): Builds the model without weights.
+            weight_file (str): File name of the state dict, looked up in the weight directories.
+            url (str, optional): Where the weight file can be downloaded from, shown when it is missing.
+        """
+        with self._lock:
+            self._specs[name] = (build_fn, weight_file, url)
+
+    def add_weight_dir(self, path):
+        """Search `path` for weight files, before the default directories"""
+        path = Path(path)
+        with self._lock:
+            if path not in self._weight_dirs:
+                self._weight_dirs.insert(0, path)
+
+    def weight_dirs(self):
+        """
+        Directories searched for weight files, in order: the added directories, $VGGT_WEIGHTS_DIR and the
+        torch.hub checkpoint cache (where earlier torch.hub downloads were stored).
+        """
+        dirs = list(self._weight_dirs)
+        if os.environ.get("VGGT_WEIGHTS_DIR"):
+            dirs.append(Path(os.environ["VGGT_WEIGHTS_DIR"]))
+        dirs.append(Path(torch.hub.get_dir()) / "checkpoints")
+        return dirs
+
+    def weight_path(self, name):
+        """Local path of the weights of `name`; raises FileNotFoundError if no directory holds them"""
+        _, weight_file, url = self._specs[name]
+        for weight_dir in self.weight_dirs():
+            path = weight_dir / weight_file
+            if path.is_file():
+                return path
+
+        searched = ", ".join(str(d) for d in self.weight_dirs())
+        hint = f" Download it from {url} into one of them." if url else ""
+        raise FileNotFoundError(f"Weights {weight_file} for {name} not found in: {searched}.{hint}")
+
+    def acquire(self, name, device="cpu", dtype=None):
+        """
+        Return the shared eval-mode model `name` on `device` (and `dtype`), loading it on first use.
+
+        Every acquire must be paired with a release. The returned model is shared: do not modify it in place
+        (e.g. with .to() or .train()).
+        """
+        if name not in self._specs:
+            raise KeyError(f"Unknown backbone {name}, registered: {sorted(self._specs)}")
+
+        key = (name, str(torch.device(device)), dtype)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._load(name, device, dtype)
+                self._refs[key] = 0
+            self._refs[key] += 1
+            return self._models[key]
+
+    def release(self, name, device="cpu", dtype=None):
+        """Drop a reference taken by acquire; the model stays cached until evict_unused()"""
+        key = (name, str(torch.device(device)), dtype)
+        with self._lock:
+            if self._refs.get(key, 0) <= 0:
+                raise RuntimeError(f"Backbone {key} was released more often than acquired")
+            self._refs[key] -= 1
+
+    def evict_unused(self):
+        """Free the cached models that no caller holds, returns the number of evicted models"""
+        with self._lock:
+            unused = [key for key, refs in self._refs.items() if refs == 0]
+            for key in unused:
+                del self._models[key], self._refs[key]
+
+        if unused and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        return len(unused)
+
+    def loaded(self):
+        """Reference counts of the loaded models, keyed by (name, device, dtype)"""
+        with self._lock:
+            return dict(self._refs)
+
+    def _load(self, name, device, dtype):
+        build_fn, _, _ = self._specs[name]
+        path = self.weight_path(name)
+
+        model = build_fn()
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+        model = model.to(device=device, dtype=dtype).eval()
+        model.requires_grad_(False)
+        return model
+
+
+backbone_registry = BackboneRegistry()
+
+for _arch, _size in [("vit_small", "s"), ("vit_base", "b"), ("vit_large", "l"), ("vit_giant2", "g")]:
+    _ffn_layer = "swiglufused" if _size == "g" else "mlp"
+    _name = f"dinov2_vit{_size}14"
+    backbone_registry.register(
+        _name,
+        partial(_build_dinov2, _arch, ffn_layer=_ffn_layer),
+        f"{_name}_pretrain.pth",
+        url=f"{_DINOV2_URL}/{_name}/{_name}_pretrain.pth",
+    )
+    backbone_registry.register(
+        f"{_name}_reg",
+        partial(_build_dinov2, _arch, num_register_tokens=4, ffn_layer=_ffn_layer),
+        f"{_name}_reg4_pretrain.pth",
+        url=f"{_DINOV2_URL}/{_name}/{_name}_reg4_pretrain.pth",
+    )
+
+backbone_registry.register(
+    "vggsfm_tracker",
+    _build_vggsfm_tracker,
+    "vggsfm_v2_tracker.pt",
+    url="https://huggingface.co/facebook/VGGSfM/resolve/main/vggsfm_v2_tracker.pt",
+)
+
+
+@contextmanager
+def backbone(name, device="cpu", dtype=None):
+    """Hold the shared model `name` for the duration of a with-block"""
+    model = backbone_registry.acquire(name, device, dtype)
+    try:
+        yield model
+    finally:
+        backbone_registry.release(name, device, dtype)
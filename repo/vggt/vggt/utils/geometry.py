@@ -5,6 +5,8 @@
 # LICENSE file in the root directory of this source tree.
 
 import os
+from functools import lru_cache
+
 import torch
 import numpy as np
 
@@ -18,6 +20,9 @@ def unproject_depth_map_to_point_map(
     """
     Unproject a batch of depth maps to 3D world coordinates.
 
+    Numpy wrapper around depth_to_world_points_batch: torch inputs are unprojected on their
+    device in a single batched pass, only the result is copied to the host.
+
     Args:
         depth_map (np.ndarray): Batch of depth maps of shape (S, H, W, 1) or (S, H, W)
         extrinsics_cam (np.ndarray): Batch of camera extrinsic matrices of shape (S, 3, 4)
@@ -26,22 +31,14 @@ def unproject_depth_map_to_point_map(
     Returns:
         np.ndarray: Batch of 3D world coordinates of shape (S, H, W, 3)
     """
-    if isinstance(depth_map, torch.Tensor):
-        depth_map = depth_map.cpu().numpy()
-    if isinstance(extrinsics_cam, torch.Tensor):
-        extrinsics_cam = extrinsics_cam.cpu().numpy()
-    if isinstance(intrinsics_cam, torch.Tensor):
-        intrinsics_cam = intrinsics_cam.cpu().numpy()
+    depth_map = _as_tensor(depth_map)
+    extrinsics_cam = _as_tensor(extrinsics_cam, depth_map.device)
+    intrinsics_cam = _as_tensor(intrinsics_cam, depth_map.device)
+    if depth_map.dim() == 4:
+        depth_map = depth_map[..., 0]
 
-    world_points_list = []
-    for frame_idx in range(depth_map.shape[0]):
-        cur_world_points, _, _ = depth_to_world_coords_points(
-            depth_map[frame_idx].squeeze(-1), extrinsics_cam[frame_idx], intrinsics_cam[frame_idx]
-        )
-        world_points_list.append(cur_world_points)
-    world_points_array = np.stack(world_points_list, axis=0)
-
-    return world_points_array
+    world_points, _, _ = depth_to_world_points_batch(depth_map.float(), extrinsics_cam, intrinsics_cam)
+    return world_points.cpu().numpy()
 
 
 def depth_to_world_coords_points(
@@ -64,24 +61,11 @@ def depth_to_world_coords_points(
     if depth_map is None:
         return None, None, None
 
-    # Valid depth mask
-    point_mask = depth_map > eps
-
-    # Convert depth map to camera coordinates
-    cam_coords_points = depth_to_cam_coords_points(depth_map, intrinsic)
+    world_coords_points, cam_coords_points, point_mask = depth_to_world_points_batch(
+        _as_tensor(depth_map).float(), _as_tensor(extrinsic), _as_tensor(intrinsic), eps=eps
+    )
 
-    # Multiply with the inverse of extrinsic matrix to transform to world coordinates
-    # extrinsic_inv is 4x4 (note closed_form_inverse_OpenCV is batched, the output is (N, 4, 4))
-    cam_to_world_extrinsic = closed_form_inverse_se3(extrinsic[None])[0]
-
-    R_cam_to_world = cam_to_world_extrinsic[:3, :3]
-    t_cam_to_world = cam_to_world_extrinsic[:3, 3]
-
-    # Apply the rotation and translation to the camera coordinates
-    world_coords_points = np.dot(cam_coords_points, R_cam_to_world.T) + t_cam_to_world  # HxWx3, 3x3 -> HxWx3
-    # world_coords_points = np.einsum("ij,hwj->hwi", R_cam_to_world, cam_coords_points) + t_cam_to_world
-
-    return world_coords_points, cam_coords_points, point_mask
+    return world_coords_points.numpy(), cam_coords_points.numpy(), point_mask.numpy()
 
 
 def depth_to_cam_coords_points(depth_map: np.ndarray, intrinsic: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
@@ -95,26 +79,93 @@ def depth_to_cam_coords_points(depth_map: np.ndarray, intrinsic: np.ndarray) ->
     Returns:
         tuple[np.ndarray, np.ndarray]: Camera coordinates (H, W, 3)
     """
-    H, W = depth_map.shape
     assert intrinsic.shape == (3, 3), "Intrinsic matrix must be 3x3"
     assert intrinsic[0, 1] == 0 and intrinsic[1, 0] == 0, "Intrinsic matrix must have zero skew"
 
-    # Intrinsic parameters
-    fu, fv = intrinsic[0, 0], intrinsic[1, 1]
-    cu, cv = intrinsic[0, 2], intrinsic[1, 2]
+    return depth_to_cam_points_batch(_as_tensor(depth_map).float(), _as_tensor(intrinsic)).numpy()
+
+
+def _as_tensor(x, device=None) -> torch.Tensor:
+    """Tensor view of an array (no copy for contiguous numpy arrays on CPU)."""
+    if isinstance(x, np.ndarray):
+        x = torch.from_numpy(np.ascontiguousarray(x))
+    return x.to(device) if device is not None else x
+
+
+@lru_cache(maxsize=16)
+def _pixel_grid(height: int, width: int, device: torch.device, dtype: torch.dtype) -> tuple[torch.Tensor, torch.Tensor]:
+    """Pixel column (u) and row (v) coordinates of shape (H, W), cached per size, device and dtype."""
+    v, u = torch.meshgrid(
+        torch.arange(height, device=device, dtype=dtype),
+        torch.arange(width, device=device, dtype=dtype),
+        indexing="ij",
+    )
+    return u, v
+
+
+def depth_to_cam_points_batch(depth: torch.Tensor, intrinsics: torch.Tensor) -> torch.Tensor:
+    """
+    Convert a batch of depth maps to camera coordinates on their device.
+
+    Args:
+        depth (torch.Tensor): Depth maps of shape (..., H, W). Half precision is computed in float32.
+        intrinsics (torch.Tensor): Zero-skew intrinsic matrices of shape (..., 3, 3).
+
+    Returns:
+        torch.Tensor: Camera coordinates of shape (..., H, W, 3)
+    """
+    dtype = torch.promote_types(depth.dtype, torch.float32)
+    depth = depth.to(dtype)
+    intrinsics = intrinsics.to(depth.device, dtype)
+    u, v = _pixel_grid(depth.shape[-2], depth.shape[-1], depth.device, dtype)
+
+    fu, fv = intrinsics[..., 0, 0, None, None], intrinsics[..., 1, 1, None, None]
+    cu, cv = intrinsics[..., 0, 2, None, None], intrinsics[..., 1, 2, None, None]
+
+    x_cam = (u - cu) * depth / fu
+    y_cam = (v - cv) * depth / fv
+    return torch.stack((x_cam, y_cam, depth), dim=-1)
+
+
+def depth_to_world_points_batch(
+    depth: torch.Tensor,
+    extrinsics: torch.Tensor,
+    intrinsics: torch.Tensor,
+    conf: torch.Tensor = None,
+    conf_threshold: float = None,
+    eps: float = 1e-8,
+) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Convert a batch of depth maps to world coordinates on their device.
 
-    # Generate grid of pixel coordinates
-    u, v = np.meshgrid(np.arange(W), np.arange(H))
+    Args:
+        depth (torch.Tensor): Depth maps of shape (..., H, W).
+        extrinsics (torch.Tensor): Camera from world matrices (OpenCV convention) of shape (..., 3, 4) or (..., 4, 4).
+        intrinsics (torch.Tensor): Zero-skew intrinsic matrices of shape (..., 3, 3).
+        conf (torch.Tensor, optional): Confidence maps of shape (..., H, W), combined into the point mask.
+        conf_threshold (float, optional): Minimum confidence of a valid point.
+        eps (float): Minimum depth of a valid point.
 
-    # Unproject to camera coordinates
-    x_cam = (u - cu) * depth_map / fu
-    y_cam = (v - cv) * depth_map / fv
-    z_cam = depth_map
+    Returns:
+        tuple[torch.Tensor, torch.Tensor, torch.Tensor]: World coordinates (..., H, W, 3), camera
+        coordinates (..., H, W, 3) and valid point mask (..., H, W).
+    """
+    cam_points = depth_to_cam_points_batch(depth, intrinsics)
 
-    # Stack to form camera coordinates
-    cam_coords = np.stack((x_cam, y_cam, z_cam), axis=-1).astype(np.float32)
+    dtype = torch.promote_types(cam_points.dtype, extrinsics.dtype)
+    extrinsics = extrinsics.to(cam_points.device, dtype)
+    R = extrinsics[..., :3, :3]
+    t = extrinsics[..., None, :3, 3]
 
-    return cam_coords
+    # world = R^T (cam - t), as row vectors (cam - t) @ R. No matrix inverse needed.
+    flat_points = cam_points.to(dtype).flatten(-3, -2)
+    world_points = torch.matmul(flat_points - t, R).unflatten(-2, cam_points.shape[-3:-1])
+
+    point_mask = depth > eps
+    if conf is not None and conf_threshold is not None:
+        point_mask = point_mask & (conf >= conf_threshold)
+
+    return world_points, cam_points, point_mask
 
 
 def closed_form_inverse_se3(se3, R=None, T=None):
@@ -125,7 +176,7 @@ def closed_form_inverse_se3(se3, R=None, T=None):
     components of `se3`. Otherwise, they will be extracted from `se3`.
 
     Args:
-        se3: Nx4x4 or Nx3x4 array or tensor of SE3 matrices.
+        se3: Nx4x4 or Nx3x4 array or tensor of SE3 matrices (any number of leading batch dimensions).
         R (optional): Nx3x3 array or tensor of rotation matrices.
         T (optional): Nx3x1 array or tensor of translation vectors.
 
@@ -146,25 +197,24 @@ def closed_form_inverse_se3(se3, R=None, T=None):
 
     # Extract R and T if not provided
     if R is None:
-        R = se3[:, :3, :3]  # (N,3,3)
+        R = se3[..., :3, :3]  # (N,3,3)
     if T is None:
-        T = se3[:, :3, 3:]  # (N,3,1)
+        T = se3[..., :3, 3:]  # (N,3,1)
 
     # Transpose R
     if is_numpy:
         # Compute the transpose of the rotation for NumPy
-        R_transposed = np.transpose(R, (0, 2, 1))
+        R_transposed = np.swapaxes(R, -1, -2)
         # -R^T t for NumPy
         top_right = -np.matmul(R_transposed, T)
-        inverted_matrix = np.tile(np.eye(4), (len(R), 1, 1))
+        inverted_matrix = np.tile(np.eye(4), R.shape[:-2] + (1, 1))
     else:
-        R_transposed = R.transpose(1, 2)  # (N,3,3)
-        top_right = -torch.bmm(R_transposed, T)  # (N,3,1)
-        inverted_matrix = torch.eye(4, 4)[None].repeat(len(R), 1, 1)
-        inverted_matrix = inverted_matrix.to(R.dtype).to(R.device)
+        R_transposed = R.transpose(-1, -2)  # (N,3,3)
+        top_right = -torch.matmul(R_transposed, T)  # (N,3,1)
+        inverted_matrix = torch.eye(4, dtype=R.dtype, device=R.device).repeat(R.shape[:-2] + (1, 1))
 
-    inverted_matrix[:, :3, :3] = R_transposed
-    inverted_matrix[:, :3, 3:] = top_right
+    inverted_matrix[..., :3, :3] = R_transposed
+    inverted_matrix[..., :3, 3:] = top_right
 
     return inverted_matrix
 
@@ -181,23 +231,18 @@ def project_world_points_to_camera_points_batch(world_points, cam_extrinsics):
     Returns:
     """
     # TODO: merge this into project_world_points_to_cam
-    
+
     # device = world_points.device
     # with torch.autocast(device_type=device.type, enabled=False):
-    ones = torch.ones_like(world_points[..., :1])  # shape: (B, S, H, W, 1)
-    world_points_h = torch.cat([world_points, ones], dim=-1)  # shape: (B, S, H, W, 4)
-
-    # extrinsics: (B, S, 3, 4) -> (B, S, 1, 1, 3, 4)
-    extrinsics_exp = cam_extrinsics.unsqueeze(2).unsqueeze(3)
+    R = cam_extrinsics[..., :3, :3]  # (B, S, 3, 3)
+    t = cam_extrinsics[..., None, :3, 3]  # (B, S, 1, 3)
 
-    # world_points_h: (B, S, H, W, 4) -> (B, S, H, W, 4, 1)
-    world_points_h_exp = world_points_h.unsqueeze(-1)
+    # Row vectors: p_cam = p_world @ R^T + t, one (H*W, 3) @ (3, 3) product per frame
+    # instead of a (3, 4) @ (4, 1) product per pixel on homogeneous coordinates
+    flat_points = world_points.flatten(-3, -2)  # (B, S, H*W, 3)
+    camera_points = torch.matmul(flat_points, R.transpose(-1, -2)) + t
 
-    # Now perform the matrix multiplication
-    # (B, S, 1, 1, 3, 4) @ (B, S, H, W, 4, 1) broadcasts to (B, S, H, W, 3, 1)
-    camera_points = torch.matmul(extrinsics_exp, world_points_h_exp).squeeze(-1)
-
-    return camera_points
+    return camera_points.unflatten(-2, world_points.shape[-3:-1])
 
 
 
@@ -222,21 +267,11 @@ def project_world_points_to_cam(
     device = world_points.device
     # with torch.autocast(device_type=device.type, dtype=torch.double):
     with torch.autocast(device_type=device.type, enabled=False):
-        N = world_points.shape[0]  # Number of points
-        B = cam_extrinsics.shape[0]  # Batch size, i.e., number of cameras
-        world_points_homogeneous = torch.cat(
-            [world_points, torch.ones_like(world_points[..., 0:1])], dim=1
-        )  # Nx4
-        # Reshape for batch processing
-        world_points_homogeneous = world_points_homogeneous.unsqueeze(0).expand(
-            B, -1, -1
-        )  # BxNx4
-
         # Step 1: Apply extrinsic parameters
-        # Transform 3D points to camera coordinate system for all cameras
-        cam_points = torch.bmm(
-            cam_extrinsics, world_points_homogeneous.transpose(-1, -2)
-        )
+        # Transform 3D points to camera coordinate system for all cameras: R @ X + t,
+        # broadcasting the shared 3xN points instead of copying homogeneous points per camera
+        cam_points = torch.matmul(cam_extrinsics[:, :, :3], world_points.transpose(-1, -2))
+        cam_points = cam_points + cam_extrinsics[:, :, 3:]  # Bx3xN
 
         if only_points_cam:
             return None, cam_points
@@ -263,8 +298,7 @@ def img_from_cam(cam_intrinsics, cam_points, distortion_params=None, default=0.0
     """
 
     # Normalized device coordinates (NDC)
-    cam_points = cam_points / cam_points[:, 2:3, :]
-    ndc_xy = cam_points[:, :2, :]
+    ndc_xy = cam_points[..., :2, :] / cam_points[..., 2:3, :]
 
     # Apply distortion if distortion_params are provided
     if distortion_params is not None:
@@ -273,20 +307,14 @@ def img_from_cam(cam_intrinsics, cam_points, distortion_params=None, default=0.0
     else:
         distorted_xy = ndc_xy
 
-    # Prepare cam_points for batch matrix multiplication
-    cam_coords_homo = torch.cat(
-        (distorted_xy, torch.ones_like(distorted_xy[:, :1, :])), dim=1
-    )  # Bx3xN
-    # Apply intrinsic parameters using batch matrix multiplication
-    pixel_coords = torch.bmm(cam_intrinsics, cam_coords_homo)  # Bx3xN
-
-    # Extract x and y coordinates
-    pixel_coords = pixel_coords[:, :2, :]  # Bx2xN
+    # Apply intrinsic parameters: the top two rows of K @ [x, y, 1]^T, without building
+    # homogeneous coordinates. Works for any leading batch dimensions.
+    pixel_coords = torch.matmul(cam_intrinsics[..., :2, :2], distorted_xy) + cam_intrinsics[..., :2, 2:]  # Bx2xN
 
     # Replace NaNs with default value
     pixel_coords = torch.nan_to_num(pixel_coords, nan=default)
 
-    return pixel_coords.transpose(1, 2)  # BxNx2
+    return pixel_coords.transpose(-1, -2)  # BxNx2
 
 
 
@@ -0,0 +1,29 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+import torch
+
+
+@torch.no_grad()
+def merge_lora_update_(weight: torch.Tensor, lora_A: torch.Tensor, lora_B: torch.Tensor,
+                       scaling: float) -> torch.Tensor:
+    """
+    Fold a LoRA update into a base weight in place: W += scaling * B @ A.
+
+    The update is computed in fp32 and cast to the weight's device and dtype. Used both when
+    training (train_utils.lora.merge_lora) and when merging adapter checkpoints for inference.
+
+    Args:
+        weight (torch.Tensor): Base weight of shape (out_features, in_features).
+        lora_A (torch.Tensor): Down projection of shape (rank, in_features).
+        lora_B (torch.Tensor): Up projection of shape (out_features, rank).
+        scaling (float): alpha / rank.
+
+    Returns:
+        torch.Tensor: The updated weight.
+    """
+    update = (lora_B.float() @ lora_A.float()) * scaling
+    return weight.add_(update.to(weight.device, weight.dtype))
@@ -0,0 +1,85 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the license found in the
+# LICENSE file in the root directory of this source tree.
+
+import torch
+import torch.nn.functional as F
+
+
+def farthest_point_sampling(distance_matrix: torch.Tensor, num_samples: int, start_index=0):
+    """
+    Select diverse items by farthest point sampling over a pairwise distance matrix.
+
+    Each step picks the item whose minimum distance to the already selected set is largest. A running
+    minimum-distance vector makes this O(N * num_samples), and batched matrices are sampled together.
+
+    Args:
+        distance_matrix (torch.Tensor): Pairwise distances with shape (N, N) or (B, N, N). Not modified.
+        num_samples (int): Number of items to select (clipped to N).
+        start_index (int or torch.Tensor): Index of the first selected item, or one index per scene
+            with shape (B,).
+
+    Returns:
+        list or torch.Tensor: Selected indices in selection order, starting with start_index. A list for
+            an (N, N) matrix, a long tensor with shape (B, num_samples) for a batch.
+    """
+    batched = distance_matrix.dim() == 3
+    if not batched:
+        distance_matrix = distance_matrix[None]
+    B, N, _ = distance_matrix.shape
+    num_samples = min(num_samples, N)
+    batch_idx = torch.arange(B, device=distance_matrix.device)
+
+    next_index = torch.as_tensor(start_index, dtype=torch.long, device=distance_matrix.device).expand(B)
+    selected = torch.empty(B, num_samples, dtype=torch.long, device=distance_matrix.device)
+    min_dist = torch.full((B, N), float("inf"), dtype=distance_matrix.dtype, device=distance_matrix.device)
+
+    for i in range(num_samples):
+        selected[:, i] = next_index
+        # Selected items get -inf so that they are never picked again, even with a non-zero diagonal
+        min_dist = torch.minimum(min_dist, distance_matrix[batch_idx, next_index].clamp(min=0))
+        min_dist[batch_idx, next_index] = float("-inf")
+        next_index = min_dist.argmax(dim=1)
+
+    return selected if batched else selected[0].tolist()
+
+
+def coverage_radius(distance_matrix: torch.Tensor, selected) -> torch.Tensor:
+    """
+    Largest distance from any item to its nearest selected item (lower means better coverage).
+
+    Args:
+        distance_matrix (torch.Tensor): Pairwise distances with shape (N, N) or (B, N, N).
+        selected (list or torch.Tensor): Selected indices with shape (k,) or (B, k).
+
+    Returns:
+        torch.Tensor: Covering radius, a scalar or shape (B,).
+    """
+    selected = torch.as_tensor(selected, dtype=torch.long, device=distance_matrix.device)
+    to_selected = distance_matrix.index_select(-2, selected) if selected.dim() == 1 else torch.gather(
+        distance_matrix, 1, selected[..., None].expand(-1, -1, distance_matrix.shape[-1])
+    )
+    return to_selected.clamp(min=0).min(dim=-2).values.max(dim=-1).values
+
+
+def select_anchor_frames(descriptors: torch.Tensor, num_anchors: int, start_index: int = 0) -> torch.Tensor:
+    """
+    Choose anchor frames by farthest point sampling on per-frame descriptors (cosine distance).
+
+    Args:
+        descriptors (torch.Tensor): Per-frame descriptors with shape (S, D) or (B, S, D).
+        num_anchors (int): Number of anchor frames.
+        start_index (int): Frame that is always an anchor. Frame 0 defines the world coordinate
+            system in VGGT, so it is the default.
+
+    Returns:
+        torch.Tensor: Sorted anchor frame indices with shape (min(num_anchors, S),) or (B, min(num_anchors, S)).
+    """
+    descriptors = F.normalize(descriptors.float(), dim=-1)
+    distance_matrix = 1 - descriptors @ descriptors.transpose(-1, -2)
+    if descriptors.dim() == 2:
+        anchors = farthest_point_sampling(distance_matrix, num_anchors, start_index)
+        return torch.tensor(sorted(anchors), dtype=torch.long, device=descriptors.device)
+    return farthest_point_sampling(distance_matrix, num_anchors, start_index).sort(dim=1).values
@@ -31,6 +31,12 @@ Examples:
 
   # Benchmark performance
   python main.py benchmark
+
+  # Predict memory/time and recommend a configuration
+  python main.py plan data/*.jpg
+
+  # Low-rank compress the aggregator to an error budget
+  python main.py compress --error-budget 0.05
         """
     )
 
@@ -48,6 +54,37 @@ Examples:
     recon_parser.add_argument("--sparse", action="store_true", help="Use sparse attention")
     recon_parser.add_argument("--output", type=str, default="outputs", help="Output directory")
     recon_parser.add_argument("--export", choices=["ply", "obj", "glb"], help="Export format")
+    recon_parser.add_argument("--global-pool", type=int, default=1,
+                             help="Pool patch tokens in global attention (2 = ~16x less attention)")
+    recon_parser.add_argument("--anchors", type=int, default=0,
+                             help="Anchor-frame global attention with this many anchors")
+    recon_parser.add_argument("--frames-chunk", type=int, default=8,
+                             help="Frames per depth / point head call (smaller = less memory)")
+    recon_parser.add_argument("--camera-iters", type=int, default=4,
+                             help="Maximum camera head refinement iterations")
+    recon_parser.add_argument("--camera-tol", type=float, default=None,
+                             help="Stop camera refinement once the pose update is below this")
+    recon_parser.add_argument("--fp16-outputs", action="store_true",
+                             help="Emit depth and world points in fp16 to halve host memory")
+    recon_parser.add_argument("--conf-percentile", type=float, default=0.0,
+                             help="Drop this percentage (0-100) of lowest-confidence points")
+    recon_parser.add_argument("--max-points", type=int, default=None,
+                             help="Maximum number of point cloud points")
+    recon_parser.add_argument("--precision", choices=["auto", "fp32", "fp16", "bf16", "int8"],
+                             default="auto",
+                             help="Inference precision (bf16 autocast, int8 quantization on CPU)")
+    recon_parser.add_argument("--compile", action="store_true",
+                             help="Compile aggregator and heads (artifacts cached in models/)")
+    recon_parser.add_argument("--backend", choices=["torch", "onnxruntime"], default="torch",
+                             help="Inference backend (onnxruntime exports to models/onnx)")
+    recon_parser.add_argument("--stream-weights", action="store_true",
+                             help="Stream aggregator blocks from the checkpoint to cut peak memory")
+    recon_parser.add_argument("--adapter", type=str, default=None,
+                             help="LoRA adapter checkpoint to merge into the model weights")
+    recon_parser.add_argument("--model-size", choices=["1b", "base", "small"], default="1b",
+                             help="Model size (base / small: distilled students in models/)")
+    recon_parser.add_argument("--weights", type=str, default=None,
+                             help="Model checkpoint to load (e.g. from 'vggt compress')")
 
     # Web interface command
     web_parser = subparsers.add_parser("web", help="Launch web interface")
@@ -63,6 +100,39 @@ Examples:
     bench_parser = subparsers.add_parser("benchmark", help="Benchmark performance")
     bench_parser.add_argument("--images", type=int, default=10, help="Number of images")
     bench_parser.add_argument("--compare", action="store_true", help="Compare sparse vs dense")
+    bench_parser.add_argument("--global-pool", type=int, default=1,
+                             help="Also run pooled global attention and report accuracy")
+    bench_parser.add_argument("--precision", choices=["fp16", "bf16", "int8"], default=None,
+                             help="Also run this precision and report accuracy vs fp32")
+    bench_parser.add_argument("--stream-weights", action="store_true",
+                             help="Also run with streamed block weights and report the cost")
+    bench_parser.add_argument("--frame-sampling", action="store_true",
+                             help="Also time batched frame sampling (FPS) and report its coverage")
+
+    # Plan command
+    plan_parser = subparsers.add_parser("plan",
+                                        help="Predict memory and time, recommend a configuration")
+    plan_parser.add_argument("images", nargs="+", help="Input images or directory")
+    plan_parser.add_argument("--memory-gb", type=float, default=None,
+                            help="Memory budget in GB (default: available system memory)")
+    plan_parser.add_argument("--dtype", choices=["fp32", "fp16", "bf16"], default="fp32",
+                            help="Compute dtype to plan for")
+    plan_parser.add_argument("--sparse", action="store_true",
+                            help="Plan for covisibility sparse attention (reconstruct --sparse)")
+    plan_parser.add_argument("--calibrate", action="store_true",
+                            help="Run the one-time micro-benchmark for this machine first")
+
+    # Compress command
+    compress_parser = subparsers.add_parser("compress",
+                                            help="Low-rank compress the aggregator blocks")
+    compress_parser.add_argument("images", nargs="*",
+                                help="Calibration images or directory (default: kitchen examples)")
+    compress_parser.add_argument("--error-budget", type=float, default=0.05,
+                                help="Maximum relative output error of each factored layer")
+    compress_parser.add_argument("--calibration-frames", type=int, default=4,
+                                help="Number of calibration images")
+    compress_parser.add_argument("--output", type=str, default=None,
+                                help="Output checkpoint (default: models/vggt_model_lowrank.pt)")
 
     # Download model command
     download_parser = subparsers.add_parser("download", help="Download VGGT model")
@@ -97,6 +167,14 @@ Examples:
             from .commands.benchmark import run_benchmark
             run_benchmark(args)
 
+        elif args.command == "plan":
+            from .commands.plan import run_plan
+            run_plan(args)
+
+        elif args.command == "compress":
+            from .commands.compress import run_compress
+            run_compress(args)
+
         elif args.command == "download":
             from .commands.download_model import download_model
             download_model(args)
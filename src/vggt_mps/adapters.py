@@ -0,0 +1,83 @@
+"""
+LoRA adapter merging for fine-tuned VGGT checkpoints
+
+Checkpoints written by the training Trainer in LoRA mode only hold the
+low-rank adapters (`<layer>.lora_A`, `<layer>.lora_B`), any other weights
+trained next to them (e.g. heads) and a 'lora' entry with the scaling.
+Merging folds each update into the base weight, W += scaling * B @ A (with
+vggt.utils.lora, as the Trainer does), so inference runs the plain model at
+no extra cost.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import torch
+import torch.nn as nn
+
+LORA_A_SUFFIX = ".lora_A"
+LORA_B_SUFFIX = ".lora_B"
+
+
+def load_adapter_checkpoint(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Load an adapter checkpoint
+
+    Returns:
+        Dict with 'model' (adapter state dict) and 'lora' (rank / alpha / scaling)
+
+    Raises:
+        ValueError: If the file holds no LoRA adapters
+    """
+    checkpoint = torch.load(path, map_location="cpu", weights_only=True)
+    if not isinstance(checkpoint, dict) or "lora" not in checkpoint:
+        raise ValueError(f"{path} is not a LoRA adapter checkpoint (no 'lora' entry)")
+    return {"model": checkpoint.get("model", {}), "lora": checkpoint["lora"]}
+
+
+@torch.no_grad()
+def merge_lora_adapters(model: nn.Module, checkpoint: Dict[str, Any]) -> int:
+    """
+    Merge LoRA adapters into the base weights of a model (in place)
+
+    Args:
+        model: VGGT model holding the base weights
+        checkpoint: Adapter checkpoint, see load_adapter_checkpoint
+
+    Returns:
+        Number of merged layers
+
+    Raises:
+        KeyError: If an adapter or trained weight has no counterpart in the model
+    """
+    from vggt.utils.lora import merge_lora_update_
+
+    state_dict = checkpoint["model"]
+    config = checkpoint["lora"]
+    scaling = config.get("scaling", config["alpha"] / config["rank"])
+
+    merged = 0
+    for key, lora_a in state_dict.items():
+        if not key.endswith(LORA_A_SUFFIX):
+            continue
+        layer = key[: -len(LORA_A_SUFFIX)]
+        lora_b = state_dict[layer + LORA_B_SUFFIX]
+        try:
+            weight = model.get_parameter(f"{layer}.weight")
+        except AttributeError:
+            raise KeyError(f"Adapter layer not in the model: {layer}") from None
+        merge_lora_update_(weight, lora_a, lora_b, scaling)
+        merged += 1
+
+    # Weights trained next to the adapters (e.g. unfrozen heads) replace the base ones
+    others = {
+        k: v
+        for k, v in state_dict.items()
+        if not k.endswith(LORA_A_SUFFIX) and not k.endswith(LORA_B_SUFFIX)
+    }
+    if others:
+        result = model.load_state_dict(others, strict=False)
+        if result.unexpected_keys:
+            unexpected = result.unexpected_keys[:3]
+            raise KeyError(f"Adapter checkpoint weights not in the model: {unexpected}")
+    return merged
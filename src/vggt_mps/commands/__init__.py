@@ -8,6 +8,8 @@ from .test_runner import run_tests
 from .benchmark import run_benchmark
 from .web_interface import launch_web_interface
 from .download_model import download_model
+from .plan import run_plan
+from .compress import run_compress
 
 __all__ = [
     "run_demo",
@@ -15,5 +17,7 @@ __all__ = [
     "run_tests",
     "run_benchmark",
     "launch_web_interface",
-    "download_model"
+    "download_model",
+    "run_plan",
+    "run_compress"
 ]
\ No newline at end of file
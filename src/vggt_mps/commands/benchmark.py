@@ -12,9 +12,12 @@ from PIL import Image
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from vggt_mps.config import DEVICE, SPARSE_CONFIG, get_model_path, is_model_available
+from vggt_mps.config import (
+    DEVICE, REPO_DIR, SPARSE_CONFIG, TEST_DATA, get_model_path, is_model_available
+)
 from vggt_mps.vggt_core import VGGTProcessor
 from vggt_mps.vggt_sparse_attention import make_vggt_sparse
+from vggt_mps.utils.accuracy import accuracy_report
 
 
 def run_benchmark(args):
@@ -25,6 +28,18 @@ def run_benchmark(args):
     print(f"Device: {DEVICE}")
     print(f"Images: {args.images}")
     print(f"Compare: {args.compare}")
+    global_pool = getattr(args, 'global_pool', 1)
+    if global_pool > 1:
+        print(f"Global pool: {global_pool}x{global_pool}")
+    precision = getattr(args, 'precision', None)
+    if precision:
+        print(f"Precision: {precision} vs fp32")
+    stream_weights = getattr(args, 'stream_weights', False)
+    if stream_weights:
+        print("Weight streaming vs resident weights")
+    frame_sampling = getattr(args, 'frame_sampling', False)
+    if frame_sampling:
+        print("Batched vs per-scene frame sampling")
     print("-" * 60)
 
     # Check model availability
@@ -42,7 +57,7 @@ def run_benchmark(args):
         images.append(img_array)
 
     # Initialize processor
-    processor = VGGTProcessor(device=DEVICE)
+    processor = VGGTProcessor(device=DEVICE, allow_simulated=not is_model_available())
 
     results = {}
 
@@ -74,6 +89,48 @@ def run_benchmark(args):
         print(f"  ❌ Failed: {e}")
         results['regular'] = {'success': False, 'error': str(e)}
 
+    # Benchmark pooled global attention against the dense run
+    if global_pool > 1 and results.get('regular', {}).get('success'):
+        print(f"\n🟣 Benchmarking Pooled Global Attention ({global_pool}x{global_pool})...")
+        print(f"  Global tokens: ~{global_pool ** 2}x fewer, "
+              f"attention work: ~{global_pool ** 4}x less")
+
+        processor.global_pool_size = global_pool
+        start_time = time.time()
+
+        try:
+            pooled_output = processor.process_images(images)
+            pooled_time = time.time() - start_time
+
+            results['pooled'] = {
+                'success': True,
+                'time': pooled_time,
+                'fps': args.images / pooled_time
+            }
+            print(f"  ✅ Time: {pooled_time:.2f}s")
+            print(f"  ✅ Speedup: {results['regular']['time'] / pooled_time:.2f}x")
+            results['pooled']['accuracy'] = accuracy_report(
+                regular_output, pooled_output, label=f"pooled {global_pool}x{global_pool}"
+            )
+
+        except Exception as e:
+            print(f"  ❌ Failed: {e}")
+            results['pooled'] = {'success': False, 'error': str(e)}
+
+        processor.global_pool_size = 1
+
+    # Benchmark a reduced precision mode against fp32 on the example scene
+    if precision:
+        results['precision'] = _benchmark_precision(precision, images)
+
+    # Benchmark streamed block weights against resident weights
+    if stream_weights:
+        results['stream_weights'] = _benchmark_stream_weights(images)
+
+    # Benchmark batched farthest point sampling of frames
+    if frame_sampling:
+        results['frame_sampling'] = _benchmark_frame_sampling(args.images)
+
     # Benchmark sparse VGGT if requested
     if args.compare:
         print("\n🟢 Benchmarking Sparse VGGT...")
@@ -135,4 +192,144 @@ def run_benchmark(args):
             print(f"  {n:3d} images: {savings:6.1f}x savings")
 
     print("\n✅ Benchmark complete!")
-    return 0
\ No newline at end of file
+    return 0
+
+
+def _load_example_scene(num_images):
+    """Load the kitchen example scene, or None if it is not available"""
+    kitchen_path = TEST_DATA["kitchen_path"]
+    if not kitchen_path.exists():
+        return None
+    paths = sorted(kitchen_path.glob("*.png")) + sorted(kitchen_path.glob("*.jpg"))
+    if not paths:
+        return None
+    return [np.array(Image.open(p).convert("RGB")) for p in paths[:num_images]]
+
+
+def _benchmark_precision(precision, fallback_images):
+    """Time a precision mode and compare its depth against an fp32 run"""
+    print(f"\n🔢 Benchmarking {precision} vs fp32...")
+    images = _load_example_scene(len(fallback_images))
+    if images is None:
+        print("  ⚠️ Example scene not found, using synthetic images")
+        images = fallback_images
+
+    try:
+        reference = VGGTProcessor(device=DEVICE, precision="fp32")
+        start_time = time.time()
+        reference_output = reference.process_images(images)
+        reference_time = time.time() - start_time
+        del reference
+
+        candidate = VGGTProcessor(device=DEVICE, precision=precision)
+        start_time = time.time()
+        candidate_output = candidate.process_images(images)
+        candidate_time = time.time() - start_time
+    except Exception as e:
+        print(f"  ❌ Failed: {e}")
+        return {'success': False, 'error': str(e)}
+
+    print(f"  ✅ fp32: {reference_time:.2f}s, {precision}: {candidate_time:.2f}s")
+    print(f"  ✅ Speedup: {reference_time / candidate_time:.2f}x")
+    return {
+        'success': True,
+        'time': candidate_time,
+        'reference_time': reference_time,
+        'accuracy': accuracy_report(reference_output, candidate_output, label=precision),
+    }
+
+
+def _benchmark_stream_weights(images):
+    """Time inference with streamed aggregator blocks and report the resident block memory"""
+    print("\n📼 Benchmarking weight streaming vs resident weights...")
+    try:
+        reference = VGGTProcessor(device=DEVICE)
+        reference.load_model()
+        aggregator = reference._get_aggregator()
+        block_bytes = sum(
+            p.numel() * p.element_size()
+            for blocks in (aggregator.frame_blocks, aggregator.global_blocks)
+            for p in blocks.parameters()
+        )
+        start_time = time.time()
+        reference.process_images(images)
+        reference_time = time.time() - start_time
+        del reference, aggregator
+
+        candidate = VGGTProcessor(device=DEVICE, stream_weights=True)
+        start_time = time.time()
+        candidate.process_images(images)
+        candidate_time = time.time() - start_time
+        streamer = candidate._weight_streamer
+        if streamer is None:
+            raise RuntimeError("Weight streaming needs a local checkpoint (run 'vggt download')")
+    except Exception as e:
+        print(f"  ❌ Failed: {e}")
+        return {'success': False, 'error': str(e)}
+
+    peak_bytes = streamer.peak_resident_bytes
+    print(f"  ✅ resident: {reference_time:.2f}s, streamed: {candidate_time:.2f}s "
+          f"({candidate_time / reference_time:.2f}x)")
+    print(f"  ✅ Block weights in memory: {block_bytes / 1024**2:.0f} MB -> "
+          f"{peak_bytes / 1024**2:.0f} MB peak")
+    return {
+        'success': True,
+        'time': candidate_time,
+        'reference_time': reference_time,
+        'block_bytes': block_bytes,
+        'peak_block_bytes': peak_bytes,
+    }
+
+
+def _benchmark_frame_sampling(num_frames, num_scenes=64, num_samples=None):
+    """
+    Time batched farthest point sampling against a per-scene loop, and compare the coverage with
+    the previous query-frame heuristic (farthest from the last selected frame only)
+    """
+    print("\n🎯 Benchmarking frame sampling (FPS)...")
+    vggt_path = REPO_DIR / "vggt"
+    if str(vggt_path) not in sys.path:
+        sys.path.insert(0, str(vggt_path))
+    from vggt.utils.sampling import coverage_radius, farthest_point_sampling
+
+    num_samples = num_samples or max(2, num_frames // 4)
+    descriptors = torch.nn.functional.normalize(torch.randn(num_scenes, num_frames, 64), dim=-1)
+    distance_matrix = 1 - descriptors @ descriptors.transpose(1, 2)
+
+    start_time = time.time()
+    looped = [farthest_point_sampling(d, num_samples) for d in distance_matrix]
+    looped_time = time.time() - start_time
+
+    start_time = time.time()
+    batched = farthest_point_sampling(distance_matrix, num_samples)
+    batched_time = time.time() - start_time
+
+    if batched.tolist() != looped:
+        print("  ❌ Batched and per-scene selections differ")
+        return {'success': False, 'error': 'batched selection mismatch'}
+
+    previous = torch.tensor([_last_selected_sampling(d, num_samples) for d in distance_matrix])
+    radius = coverage_radius(distance_matrix, batched).mean().item()
+    previous_radius = coverage_radius(distance_matrix, previous).mean().item()
+
+    print(f"  ✅ {num_scenes} scenes x {num_frames} frames, {num_samples} samples")
+    print(f"  ✅ per-scene: {looped_time * 1000:.1f}ms, batched: {batched_time * 1000:.1f}ms "
+          f"({looped_time / max(batched_time, 1e-9):.1f}x)")
+    print(f"  ✅ Coverage radius: {radius:.3f} (previous heuristic: {previous_radius:.3f})")
+    return {
+        'success': True,
+        'time': batched_time,
+        'reference_time': looped_time,
+        'coverage_radius': radius,
+        'previous_coverage_radius': previous_radius,
+    }
+
+
+def _last_selected_sampling(distance_matrix, num_samples):
+    """The previous query-frame selection: farthest from the most recently selected frame"""
+    selected = [0]
+    while len(selected) < num_samples:
+        distances = distance_matrix[selected[-1]].clamp(min=0)
+        distances[selected] = -1
+        selected.append(int(distances.argmax()))
+    return selected
@@ -0,0 +1,92 @@
+"""
+Low-rank compression command for VGGT-MPS
+"""
+
+import sys
+from glob import glob
+from pathlib import Path
+
+import torch
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vggt_mps.config import MODEL_DIR, TEST_DATA, is_model_available
+from vggt_mps.compression import (
+    compress_low_rank, low_rank_linear_names, save_low_rank_checkpoint
+)
+from vggt_mps.vggt_core import VGGTProcessor
+
+DEFAULT_OUTPUT = MODEL_DIR / "vggt_model_lowrank.pt"
+
+
+def _collect_images(patterns):
+    image_paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_file():
+            image_paths.append(path)
+        elif path.is_dir():
+            for ext in ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.PNG']:
+                image_paths.extend(path.glob(ext))
+        else:
+            image_paths.extend([Path(p) for p in glob(pattern)])
+    return sorted(set(image_paths))
+
+
+def _num_parameters(module):
+    return sum(p.numel() for p in module.parameters())
+
+
+def run_compress(args):
+    """Factor the aggregator block linears to meet an error budget and save the model"""
+    print("=" * 60)
+    print("🗜️ VGGT Low-Rank Compression")
+    print("=" * 60)
+
+    if not is_model_available():
+        print("\n❌ VGGT model not found!")
+        print("Run: python main.py download")
+        return
+
+    patterns = args.images or [str(TEST_DATA["kitchen_path"])]
+    image_paths = _collect_images(patterns)[: args.calibration_frames]
+    if not image_paths:
+        print("❌ No calibration images found!")
+        return
+    print(f"📸 Calibrating on {len(image_paths)} images, error budget {args.error_budget:.3f}")
+
+    # SVD runs on CPU; the compressed model is saved device-independent
+    processor = VGGTProcessor(device="cpu")
+    processor.load_model()
+    if processor.model is None:
+        print("❌ Could not load the VGGT model")
+        return
+    model = processor.model
+
+    from vggt.utils.load_fn import load_and_preprocess_images
+    images = load_and_preprocess_images([str(p) for p in image_paths]).unsqueeze(0)
+
+    with torch.no_grad():
+        reference = model.aggregator(images)[0][-1]
+    params_before = _num_parameters(model.aggregator)
+    num_linears = len(low_rank_linear_names(model))
+
+    print("\n⏳ Factoring aggregator blocks...")
+    ranks = compress_low_rank(model, images, error_budget=args.error_budget)
+
+    with torch.no_grad():
+        compressed = model.aggregator(images)[0][-1]
+    error = ((compressed - reference).norm() / reference.norm()).item()
+    params_after = _num_parameters(model.aggregator)
+
+    print(f"  ✅ Factored {len(ranks)} of {num_linears} block linears")
+    print(f"  ✅ Aggregator parameters: {params_before / 1e6:.1f}M -> {params_after / 1e6:.1f}M "
+          f"({params_after / params_before:.0%})")
+    print(f"  ✅ Relative error of the final aggregator tokens: {error:.4f}")
+
+    output = Path(args.output) if args.output else DEFAULT_OUTPUT
+    output.parent.mkdir(parents=True, exist_ok=True)
+    save_low_rank_checkpoint(model, ranks, output, args.error_budget)
+    print(f"\n💾 Saved to {output} ({output.stat().st_size / 1024**2:.0f} MB)")
+    print(f"   Run with: vggt reconstruct --weights {output} <images>")
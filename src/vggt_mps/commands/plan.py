@@ -0,0 +1,97 @@
+"""
+Execution planning command for VGGT-MPS
+"""
+
+import sys
+from glob import glob
+from pathlib import Path
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vggt_mps.config import CAMERA_CONFIG, PROCESSING_CONFIG
+from vggt_mps.cost_model import CostModel, available_memory_bytes, calibrate, preprocessed_size
+
+GB = 1024**3
+
+
+def _collect_images(patterns):
+    image_paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_file():
+            image_paths.append(path)
+        elif path.is_dir():
+            for ext in ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.PNG']:
+                image_paths.extend(path.glob(ext))
+        else:
+            image_paths.extend([Path(p) for p in glob(pattern)])
+    return sorted(set(image_paths))
+
+
+def _print_prediction(prediction):
+    for stage, cost in prediction["stages"].items():
+        print(f"   {stage:<12} {cost['seconds']:8.2f} s   {cost['memory_bytes'] / GB:6.2f} GB")
+    print(
+        f"   {'total':<12} {prediction['total_seconds']:8.2f} s   "
+        f"{prediction['peak_memory_bytes'] / GB:6.2f} GB peak"
+    )
+
+
+def run_plan(args):
+    """Predict the cost of reconstructing the given images and recommend a configuration"""
+    print("=" * 60)
+    print("🧮 VGGT Execution Plan")
+    print("=" * 60)
+
+    image_paths = _collect_images(args.images)[: PROCESSING_CONFIG["max_images"]]
+    if not image_paths:
+        print("❌ No images found!")
+        return
+
+    # reconstruct resizes every image to the camera size before preprocessing
+    H, W = preprocessed_size(CAMERA_CONFIG["image_width"], CAMERA_CONFIG["image_height"])
+    S = len(image_paths)
+    print(f"📸 {S} images -> model input {S}x3x{H}x{W}")
+
+    dtype = getattr(args, 'dtype', 'fp32')
+    if getattr(args, 'calibrate', False):
+        print("\n⏱️ Calibrating cost model (one-time micro-benchmark)...")
+        calibrate(dtype=dtype)
+
+    model = CostModel(dtype=dtype)
+    if not model.calibrated:
+        print("⚠️ No calibration for this machine, using default coefficients")
+        print("   Run with --calibrate for machine-specific predictions")
+
+    memory_gb = getattr(args, 'memory_gb', None)
+    budget = int(memory_gb * GB) if memory_gb else available_memory_bytes()
+    if budget is None:
+        print("⚠️ Could not detect available memory, assuming 8 GB (use --memory-gb)")
+        budget = 8 * GB
+    print(f"💾 Memory budget: {budget / GB:.2f} GB, {model.threads} threads, {dtype}")
+
+    sparse = getattr(args, 'sparse', False)
+    print("\n📊 Default configuration (dense global attention, frames_chunk=8):")
+    _print_prediction(model.predict(S, H, W, sparse=sparse))
+
+    best = model.recommend(S, H, W, budget, sparse=sparse)
+    config = best["config"]
+    print(
+        f"\n{'✅' if best['fits'] else '⚠️'} Recommended: global={config['global_mode']}, "
+        f"frames_chunk={config['frames_chunk_size']}"
+    )
+    _print_prediction(best)
+
+    if not best["fits"]:
+        print("❌ No configuration fits the memory budget; reduce the number of images")
+        return
+
+    flags = ["--sparse"] if sparse else []
+    if config["global_mode"].startswith("pooled"):
+        flags.append(f"--global-pool {config['global_mode'][len('pooled'):]}")
+    elif config["global_mode"].startswith("anchors"):
+        flags.append(f"--anchors {config['global_mode'][len('anchors'):]}")
+    if config["frames_chunk_size"] != 8:
+        flags.append(f"--frames-chunk {config['frames_chunk_size']}")
+    print(f"\n💡 vggt reconstruct {' '.join(flags + [str(p) for p in args.images])}".rstrip())
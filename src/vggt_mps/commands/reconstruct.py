@@ -67,14 +67,52 @@ def run_reconstruction(args):
         print(f"  ⚠️ Limited to {PROCESSING_CONFIG['max_images']} images")
 
     # Check model availability
-    if not is_model_available():
+    model_size = getattr(args, 'model_size', '1b')
+    weights = getattr(args, 'weights', None)
+    if weights is not None and not Path(weights).exists():
+        print(f"\n❌ Model checkpoint not found: {weights}")
+        return
+    if weights is None and not is_model_available(model_size):
         print("\n❌ VGGT model not found!")
-        print("Run: python main.py download")
+        if model_size == "1b":
+            print("Run: python main.py download")
+        else:
+            print(f"Distill a '{model_size}' student and save it as {get_model_path(model_size)}")
         return
 
     # Initialize processor
     print(f"\n🚀 Initializing VGGT on {DEVICE}")
-    processor = VGGTProcessor(device=DEVICE)
+    processor = VGGTProcessor(
+        device=DEVICE,
+        global_pool_size=getattr(args, 'global_pool', 1),
+        global_num_anchors=getattr(args, 'anchors', 0),
+        frames_chunk_size=getattr(args, 'frames_chunk', 8),
+        camera_iterations=getattr(args, 'camera_iters', 4),
+        camera_tol=getattr(args, 'camera_tol', None),
+        output_fp16=getattr(args, 'fp16_outputs', False),
+        conf_percentile=getattr(args, 'conf_percentile', 0.0),
+        max_points=getattr(args, 'max_points', None),
+        precision=getattr(args, 'precision', 'auto'),
+        compiled=getattr(args, 'compile', False),
+        backend=getattr(args, 'backend', 'torch'),
+        stream_weights=getattr(args, 'stream_weights', False),
+        adapter_path=getattr(args, 'adapter', None),
+        model_size=model_size,
+        model_path=weights,
+    )
+    if processor.backend != "torch":
+        print(f"🧩 Backend: {processor.backend}")
+    if processor.compiled:
+        print("🛠️ Compiled execution (first run per resolution / frame-count bucket compiles)")
+    if processor.precision != "fp32":
+        print(f"🔢 Precision: {processor.precision}")
+    if processor.stream_weights:
+        print("📼 Streaming aggregator block weights from the checkpoint")
+    if processor.global_num_anchors > 0:
+        print(f"⚓ Anchor-frame global attention: {processor.global_num_anchors} anchors")
+    elif processor.global_pool_size > 1:
+        pool = processor.global_pool_size
+        print(f"🟣 Pooled global attention: {pool}x{pool}")
 
     # Apply sparse attention if requested
     if args.sparse:
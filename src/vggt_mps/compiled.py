@@ -0,0 +1,138 @@
+"""
+Compiled VGGT execution with on-disk artifact caching
+
+The aggregator and the camera / DPT heads are compiled in place with
+torch.compile, which fuses the element-wise work around the 48 transformer
+blocks (RoPE, LayerScale, residuals) and removes per-op Python overhead.
+Compiled artifacts are cached under MODEL_DIR per input bucket, so the
+compile cost is paid once per bucket and reused by later processes.
+
+Resolutions are already bucketed by load_and_preprocess_images (width 518,
+height a multiple of 14); frame counts are grouped into power-of-two buckets,
+within which the frame dimension is compiled as dynamic.
+
+Compiling needs torch >= 2.2 (nn.Module.compile); the artifact cache needs
+torch >= 2.6 and is skipped with a warning on older versions.
+"""
+
+import re
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+import torch
+
+from .config import MODEL_DIR
+
+COMPILE_CACHE_DIR = MODEL_DIR / "compiled"
+
+# Upper bounds of the frame-count buckets; larger scenes use the next power of two
+FRAME_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Submodules compiled in place (the track head depends on the query points and stays eager)
+COMPILED_MODULES = ("aggregator", "camera_head", "depth_head", "point_head")
+
+
+def has_artifact_cache() -> bool:
+    """Whether this torch can save and load compiled artifacts (torch >= 2.6)"""
+    compiler = getattr(torch, "compiler", None)
+    return hasattr(compiler, "save_cache_artifacts") and hasattr(compiler, "load_cache_artifacts")
+
+
+def frame_bucket(num_frames: int) -> int:
+    """Smallest frame bucket holding num_frames"""
+    if num_frames < 1:
+        raise ValueError(f"num_frames must be >= 1, got {num_frames}")
+    for bucket in FRAME_BUCKETS:
+        if num_frames <= bucket:
+            return bucket
+    return 1 << (num_frames - 1).bit_length()
+
+
+def bucket_key(num_frames: int, height: int, width: int, tag: str = "fp32") -> str:
+    """File-name safe key identifying the compiled artifacts for an input shape"""
+    key = f"{height}x{width}_s{frame_bucket(num_frames)}_{tag}_torch{torch.__version__}"
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+
+
+class CompiledVGGT:
+    """Compiles a VGGT model in place and manages its per-bucket artifact cache"""
+
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        cache_dir: Path = COMPILE_CACHE_DIR,
+        tag: str = "fp32",
+        backend: str = "inductor",
+    ):
+        """
+        Args:
+            model: VGGT model in eval mode (its submodules are compiled in place)
+            cache_dir: Directory holding the compiled artifacts
+            tag: Extra bucket key component, e.g. the precision mode
+            backend: torch.compile backend
+
+        Raises:
+            RuntimeError: If this torch cannot compile modules in place (torch < 2.2)
+        """
+        if not hasattr(torch.nn.Module, "compile"):
+            raise RuntimeError(
+                f"Compiled execution requires torch >= 2.2, found {torch.__version__}"
+            )
+        if not has_artifact_cache():
+            print(f"⚠️ torch {torch.__version__} cannot cache compiled artifacts (needs 2.6), "
+                  "every process compiles again")
+
+        self.model = model
+        self.cache_dir = Path(cache_dir)
+        self.tag = tag
+        self._loaded: Set[str] = set()
+        self._saved: Set[str] = set()
+
+        for name in COMPILED_MODULES:
+            module = getattr(model, name, None)
+            if module is not None:
+                module.compile(backend=backend)
+
+    def artifact_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def prepare(self, images: torch.Tensor) -> Tuple[torch.Tensor, str]:
+        """
+        Load cached artifacts for the bucket of these images and mark the frame dimension dynamic
+
+        Args:
+            images: [S, 3, H, W] or [B, S, 3, H, W] preprocessed images
+
+        Returns:
+            Tuple of ([B, S, 3, H, W] images to pass to the model, bucket key)
+        """
+        if images.ndim == 4:
+            images = images.unsqueeze(0)
+        S, H, W = images.shape[1], images.shape[-2], images.shape[-1]
+        key = bucket_key(S, H, W, self.tag)
+
+        path = self.artifact_path(key)
+        if has_artifact_cache() and key not in self._loaded and path.exists():
+            try:
+                torch.compiler.load_cache_artifacts(path.read_bytes())
+                self._loaded.add(key)
+            except Exception as e:
+                print(f"⚠️ Could not load compiled artifacts {path.name}: {e}")
+
+        if S > 1:
+            torch._dynamo.maybe_mark_dynamic(images, 1)
+        return images, key
+
+    def save(self, key: str) -> Optional[Path]:
+        """Write the compiled artifacts for a bucket the first time it is compiled"""
+        if not has_artifact_cache() or key in self._loaded or key in self._saved:
+            return None
+        artifacts = torch.compiler.save_cache_artifacts()
+        if artifacts is None:
+            return None
+
+        path = self.artifact_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(artifacts[0])
+        self._saved.add(key)
+        return path
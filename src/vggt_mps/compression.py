@@ -0,0 +1,203 @@
+"""
+Low-rank compression of the VGGT aggregator
+
+The attention (qkv, proj) and MLP (fc1, fc2) linears of the 48 aggregator
+blocks hold most of the weights and FLOPs. Each one is replaced by two
+linears from its truncated SVD, W ~ (U_r sqrt(S_r)) (sqrt(S_r) V_r^T), with
+the rank chosen per layer on calibration images: the smallest rank whose
+relative output error on the calibration activations stays within the error
+budget. Layers that would not get smaller are left dense.
+
+For a layer input X the output error of keeping r components is
+||X (W - W_r)^T||_F^2 = sum_{i >= r} s_i^2 ||X v_i||^2, so the rank follows
+from one SVD and one projection of the calibration activations.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+import torch.nn as nn
+
+# Linear layers of an aggregator Block that are factored
+LOW_RANK_LINEAR_NAMES = ("attn.qkv", "attn.proj", "mlp.fc1", "mlp.fc2")
+BLOCK_PREFIXES = ("aggregator.frame_blocks.", "aggregator.global_blocks.")
+
+# Checkpoint entry holding the per-layer ranks of a compressed model
+LOW_RANK_KEY = "low_rank"
+
+
+class LowRankLinear(nn.Module):
+    """Linear layer factored as up(down(x)): rank * (in + out) weights instead of in * out"""
+
+    def __init__(self, in_features: int, out_features: int, rank: int, bias: bool = True,
+                 device=None, dtype=None):
+        super().__init__()
+        self.in_features = in_features
+        self.out_features = out_features
+        self.rank = rank
+        self.down = nn.Linear(in_features, rank, bias=False, device=device, dtype=dtype)
+        self.up = nn.Linear(rank, out_features, bias=bias, device=device, dtype=dtype)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.up(self.down(x))
+
+    def extra_repr(self) -> str:
+        return f"in_features={self.in_features}, out_features={self.out_features}, rank={self.rank}"
+
+
+def low_rank_linear_names(model: nn.Module) -> Dict[str, nn.Linear]:
+    """Aggregator block linears that can be factored, by qualified name"""
+    return {
+        name: module
+        for name, module in model.named_modules()
+        if isinstance(module, nn.Linear)
+        and name.startswith(BLOCK_PREFIXES)
+        and name.endswith(LOW_RANK_LINEAR_NAMES)
+    }
+
+
+def select_rank(energies: torch.Tensor, error_budget: float) -> int:
+    """
+    Smallest rank whose relative output error is within the budget
+
+    Args:
+        energies: Output energy of each singular component, s_i^2 ||X v_i||^2
+        error_budget: Maximum relative Frobenius error of the layer output
+
+    Returns:
+        Rank in [1, len(energies)]
+    """
+    total = energies.sum()
+    if total <= 0:
+        return 1
+    # tail[r]: error energy left when keeping the first r components
+    tail = energies.flip(0).cumsum(0).flip(0)
+    within = torch.nonzero(tail <= (error_budget ** 2) * total)
+    rank = int(within[0]) if len(within) else len(energies)
+    return max(rank, 1)
+
+
+def factorize(
+    weight: torch.Tensor, inputs: torch.Tensor, error_budget: float
+) -> Optional[Tuple[torch.Tensor, torch.Tensor]]:
+    """
+    Truncated SVD factors of a linear weight for the given calibration inputs
+
+    Returns:
+        (down, up) weights of shape (rank, in) and (out, rank), or None when the
+        factored layer would not have fewer weights than the dense one
+    """
+    out_features, in_features = weight.shape
+    u, s, vh = torch.linalg.svd(weight.float(), full_matrices=False)
+    x = inputs.reshape(-1, in_features).float()
+    energies = s ** 2 * (x @ vh.T).pow(2).sum(dim=0)
+    rank = select_rank(energies, error_budget)
+    if rank * (in_features + out_features) >= in_features * out_features:
+        return None
+    root = s[:rank].sqrt()
+    down = root[:, None] * vh[:rank]
+    up = u[:, :rank] * root
+    return down.to(weight.dtype), up.to(weight.dtype)
+
+
+def _replace_module(model: nn.Module, name: str, module: nn.Module) -> None:
+    parent_name, _, child_name = name.rpartition(".")
+    setattr(model.get_submodule(parent_name), child_name, module)
+
+
+@torch.no_grad()
+def compress_low_rank(
+    model: nn.Module, images: torch.Tensor, error_budget: float = 0.05
+) -> Dict[str, int]:
+    """
+    Factor the aggregator block linears of a VGGT model (in place)
+
+    The calibration images run through the aggregator once; every layer is
+    factored from the activations it saw.
+
+    Args:
+        model: VGGT model in eval mode
+        images: Calibration images [S, 3, H, W] or [B, S, 3, H, W] in [0, 1]
+        error_budget: Maximum relative output error of each factored layer
+
+    Returns:
+        Rank of each factored layer, by qualified name
+    """
+    if error_budget < 0:
+        raise ValueError(f"error_budget must be >= 0, got {error_budget}")
+    if images.dim() == 4:
+        images = images.unsqueeze(0)
+
+    targets = low_rank_linear_names(model)
+    factors: Dict[str, Optional[Tuple[torch.Tensor, torch.Tensor]]] = {}
+
+    def make_hook(name):
+        def hook(module, inputs, output):
+            if name not in factors:
+                factors[name] = factorize(module.weight, inputs[0], error_budget)
+        return hook
+
+    handles = [module.register_forward_hook(make_hook(name)) for name, module in targets.items()]
+    try:
+        model.aggregator(images)
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    ranks = {}
+    for name, result in factors.items():
+        if result is None:
+            continue
+        linear = targets[name]
+        down, up = result
+        factored = LowRankLinear(linear.in_features, linear.out_features, down.shape[0],
+                                 bias=linear.bias is not None,
+                                 device=linear.weight.device, dtype=linear.weight.dtype)
+        factored.down.weight.copy_(down)
+        factored.up.weight.copy_(up)
+        if linear.bias is not None:
+            factored.up.bias.copy_(linear.bias)
+        _replace_module(model, name, factored)
+        ranks[name] = down.shape[0]
+    return ranks
+
+
+def apply_low_rank_structure(model: nn.Module, ranks: Dict[str, int]) -> nn.Module:
+    """
+    Replace the listed linears with empty LowRankLinear layers of the given ranks
+
+    Used before loading a compressed state dict into a freshly built model.
+
+    Raises:
+        KeyError: If a listed layer is not a linear of the model
+    """
+    for name, rank in ranks.items():
+        try:
+            linear = model.get_submodule(name)
+        except AttributeError:
+            raise KeyError(f"Low-rank layer not in the model: {name}") from None
+        if not isinstance(linear, nn.Linear):
+            raise KeyError(f"Low-rank layer is not a linear: {name}")
+        _replace_module(model, name, LowRankLinear(
+            linear.in_features, linear.out_features, rank, bias=linear.bias is not None,
+            device=linear.weight.device, dtype=linear.weight.dtype,
+        ))
+    return model
+
+
+def save_low_rank_checkpoint(
+    model: nn.Module, ranks: Dict[str, int], path: Union[str, Path], error_budget: float
+) -> None:
+    """Save a compressed model with the ranks needed to rebuild it"""
+    torch.save(
+        {"model": model.state_dict(), LOW_RANK_KEY: {"ranks": ranks, "error_budget": error_budget}},
+        path,
+    )
+
+
+def load_low_rank_checkpoint(model: nn.Module, checkpoint: Dict[str, Any]) -> nn.Module:
+    """Factor a freshly built model as recorded in a compressed checkpoint and load its weights"""
+    apply_low_rank_structure(model, checkpoint[LOW_RANK_KEY]["ranks"])
+    model.load_state_dict(checkpoint["model"])
+    return model
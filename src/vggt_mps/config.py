@@ -72,6 +72,28 @@ MODEL_CONFIG = {
     "parameters": "1B",
 }
 
+# Model sizes: the released 1B model and smaller students distilled from it with
+# repo/vggt/training/config/distill.yaml. "kwargs" build the matching VGGT().
+MODEL_SIZES = {
+    "1b": {
+        "kwargs": {},
+        "local_path": MODEL_CONFIG["local_path"],
+        "huggingface_id": MODEL_CONFIG["huggingface_id"],
+    },
+    "base": {
+        "kwargs": {"embed_dim": 768, "depth": 12, "num_heads": 12,
+                   "patch_embed": "dinov2_vitb14_reg", "enable_track": False},
+        "local_path": MODEL_DIR / "vggt_base.pt",
+        "huggingface_id": None,
+    },
+    "small": {
+        "kwargs": {"embed_dim": 384, "depth": 8, "num_heads": 6,
+                   "patch_embed": "dinov2_vits14_reg", "enable_track": False},
+        "local_path": MODEL_DIR / "vggt_small.pt",
+        "huggingface_id": None,
+    },
+}
+
 # Device configuration
 def get_device() -> torch.device:
     """
@@ -174,8 +196,11 @@ def load_from_env() -> None:
 load_from_env()
 
 # Utility functions
-def get_model_path() -> Path:
+def get_model_path(model_size: str = "1b") -> Path:
     """Get model path, checking multiple locations"""
+    if model_size != "1b":
+        return MODEL_SIZES[model_size]["local_path"]
+
     # Check local path first
     if MODEL_CONFIG["local_path"].exists():
         return MODEL_CONFIG["local_path"]
@@ -187,6 +212,6 @@ def get_model_path() -> Path:
 
     return MODEL_CONFIG["local_path"]  # Return expected path even if not exists
 
-def is_model_available() -> bool:
+def is_model_available(model_size: str = "1b") -> bool:
     """Check if model is available locally"""
-    return get_model_path().exists()
\ No newline at end of file
+    return get_model_path(model_size).exists()
\ No newline at end of file
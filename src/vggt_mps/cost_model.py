@@ -0,0 +1,395 @@
+"""
+Predictive cost model for VGGT inference
+
+Predicts peak memory and wall time per stage (covisibility features for
+--sparse, aggregator, camera head, DPT heads) from the scene size and
+execution settings. FLOP and activation counts
+are analytical; the conversion to seconds uses per-machine throughput
+coefficients measured once by a short micro-benchmark of an Aggregator
+`Block` and a `DPTHead`, cached in MODEL_DIR.
+"""
+
+import json
+import math
+import os
+import platform
+import sys
+import time
+from itertools import product
+from typing import Any, Dict, List, Optional
+
+import torch
+
+from .config import MODEL_DIR, REPO_DIR
+
+CALIBRATION_FILE = MODEL_DIR / "cost_calibration.json"
+
+# VGGT-1B architecture (see repo/vggt/vggt/models/vggt.py)
+VGGT_ARCH = {
+    "embed_dim": 1024,
+    "depth": 24,  # frame blocks, and as many global blocks
+    "patch_size": 14,
+    "num_special_tokens": 5,  # 1 camera + 4 register tokens
+    "patch_embed_depth": 24,  # DINOv2 ViT-L
+    "intermediate_layers": 24,  # aggregator keeps one [B, S, P, 2C] output per block pair
+    "dpt_features": 256,
+    "camera_trunk_depth": 4,
+    "camera_dim": 2048,
+}
+
+# DINOv2 ViT-B/14 run by MegaLoc on every frame for --sparse (see megaloc_mps.py)
+MEGALOC_ARCH = {
+    "embed_dim": 768,
+    "depth": 12,
+}
+
+# Parameter counts per stage
+VGGT_PARAMS = {
+    "aggregator": 909_112_320,
+    "camera_head": 216_174_610,
+    "depth_head": 32_654_562,
+    "point_head": 32_654_628,
+    "track_head": 65_941_396,
+    "megaloc": 86_580_480,
+}
+
+DTYPE_BYTES = {"fp32": 4, "fp16": 2, "bf16": 2}
+
+# Fallback coefficients (roughly a modern 8-core laptop CPU, fp32) used before calibration
+DEFAULT_COEFFICIENTS = {
+    "linear_flops_per_sec": 2.0e11,
+    "attention_flops_per_sec": 1.0e11,
+    "dpt_sec_per_pixel": 2.0e-6,
+}
+
+
+def _machine_key(dtype: str, threads: int) -> str:
+    return (
+        f"{platform.node()}|{platform.machine()}|{platform.processor()}|threads={threads}|{dtype}"
+    )
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Best-effort available system memory, or None if unknown"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def preprocessed_size(width: int, height: int, target_size: int = 518) -> tuple:
+    """
+    Image size after vggt.utils.load_fn.load_and_preprocess_images (crop mode)
+
+    Returns:
+        (H, W) of the model input
+    """
+    new_height = round(height * (target_size / width) / 14) * 14
+    return min(new_height, target_size), target_size
+
+
+class CostModel:
+    """Per-stage memory and time predictor for VGGT inference"""
+
+    def __init__(
+        self,
+        coefficients: Optional[Dict[str, float]] = None,
+        dtype: str = "fp32",
+        threads: Optional[int] = None,
+    ):
+        """
+        Args:
+            coefficients: Throughput coefficients; defaults to the cached calibration
+                for this machine, or DEFAULT_COEFFICIENTS if none exists
+            dtype: Compute dtype (fp32, fp16, bf16)
+            threads: Number of intra-op threads (defaults to torch.get_num_threads())
+        """
+        if dtype not in DTYPE_BYTES:
+            raise ValueError(f"Unsupported dtype '{dtype}', expected one of {list(DTYPE_BYTES)}")
+        self.dtype = dtype
+        self.threads = threads or torch.get_num_threads()
+        self.calibrated = coefficients is not None
+        if coefficients is None:
+            coefficients = load_calibration(dtype, self.threads)
+            self.calibrated = coefficients is not None
+        self.coefficients = dict(DEFAULT_COEFFICIENTS, **(coefficients or {}))
+
+    # ------------------------------------------------------------------
+    # Analytical counts
+    # ------------------------------------------------------------------
+    @staticmethod
+    def tokens_per_frame(H: int, W: int, pool: int = 1) -> int:
+        ps = VGGT_ARCH["patch_size"]
+        h, w = H // ps, W // ps
+        return VGGT_ARCH["num_special_tokens"] + math.ceil(h / pool) * math.ceil(w / pool)
+
+    @staticmethod
+    def block_flops(num_sequences: int, seq_len: int, dim: int) -> Dict[str, float]:
+        """Linear (qkv, proj, MLP) and attention FLOPs of one transformer block"""
+        return {
+            "linear": 24.0 * dim * dim * num_sequences * seq_len,
+            "attention": 4.0 * dim * num_sequences * seq_len * seq_len,
+        }
+
+    def global_attention_flops(self, S: int, H: int, W: int, global_mode: str) -> Dict[str, float]:
+        """FLOPs of one global block for 'dense', 'pooled<k>' or 'anchors<A>'"""
+        C = VGGT_ARCH["embed_dim"]
+        P = self.tokens_per_frame(H, W)
+        if global_mode.startswith("pooled"):
+            Pc = self.tokens_per_frame(H, W, pool=int(global_mode[len("pooled") :]))
+            return self.block_flops(1, S * Pc, C)
+        if global_mode.startswith("anchors"):
+            A = min(int(global_mode[len("anchors") :]), S)
+            flops = self.block_flops(1, S * P, C)
+            # anchor queries see all keys, other queries see their frame plus the anchors
+            flops["attention"] = 4.0 * C * P * P * (A * S + (S - A) * (1 + A))
+            return flops
+        return self.block_flops(1, S * P, C)
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+    def predict(
+        self,
+        S: int,
+        H: int,
+        W: int,
+        heads: List[str] = ("camera", "depth", "point"),
+        global_mode: str = "dense",
+        frames_chunk_size: int = 8,
+        sparse: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Predict per-stage time and memory
+
+        Args:
+            S: Number of frames
+            H, W: Model input size (multiples of 14)
+            heads: Enabled heads among camera, depth, point
+            global_mode: 'dense', 'pooled<k>' (e.g. pooled2) or 'anchors<A>' (e.g. anchors8)
+            frames_chunk_size: DPT head frame chunk size
+            sparse: Covisibility-masked global attention (vggt reconstruct --sparse)
+
+        Returns:
+            Dict with per-stage {'seconds', 'memory_bytes'}, 'peak_memory_bytes'
+            and 'total_seconds'
+        """
+        coef = self.coefficients
+        nbytes = DTYPE_BYTES[self.dtype]
+        C = VGGT_ARCH["embed_dim"]
+        depth = VGGT_ARCH["depth"]
+        P = self.tokens_per_frame(H, W)
+
+        frame = self.block_flops(S, P, C)
+        patch_embed = self.block_flops(S, P, C)
+        glob = self.global_attention_flops(S, H, W, global_mode)
+        linear = (
+            depth * (frame["linear"] + glob["linear"])
+            + VGGT_ARCH["patch_embed_depth"] * patch_embed["linear"]
+        )
+        attention = (
+            depth * (frame["attention"] + glob["attention"])
+            + VGGT_ARCH["patch_embed_depth"] * patch_embed["attention"]
+        )
+
+        weights = (
+            sum(VGGT_PARAMS[k] for k in ("aggregator", "camera_head", "depth_head", "point_head"))
+            * nbytes
+        )
+        # intermediate outputs [S, P, 2C] for every block pair,
+        # plus a block working set (qkv + MLP hidden)
+        intermediates = VGGT_ARCH["intermediate_layers"] * S * P * 2 * C * nbytes
+        working = S * P * C * (1 + 3 + 4 + 1) * nbytes
+
+        stages = {}
+        if sparse:
+            # MegaLoc features one frame at a time. The covisibility mask does not skip
+            # attention work, so the aggregator costs the same as without it.
+            D = MEGALOC_ARCH["embed_dim"]
+            N = 1 + (H // VGGT_ARCH["patch_size"]) * (W // VGGT_ARCH["patch_size"])  # cls + patches
+            megaloc = self.block_flops(S, N, D)
+            stages["covisibility"] = {
+                "seconds": MEGALOC_ARCH["depth"]
+                * (
+                    megaloc["linear"] / coef["linear_flops_per_sec"]
+                    + megaloc["attention"] / coef["attention_flops_per_sec"]
+                ),
+                "memory_bytes": weights + VGGT_PARAMS["megaloc"] * nbytes + N * D * 9 * nbytes,
+            }
+            weights += VGGT_PARAMS["megaloc"] * nbytes
+
+        stages["aggregator"] = {
+            "seconds": linear / coef["linear_flops_per_sec"]
+            + attention / coef["attention_flops_per_sec"],
+            "memory_bytes": weights + intermediates + working,
+        }
+
+        if "camera" in heads:
+            cam = self.block_flops(1, S, VGGT_ARCH["camera_dim"])
+            cam_flops = 4 * VGGT_ARCH["camera_trunk_depth"] * (cam["linear"] + cam["attention"])
+            stages["camera_head"] = {
+                "seconds": cam_flops / coef["linear_flops_per_sec"],
+                "memory_bytes": weights + intermediates,
+            }
+
+        chunk = min(frames_chunk_size, S)
+        outputs = 0
+        for name, out_dim in (("depth", 2), ("point", 4)):
+            if name not in heads:
+                continue
+            outputs += S * H * W * out_dim * 4
+            # fused features at full resolution for one chunk, a few live buffers deep
+            dpt_working = chunk * H * W * VGGT_ARCH["dpt_features"] * nbytes * 3
+            stages[f"{name}_head"] = {
+                "seconds": S * H * W * coef["dpt_sec_per_pixel"],
+                "memory_bytes": weights + intermediates + outputs + dpt_working,
+            }
+
+        return {
+            "stages": stages,
+            "peak_memory_bytes": max(stage["memory_bytes"] for stage in stages.values()),
+            "total_seconds": sum(stage["seconds"] for stage in stages.values()),
+            "config": {
+                "global_mode": global_mode,
+                "frames_chunk_size": frames_chunk_size,
+                "sparse": sparse,
+                "dtype": self.dtype,
+            },
+        }
+
+    def recommend(
+        self,
+        S: int,
+        H: int,
+        W: int,
+        memory_budget: int,
+        heads: List[str] = ("camera", "depth", "point"),
+        sparse: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Fastest configuration whose predicted peak memory fits the budget
+
+        Searches the global attention mode and the DPT head frame chunk size;
+        sparse is kept as given, since it changes the attention pattern.
+
+        Returns:
+            Prediction dict of the chosen configuration, with 'fits' set to False
+            (and the lowest-memory configuration) if nothing fits
+        """
+        global_modes = ["dense", "pooled2"] + [f"anchors{a}" for a in (8, 4) if a < S]
+        candidates = [
+            self.predict(S, H, W, heads, global_mode=mode, frames_chunk_size=chunk, sparse=sparse)
+            for mode, chunk in product(global_modes, (8, 4, 2, 1))
+        ]
+
+        fitting = [c for c in candidates if c["peak_memory_bytes"] <= memory_budget]
+        if fitting:
+            best = min(fitting, key=lambda c: (c["total_seconds"], c["peak_memory_bytes"]))
+            best["fits"] = True
+        else:
+            best = min(candidates, key=lambda c: (c["peak_memory_bytes"], c["total_seconds"]))
+            best["fits"] = False
+        return best
+
+
+# ----------------------------------------------------------------------
+# Calibration
+# ----------------------------------------------------------------------
+def _time_call(fn, repeats: int = 3) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def calibrate(
+    dtype: str = "fp32", threads: Optional[int] = None, save: bool = True
+) -> Dict[str, float]:
+    """
+    Measure throughput coefficients with a short micro-benchmark
+
+    Times one Aggregator Block at two sequence lengths (separating linear from
+    attention throughput) and a DPTHead on a small input.
+
+    Returns:
+        Coefficient dict (see DEFAULT_COEFFICIENTS)
+    """
+    vggt_path = REPO_DIR / "vggt"
+    if str(vggt_path) not in sys.path:
+        sys.path.insert(0, str(vggt_path))
+    from vggt.layers.block import Block
+    from vggt.heads.dpt_head import DPTHead
+
+    threads = threads or torch.get_num_threads()
+    torch.set_num_threads(threads)
+    torch_dtype = {"fp32": torch.float32, "fp16": torch.float16, "bf16": torch.bfloat16}[dtype]
+    C = VGGT_ARCH["embed_dim"]
+
+    block = Block(dim=C, num_heads=16, init_values=0.01).eval().to(torch_dtype)
+    timings = {}
+    with torch.no_grad():
+        for n in (256, 1024):
+            x = torch.randn(1, n, C, dtype=torch_dtype)
+            timings[n] = _time_call(lambda: block(x))
+
+    # t(n) = linear(n) / a + attention(n) / b, solved for a and b from the two sizes
+    f_small, f_large = CostModel.block_flops(1, 256, C), CostModel.block_flops(1, 1024, C)
+    det = f_small["linear"] * f_large["attention"] - f_large["linear"] * f_small["attention"]
+    inv_a = (timings[256] * f_large["attention"] - timings[1024] * f_small["attention"]) / det
+    inv_b = (f_small["linear"] * timings[1024] - f_large["linear"] * timings[256]) / det
+    linear_rate = 1.0 / inv_a if inv_a > 0 else f_large["linear"] / timings[1024]
+    attention_rate = 1.0 / inv_b if inv_b > 0 else linear_rate
+
+    head = (
+        DPTHead(dim_in=2 * C, output_dim=2, activation="exp", conf_activation="expp1")
+        .eval()
+        .to(torch_dtype)
+    )
+    H = W = 14 * 16
+    P = VGGT_ARCH["num_special_tokens"] + (H // 14) * (W // 14)
+    tokens = [torch.randn(1, 1, P, 2 * C, dtype=torch_dtype)] * VGGT_ARCH["intermediate_layers"]
+    images = torch.rand(1, 1, 3, H, W, dtype=torch_dtype)
+    with torch.no_grad():
+        dpt_time = _time_call(
+            lambda: head(tokens, images=images, patch_start_idx=VGGT_ARCH["num_special_tokens"])
+        )
+
+    coefficients = {
+        "linear_flops_per_sec": linear_rate,
+        "attention_flops_per_sec": attention_rate,
+        "dpt_sec_per_pixel": dpt_time / (H * W),
+    }
+
+    if save:
+        data = {}
+        if CALIBRATION_FILE.exists():
+            try:
+                data = json.loads(CALIBRATION_FILE.read_text())
+            except (OSError, json.JSONDecodeError):
+                data = {}
+        data[_machine_key(dtype, threads)] = coefficients
+        CALIBRATION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CALIBRATION_FILE.write_text(json.dumps(data, indent=2))
+
+    return coefficients
+
+
+def load_calibration(
+    dtype: str = "fp32", threads: Optional[int] = None
+) -> Optional[Dict[str, float]]:
+    """Cached calibration for this machine, or None if it was never calibrated"""
+    if not CALIBRATION_FILE.exists():
+        return None
+    try:
+        data = json.loads(CALIBRATION_FILE.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+    return data.get(_machine_key(dtype, threads or torch.get_num_threads()))
@@ -4,6 +4,7 @@ MegaLoc MPS Port for VGGT Sparse Attention
 Implements covisibility detection for O(n) scaling
 """
 
+import sys
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -11,9 +12,14 @@ from pathlib import Path
 import numpy as np
 from typing import Tuple, Optional
 
+from .config import MODEL_DIR, REPO_DIR
+
 class MegaLocMPS(nn.Module):
     """MegaLoc ported to Apple Silicon MPS for fast covisibility detection"""
 
+    # Registry holding the shared DINOv2, while it is held (see close)
+    _registry = None
+
     def __init__(
         self,
         num_clusters: int = 64,
@@ -28,8 +34,8 @@ class MegaLocMPS(nn.Module):
         self.device = torch.device(device if torch.backends.mps.is_available() else "cpu")
         print(f"MegaLoc using device: {self.device}")
 
-        # DINOv2 backbone (we'll use torch.hub to load)
-        self.backbone = self._load_dinov2()
+        # DINOv2 backbone, shared through the vggt backbone registry
+        self._set_backbone(self._load_dinov2())
 
         # SALAD aggregator components
         self.cluster_dim = cluster_dim
@@ -53,12 +59,21 @@ class MegaLocMPS(nn.Module):
         self.out_dim = num_clusters * cluster_dim + token_dim
 
     def _load_dinov2(self):
-        """Load DINOv2 backbone optimized for MPS"""
+        """
+        Acquire the process-wide DINOv2 ViT-B/14 from the backbone registry
+
+        Weights are read from models/dinov2_vitb14_pretrain.pth, $VGGT_WEIGHTS_DIR
+        or the torch.hub cache; nothing is downloaded.
+        """
         try:
-            # Load DINOv2 ViT-B/14
-            model = torch.hub.load('facebookresearch/dinov2', 'dinov2_vitb14')
-            model = model.to(self.device)
-            model.eval()
+            vggt_path = REPO_DIR / "vggt"
+            if str(vggt_path) not in sys.path:
+                sys.path.insert(0, str(vggt_path))
+            from vggt.utils.backbones import backbone_registry
+
+            backbone_registry.add_weight_dir(MODEL_DIR)
+            model = backbone_registry.acquire("dinov2_vitb14", self.device)
+            self._registry = backbone_registry
             return model
         except (RuntimeError, ImportError, OSError, ConnectionError) as e:
             print(f"⚠️ Could not load DINOv2 (reason: {type(e).__name__}: {e})")
@@ -66,6 +81,21 @@ class MegaLocMPS(nn.Module):
             # Placeholder if DINOv2 not available
             return nn.Identity()
 
+    def _set_backbone(self, model: nn.Module):
+        # A plain attribute rather than a submodule: .to(), state_dict() and parameters()
+        # of this module must not reach the DINOv2 that other users share
+        object.__setattr__(self, "backbone", model)
+
+    def close(self):
+        """Return the shared DINOv2 to the registry (falls back to the placeholder)"""
+        if self._registry is not None:
+            self._registry.release("dinov2_vitb14", self.device)
+            self._registry = None
+            self._set_backbone(nn.Identity())
+
+    def __del__(self):
+        self.close()
+
     def extract_features(self, images: torch.Tensor) -> torch.Tensor:
         """
         Extract MegaLoc features from images
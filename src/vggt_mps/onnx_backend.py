@@ -0,0 +1,308 @@
+"""
+ONNX Runtime backend for VGGT inference
+
+Exports the aggregator (dynamic frame count) and the camera / depth / point
+heads to ONNX, one directory per input resolution and export configuration
+(checkpoint, adapter, camera iterations, global attention mode), and runs them with ONNX
+Runtime on CPU. Only the aggregator layers consumed by the heads are exported
+as graph outputs. The DPT heads are independent per frame, so they are run
+in frame chunks to bound the working set; the camera head attends across
+frames and sees all of them at once.
+
+Requires the optional dependencies: pip install onnx onnxruntime onnxscript
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .config import MODEL_DIR
+
+ONNX_DIR = MODEL_DIR / "onnx"
+MANIFEST_NAME = "manifest.json"
+DPT_HEADS = ("depth_head", "point_head")
+DPT_OUTPUTS = {
+    "depth_head": ("depth", "depth_conf"),
+    "point_head": ("world_points", "world_points_conf"),
+}
+
+
+class _AggregatorGraph(nn.Module):
+    """Aggregator returning only the intermediate layers used by the heads"""
+
+    def __init__(self, aggregator: nn.Module, layers: List[int]):
+        super().__init__()
+        self.aggregator = aggregator
+        self.layers = layers
+
+    def forward(self, images: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        tokens_list, _ = self.aggregator(images)
+        return tuple(tokens_list[i] for i in self.layers)
+
+
+class _CameraHeadGraph(nn.Module):
+    """Camera head with a fixed number of refinement iterations, returning the final pose"""
+
+    def __init__(self, head: nn.Module, num_iterations: int):
+        super().__init__()
+        self.head = head
+        self.num_iterations = num_iterations
+
+    def forward(self, tokens: torch.Tensor) -> torch.Tensor:
+        return self.head([tokens], num_iterations=self.num_iterations, return_all=False)[-1]
+
+
+class _DPTHeadGraph(nn.Module):
+    """DPT head taking its four aggregator layers as separate inputs"""
+
+    def __init__(self, head: nn.Module, layers: List[int], patch_start_idx: int):
+        super().__init__()
+        self.head = head
+        self.layers = layers
+        self.patch_start_idx = patch_start_idx
+
+    def forward(
+        self,
+        images: torch.Tensor,
+        tokens_0: torch.Tensor,
+        tokens_1: torch.Tensor,
+        tokens_2: torch.Tensor,
+        tokens_3: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        tokens_list: List[Optional[torch.Tensor]] = [None] * (max(self.layers) + 1)
+        for layer, t in zip(self.layers, (tokens_0, tokens_1, tokens_2, tokens_3)):
+            tokens_list[layer] = t
+        return self.head(
+            tokens_list, images=images, patch_start_idx=self.patch_start_idx, frames_chunk_size=None
+        )
+
+
+def onnx_dir_for(
+    height: int, width: int, root: Path = ONNX_DIR, config: Optional[Dict[str, Any]] = None
+) -> Path:
+    """
+    Directory holding the exported graphs for one input resolution and export configuration
+
+    Args:
+        height, width: Preprocessed input size
+        root: Root directory of the exported graphs
+        config: JSON-serializable description of everything else baked into the graphs
+            (e.g. checkpoint identity, camera iterations); its hash is part of the name
+    """
+    name = f"{height}x{width}"
+    if config:
+        encoded = json.dumps(config, sort_keys=True, default=str).encode()
+        name += f"_{hashlib.sha256(encoded).hexdigest()[:12]}"
+    return Path(root) / name
+
+
+def _export(
+    module: nn.Module,
+    args: Tuple,
+    path: Path,
+    input_names: List[str],
+    output_names: List[str],
+    dynamic_inputs: List[str],
+    opset: int,
+) -> None:
+    """Export a module with a dynamic frame dimension (dim 1) on the given inputs"""
+    frames = torch.export.Dim.DYNAMIC
+    dynamic_shapes = tuple({1: frames} if name in dynamic_inputs else None for name in input_names)
+    torch.onnx.export(
+        module,
+        args,
+        str(path),
+        input_names=input_names,
+        output_names=output_names,
+        dynamic_shapes=dynamic_shapes,
+        opset_version=opset,
+        dynamo=True,
+    )
+
+
+def export_vggt_onnx(
+    model: nn.Module,
+    height: int,
+    width: int,
+    output_root: Path = ONNX_DIR,
+    camera_iterations: int = 4,
+    opset: int = 18,
+    config: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """
+    Export the aggregator and heads of a VGGT model to ONNX for one input resolution
+
+    Args:
+        model: VGGT model in eval mode with dense global attention (pooled and anchor modes are
+            rejected)
+        height, width: Preprocessed input size
+        output_root: Root directory; graphs go to onnx_dir_for(height, width, output_root, config)
+        camera_iterations: Camera head refinement iterations baked into the graph
+        opset: ONNX opset version
+        config: Export configuration identifying the model (see onnx_dir_for), stored in
+            the manifest
+
+    Returns:
+        Directory containing the graphs and manifest.json
+
+    Raises:
+        ValueError: If the aggregator is set to pooled or anchor global attention
+    """
+    aggregator = getattr(model.aggregator, 'aggregator', model.aggregator)
+    if (getattr(aggregator, 'global_pool_size', 1) > 1
+            or getattr(aggregator, 'global_num_anchors', 0) > 0
+            or getattr(aggregator, 'global_anchor_idx', None) is not None):
+        # Anchor selection is data-dependent and the pooled graph is not parity-tested
+        raise ValueError("Only dense global attention can be exported to ONNX")
+    patch_start_idx = aggregator.patch_start_idx
+    num_layers = aggregator.depth
+
+    layers = {num_layers - 1} if model.camera_head is not None else set()
+    for name in DPT_HEADS:
+        head = getattr(model, name, None)
+        if head is not None:
+            layers.update(head.intermediate_layer_idx)
+    layers = sorted(layers)
+    token_names = [f"tokens_{i}" for i in layers]
+
+    out_dir = onnx_dir_for(height, width, output_root, config)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    images = torch.rand(1, 2, 3, height, width)
+    manifest: Dict[str, Any] = {
+        "layers": layers,
+        "patch_start_idx": patch_start_idx,
+        "graphs": {},
+        "config": config or {},
+    }
+
+    with torch.no_grad():
+        tokens = _AggregatorGraph(aggregator, layers).eval()(images)
+        _export(
+            _AggregatorGraph(aggregator, layers).eval(),
+            (images,),
+            out_dir / "aggregator.onnx",
+            ["images"],
+            token_names,
+            ["images"],
+            opset,
+        )
+        manifest["graphs"]["aggregator"] = "aggregator.onnx"
+
+        if model.camera_head is not None:
+            last = layers.index(num_layers - 1)
+            _export(
+                _CameraHeadGraph(model.camera_head, camera_iterations).eval(),
+                (tokens[last],),
+                out_dir / "camera_head.onnx",
+                ["tokens"],
+                ["pose_enc"],
+                ["tokens"],
+                opset,
+            )
+            manifest["graphs"]["camera_head"] = "camera_head.onnx"
+            manifest["camera_iterations"] = camera_iterations
+
+        for name in DPT_HEADS:
+            head = getattr(model, name, None)
+            if head is None:
+                continue
+            head_layers = list(head.intermediate_layer_idx)
+            head_tokens = tuple(tokens[layers.index(i)] for i in head_layers)
+            input_names = ["images"] + [f"tokens_{j}" for j in range(len(head_layers))]
+            _export(
+                _DPTHeadGraph(head, head_layers, patch_start_idx).eval(),
+                (images,) + head_tokens,
+                out_dir / f"{name}.onnx",
+                input_names,
+                list(DPT_OUTPUTS[name]),
+                input_names,
+                opset,
+            )
+            manifest["graphs"][name] = f"{name}.onnx"
+            manifest[f"{name}_layers"] = head_layers
+
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return out_dir
+
+
+class OnnxVGGT:
+    """Runs exported VGGT graphs with ONNX Runtime"""
+
+    def __init__(
+        self,
+        onnx_dir: Path,
+        num_threads: Optional[int] = None,
+        providers: Tuple[str, ...] = ("CPUExecutionProvider",),
+    ):
+        """
+        Args:
+            onnx_dir: Directory written by export_vggt_onnx
+            num_threads: Intra-op threads for ONNX Runtime (default: ORT's choice)
+            providers: ONNX Runtime execution providers
+        """
+        import onnxruntime
+
+        self.onnx_dir = Path(onnx_dir)
+        self.manifest = json.loads((self.onnx_dir / MANIFEST_NAME).read_text())
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.sessions = {
+            name: onnxruntime.InferenceSession(
+                str(self.onnx_dir / file), options, providers=list(providers)
+            )
+            for name, file in self.manifest["graphs"].items()
+        }
+
+    def __call__(self, images: torch.Tensor, frames_chunk_size: int = 8) -> Dict[str, torch.Tensor]:
+        """
+        Run inference
+
+        Args:
+            images: [S, 3, H, W] or [1, S, 3, H, W] images in [0, 1]
+            frames_chunk_size: Frames per DPT head call
+
+        Returns:
+            Predictions dict with the same keys and shapes as VGGT.forward (lean outputs)
+        """
+        if images.ndim == 4:
+            images = images.unsqueeze(0)
+        images_np = images.detach().float().cpu().numpy()
+        S = images_np.shape[1]
+
+        layers = self.manifest["layers"]
+        tokens = dict(zip(layers, self.sessions["aggregator"].run(None, {"images": images_np})))
+
+        predictions: Dict[str, torch.Tensor] = {}
+        if "camera_head" in self.sessions:
+            pose_enc = self.sessions["camera_head"].run(None, {"tokens": tokens[layers[-1]]})[0]
+            predictions["pose_enc"] = torch.from_numpy(pose_enc)
+
+        for name in DPT_HEADS:
+            if name not in self.sessions:
+                continue
+            head_layers = self.manifest[f"{name}_layers"]
+            preds, confs = [], []
+            for start in range(0, S, frames_chunk_size):
+                end = min(start + frames_chunk_size, S)
+                feeds = {"images": images_np[:, start:end]}
+                feeds.update(
+                    {f"tokens_{j}": tokens[i][:, start:end] for j, i in enumerate(head_layers)}
+                )
+                pred, conf = self.sessions[name].run(None, feeds)
+                preds.append(pred)
+                confs.append(conf)
+            key, conf_key = DPT_OUTPUTS[name]
+            predictions[key] = torch.from_numpy(np.concatenate(preds, axis=1))
+            predictions[conf_key] = torch.from_numpy(np.concatenate(confs, axis=1))
+
+        return predictions
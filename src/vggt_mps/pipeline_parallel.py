@@ -0,0 +1,342 @@
+"""
+Pipeline-parallel VGGT inference across processes
+
+The model is cut into K contiguous stages (patch embedding, groups of
+frame+global block pairs, heads), balanced by parameter count, and each
+process of a torch.distributed group keeps only the weights of its stage.
+Scenes are micro-batches: while stage k works on scene i, stage k-1 already
+works on scene i+1, so throughput grows with the number of concurrent scenes
+and hosts with little RAM can serve the model together. Built on the meta
+device and given a memory-mapped checkpoint, a rank only ever reads the
+weights of its own stage.
+
+Between stages only the running tokens and the aggregator layers consumed
+by the heads are sent. Launch one process per stage, e.g.:
+
+    torchrun --nproc-per-node 3 -m vggt_mps.pipeline_parallel scene_a/ scene_b/ --output outputs/
+"""
+
+import argparse
+import gc
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+
+from .weight_streaming import assign_weights, open_checkpoint
+
+EMBED_UNIT = "embed"
+HEADS_UNIT = "heads"
+HEAD_NAMES = ("camera_head", "depth_head", "point_head")
+
+
+def _aggregator(model: nn.Module) -> nn.Module:
+    return getattr(model.aggregator, 'aggregator', model.aggregator)
+
+
+def _num_params(modules: Iterable[Optional[nn.Module]]) -> int:
+    return sum(p.numel() for m in modules if m is not None for p in m.parameters())
+
+
+def pipeline_units(model: nn.Module) -> List[str]:
+    """Ordered pipeline units: 'embed', 'layer0' ... 'layer{n-1}', 'heads'"""
+    aggregator = _aggregator(model)
+    return [EMBED_UNIT] + [f"layer{i}" for i in range(aggregator.aa_block_num)] + [HEADS_UNIT]
+
+
+def _unit_modules(model: nn.Module, unit: str) -> List[Optional[nn.Module]]:
+    aggregator = _aggregator(model)
+    if unit == EMBED_UNIT:
+        return [aggregator.patch_embed]
+    if unit == HEADS_UNIT:
+        return [getattr(model, name, None) for name in HEAD_NAMES]
+    i, size = int(unit[len("layer"):]), aggregator.aa_block_size
+    return list(aggregator.frame_blocks[i * size : (i + 1) * size]) + list(
+        aggregator.global_blocks[i * size : (i + 1) * size]
+    )
+
+
+def partition_units(model: nn.Module, num_stages: int) -> List[List[str]]:
+    """
+    Split the pipeline units into contiguous stages with balanced parameter counts
+
+    Raises:
+        ValueError: If there are more stages than units
+    """
+    units = pipeline_units(model)
+    if not 1 <= num_stages <= len(units):
+        raise ValueError(f"num_stages must be in [1, {len(units)}], got {num_stages}")
+
+    sizes = [_num_params(_unit_modules(model, unit)) for unit in units]
+    total = sum(sizes)
+    stages, current, done = [], [], 0
+    for i, (unit, size) in enumerate(zip(units, sizes)):
+        current.append(unit)
+        done += size
+        stages_left = num_stages - len(stages) - 1
+        units_left = len(units) - i - 1
+        # Close the stage at its share of the parameters, keeping one unit for every later stage
+        target = total * (len(stages) + 1) / num_stages
+        if stages_left and (done >= target or units_left == stages_left):
+            stages.append(current)
+            current = []
+    stages.append(current)
+    return stages
+
+
+def prune_to_stage(model: nn.Module, units: List[str]) -> nn.Module:
+    """Release the weights of every unit not owned by this stage (modifies the model in place)"""
+    aggregator = _aggregator(model)
+    owned = set(units)
+    if EMBED_UNIT not in owned:
+        aggregator.patch_embed = nn.Identity()
+    size = aggregator.aa_block_size
+    for i in range(aggregator.aa_block_num):
+        if f"layer{i}" not in owned:
+            for j in range(i * size, (i + 1) * size):
+                aggregator.frame_blocks[j] = nn.Identity()
+                aggregator.global_blocks[j] = nn.Identity()
+    if HEADS_UNIT not in owned:
+        for name in HEAD_NAMES + ("track_head",):
+            if getattr(model, name, None) is not None:
+                setattr(model, name, None)
+    gc.collect()
+    return model
+
+
+def _needed_layers(model: nn.Module) -> List[int]:
+    """Aggregator layers read by the heads (the camera head reads the last one)"""
+    aggregator = _aggregator(model)
+    layers = {aggregator.depth - 1}
+    for name in ("depth_head", "point_head"):
+        head = getattr(model, name, None)
+        if head is not None:
+            layers.update(head.intermediate_layer_idx)
+    return sorted(layers)
+
+
+def run_stage(
+    model: nn.Module,
+    units: List[str],
+    state: Dict[str, Any],
+    needed_layers: List[int],
+    frames_chunk_size: int = 8,
+) -> Dict[str, Any]:
+    """
+    Run this stage's units on one scene
+
+    Args:
+        model: (Pruned) VGGT model in eval mode
+        units: Units owned by this stage
+        state: {'images': [B, S, 3, H, W]} for the first stage, else the previous stage's output
+        needed_layers: Aggregator layers to carry forward for the heads
+
+    Returns:
+        State for the next stage, or the predictions dict after the heads
+    """
+    aggregator = _aggregator(model)
+    images = state["images"]
+    B, S, _, H, W = images.shape
+
+    with torch.no_grad():
+        for unit in units:
+            if unit == EMBED_UNIT:
+                tokens, pos, anchor_idx, pooled_pos = aggregator._prepare_tokens(images)
+                state.update(
+                    tokens=tokens, pos=pos, anchor_idx=anchor_idx, pooled_pos=pooled_pos, outputs={}
+                )
+            elif unit == HEADS_UNIT:
+                return _run_heads(model, state, frames_chunk_size)
+            else:
+                i = int(unit[len("layer"):])
+                tokens, pos = state["tokens"], state["pos"]
+                _, P, C = tokens.shape
+                tokens, _, frame_inter = aggregator._process_frame_attention(
+                    tokens, B, S, P, C, i * aggregator.aa_block_size, pos=pos
+                )
+                tokens, _, global_inter = aggregator._process_global_attention(
+                    tokens,
+                    B,
+                    S,
+                    P,
+                    C,
+                    i * aggregator.aa_block_size,
+                    pos=pos,
+                    patch_hw=(H // aggregator.patch_size, W // aggregator.patch_size),
+                    pooled_pos=state["pooled_pos"],
+                    anchor_idx=state["anchor_idx"],
+                )
+                for j, (f, g) in enumerate(zip(frame_inter, global_inter)):
+                    layer = i * aggregator.aa_block_size + j
+                    if layer in needed_layers:
+                        state["outputs"][layer] = torch.cat([f, g], dim=-1)
+                state["tokens"] = tokens.view(B * S, P, C)
+
+    return state
+
+
+def _run_heads(model: nn.Module, state: Dict[str, Any], frames_chunk_size: int) -> Dict[str, Any]:
+    aggregator = _aggregator(model)
+    outputs = state["outputs"]
+    tokens_list = [outputs.get(i) for i in range(aggregator.depth)]
+    images = state["images"]
+
+    predictions: Dict[str, Any] = {}
+    if model.camera_head is not None:
+        predictions["pose_enc"] = model.camera_head(
+            tokens_list,
+            num_iterations=getattr(model, 'camera_num_iterations', 4),
+            convergence_tol=getattr(model, 'camera_convergence_tol', None),
+            return_all=False,
+        )[-1]
+    for name, keys in (
+        ("depth_head", ("depth", "depth_conf")),
+        ("point_head", ("world_points", "world_points_conf")),
+    ):
+        head = getattr(model, name, None)
+        if head is not None:
+            predictions[keys[0]], predictions[keys[1]] = head(
+                tokens_list,
+                images=images,
+                patch_start_idx=aggregator.patch_start_idx,
+                frames_chunk_size=frames_chunk_size,
+            )
+    return predictions
+
+
+def run_vggt_pipeline(
+    model: nn.Module,
+    scenes: Optional[Iterable[torch.Tensor]] = None,
+    group=None,
+    frames_chunk_size: int = 8,
+    checkpoint: Optional[Mapping[str, torch.Tensor]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Pipeline-parallel inference over a stream of scenes; call on every rank of the group
+
+    Rank r runs stage r of partition_units(model, world_size) and prunes the model
+    to that stage. Scenes are only read on rank 0.
+
+    Args:
+        model: VGGT model in eval mode (same architecture on every rank). With a
+            checkpoint it is usually built on the meta device.
+        scenes: Iterable of [S, 3, H, W] or [B, S, 3, H, W] images (rank 0 only)
+        frames_chunk_size: DPT head frame chunk size
+        checkpoint: State dict (see weight_streaming.open_checkpoint) from which only
+            this stage's weights are loaded, after pruning
+
+    Returns:
+        Predictions for every scene, in order, on rank 0; None on other ranks
+    """
+    rank = dist.get_rank(group)
+    world_size = dist.get_world_size(group)
+    stages = partition_units(model, world_size)
+    needed_layers = _needed_layers(model)
+    prune_to_stage(model, stages[rank])
+    if checkpoint is not None:
+        assign_weights(model, checkpoint)
+    units = stages[rank]
+    last = world_size - 1
+
+    def global_rank(r: int) -> int:
+        return dist.get_global_rank(group, r) if group is not None else r
+
+    if rank == 0:
+        results = []
+        for images in scenes:
+            if images.ndim == 4:
+                images = images.unsqueeze(0)
+            state = run_stage(model, units, {"images": images}, needed_layers, frames_chunk_size)
+            if world_size == 1:
+                results.append(state)
+            else:
+                dist.send_object_list([state], dst=global_rank(1), group=group)
+        if world_size == 1:
+            return results
+        dist.send_object_list([None], dst=global_rank(1), group=group)
+
+        # The last stage returns all predictions once the stream ends (avoids a send cycle)
+        received = [None]
+        dist.recv_object_list(received, src=global_rank(last), group=group)
+        return received[0]
+
+    results = []
+    while True:
+        received = [None]
+        dist.recv_object_list(received, src=global_rank(rank - 1), group=group)
+        state = received[0]
+        if state is None:
+            break
+        state = run_stage(model, units, state, needed_layers, frames_chunk_size)
+        if rank == last:
+            results.append(state)
+        else:
+            dist.send_object_list([state], dst=global_rank(rank + 1), group=group)
+
+    if rank == last:
+        dist.send_object_list([results], dst=global_rank(0), group=group)
+    else:
+        dist.send_object_list([None], dst=global_rank(rank + 1), group=group)
+    return None
+
+
+def main() -> None:
+    """torchrun entry point: reconstruct several scenes and save predictions from rank 0"""
+    import numpy as np
+
+    parser = argparse.ArgumentParser(
+        description="Pipeline-parallel VGGT inference (launch with torchrun)"
+    )
+    parser.add_argument("scenes", nargs="+", help="Scene directories, one micro-batch each")
+    parser.add_argument("--output", type=str, default="outputs", help="Output directory")
+    parser.add_argument("--model-size", choices=["1b", "base", "small"], default="1b",
+                        help="Model size (base / small: distilled students in models/)")
+    parser.add_argument("--weights", type=str, default=None,
+                        help="Model checkpoint (default: the local checkpoint of --model-size)")
+    args = parser.parse_args()
+
+    dist.init_process_group(backend="gloo")
+    try:
+        from .config import MODEL_SIZES, REPO_DIR, get_model_path
+
+        if str(REPO_DIR / "vggt") not in sys.path:
+            sys.path.insert(0, str(REPO_DIR / "vggt"))
+        from vggt.models.vggt import VGGT
+        from vggt.utils.load_fn import load_and_preprocess_images
+
+        checkpoint_path = Path(args.weights) if args.weights else get_model_path(args.model_size)
+        if not checkpoint_path.exists():
+            raise RuntimeError(
+                f"Model checkpoint not found: {checkpoint_path}. Run 'vggt download' first."
+            )
+        # Every rank builds the model without weights and reads only its stage's keys
+        with torch.device("meta"):
+            model = VGGT(**MODEL_SIZES[args.model_size]["kwargs"]).eval()
+
+        scene_dirs = [Path(scene) for scene in args.scenes]
+        scenes = None
+        if dist.get_rank() == 0:
+            scenes = (
+                load_and_preprocess_images(
+                    sorted(str(p) for ext in ("*.jpg", "*.jpeg", "*.png") for p in d.glob(ext))
+                )
+                for d in scene_dirs
+            )
+        results = run_vggt_pipeline(model, scenes, checkpoint=open_checkpoint(checkpoint_path))
+
+        if dist.get_rank() == 0:
+            output_dir = Path(args.output)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for scene_dir, predictions in zip(scene_dirs, results):
+                output = output_dir / f"{scene_dir.name}_predictions.npz"
+                np.savez(output, **{k: v.cpu().float().numpy() for k, v in predictions.items()})
+                print(f"✅ Saved {output}")
+    finally:
+        dist.destroy_process_group()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+OOM-resilient VGGT execution
+
+Runs VGGT stage by stage (aggregator, camera head, depth head, point head,
+tracking). When a stage runs out of memory it is retried with progressively
+cheaper settings: smaller frame chunks for the DPT heads, smaller query chunks
+for tracking, and pooled / anchor-frame global attention for the aggregator.
+The degraded mode used for every stage is reported back to the caller.
+"""
+
+import gc
+import torch
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Substrings of allocation failure messages across CUDA, MPS and CPU allocators
+OOM_MARKERS = (
+    "out of memory",
+    "can't allocate memory",
+    "cannot allocate memory",
+    "not enough memory",
+)
+
+# Default retry ladders, from most to least memory hungry
+HEAD_CHUNK_SIZES = [8, 4, 2, 1]
+TRACK_CHUNK_SIZES = [None, 1024, 256, 64]
+
+
+class InferenceOOMError(RuntimeError):
+    """Raised when a stage runs out of memory in every degraded mode"""
+
+    def __init__(self, stage: str, modes: List[str]):
+        self.stage = stage
+        self.modes = modes
+        super().__init__(f"Stage '{stage}' ran out of memory in all modes: {', '.join(modes)}")
+
+
+def is_oom_error(error: BaseException) -> bool:
+    """Check whether an exception is an allocation failure"""
+    if isinstance(error, MemoryError):
+        return True
+    if hasattr(torch, "OutOfMemoryError") and isinstance(error, torch.OutOfMemoryError):
+        return True
+    if isinstance(error, RuntimeError):
+        message = str(error).lower()
+        return any(marker in message for marker in OOM_MARKERS)
+    return False
+
+
+def free_memory(device: Optional[torch.device] = None) -> None:
+    """Release cached allocator memory after a failed attempt"""
+    gc.collect()
+    if device is None:
+        return
+    if device.type == "cuda":
+        torch.cuda.empty_cache()
+    elif device.type == "mps" and hasattr(torch, "mps"):
+        torch.mps.empty_cache()
+
+
+def run_with_retries(
+    stage: str,
+    attempts: List[Tuple[str, Callable[[], Any]]],
+    report: Dict[str, Dict[str, Any]],
+    device: Optional[torch.device] = None,
+) -> Any:
+    """
+    Run the first attempt that does not run out of memory
+
+    Args:
+        stage: Stage name used in the report and in error messages
+        attempts: (mode description, callable) pairs, cheapest last
+        report: Dict updated with {stage: {'mode': ..., 'degraded': ...}} for the
+            attempt that succeeded
+        device: Device whose cache is emptied between attempts
+
+    Returns:
+        Result of the successful attempt
+
+    Raises:
+        InferenceOOMError: If every attempt runs out of memory
+        Exception: Any non-OOM error is re-raised unchanged
+    """
+    tried = []
+    for mode, fn in attempts:
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_oom_error(e):
+                raise
+            print(f"⚠️ {stage}: out of memory in mode '{mode}', retrying with a cheaper mode")
+            tried.append(mode)
+            free_memory(device)
+            continue
+
+        report[stage] = {'mode': mode, 'degraded': bool(tried)}
+        if tried:
+            print(f"   {stage}: completed in degraded mode '{mode}'")
+        return result
+
+    raise InferenceOOMError(stage, tried)
+
+
+def _aggregator_attempts(
+    aggregator: torch.nn.Module, images: torch.Tensor
+) -> List[Tuple[str, Callable[[], Any]]]:
+    """Build the aggregator retry ladder: configured mode, then pooled, then anchor frames"""
+    S = images.shape[1]
+    base = {
+        'global_pool_size': getattr(aggregator, 'global_pool_size', 1),
+        'global_num_anchors': getattr(aggregator, 'global_num_anchors', 0),
+    }
+
+    def describe(settings: Dict[str, int]) -> str:
+        if settings['global_num_anchors'] > 0:
+            return f"anchors={settings['global_num_anchors']}"
+        if settings['global_pool_size'] > 1:
+            return f"pooled={settings['global_pool_size']}x{settings['global_pool_size']}"
+        return "dense"
+
+    ladder = [base]
+    if hasattr(aggregator, 'global_pool_size') and base['global_num_anchors'] == 0:
+        ladder.append(
+            {'global_pool_size': max(2, base['global_pool_size'] * 2), 'global_num_anchors': 0}
+        )
+    if hasattr(aggregator, 'global_num_anchors'):
+        for num_anchors in (8, 4, 2):
+            if num_anchors < S and (
+                base['global_num_anchors'] == 0 or num_anchors < base['global_num_anchors']
+            ):
+                ladder.append({'global_pool_size': 1, 'global_num_anchors': num_anchors})
+
+    def make_attempt(settings: Dict[str, int]) -> Callable[[], Any]:
+        def attempt():
+            for name, value in settings.items():
+                if hasattr(aggregator, name):
+                    setattr(aggregator, name, value)
+            try:
+                return aggregator(images)
+            finally:
+                for name, value in base.items():
+                    if hasattr(aggregator, name):
+                        setattr(aggregator, name, value)
+
+        return attempt
+
+    return [(describe(settings), make_attempt(settings)) for settings in ladder]
+
+
+def _dpt_attempts(
+    head: torch.nn.Module,
+    tokens_list: List[torch.Tensor],
+    images: torch.Tensor,
+    patch_start_idx: int,
+    frames_chunk_size: int = 8,
+):
+    """Build the DPT head retry ladder over frame chunk sizes, starting at frames_chunk_size"""
+    S = images.shape[1]
+    ladder = [frames_chunk_size] + [c for c in HEAD_CHUNK_SIZES if c < frames_chunk_size]
+    chunk_sizes = list(dict.fromkeys(min(c, S) for c in ladder))
+
+    def make_attempt(chunk: int) -> Callable[[], Any]:
+        return lambda: head(
+            tokens_list, images=images, patch_start_idx=patch_start_idx, frames_chunk_size=chunk
+        )
+
+    return [(f"frames_chunk={c}", make_attempt(c)) for c in chunk_sizes]
+
+
+def _track_attempts(track_head, tokens_list, images, patch_start_idx, query_points):
+    """
+    Build the tracking retry ladder over query point chunk sizes, sharing the feature maps
+
+    The tracker's space attention mixes the query points of a call, so chunked
+    tracks are close to, but not identical with, tracking all queries at once.
+    """
+    state = {}
+
+    def run(chunk: Optional[int]):
+        if 'feature_maps' not in state:
+            state['feature_maps'] = track_head.extract_features(
+                tokens_list, images, patch_start_idx
+            )
+        fmaps = state['feature_maps']
+
+        N = query_points.shape[1]
+        chunk = N if chunk is None else chunk
+        tracks, vis, conf = [], [], []
+        for start in range(0, N, chunk):
+            coord_preds, vis_scores, conf_scores = track_head.track(
+                fmaps, query_points[:, start : start + chunk]
+            )
+            tracks.append(coord_preds[-1])
+            vis.append(vis_scores)
+            conf.append(conf_scores)
+
+        return (
+            torch.cat(tracks, dim=2),
+            torch.cat(vis, dim=2),
+            torch.cat(conf, dim=2) if conf[0] is not None else None,
+        )
+
+    N = query_points.shape[1]
+    chunk_sizes = [c for c in TRACK_CHUNK_SIZES if c is None or c < N]
+    return [
+        ("all_queries" if c is None else f"query_chunk={c}", (lambda c=c: run(c)))
+        for c in chunk_sizes
+    ]
+
+
+def run_vggt_resilient(
+    model: torch.nn.Module,
+    images: torch.Tensor,
+    query_points: Optional[torch.Tensor] = None,
+    device: Optional[torch.device] = None,
+    frames_chunk_size: int = 8,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Run VGGT inference stage by stage with split-and-retry on allocation failures
+
+    Mirrors VGGT.forward in eval mode. The model's inference options (camera
+    refinement, lean outputs, output dtype) are honoured.
+
+    Args:
+        model: VGGT model in eval mode
+        images: [S, 3, H, W] or [B, S, 3, H, W] images in [0, 1]
+        query_points: Optional [N, 2] or [B, N, 2] query points for tracking
+        device: Device used to empty allocator caches between attempts
+        frames_chunk_size: Frames per DPT head call in the first attempt
+
+    Returns:
+        Tuple of (predictions dict, report mapping stage -> {'mode', 'degraded'})
+
+    Raises:
+        InferenceOOMError: If a stage runs out of memory in every mode
+    """
+    if images.ndim == 4:
+        images = images.unsqueeze(0)
+    if query_points is not None and query_points.ndim == 2:
+        query_points = query_points.unsqueeze(0)
+
+    report: Dict[str, Dict[str, Any]] = {}
+    predictions: Dict[str, Any] = {}
+    lean = getattr(model, 'lean_outputs', False)
+
+    # Sparse attention wrapper (see vggt_sparse_attention) needs its mask for this batch
+    if hasattr(model.aggregator, 'set_covisibility_mask'):
+        model.aggregator.set_covisibility_mask(images)
+
+    aggregated_tokens_list, patch_start_idx = run_with_retries(
+        "aggregator", _aggregator_attempts(model.aggregator, images), report, device
+    )
+
+    with torch.cuda.amp.autocast(enabled=False):
+        if model.camera_head is not None:
+            keep_all = getattr(model, 'keep_pose_enc_list', True) and not lean
+            pose_enc_list = run_with_retries(
+                "camera_head",
+                [
+                    (
+                        "default",
+                        lambda: model.camera_head(
+                            aggregated_tokens_list,
+                            num_iterations=getattr(model, 'camera_num_iterations', 4),
+                            convergence_tol=getattr(model, 'camera_convergence_tol', None),
+                            return_all=keep_all,
+                        ),
+                    )
+                ],
+                report,
+                device,
+            )
+            predictions["pose_enc"] = pose_enc_list[-1]
+            if keep_all:
+                predictions["pose_enc_list"] = pose_enc_list
+
+        if model.depth_head is not None:
+            predictions["depth"], predictions["depth_conf"] = run_with_retries(
+                "depth_head",
+                _dpt_attempts(
+                    model.depth_head, aggregated_tokens_list, images, patch_start_idx,
+                    frames_chunk_size,
+                ),
+                report,
+                device,
+            )
+
+        if model.point_head is not None:
+            predictions["world_points"], predictions["world_points_conf"] = run_with_retries(
+                "point_head",
+                _dpt_attempts(
+                    model.point_head, aggregated_tokens_list, images, patch_start_idx,
+                    frames_chunk_size,
+                ),
+                report,
+                device,
+            )
+
+    if model.track_head is not None and query_points is not None:
+        predictions["track"], predictions["vis"], predictions["conf"] = run_with_retries(
+            "track_head",
+            _track_attempts(
+                model.track_head, aggregated_tokens_list, images, patch_start_idx, query_points
+            ),
+            report,
+            device,
+        )
+
+    output_dtype = getattr(model, 'output_dtype', None)
+    if output_dtype is not None:
+        for key in ("depth", "world_points"):
+            if key in predictions:
+                predictions[key] = predictions[key].to(output_dtype)
+
+    if not lean:
+        predictions["images"] = images
+
+    return predictions, report
@@ -0,0 +1,304 @@
+"""
+Sequence-parallel VGGT inference across processes
+
+Frames are sharded contiguously across the processes of a torch.distributed
+group (gloo backend on CPU). Patch embedding, frame attention and the DPT
+heads only touch local frames. Global attention uses ring attention: every
+process keeps its queries and passes its K/V shard around the ring, merging
+partial results with an online softmax, so no process ever holds the full
+S*P x S*P attention or all frames' tokens. The camera head only needs one
+pose token per frame, which is all-gathered.
+
+Results equal single-process inference up to floating point summation
+order. Launch one process per shard, e.g.:
+
+    torchrun --nproc-per-node 2 -m vggt_mps.sequence_parallel data/*.jpg --output outputs/sp.npz
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+import torch.distributed as dist
+
+
+def shard_frames(num_frames: int, world_size: int) -> List[Tuple[int, int]]:
+    """
+    Contiguous [start, end) frame ranges, one per rank, sizes differing by at most one
+
+    Raises:
+        ValueError: If there are fewer frames than ranks
+    """
+    if num_frames < world_size:
+        raise ValueError(f"Cannot shard {num_frames} frames across {world_size} processes")
+    base, extra = divmod(num_frames, world_size)
+    bounds, start = [], 0
+    for rank in range(world_size):
+        end = start + base + (1 if rank < extra else 0)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def all_gather_frames(
+    tensor: torch.Tensor, bounds: List[Tuple[int, int]], group=None
+) -> torch.Tensor:
+    """All-gather per-rank frame shards along dim 1 (shards may differ in size)"""
+    max_frames = max(end - start for start, end in bounds)
+    pad = max_frames - tensor.shape[1]
+    if pad > 0:
+        tensor = torch.cat(
+            [tensor, tensor.new_zeros(tensor.shape[0], pad, *tensor.shape[2:])], dim=1
+        )
+
+    gathered = [torch.empty_like(tensor) for _ in bounds]
+    dist.all_gather(gathered, tensor.contiguous(), group=group)
+    return torch.cat([g[:, : end - start] for g, (start, end) in zip(gathered, bounds)], dim=1)
+
+
+def ring_attention(
+    q: torch.Tensor, k: torch.Tensor, v: torch.Tensor, kv_lengths: List[int], group=None
+) -> torch.Tensor:
+    """
+    Attention of local queries over the K/V shards of every rank in the group
+
+    Args:
+        q, k, v: Local (B, heads, N_local, head_dim) tensors
+        kv_lengths: Number of K/V tokens held by each rank
+
+    Returns:
+        (B, heads, N_local, head_dim) attention output
+    """
+    rank = dist.get_rank(group)
+    world_size = dist.get_world_size(group)
+    send_to, recv_from = (rank + 1) % world_size, (rank - 1) % world_size
+    scale = q.shape[-1] ** -0.5
+
+    kv = torch.stack([k, v]).contiguous()
+    row_max = q.new_full((*q.shape[:-1], 1), float("-inf"))
+    row_sum = q.new_zeros((*q.shape[:-1], 1))
+    out = torch.zeros_like(q)
+
+    for step in range(world_size):
+        requests = []
+        if step < world_size - 1:
+            # The shard held after this step started on rank (rank - step - 1)
+            src_len = kv_lengths[(rank - step - 1) % world_size]
+            recv_buf = kv.new_empty(kv.shape[0], *kv.shape[1:3], src_len, kv.shape[-1])
+            requests = [
+                dist.isend(kv, send_to, group=group),
+                dist.irecv(recv_buf, recv_from, group=group),
+            ]
+
+        scores = torch.matmul(q, kv[0].transpose(-2, -1)) * scale
+        new_max = torch.maximum(row_max, scores.amax(dim=-1, keepdim=True))
+        probs = torch.exp(scores - new_max)
+        correction = torch.exp(row_max - new_max)
+        row_sum = row_sum * correction + probs.sum(dim=-1, keepdim=True)
+        out = out * correction + torch.matmul(probs, kv[1])
+        row_max = new_max
+
+        for request in requests:
+            request.wait()
+        if requests:
+            kv = recv_buf
+
+    return out / row_sum
+
+
+def _ring_global_block(
+    block, tokens: torch.Tensor, pos: Optional[torch.Tensor], kv_lengths: List[int], group=None
+):
+    """Global attention block over all ranks' tokens; same math as Block.forward in eval mode"""
+    B, N, C = tokens.shape
+    q, k, v = block.attn.project_qkv(block.norm1(tokens), pos=pos)
+    attn = ring_attention(q, k, v, kv_lengths, group)
+    attn = block.attn.proj(attn.transpose(1, 2).reshape(B, N, C))
+    tokens = tokens + block.ls1(attn)
+    return tokens + block.ls2(block.mlp(block.norm2(tokens)))
+
+
+def _local_special_tokens(token: torch.Tensor, B: int, start: int, end: int) -> torch.Tensor:
+    """Camera / register tokens for frames [start, end); global frame 0 uses the first slot"""
+    first = token[:, 0:1].expand(B, 1, *token.shape[2:])
+    others = token[:, 1:].expand(B, end - start, *token.shape[2:])
+    combined = torch.cat([first, others[:, 1:]], dim=1) if start == 0 else others
+    return combined.reshape(B * (end - start), *token.shape[2:])
+
+
+def run_aggregator_sequence_parallel(
+    aggregator: torch.nn.Module,
+    images: torch.Tensor,
+    bounds: List[Tuple[int, int]],
+    group=None,
+) -> Tuple[List[torch.Tensor], int]:
+    """
+    Aggregator forward for this rank's frames (dense global attention, eval mode)
+
+    Args:
+        aggregator: VGGT Aggregator
+        images: [B, S_local, 3, H, W] local frames
+        bounds: Frame ranges of all ranks (see shard_frames)
+
+    Returns:
+        Local intermediate outputs [B, S_local, P, 2C] and patch_start_idx
+    """
+    rank = dist.get_rank(group)
+    start, end = bounds[rank]
+    B, S, C_in, H, W = images.shape
+
+    images = (images - aggregator._resnet_mean) / aggregator._resnet_std
+    patch_tokens = aggregator.patch_embed(images.view(B * S, C_in, H, W))
+    if isinstance(patch_tokens, dict):
+        patch_tokens = patch_tokens["x_norm_patchtokens"]
+
+    camera_token = _local_special_tokens(aggregator.camera_token, B, start, end)
+    register_token = _local_special_tokens(aggregator.register_token, B, start, end)
+    tokens = torch.cat([camera_token, register_token, patch_tokens], dim=1)
+
+    pos = None
+    if aggregator.rope is not None:
+        pos = aggregator.position_getter(
+            B * S, H // aggregator.patch_size, W // aggregator.patch_size, device=images.device
+        )
+        if aggregator.patch_start_idx > 0:
+            pos = pos + 1
+            pos_special = torch.zeros(
+                B * S, aggregator.patch_start_idx, 2, device=images.device, dtype=pos.dtype
+            )
+            pos = torch.cat([pos_special, pos], dim=1)
+
+    _, P, C = tokens.shape
+    kv_lengths = [(e - s) * P for s, e in bounds]
+    global_pos = pos.view(B, S * P, 2) if pos is not None else None
+
+    frame_idx = 0
+    global_idx = 0
+    output_list = []
+    for _ in range(aggregator.aa_block_num):
+        frame_intermediates, global_intermediates = [], []
+        for attn_type in aggregator.aa_order:
+            if attn_type == "frame":
+                tokens, frame_idx, frame_intermediates = aggregator._process_frame_attention(
+                    tokens, B, S, P, C, frame_idx, pos=pos
+                )
+            elif attn_type == "global":
+                tokens = tokens.view(B, S * P, C)
+                for _ in range(aggregator.aa_block_size):
+                    tokens = _ring_global_block(
+                        aggregator.global_blocks[global_idx], tokens, global_pos, kv_lengths, group
+                    )
+                    global_idx += 1
+                    global_intermediates.append(tokens.view(B, S, P, C))
+            else:
+                raise ValueError(f"Unknown attention type: {attn_type}")
+
+        for frame_inter, global_inter in zip(frame_intermediates, global_intermediates):
+            output_list.append(torch.cat([frame_inter, global_inter], dim=-1))
+
+    return output_list, aggregator.patch_start_idx
+
+
+def run_vggt_sequence_parallel(
+    model: torch.nn.Module,
+    images: torch.Tensor,
+    group=None,
+    frames_chunk_size: int = 8,
+) -> Dict[str, Any]:
+    """
+    Sequence-parallel VGGT inference; call on every rank of the group with the same inputs
+
+    Args:
+        model: VGGT model in eval mode (identical weights on every rank)
+        images: [S, 3, H, W] or [B, S, 3, H, W] images in [0, 1]; each rank only uses its shard
+        frames_chunk_size: DPT head frame chunk size
+
+    Returns:
+        Predictions for all frames (pose_enc, depth, depth_conf, world_points,
+        world_points_conf), gathered on every rank
+    """
+    if images.ndim == 4:
+        images = images.unsqueeze(0)
+    aggregator = getattr(model.aggregator, 'aggregator', model.aggregator)
+    bounds = shard_frames(images.shape[1], dist.get_world_size(group))
+    start, end = bounds[dist.get_rank(group)]
+    local_images = images[:, start:end]
+
+    with torch.no_grad():
+        tokens_list, patch_start_idx = run_aggregator_sequence_parallel(
+            aggregator, local_images, bounds, group
+        )
+
+        predictions: Dict[str, Any] = {}
+        if model.camera_head is not None:
+            # The camera head only reads the camera token of the last layer
+            pose_tokens = all_gather_frames(tokens_list[-1][:, :, :1], bounds, group)
+            predictions["pose_enc"] = model.camera_head(
+                [pose_tokens],
+                num_iterations=getattr(model, 'camera_num_iterations', 4),
+                convergence_tol=getattr(model, 'camera_convergence_tol', None),
+                return_all=False,
+            )[-1]
+
+        for head_name, keys in (
+            ("depth_head", ("depth", "depth_conf")),
+            ("point_head", ("world_points", "world_points_conf")),
+        ):
+            head = getattr(model, head_name, None)
+            if head is None:
+                continue
+            pred, conf = head(
+                tokens_list,
+                images=local_images,
+                patch_start_idx=patch_start_idx,
+                frames_chunk_size=frames_chunk_size,
+            )
+            predictions[keys[0]] = all_gather_frames(pred, bounds, group)
+            predictions[keys[1]] = all_gather_frames(conf, bounds, group)
+
+    return predictions
+
+
+def main() -> None:
+    """torchrun entry point: reconstruct a scene and save predictions from rank 0"""
+    import numpy as np
+
+    parser = argparse.ArgumentParser(
+        description="Sequence-parallel VGGT inference (launch with torchrun)"
+    )
+    parser.add_argument("images", nargs="+", help="Image files to process")
+    parser.add_argument(
+        "--output", type=str, default="outputs/sequence_parallel.npz", help="Output .npz file"
+    )
+    args = parser.parse_args()
+
+    dist.init_process_group(backend="gloo")
+    try:
+        from .config import REPO_DIR
+        from .vggt_core import VGGTProcessor
+
+        if str(REPO_DIR / "vggt") not in sys.path:
+            sys.path.insert(0, str(REPO_DIR / "vggt"))
+        from vggt.utils.load_fn import load_and_preprocess_images
+
+        processor = VGGTProcessor(device="cpu")
+        processor.load_model()
+        if processor.model is None:
+            raise RuntimeError("VGGT model could not be loaded. Run 'vggt download' first.")
+
+        images = load_and_preprocess_images(sorted(args.images))
+        predictions = run_vggt_sequence_parallel(processor.model, images)
+
+        if dist.get_rank() == 0:
+            output = Path(args.output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(output, **{k: v.cpu().float().numpy() for k, v in predictions.items()})
+            print(f"✅ Saved predictions for {images.shape[0]} frames to {output}")
+    finally:
+        dist.destroy_process_group()
+
+
+if __name__ == "__main__":
+    main()
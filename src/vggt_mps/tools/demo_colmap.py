@@ -56,7 +56,8 @@ def vggt_reconstruct_3d_scene_simplified(
 ) -> dict:
     """
     Perform simplified 3D scene reconstruction from images using VGGT model following tutorial approach.
-    Input is scene directory with images subdirectory and output is visualizations, point cloud, and optional COLMAP reconstruction.
+    Input is scene directory with images subdirectory and output is visualizations, point cloud,
+    and COLMAP reconstruction.
     """
     # Configure matplotlib for high-resolution outputs
     plt.rcParams["figure.dpi"] = 300
@@ -81,17 +82,10 @@ def vggt_reconstruct_3d_scene_simplified(
         from vggt.utils.pose_enc import pose_encoding_to_extri_intri
         from vggt.utils.geometry import unproject_depth_map_to_point_map
         from vggt.utils.helper import create_pixel_coordinate_grid, randomly_limit_trues
+        from vggt.dependency.colmap_writer import write_colmap_wo_track
     except ImportError as e:
         raise ImportError(f"VGGT modules not available: {e}")
 
-    # Try to import COLMAP modules (optional for this simplified demo)
-    try:
-        import pycolmap
-        from vggt.dependency.np_to_pycolmap import batch_np_matrix_to_pycolmap_wo_track
-        COLMAP_AVAILABLE = True
-    except ImportError:
-        COLMAP_AVAILABLE = False
-
     # Set seed for reproducibility
     np.random.seed(seed)
     torch.manual_seed(seed)
@@ -306,11 +300,13 @@ def vggt_reconstruct_3d_scene_simplified(
             "path": str(pointcloud_vis_path.resolve())
         })
 
-    # Convert to COLMAP format if available
+    # Save sparse reconstruction in COLMAP binary format (written directly, no pycolmap needed)
     reconstruction = None
-    if COLMAP_AVAILABLE and len(filtered_points_3d) > 0:
+    if len(filtered_points_3d) > 0:
+        sparse_dir = output_dir / "sparse"
         try:
-            reconstruction = batch_np_matrix_to_pycolmap_wo_track(
+            reconstruction = write_colmap_wo_track(
+                sparse_dir,
                 filtered_points_3d,
                 filtered_points_xyf,
                 filtered_points_rgb,
@@ -320,22 +316,12 @@ def vggt_reconstruct_3d_scene_simplified(
                 shared_camera=shared_camera,
                 camera_type=camera_type,
             )
-        except Exception as e:
-            reconstruction = None
-
-    # Save sparse reconstruction if COLMAP is available
-    if reconstruction is not None:
-        sparse_dir = output_dir / "sparse"
-        sparse_dir.mkdir(parents=True, exist_ok=True)
-
-        try:
-            reconstruction.write(str(sparse_dir))
             artifacts.append({
                 "description": "COLMAP sparse reconstruction",
                 "path": str(sparse_dir.resolve())
             })
         except Exception:
-            pass
+            reconstruction = None
 
     # Save point cloud as PLY file for visualization
     if len(filtered_points_3d) > 0:
@@ -387,9 +373,9 @@ def vggt_reconstruct_3d_scene_simplified(
 
     # Reconstruction info
     if reconstruction is not None:
-        summary_data.append(["colmap_num_cameras", len(reconstruction.cameras)])
-        summary_data.append(["colmap_num_images", len(reconstruction.images)])
-        summary_data.append(["colmap_num_3d_points", len(reconstruction.points3D)])
+        summary_data.append(["colmap_num_cameras", reconstruction["num_cameras"]])
+        summary_data.append(["colmap_num_images", reconstruction["num_images"]])
+        summary_data.append(["colmap_num_3d_points", reconstruction["num_points3D"]])
 
     summary_df = pd.DataFrame(summary_data, columns=["parameter", "value"])
     summary_path = output_dir / "reconstruction_summary.csv"
@@ -45,6 +45,41 @@ timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 # MCP server instance
 readme_mcp = FastMCP(name="readme")
 
+# Track sessions of the most recent scenes, so that tracking new query points on the same
+# images only runs the tracker (see vggt_visualize_point_tracks)
+_TRACK_SESSIONS = {}
+_MAX_TRACK_SESSIONS = 2
+
+
+def _get_track_session(image_paths, device, log_messages):
+    """Return the cached track session of these images, or a new one holding the model"""
+    from vggt.models.track_session import TrackSession
+    from vggt.models.vggt import VGGT
+    from vggt.utils.load_fn import load_and_preprocess_images
+
+    # Edited images invalidate the cached features
+    key = (device, tuple((path, os.path.getmtime(path)) for path in image_paths))
+    if key in _TRACK_SESSIONS:
+        log_messages.append("Reusing cached scene features, only running the tracker")
+        _TRACK_SESSIONS[key] = _TRACK_SESSIONS.pop(key)  # most recently used last
+        return _TRACK_SESSIONS[key]
+
+    # Share the model with the sessions of other scenes on the same device
+    model = next((s.model for (d, _), s in _TRACK_SESSIONS.items() if d == device), None)
+    if model is None:
+        log_messages.append("Loading VGGT model...")
+        model = VGGT.from_pretrained("facebook/VGGT-1B").to(device)
+        log_messages.append("Model loaded successfully!")
+
+    log_messages.append("Loading and preprocessing images...")
+    images = load_and_preprocess_images(image_paths).to(device)
+    log_messages.append(f"Loaded images with shape: {images.shape}")
+
+    _TRACK_SESSIONS[key] = TrackSession(model, images)
+    while len(_TRACK_SESSIONS) > _MAX_TRACK_SESSIONS:
+        _TRACK_SESSIONS.pop(next(iter(_TRACK_SESSIONS)))
+    return _TRACK_SESSIONS[key]
+
 @readme_mcp.tool
 def vggt_quick_start_inference(
     # Primary data inputs
@@ -674,26 +709,17 @@ def vggt_visualize_point_tracks(
     image_paths = [str(images_directory / img) for img in image_files]
     log_messages.append(f"Found {len(image_files)} images: {image_files}")
 
-    # Initialize the model
-    log_messages.append("Loading VGGT model...")
-    model = VGGT.from_pretrained("facebook/VGGT-1B").to(device)
-    log_messages.append("Model loaded successfully!")
-
-    # Load and preprocess the images
-    log_messages.append("Loading and preprocessing images...")
-    images = load_and_preprocess_images(image_paths).to(device)
-    log_messages.append(f"Loaded images with shape: {images.shape}")
+    # Reuse the model and scene features of an earlier call on the same images
+    session = _get_track_session(image_paths, device, log_messages)
+    images = session.images[0]
 
     log_messages.append("Running VGGT inference for point tracking...")
 
     with torch.no_grad():
         with torch.amp.autocast('cuda', dtype=dtype) if torch.cuda.is_available() else torch.amp.autocast('cpu'):
-            images_batch = images[None]  # add batch dimension
-            aggregated_tokens_list, ps_idx = model.aggregator(images_batch)
-            
-            # Predict Tracks
+            # Predict Tracks, the aggregator and feature extractor only run for a new scene
             query_points_tensor = torch.FloatTensor(query_points).to(device)
-            track_list, vis_score, conf_score = model.track_head(aggregated_tokens_list, images_batch, ps_idx, query_points=query_points_tensor[None])
+            track_list, vis_score, conf_score = session.track(query_points_tensor)
 
     log_messages.append("Visualizing point tracks...")
 
@@ -0,0 +1,78 @@
+"""
+Accuracy comparison utilities for approximate inference modes
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Union
+
+
+def _as_depth_list(result: Union[List[np.ndarray], Dict[str, Any]]) -> List[np.ndarray]:
+    """Extract depth maps from a VGGTProcessor result (dict or list fallback)"""
+    if isinstance(result, dict):
+        return [np.asarray(d) for d in result.get('depth_maps', [])]
+    return [np.asarray(d) for d in result]
+
+
+def compare_depth_maps(
+    reference: List[np.ndarray], candidate: List[np.ndarray], eps: float = 1e-6
+) -> Dict[str, float]:
+    """
+    Compare candidate depth maps against a reference
+
+    Args:
+        reference: Depth maps from the reference (dense, fp32) run
+        candidate: Depth maps from the approximate run
+        eps: Small value to avoid division by zero
+
+    Returns:
+        Dict with abs_rel, rmse and delta_1 (fraction of pixels with max ratio < 1.25)
+
+    Raises:
+        ValueError: If the number or shapes of the depth maps differ
+    """
+    if len(reference) != len(candidate):
+        raise ValueError(f"Expected {len(reference)} depth maps, got {len(candidate)}")
+
+    ref = np.stack([np.asarray(d, dtype=np.float64) for d in reference])
+    cand = np.stack([np.asarray(d, dtype=np.float64) for d in candidate])
+    if ref.shape != cand.shape:
+        raise ValueError(f"Depth shape mismatch: {ref.shape} vs {cand.shape}")
+
+    valid = np.isfinite(ref) & np.isfinite(cand) & (ref > eps)
+    ref, cand = ref[valid], cand[valid]
+    if ref.size == 0:
+        return {'abs_rel': float('nan'), 'rmse': float('nan'), 'delta_1': float('nan')}
+
+    ratio = np.maximum(cand / ref, ref / np.maximum(cand, eps))
+
+    return {
+        'abs_rel': float(np.mean(np.abs(cand - ref) / ref)),
+        'rmse': float(np.sqrt(np.mean((cand - ref) ** 2))),
+        'delta_1': float(np.mean(ratio < 1.25)),
+    }
+
+
+def accuracy_report(
+    reference: Union[List[np.ndarray], Dict[str, Any]],
+    candidate: Union[List[np.ndarray], Dict[str, Any]],
+    label: str = "candidate",
+) -> Dict[str, float]:
+    """
+    Compare two VGGTProcessor results and print a short accuracy report
+
+    Args:
+        reference: Result of the reference run
+        candidate: Result of the approximate run
+        label: Name of the approximate mode, used in the printout
+
+    Returns:
+        Dict of metrics (see compare_depth_maps)
+    """
+    metrics = compare_depth_maps(_as_depth_list(reference), _as_depth_list(candidate))
+
+    print(f"  📐 Accuracy of {label} vs reference:")
+    print(f"     AbsRel:  {metrics['abs_rel']:.4f}")
+    print(f"     RMSE:    {metrics['rmse']:.4f}")
+    print(f"     δ<1.25:  {metrics['delta_1']:.2%}")
+
+    return metrics
@@ -0,0 +1,80 @@
+"""
+On-device point filtering for VGGT predictions
+
+Confidence thresholding and subsampling run on the model device so that only
+surviving points are transferred to the host and materialized as numpy arrays.
+"""
+
+import numpy as np
+import torch
+from typing import Dict, Optional
+
+
+def select_confident_points(
+    points: torch.Tensor,
+    conf: torch.Tensor,
+    images: Optional[torch.Tensor] = None,
+    conf_threshold: float = 0.0,
+    conf_percentile: float = 0.0,
+    stride: int = 1,
+    max_points: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Filter a dense point map on its device and return the survivors on the host
+
+    Args:
+        points: [S, H, W, 3] world points (any float dtype, any device)
+        conf: [S, H, W] confidence of each point
+        images: Optional [S, 3, H, W] input images in [0, 1], used for point colors
+        conf_threshold: Drop points with confidence below this value
+        conf_percentile: Drop this percentage (0-100) of the lowest-confidence points
+        stride: Keep every stride-th pixel along H and W
+        max_points: Evenly subsample the survivors down to at most this many points
+
+    Returns:
+        Dict with 'points' (Nx3 float32), 'conf' (N,) and, if images were given,
+        'colors' (Nx3 uint8)
+
+    Raises:
+        ValueError: If the shapes do not match or conf_percentile is outside 0-100
+    """
+    if not 0 <= conf_percentile <= 100:
+        raise ValueError(f"conf_percentile must be in [0, 100], got {conf_percentile}")
+    if points.shape[:-1] != conf.shape:
+        raise ValueError(
+            f"Points {tuple(points.shape)} and confidence {tuple(conf.shape)} do not match"
+        )
+
+    colors = images.permute(0, 2, 3, 1) if images is not None else None  # [S, H, W, 3]
+
+    if stride > 1:
+        points = points[:, ::stride, ::stride]
+        conf = conf[:, ::stride, ::stride]
+        colors = colors[:, ::stride, ::stride] if colors is not None else None
+
+    points = points.reshape(-1, 3)
+    conf = conf.reshape(-1)
+    colors = colors.reshape(-1, 3) if colors is not None else None
+
+    mask = (conf >= conf_threshold) & torch.isfinite(points).all(dim=-1)
+    if conf_percentile > 0 and conf.numel() > 0:
+        # Rank-based, so exactly the requested share is dropped even with tied confidences
+        num_keep = conf.numel() - int(conf.numel() * conf_percentile / 100.0)
+        in_top = torch.zeros_like(mask)
+        in_top[conf.float().topk(num_keep).indices] = True
+        mask &= in_top
+
+    keep = torch.nonzero(mask).squeeze(1)
+
+    if max_points is not None and keep.numel() > max_points:
+        sample = torch.linspace(0, keep.numel() - 1, max_points, device=keep.device).long()
+        keep = keep[sample]
+
+    result = {
+        'points': points[keep].float().cpu().numpy(),
+        'conf': conf[keep].float().cpu().numpy(),
+    }
+    if colors is not None:
+        result['colors'] = (colors[keep].float().clamp(0, 1) * 255).to(torch.uint8).cpu().numpy()
+
+    return result
@@ -0,0 +1,78 @@
+"""
+Reduced-precision inference modes for VGGT
+
+bf16/fp16 run the aggregator and heads under torch.autocast; int8 replaces
+the transformer Block MLP and QKV linears with dynamically quantized int8
+linears (weights stored in int8, activations quantized per batch), which
+quarters the memory traffic of the dominant layers on CPU.
+"""
+
+from contextlib import nullcontext
+from typing import ContextManager, List
+
+import torch
+
+PRECISION_MODES = ("auto", "fp32", "fp16", "bf16", "int8")
+
+# Linear layers of a transformer Block that are quantized in int8 mode
+INT8_LINEAR_NAMES = ("attn.qkv", "mlp.fc1", "mlp.fc2")
+
+
+def resolve_precision(precision: str, device: torch.device) -> str:
+    """
+    Resolve 'auto' to a concrete mode for the device
+
+    'auto' keeps the previous behaviour: fp16 autocast on CUDA, fp32 elsewhere.
+
+    Raises:
+        ValueError: On an unknown mode, or int8 on a non-CPU device
+    """
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISION_MODES}")
+    if precision == "auto":
+        return "fp16" if device.type == "cuda" else "fp32"
+    if precision == "int8" and device.type != "cpu":
+        raise ValueError(
+            f"int8 dynamic quantization is only supported on CPU, got device '{device.type}'"
+        )
+    return precision
+
+
+def autocast_context(precision: str, device: torch.device) -> ContextManager:
+    """Autocast context for a resolved precision mode (no-op for fp32 and int8)"""
+    if precision == "bf16":
+        return torch.autocast(device_type=device.type, dtype=torch.bfloat16)
+    if precision == "fp16":
+        return torch.autocast(device_type=device.type, dtype=torch.float16)
+    return nullcontext()
+
+
+def int8_linear_names(model: torch.nn.Module) -> List[str]:
+    """Qualified names of the Block MLP and QKV linears to quantize"""
+    names = []
+    for name, module in model.named_modules():
+        if not isinstance(module, torch.nn.Linear):
+            continue
+        if any(name == target or name.endswith("." + target) for target in INT8_LINEAR_NAMES):
+            names.append(name)
+    return names
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamically quantize the Block MLP and QKV linears of a model to int8
+
+    Idempotent: already quantized layers are no longer nn.Linear and are skipped.
+
+    Args:
+        model: Model in eval mode (modified in place)
+
+    Returns:
+        The quantized model
+    """
+    from torch.ao.quantization import quantize_dynamic
+
+    names = int8_linear_names(model)
+    if not names:
+        return model
+    return quantize_dynamic(model, set(names), dtype=torch.qint8, inplace=True)
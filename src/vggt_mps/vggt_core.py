@@ -6,9 +6,18 @@ import torch
 import numpy as np
 from PIL import Image
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import sys
 
+from .adapters import load_adapter_checkpoint, merge_lora_adapters
+from .compiled import CompiledVGGT
+from .compression import LOW_RANK_KEY, load_low_rank_checkpoint
+from .config import MODEL_SIZES, PROCESSING_CONFIG
+from .resilient import run_vggt_resilient
+from .utils.point_filter import select_confident_points
+from .utils.precision import autocast_context, quantize_int8, resolve_precision
+from .weight_streaming import WeightStreamer, load_streamed_vggt
+
 # Add VGGT repo to path
 REPO_PATH = Path(__file__).parent.parent / "repo" / "vggt"
 if REPO_PATH.exists():
@@ -18,16 +27,114 @@ if REPO_PATH.exists():
 class VGGTProcessor:
     """VGGT model processor for 3D reconstruction"""
 
-    def __init__(self, device: Union[str, torch.device] = "mps"):
+    def __init__(
+        self,
+        device: Union[str, torch.device] = "mps",
+        global_pool_size: int = 1,
+        global_num_anchors: int = 0,
+        camera_iterations: int = 4,
+        camera_tol: Optional[float] = None,
+        output_fp16: bool = False,
+        conf_percentile: float = 0.0,
+        max_points: Optional[int] = None,
+        allow_simulated: bool = False,
+        precision: str = "auto",
+        compiled: bool = False,
+        backend: str = "torch",
+        stream_weights: bool = False,
+        adapter_path: Optional[Path] = None,
+        model_size: str = "1b",
+        model_path: Optional[Path] = None,
+        frames_chunk_size: int = 8,
+    ):
         """
         Initialize VGGT processor
 
         Args:
             device: Device to run model on (mps, cuda, cpu)
+            global_pool_size: Pool patch tokens by this factor before each global
+                attention block (1 = dense). 2 gives ~4x fewer global tokens.
+            global_num_anchors: If > 0, frames attend globally only to themselves and this
+                many anchor frames chosen by farthest point sampling (0 = dense).
+            camera_iterations: Maximum number of camera head refinement iterations.
+            camera_tol: Stop camera refinement early once the pose encoding changes by
+                less than this value (None = always run camera_iterations).
+            output_fp16: Emit depth and world points in fp16 to halve transfer and host memory.
+            conf_percentile: Drop this percentage of lowest-confidence points (on device)
+                before building the point cloud.
+            max_points: Cap on the number of point cloud points transferred to the host.
+            allow_simulated: Return simulated depth when the model is unavailable or
+                inference fails. Off by default: failures raise instead of returning fake data.
+            precision: Inference precision: 'fp32', 'fp16', 'bf16' (autocast through aggregator
+                and heads), 'int8' (CPU only: dynamic int8 Block MLP/QKV linears) or 'auto'
+                (fp16 on CUDA, fp32 elsewhere).
+            compiled: Run the aggregator and heads through torch.compile, caching the compiled
+                artifacts per resolution / frame-count bucket under MODEL_DIR.
+            backend: 'torch' or 'onnxruntime' (CPU, fp32, dense global attention only). The
+                ONNX graphs are exported from the loaded model on first use of each resolution.
+            stream_weights: Keep only the executing aggregator blocks in memory, streaming them
+                from the memory-mapped local checkpoint (lower peak memory, slower inference).
+            adapter_path: LoRA adapter checkpoint from the training Trainer, merged into the base
+                weights when the model is loaded.
+            model_size: Key of config.MODEL_SIZES: '1b' (released model) or a distilled student
+                ('base', 'small') loaded from its local checkpoint.
+            model_path: Checkpoint loaded by load_model() when no path is passed, e.g. a
+                low-rank compressed model from 'vggt compress' (default: search models/).
+            frames_chunk_size: Frames per depth / point head call. Smaller chunks lower the
+                peak memory of the heads; on OOM the chunk size is halved further.
         """
+        if global_pool_size < 1:
+            raise ValueError(f"global_pool_size must be >= 1, got {global_pool_size}")
+        if global_num_anchors < 0:
+            raise ValueError(f"global_num_anchors must be >= 0, got {global_num_anchors}")
+        if camera_iterations < 1:
+            raise ValueError(f"camera_iterations must be >= 1, got {camera_iterations}")
+        if frames_chunk_size < 1:
+            raise ValueError(f"frames_chunk_size must be >= 1, got {frames_chunk_size}")
+        if not 0 <= conf_percentile <= 100:
+            raise ValueError(f"conf_percentile must be in [0, 100], got {conf_percentile}")
+        if backend not in ("torch", "onnxruntime"):
+            raise ValueError(f"backend must be 'torch' or 'onnxruntime', got '{backend}'")
+        if model_size not in MODEL_SIZES:
+            raise ValueError(f"model_size must be one of {list(MODEL_SIZES)}, got '{model_size}'")
+
         self.device = torch.device(device) if isinstance(device, str) else device
         self.model = None
-        self.dtype = torch.float32 if self.device.type == "mps" else torch.float16
+        self.precision = resolve_precision(precision, self.device)
+        self.dtype = {"fp16": torch.float16, "bf16": torch.bfloat16}.get(
+            self.precision, torch.float32
+        )
+        if backend == "onnxruntime" and (self.precision != "fp32" or compiled):
+            raise ValueError("The onnxruntime backend runs fp32 exported graphs; "
+                             "precision and compiled options apply to the torch backend only")
+        if backend == "onnxruntime" and (global_pool_size > 1 or global_num_anchors > 0):
+            raise ValueError("The onnxruntime backend exports dense global attention; "
+                             "pooled and anchor attention apply to the torch backend only")
+        if stream_weights and (backend != "torch" or compiled or self.precision == "int8"):
+            raise ValueError("stream_weights requires the eager torch backend without int8")
+        if stream_weights and adapter_path is not None:
+            raise ValueError("Adapters cannot be merged into streamed weights")
+        self.backend = backend
+        self._onnx_runners: Dict[str, Any] = {}
+        self.global_pool_size = global_pool_size
+        self.global_num_anchors = global_num_anchors
+        self.camera_iterations = camera_iterations
+        self.camera_tol = camera_tol
+        self.output_fp16 = output_fp16
+        self.conf_percentile = conf_percentile
+        self.max_points = max_points
+        self.frames_chunk_size = frames_chunk_size
+        self.allow_simulated = allow_simulated
+        self.compiled = compiled
+        self._compiled_model: Optional[CompiledVGGT] = None
+        self.stream_weights = stream_weights
+        self._weight_streamer: Optional[WeightStreamer] = None
+        self.adapter_path = Path(adapter_path) if adapter_path is not None else None
+        self.model_size = model_size
+        self.model_path = Path(model_path) if model_path is not None else None
+        # Checkpoint file or HuggingFace id the current weights were loaded from
+        self._checkpoint_source: Optional[Union[Path, str]] = None
+        self.last_execution_report: Dict[str, Dict[str, Any]] = {}
 
     def load_model(self, model_path: Optional[Path] = None) -> None:
         """
@@ -51,12 +158,15 @@ class VGGTProcessor:
             print("   Using simulated mode for testing.")
             return
 
+        size_config = MODEL_SIZES[self.model_size]
+        if model_path is None:
+            model_path = self.model_path
         if model_path is None:
             # Default paths to check
             possible_paths = [
                 Path(__file__).parent.parent / "models" / "vggt_model.pt",
                 Path(__file__).parent.parent / "repo" / "vggt" / "vggt_model.pt",
-            ]
+            ] if self.model_size == "1b" else [size_config["local_path"]]
             for path in possible_paths:
                 if path.exists():
                     model_path = path
@@ -68,16 +178,37 @@ class VGGTProcessor:
         if model_path is not None and model_path.exists():
             # Local model file exists - try loading it
             print(f"📂 Loading model from: {model_path}")
+            if self.stream_weights:
+                # No fallback here: other weights would silently replace the requested checkpoint
+                try:
+                    self.model, self._weight_streamer = load_streamed_vggt(
+                        model_path, self.device, **size_config["kwargs"]
+                    )
+                except Exception as e:
+                    raise RuntimeError(f"Could not stream weights from {model_path}: {e}") from e
+                print("✅ Model loaded with streamed aggregator blocks!")
+                return
             try:
-                self.model = VGGT()
+                self.model = VGGT(**size_config["kwargs"])
                 checkpoint = torch.load(model_path, map_location=self.device, weights_only=True)
 
                 # Validate checkpoint format
                 if not isinstance(checkpoint, dict):
                     raise ValueError(f"Invalid checkpoint format: expected dict, got {type(checkpoint)}")
-
-                self.model.load_state_dict(checkpoint)
+                if LOW_RANK_KEY in checkpoint:
+                    # Compressed by 'vggt compress': factor the block linears, then load
+                    load_low_rank_checkpoint(self.model, checkpoint)
+                    num_factored = len(checkpoint[LOW_RANK_KEY]["ranks"])
+                    print(f"🗜️ Low-rank model: {num_factored} factored layers")
+                else:
+                    # Training checkpoints (e.g. distilled students) nest the weights under 'model'
+                    if "model" in checkpoint:
+                        checkpoint = checkpoint["model"]
+                    self.model.load_state_dict(checkpoint)
+                self._merge_adapter()
                 self.model = self.model.to(self.device)
+                self.model.eval()
+                self._checkpoint_source = model_path
                 print("✅ Model loaded successfully from local path!")
                 return  # Success - exit early
             except Exception as e:
@@ -95,10 +226,18 @@ class VGGTProcessor:
         # 1. No local path was provided (model_path is None)
         # 2. Local path doesn't exist
         # 3. Local loading failed with exception
-        if self.model is None and try_huggingface:
+        if self.model is None and try_huggingface and size_config["huggingface_id"] is None:
+            print(f"⚠️ No published weights for model size '{self.model_size}'")
+            print("   Distill one with repo/vggt/training/config/distill.yaml.")
+        elif self.model is None and try_huggingface:
+            if self.stream_weights:
+                print("⚠️ Weight streaming needs a local checkpoint, loading all weights")
             print("📥 Loading model from HuggingFace...")
             try:
-                self.model = VGGT.from_pretrained("facebook/VGGT-1B").to(self.device)
+                self.model = VGGT.from_pretrained(size_config["huggingface_id"])
+                self._merge_adapter()
+                self.model = self.model.to(self.device)
+                self._checkpoint_source = size_config["huggingface_id"]
                 print("✅ Model loaded successfully from HuggingFace!")
             except Exception as e:
                 print(f"⚠️ Could not load model from HuggingFace: {e}")
@@ -108,6 +247,36 @@ class VGGTProcessor:
         if self.model:
             self.model.eval()
 
+    def _merge_adapter(self) -> None:
+        """Merge the LoRA adapters of adapter_path into the freshly loaded base weights"""
+        if self.adapter_path is None:
+            return
+        merged = merge_lora_adapters(self.model, load_adapter_checkpoint(self.adapter_path))
+        print(f"🧬 Merged {merged} LoRA adapters from {self.adapter_path.name}")
+
+    def _get_aggregator(self) -> Optional[torch.nn.Module]:
+        """Return the VGGT Aggregator, unwrapping the sparse attention wrapper if present"""
+        aggregator = getattr(self.model, 'aggregator', None)
+        return getattr(aggregator, 'aggregator', aggregator)
+
+    def _configure_model(self) -> None:
+        """Apply inference-time options to the loaded model"""
+        aggregator = self._get_aggregator()
+        if aggregator is not None and hasattr(aggregator, 'global_pool_size'):
+            aggregator.global_pool_size = self.global_pool_size
+        if aggregator is not None and hasattr(aggregator, 'global_num_anchors'):
+            aggregator.global_num_anchors = self.global_num_anchors
+
+        if hasattr(self.model, 'camera_num_iterations'):
+            self.model.camera_num_iterations = self.camera_iterations
+            self.model.camera_convergence_tol = self.camera_tol
+            # Echoed images and intermediate pose encodings are never used by the processor
+            self.model.lean_outputs = True
+            self.model.output_dtype = torch.float16 if self.output_fp16 else None
+
+        if self.precision == "int8":
+            self.model = quantize_int8(self.model)
+
     def process_images(self, images: List[np.ndarray]) -> Union[List[np.ndarray], Dict[str, Any]]:
         """
         Process images through VGGT
@@ -116,7 +285,10 @@ class VGGTProcessor:
             images: List of images as numpy arrays (H, W, 3)
 
         Returns:
-            Dict containing depth maps, camera poses, and point cloud, or list of depth maps as fallback
+            Dict containing depth maps, camera poses, and point cloud, or list of depth maps as
+            fallback. When the model predicts world points, 'point_cloud' holds those points in the
+            first camera's frame, filtered by confidence; otherwise it is back-projected from the
+            depth maps with nominal intrinsics and a per-view offset, as before.
 
         Raises:
             ValueError: If images list is empty or contains invalid data
@@ -140,15 +312,15 @@ class VGGTProcessor:
 
         # Verify model loaded successfully after load attempt
         # Check both that model exists AND that it has required methods
-        # Note: This is intentional graceful degradation, not an error condition
-        # The system can still function with simulated depth for testing/development
         if self.model is None or not hasattr(self.model, 'eval'):
             if self.model is not None:
-                print("⚠️ Model loaded but appears to be invalid (missing required methods)")
+                reason = "Model loaded but appears to be invalid (missing required methods)"
             else:
-                print("⚠️ Model could not be loaded from any source (local or HuggingFace)")
-            print("   Falling back to simulated depth for testing purposes")
-            print("   To use real model: run 'vggt download' or check network connection")
+                reason = "Model could not be loaded from any source (local or HuggingFace)"
+            if not self.allow_simulated:
+                raise RuntimeError(f"{reason}. Run 'vggt download' or check network connection.")
+            print(f"⚠️ {reason}")
+            print("   Falling back to simulated depth (allow_simulated=True)")
             return self._simulate_depth(images)
 
         # Process with real model
@@ -173,30 +345,34 @@ class VGGTProcessor:
             # Load and preprocess
             input_tensor = load_and_preprocess_images(temp_paths).to(self.device)
 
-            # Run inference
-            with torch.no_grad():
-                if self.device.type == "mps":
-                    predictions = self.model(input_tensor)
-                else:
-                    with torch.cuda.amp.autocast(dtype=self.dtype):
-                        predictions = self.model(input_tensor)
+            self._configure_model()
+            if self.backend == "onnxruntime":
+                predictions, report = self._run_onnxruntime(input_tensor)
+                return self._build_result(images, predictions, report)
+
+            # Run inference stage by stage, degrading chunk sizes / attention on OOM
+            bucket = None
+            if self.compiled:
+                if self._compiled_model is None or self._compiled_model.model is not self.model:
+                    self._compiled_model = CompiledVGGT(self.model, tag=self.precision)
+                input_tensor, bucket = self._compiled_model.prepare(input_tensor)
 
-            # Extract depth maps
-            depth_tensor = predictions['depth'].cpu().numpy()
-            depth_maps = [depth_tensor[0, i, :, :, 0] for i in range(depth_tensor.shape[1])]
+            with torch.no_grad(), autocast_context(self.precision, self.device):
+                predictions, report = run_vggt_resilient(
+                    self.model, input_tensor, device=self.device,
+                    frames_chunk_size=self.frames_chunk_size,
+                )
 
-            # Return full predictions dict if available
-            result = {
-                'depth_maps': depth_maps,
-                'camera_poses': predictions.get('poses', None),
-                'point_cloud': self._generate_point_cloud(images, depth_maps)
-            }
+            if bucket is not None:
+                self._compiled_model.save(bucket)
 
-            return result
+            return self._build_result(images, predictions, report)
 
         except Exception as e:
+            if not self.allow_simulated:
+                raise
             print(f"⚠️ Error processing with real model: {e}")
-            print(f"   Falling back to simulated depth maps.")
+            print("   Falling back to simulated depth maps (allow_simulated=True).")
             return self._simulate_depth(images)
 
         finally:
@@ -208,6 +384,94 @@ class VGGTProcessor:
                 except Exception as cleanup_error:
                     print(f"⚠️ Warning: Could not clean up temp directory: {cleanup_error}")
 
+    def _run_onnxruntime(
+        self, input_tensor: torch.Tensor
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Run the exported ONNX graphs for this input resolution, exporting them on first use"""
+        from .onnx_backend import (
+            MANIFEST_NAME, ONNX_DIR, OnnxVGGT, export_vggt_onnx, onnx_dir_for,
+        )
+
+        H, W = input_tensor.shape[-2:]
+        config = self._onnx_export_config()
+        onnx_dir = onnx_dir_for(H, W, ONNX_DIR, config)
+        if not (onnx_dir / MANIFEST_NAME).exists():
+            print(f"📦 Exporting ONNX graphs for {H}x{W} to {onnx_dir}")
+            export_vggt_onnx(
+                self.model, H, W, output_root=ONNX_DIR,
+                camera_iterations=self.camera_iterations, config=config,
+            )
+
+        key = str(onnx_dir)
+        if key not in self._onnx_runners:
+            self._onnx_runners[key] = OnnxVGGT(onnx_dir)
+        predictions = self._onnx_runners[key](
+            input_tensor.cpu(), frames_chunk_size=self.frames_chunk_size
+        )
+
+        if self.output_fp16:
+            for name in ("depth", "world_points"):
+                if name in predictions:
+                    predictions[name] = predictions[name].half()
+        return predictions, {'onnxruntime': {'mode': onnx_dir.name, 'degraded': False}}
+
+    def _onnx_export_config(self) -> Dict[str, Any]:
+        """Everything baked into exported ONNX graphs besides the input resolution"""
+        def identity(source):
+            # Files are identified by path, size and modification time, so a re-saved
+            # checkpoint is exported again
+            if isinstance(source, Path):
+                stat = source.stat()
+                return [str(source.resolve()), stat.st_size, stat.st_mtime_ns]
+            return source
+
+        return {
+            "model_size": self.model_size,
+            "checkpoint": identity(self._checkpoint_source),
+            "adapter": identity(self.adapter_path),
+            "camera_iterations": self.camera_iterations,
+        }
+
+    def _build_result(
+        self,
+        images: List[np.ndarray],
+        predictions: Dict[str, Any],
+        report: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Convert predictions into the processor result dict"""
+        self.last_execution_report = report
+        degraded = {stage: info['mode'] for stage, info in report.items() if info['degraded']}
+        if degraded:
+            print(f"⚠️ Completed with degraded modes: {degraded}")
+
+        # Extract depth maps
+        depth_tensor = predictions['depth'].cpu().float().numpy()
+        depth_maps = [depth_tensor[0, i, :, :, 0] for i in range(depth_tensor.shape[1])]
+
+        # Filter world points on device so only surviving points reach the host.
+        # These are the model's world points, not the nominal back-projection of
+        # _generate_point_cloud, which remains the fallback without a point head.
+        if 'world_points' in predictions:
+            point_cloud = select_confident_points(
+                predictions['world_points'][0],
+                predictions['world_points_conf'][0],
+                conf_percentile=self.conf_percentile,
+                stride=PROCESSING_CONFIG["point_cloud_step"],
+                max_points=self.max_points,
+            )['points']
+        else:
+            point_cloud = self._generate_point_cloud(images, depth_maps)
+
+        # Return full predictions dict if available
+        result = {
+            'depth_maps': depth_maps,
+            'camera_poses': predictions.get('poses', None),
+            'point_cloud': point_cloud,
+            'execution_report': report,
+        }
+
+        return result
+
     def _simulate_depth(self, images: List[np.ndarray]) -> List[np.ndarray]:
         """
         Generate simulated depth maps for testing
@@ -0,0 +1,315 @@
+"""
+Aggregator weight streaming from memory-mapped checkpoints
+
+The 48 alternating-attention blocks of the aggregator hold most of VGGT's
+weights (~600M parameters for VGGT-1B). With weight streaming, only the
+blocks currently executing are resident: each block's weights are copied
+from a memory-mapped checkpoint right before it runs and released right
+after, while a background thread already reads the next block in execution
+order. Peak memory becomes the activations, the non-streamed modules and
+about two blocks, at the cost of re-reading every block per forward pass.
+
+Streaming hooks the aggregator's frame / global attention steps, so it
+covers dense, pooled and anchor global attention (inference only).
+
+    model, streamer = load_streamed_vggt("models/vggt_model.pt")
+    predictions = model(images)
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import torch
+import torch.nn as nn
+
+from .compression import LOW_RANK_KEY, apply_low_rank_structure
+
+STREAMED_BLOCKS = ("frame_blocks", "global_blocks")
+
+# Aggregator methods running the blocks of each kind (wrapped on the instance)
+BLOCK_METHODS = {
+    "frame_blocks": "_process_frame_attention",
+    "global_blocks": "_process_global_attention",
+}
+
+# A unit is the aa_block_size blocks run by one frame or global attention step
+Unit = Tuple[str, int]
+
+
+class _SafetensorsCheckpoint(Mapping):
+    """Read-only mapping over a .safetensors file; tensors are read on access"""
+
+    def __init__(self, path: Path):
+        from safetensors import safe_open
+
+        self._file = safe_open(str(path), framework="pt", device="cpu")
+        self._keys = list(self._file.keys())
+        self._key_set = frozenset(self._keys)
+
+    def __getitem__(self, key: str) -> torch.Tensor:
+        if key not in self._key_set:
+            raise KeyError(key)
+        return self._file.get_tensor(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._key_set
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def _open_checkpoint(
+    path: Union[str, Path]
+) -> Tuple[Mapping[str, torch.Tensor], Optional[Dict[str, Any]]]:
+    """open_checkpoint, also returning the low-rank entry of compressed checkpoints (or None)"""
+    path = Path(path)
+    if path.suffix == ".safetensors":
+        return _SafetensorsCheckpoint(path), None
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    if not isinstance(checkpoint, dict):
+        raise ValueError(f"Invalid checkpoint format: expected dict, got {type(checkpoint)}")
+    low_rank = checkpoint.get(LOW_RANK_KEY)
+    if isinstance(checkpoint.get("model"), dict):
+        checkpoint = checkpoint["model"]
+    return checkpoint, low_rank
+
+
+def open_checkpoint(path: Union[str, Path]) -> Mapping[str, torch.Tensor]:
+    """
+    Open a state dict without reading it into memory
+
+    .safetensors files are read tensor by tensor; other files are loaded with
+    torch.load(mmap=True), so tensors stay backed by the file until copied.
+    Training checkpoints (e.g. distilled students) nest the weights under 'model'.
+    """
+    return _open_checkpoint(path)[0]
+
+
+def _restore_normalization_buffers(model: nn.Module) -> None:
+    """Re-create the aggregator's non-persistent input normalization buffers if they are on meta"""
+    from vggt.models.aggregator import _RESNET_MEAN, _RESNET_STD
+
+    aggregator = getattr(model.aggregator, 'aggregator', model.aggregator)
+    for name, value in (("_resnet_mean", _RESNET_MEAN), ("_resnet_std", _RESNET_STD)):
+        if getattr(aggregator, name).is_meta:
+            setattr(aggregator, name, torch.tensor(value).view(1, 1, 3, 1, 1))
+
+
+def assign_weights(
+    model: nn.Module, checkpoint: Mapping[str, torch.Tensor], skip: Iterable[str] = ()
+) -> None:
+    """
+    Load the weights of a VGGT model built on the meta device, reading only its own keys
+
+    Checkpoint tensors are assigned rather than copied, so weights from
+    open_checkpoint stay backed by the file until moved. Keys of modules that
+    were removed from the model, and keys in skip, are never read. Checkpoints
+    do not hold the non-persistent normalization buffers; they are re-created.
+
+    Raises:
+        RuntimeError: If the checkpoint lacks some of the model's weights
+    """
+    skip = set(skip)
+    keys = [key for key in model.state_dict() if key not in skip]
+    missing = [key for key in keys if key not in checkpoint]
+    if missing:
+        raise RuntimeError(f"Checkpoint is missing {len(missing)} weights, e.g. {missing[0]}")
+    model.load_state_dict({key: checkpoint[key] for key in keys}, strict=False, assign=True)
+    _restore_normalization_buffers(model)
+
+
+class WeightStreamer:
+    """Keeps the aggregator blocks out of memory and streams them in as they run"""
+
+    def __init__(
+        self,
+        aggregator: nn.Module,
+        checkpoint: Mapping[str, torch.Tensor],
+        prefix: str = "aggregator.",
+        prefetch: bool = True,
+        device: Union[str, torch.device, None] = None,
+    ):
+        """
+        Args:
+            aggregator: VGGT Aggregator (its block weights are released in place)
+            checkpoint: State dict holding the block weights, see open_checkpoint
+            prefix: Key prefix of the aggregator in the checkpoint
+            prefetch: Read the next block on a background thread while the current one runs
+            device: Device the block weights are copied to (default: the aggregator's buffers)
+        """
+        self.aggregator = aggregator
+        self.checkpoint = checkpoint
+        self.prefix = prefix
+        if device is None:
+            device = aggregator._resnet_mean.device
+        self.device = torch.device(device)
+
+        missing = [key for key in self._all_keys() if key not in checkpoint]
+        if missing:
+            raise KeyError(f"Checkpoint is missing {len(missing)} block weights, e.g. {missing[0]}")
+
+        self.order = self._execution_order()
+        self._resident: Dict[Unit, Dict[str, torch.Tensor]] = {}
+        self._pending: Dict[Unit, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        # Bytes of the executing blocks; a running prefetch holds about one unit more
+        self.resident_bytes = 0
+        self.peak_resident_bytes = 0
+        self.unit_loads = 0
+
+        self._placeholders = {}
+        for kind in STREAMED_BLOCKS:
+            for block in getattr(aggregator, kind):
+                for module in block.modules():
+                    for name, param in list(module._parameters.items()):
+                        if param is not None:
+                            module._parameters[name] = self._placeholder(param.dtype)
+
+        for kind, method in BLOCK_METHODS.items():
+            setattr(aggregator, method, self._streamed(kind, getattr(aggregator, method)))
+
+    def _placeholder(self, dtype: torch.dtype) -> nn.Parameter:
+        if dtype not in self._placeholders:
+            self._placeholders[dtype] = torch.empty(0, dtype=dtype, device=self.device)
+        return nn.Parameter(self._placeholders[dtype], requires_grad=False)
+
+    def _all_keys(self) -> List[str]:
+        return [
+            f"{self.prefix}{kind}.{i}.{name}"
+            for kind in STREAMED_BLOCKS
+            for i, block in enumerate(getattr(self.aggregator, kind))
+            for name, _ in block.named_parameters()
+        ]
+
+    def _execution_order(self) -> List[Unit]:
+        """Units in the order the aggregator runs them, e.g. frame 0, global 0, frame 1, ..."""
+        size = self.aggregator.aa_block_size
+        order = []
+        for i in range(self.aggregator.aa_block_num):
+            for attn_type in self.aggregator.aa_order:
+                order.append((f"{attn_type}_blocks", i * size))
+        return order
+
+    def _blocks(self, unit: Unit) -> List[Tuple[int, nn.Module]]:
+        kind, start = unit
+        blocks = getattr(self.aggregator, kind)
+        return [(i, blocks[i]) for i in range(start, start + self.aggregator.aa_block_size)]
+
+    def _read(self, unit: Unit) -> Dict[str, torch.Tensor]:
+        """Copy a unit's weights out of the checkpoint (runs on the prefetch thread)"""
+        kind, _ = unit
+        weights = {}
+        for i, block in self._blocks(unit):
+            for name, placeholder in block.named_parameters():
+                source = self.checkpoint[f"{self.prefix}{kind}.{i}.{name}"]
+                tensor = source.to(self.device, placeholder.dtype)
+                # Copy even when no conversion happened, so nothing stays mapped to the file
+                weights[f"{i}.{name}"] = tensor.clone() if tensor is source else tensor
+        return weights
+
+    def _prefetch(self, unit: Unit) -> None:
+        if self._executor is None:
+            return
+        with self._lock:
+            if unit not in self._pending and unit not in self._resident:
+                self._pending[unit] = self._executor.submit(self._read, unit)
+
+    def _acquire(self, unit: Unit) -> None:
+        """Make a unit resident (waiting for its prefetch if one is running)"""
+        with self._lock:
+            future = self._pending.pop(unit, None)
+        weights = future.result() if future is not None else self._read(unit)
+
+        blocks = dict(self._blocks(unit))
+        for key, tensor in weights.items():
+            i, name = key.split(".", 1)
+            module_name, _, param_name = name.rpartition(".")
+            module = blocks[int(i)].get_submodule(module_name)
+            module._parameters[param_name].data = tensor
+
+        self._resident[unit] = weights
+        self.resident_bytes += sum(t.numel() * t.element_size() for t in weights.values())
+        self.peak_resident_bytes = max(self.peak_resident_bytes, self.resident_bytes)
+        self.unit_loads += 1
+
+    def _release(self, unit: Unit) -> None:
+        weights = self._resident.pop(unit)
+        self.resident_bytes -= sum(t.numel() * t.element_size() for t in weights.values())
+        for _, block in self._blocks(unit):
+            for param in block.parameters():
+                param.data = self._placeholders[param.dtype]
+
+    def _streamed(self, kind: str, original):
+        def run(tokens, B, S, P, C, idx, *args, **kwargs):
+            unit = (kind, idx)
+            position = self.order.index(unit)
+            self._acquire(unit)
+            # The next unit wraps around to the first one of the next forward pass
+            self._prefetch(self.order[(position + 1) % len(self.order)])
+            try:
+                return original(tokens, B, S, P, C, idx, *args, **kwargs)
+            finally:
+                self._release(unit)
+
+        return run
+
+    def close(self) -> None:
+        """Stop the prefetch thread, restore the aggregator methods and drop pending reads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._pending.clear()
+        for method in BLOCK_METHODS.values():
+            vars(self.aggregator).pop(method, None)
+
+
+def load_streamed_vggt(
+    checkpoint_path: Union[str, Path],
+    device: Union[str, torch.device] = "cpu",
+    prefetch: bool = True,
+    **model_kwargs,
+) -> Tuple[nn.Module, WeightStreamer]:
+    """
+    Build a VGGT model whose aggregator blocks are streamed from checkpoint_path
+
+    The model is built on the meta device, so block weights are never
+    allocated up front. All other weights are assigned from the checkpoint
+    (see assign_weights). model_kwargs are passed to VGGT() and must match the
+    checkpoint. Low-rank checkpoints from 'vggt compress' are factored first,
+    so the factored block linears are streamed.
+
+    Returns:
+        Tuple of (VGGT model in eval mode, its WeightStreamer)
+
+    Raises:
+        RuntimeError: If the checkpoint does not match the model built from model_kwargs
+        KeyError: If a low-rank layer of the checkpoint is not in the model
+    """
+    from vggt.models.vggt import VGGT
+
+    device = torch.device(device)
+    checkpoint, low_rank = _open_checkpoint(checkpoint_path)
+    with torch.device("meta"):
+        model = VGGT(**model_kwargs)
+    if low_rank is not None:
+        apply_low_rank_structure(model, low_rank["ranks"])
+
+    streamer = WeightStreamer(model.aggregator, checkpoint, prefetch=prefetch, device=device)
+    try:
+        expected = set(model.state_dict())
+        unexpected = [key for key in checkpoint.keys() if key not in expected]
+        if unexpected:
+            raise RuntimeError(f"Checkpoint does not match VGGT: unexpected {unexpected[:3]}")
+        assign_weights(model, checkpoint, skip=streamer._all_keys())
+    except Exception:
+        streamer.close()
+        raise
+
+    return model.to(device).eval(), streamer
+
@@ -0,0 +1,170 @@
+"""
+Tests for LoRA adapters: training-time layers and merging checkpoints into the base weights
+"""
+
+import importlib.util
+import tempfile
+import unittest
+import torch
+import sys
+from pathlib import Path
+
+from tests.tiny_models import PROJECT_ROOT, make_tiny_vggt
+from vggt_mps.adapters import load_adapter_checkpoint, merge_lora_adapters
+from vggt_mps.vggt_core import VGGTProcessor
+
+# The training utilities import as a top-level package, as in the Trainer
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt" / "training"))
+
+HAS_WCMATCH = importlib.util.find_spec("wcmatch") is not None
+if HAS_WCMATCH:
+    from train_utils.lora import LoRALinear, apply_lora, lora_config, lora_state_dict, merge_lora
+
+LORA_PATTERNS = ["aggregator.frame_blocks.0.attn.qkv", "aggregator.global_blocks.*.attn.proj"]
+
+
+def make_tiny_model():
+    """Small aggregator and camera head under the same state dict prefixes as VGGT"""
+    return make_tiny_vggt(dense=False)
+
+
+def make_adapter_checkpoint(rank=4, alpha=8.0):
+    torch.manual_seed(1)
+    layers = ["aggregator.frame_blocks.0.attn.qkv", "aggregator.global_blocks.1.attn.proj"]
+    model = make_tiny_model()
+    state_dict = {}
+    for layer in layers:
+        linear = model.get_submodule(layer)
+        state_dict[f"{layer}.lora_A"] = torch.randn(rank, linear.in_features)
+        state_dict[f"{layer}.lora_B"] = torch.randn(linear.out_features, rank)
+    state_dict["camera_head.pose_branch.fc2.bias"] = torch.randn(9)
+    lora = {"rank": rank, "alpha": alpha, "scaling": alpha / rank, "layers": layers}
+    return {"model": state_dict, "lora": lora, "steps": {"train": 10, "val": 0}}
+
+
+class TestAdapters(unittest.TestCase):
+    """Test adapter loading and merging"""
+
+    def test_merge_updates_weights(self):
+        checkpoint = make_adapter_checkpoint()
+        model, base = make_tiny_model(), make_tiny_model()
+        self.assertEqual(merge_lora_adapters(model, checkpoint), 2)
+
+        layer = "aggregator.frame_blocks.0.attn.qkv"
+        expected = base.get_parameter(f"{layer}.weight") + 2.0 * (
+            checkpoint["model"][f"{layer}.lora_B"] @ checkpoint["model"][f"{layer}.lora_A"]
+        )
+        self.assertTrue(torch.allclose(model.get_parameter(f"{layer}.weight"), expected, atol=1e-5))
+        # Layers without adapters keep their base weights
+        self.assertTrue(torch.equal(model.aggregator.frame_blocks[1].attn.qkv.weight,
+                                    base.aggregator.frame_blocks[1].attn.qkv.weight))
+        # Weights trained next to the adapters replace the base ones
+        self.assertTrue(torch.equal(model.camera_head.pose_branch.fc2.bias,
+                                    checkpoint["model"]["camera_head.pose_branch.fc2.bias"]))
+
+    def test_load_checkpoint_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "checkpoint.pt"
+            torch.save(make_adapter_checkpoint(), path)
+            checkpoint = load_adapter_checkpoint(path)
+            self.assertEqual(checkpoint["lora"]["rank"], 4)
+
+            torch.save({"model": make_tiny_model().state_dict()}, path)
+            with self.assertRaises(ValueError):
+                load_adapter_checkpoint(path)
+
+    def test_unknown_layer(self):
+        checkpoint = make_adapter_checkpoint()
+        checkpoint["model"]["aggregator.frame_blocks.7.attn.qkv.lora_A"] = torch.zeros(4, 64)
+        checkpoint["model"]["aggregator.frame_blocks.7.attn.qkv.lora_B"] = torch.zeros(192, 4)
+        with self.assertRaises(KeyError):
+            merge_lora_adapters(make_tiny_model(), checkpoint)
+
+
+    def test_stream_weights_rejected(self):
+        # Streamed blocks are re-read from the checkpoint, so merged adapters would be lost
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "checkpoint.pt"
+            torch.save(make_adapter_checkpoint(), path)
+            with self.assertRaises(ValueError):
+                VGGTProcessor(device="cpu", stream_weights=True, adapter_path=path)
+
+
+@unittest.skipUnless(HAS_WCMATCH, "wcmatch is not installed")
+class TestLoRATraining(unittest.TestCase):
+    """Test the training-time LoRA layers against the merged inference weights"""
+
+    def setUp(self):
+        self.images = torch.rand(1, 2, 3, 56, 56)
+
+    def randomize_adapters(self, model):
+        # lora_B starts at zero; give it values so the adapters change the output
+        torch.manual_seed(2)
+        for module in model.modules():
+            if isinstance(module, LoRALinear):
+                torch.nn.init.normal_(module.lora_B, std=0.1)
+
+    def test_zero_init_identity(self):
+        linear = torch.nn.Linear(16, 8)
+        lora = LoRALinear.from_linear(linear, rank=4, alpha=8.0)
+        self.assertIs(lora.weight, linear.weight)
+        x = torch.randn(3, 16)
+        self.assertTrue(torch.equal(lora(x), linear(x)))
+        with self.assertRaises(ValueError):
+            LoRALinear(16, 8, rank=0)
+
+    def test_apply_lora_trains_adapters_only(self):
+        model, base = make_tiny_model(), make_tiny_model()
+        layers = apply_lora(model, LORA_PATTERNS, rank=4, alpha=8.0)
+        self.assertEqual(layers, ["aggregator.frame_blocks.0.attn.qkv",
+                                  "aggregator.global_blocks.0.attn.proj",
+                                  "aggregator.global_blocks.1.attn.proj"])
+        trainable = {name for name, p in model.named_parameters() if p.requires_grad}
+        self.assertEqual(trainable, {f"{layer}.{name}" for layer in layers
+                                     for name in ("lora_A", "lora_B")})
+        # Base weights keep their names, so pretrained checkpoints load unchanged
+        model.load_state_dict(base.state_dict(), strict=False)
+        with torch.no_grad():
+            self.assertTrue(torch.equal(model(self.images)["pose_enc"],
+                                        base(self.images)["pose_enc"]))
+        with self.assertRaises(ValueError):
+            apply_lora(make_tiny_model(), ["aggregator.frame_blocks.9.attn.qkv"])
+
+    def test_merge_matches_adapted_forward(self):
+        model = make_tiny_model()
+        apply_lora(model, LORA_PATTERNS, rank=4, alpha=8.0)
+        self.randomize_adapters(model)
+        layer = model.aggregator.frame_blocks[0].attn.qkv
+        x = torch.randn(5, layer.in_features)
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(layer.merged()(x), layer(x), atol=1e-5))
+            adapted = model(self.images)["pose_enc"]
+            merge_lora(model)
+            merged = model(self.images)["pose_enc"]
+        self.assertFalse(any(isinstance(m, LoRALinear) for m in model.modules()))
+        self.assertTrue(torch.allclose(merged, adapted, atol=1e-4))
+
+    def test_state_dict_roundtrip(self):
+        # Adapters saved by the Trainer merge into a fresh base model like merge_lora does
+        model = make_tiny_model()
+        layers = apply_lora(model, LORA_PATTERNS, rank=4, alpha=8.0)
+        self.randomize_adapters(model)
+        model.camera_head.pose_branch.fc2.bias.requires_grad = True
+        state_dict = lora_state_dict(model)
+        self.assertEqual(len(state_dict), 2 * len(layers) + 1)
+        self.assertIn("camera_head.pose_branch.fc2.bias", state_dict)
+        self.assertNotIn("aggregator.frame_blocks.0.attn.qkv.weight", state_dict)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "checkpoint.pt"
+            torch.save({"model": state_dict, "lora": lora_config(4, 8.0, layers)}, path)
+            checkpoint = load_adapter_checkpoint(path)
+        base = make_tiny_model()
+        self.assertEqual(merge_lora_adapters(base, checkpoint), len(layers))
+        merged = merge_lora(model).state_dict()
+        for name, value in base.state_dict().items():
+            self.assertTrue(torch.allclose(value, merged[name], atol=1e-6), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Tests for approximate global attention modes of the VGGT Aggregator
+"""
+
+import unittest
+import numpy as np
+import torch
+import sys
+from pathlib import Path
+
+# Add src and the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+import torch.nn.functional as F
+
+from vggt.models.aggregator import Aggregator
+from vggt.utils.sampling import coverage_radius, farthest_point_sampling
+from vggt_mps.utils.accuracy import compare_depth_maps
+
+
+def make_tiny_aggregator(**kwargs) -> Aggregator:
+    """Small conv-embed aggregator that runs quickly on CPU"""
+    torch.manual_seed(0)
+    return Aggregator(
+        img_size=56, patch_size=14, embed_dim=64, depth=2, num_heads=4, patch_embed="conv", **kwargs
+    ).eval()
+
+
+class TestPooledGlobalAttention(unittest.TestCase):
+    """Test coarse-global / fine-frame pooled attention"""
+
+    def setUp(self):
+        self.images = torch.rand(1, 3, 3, 70, 84)  # 5x6 patch grid, not divisible by 2
+
+    def test_pool_size_one_is_dense(self):
+        """The pooling code with a pool size of 1 reproduces the dense global block"""
+        aggregator = make_tiny_aggregator(global_pool_size=1)
+        block = aggregator.global_blocks[0]
+        B, S, h, w, C = 1, 3, 5, 6, 64
+        P = aggregator.patch_start_idx + h * w
+        tokens = torch.randn(B, S * P, C)
+
+        with torch.no_grad():
+            pos = aggregator._get_pooled_pos(B * S, (h, w), tokens.device, torch.long)
+            pooled = aggregator._pooled_global_block(block, tokens, B, S, P, C, (h, w), pos=pos)
+            dense = block(tokens, pos=pos.view(B, S * P, 2))
+
+        # Pooled positions at k=1 are the dense positions (patches shifted by 1, special tokens 0)
+        expected_pos = aggregator.position_getter(B * S, h, w, device=tokens.device) + 1
+        self.assertTrue(torch.equal(pos[:, aggregator.patch_start_idx:], expected_pos))
+        self.assertTrue((pos[:, : aggregator.patch_start_idx] == 0).all())
+        self.assertTrue(torch.allclose(pooled, dense, atol=1e-5))
+
+    def test_pooled_output_shape(self):
+        """Pooled mode keeps full-resolution token outputs"""
+        aggregator = make_tiny_aggregator()
+        with torch.no_grad():
+            dense, idx = aggregator(self.images)
+            aggregator.global_pool_size = 2
+            pooled, pooled_idx = aggregator(self.images)
+
+        self.assertEqual(idx, pooled_idx)
+        self.assertEqual(len(dense), len(pooled))
+        for d, p in zip(dense, pooled):
+            self.assertEqual(d.shape, p.shape)
+            self.assertTrue(torch.isfinite(p).all())
+
+    def test_training_ignores_pooling(self):
+        """Pooling is an inference-only mode"""
+        aggregator = make_tiny_aggregator(global_pool_size=2)
+        aggregator.train()
+        ref = make_tiny_aggregator().train()
+        out, _ = aggregator(self.images)
+        out_ref, _ = ref(self.images)
+        self.assertTrue(torch.allclose(out[-1], out_ref[-1]))
+
+
+class TestAnchorGlobalAttention(unittest.TestCase):
+    """Test anchor-frame global attention"""
+
+    def setUp(self):
+        self.images = torch.rand(2, 5, 3, 56, 70)
+
+    def test_all_anchors_is_dense(self):
+        """With every frame as an anchor the result equals dense global attention"""
+        aggregator = make_tiny_aggregator()
+        with torch.no_grad():
+            dense, _ = aggregator(self.images)
+            aggregator.global_anchor_idx = list(range(5))
+            anchored, _ = aggregator(self.images)
+        self.assertTrue(torch.allclose(dense[-1], anchored[-1], atol=1e-5))
+
+    def test_matches_masked_attention(self):
+        """Anchor block equals dense attention with an explicit frame-level mask"""
+        aggregator = make_tiny_aggregator()
+        aggregator.global_anchor_chunk_size = 2
+        block = aggregator.global_blocks[0]
+        B, S, P, C = 1, 5, 6, 64
+        tokens = torch.randn(B, S * P, C)
+        pos = torch.randint(0, 4, (B, S * P, 2))
+        anchor_idx = torch.tensor([[0, 3]])
+
+        with torch.no_grad():
+            out = aggregator._anchor_global_block(block, tokens, B, S, P, C, anchor_idx, pos=pos)
+
+            q, k, v = block.attn.project_qkv(block.norm1(tokens), pos=pos)
+            frame = torch.arange(S).repeat_interleave(P)
+            is_anchor = torch.zeros(S, dtype=torch.bool)
+            is_anchor[anchor_idx[0]] = True
+            is_anchor_token = is_anchor[frame]
+            same_frame = frame[:, None] == frame[None, :]
+            mask = is_anchor_token[:, None] | is_anchor_token[None, :] | same_frame
+            attn_out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask)
+            attn_out = block.attn.proj(attn_out.transpose(1, 2).reshape(B, S * P, C))
+            ref = tokens + block.ls1(attn_out)
+            ref = ref + block.ls2(block.mlp(block.norm2(ref)))
+
+        self.assertTrue(torch.allclose(out, ref, atol=1e-5))
+
+    def test_fps_anchor_selection(self):
+        """Automatic anchors always include frame 0 and have the requested count"""
+        aggregator = make_tiny_aggregator(global_num_anchors=2)
+        with torch.no_grad():
+            output, _ = aggregator(self.images)
+            anchor_idx = aggregator._get_anchor_idx(torch.randn(2, 5, 6, 64), 2, 5)
+        self.assertEqual(anchor_idx.shape, (2, 2))
+        self.assertTrue((anchor_idx[:, 0] == 0).all())
+        self.assertTrue(torch.isfinite(output[-1]).all())
+
+    def test_farthest_point_sampling(self):
+        """FPS picks the point farthest from the whole selected set"""
+        points = torch.tensor([[0.0], [1.0], [10.0], [9.0]])
+        distance_matrix = torch.cdist(points, points)
+        self.assertEqual(farthest_point_sampling(distance_matrix, 3, 0), [0, 2, 1])
+
+    def test_batched_farthest_point_sampling(self):
+        """Batched FPS matches a brute-force min-distance search per scene"""
+        points = torch.randn(3, 20, 4)
+        distance_matrix = 100 + torch.cdist(points, points)  # non-zero diagonal
+        original = distance_matrix.clone()
+        start_index = torch.tensor([0, 5, 19])
+
+        selected = farthest_point_sampling(distance_matrix, 6, start_index)
+        self.assertEqual(selected.shape, (3, 6))
+        self.assertTrue(torch.equal(distance_matrix, original))
+        for b in range(3):
+            expected = [int(start_index[b])]
+            while len(expected) < 6:
+                min_dist = distance_matrix[b, expected].min(dim=0).values
+                min_dist[expected] = -1
+                expected.append(int(min_dist.argmax()))
+            self.assertEqual(selected[b].tolist(), expected)
+            single = farthest_point_sampling(distance_matrix[b], 6, int(start_index[b]))
+            self.assertEqual(single, expected)
+            self.assertEqual(len(set(expected)), 6)
+
+        # Asking for more samples than items selects every item once
+        self.assertEqual(sorted(farthest_point_sampling(distance_matrix[0], 50)), list(range(20)))
+
+    def test_fps_coverage(self):
+        """FPS covers the items better than random picks"""
+        points = torch.rand(4, 200, 2)
+        distance_matrix = torch.cdist(points, points)
+        radius = coverage_radius(distance_matrix, farthest_point_sampling(distance_matrix, 16))
+        random_radius = coverage_radius(distance_matrix, torch.randperm(200)[:16])
+        self.assertEqual(radius.shape, (4,))
+        self.assertTrue((radius < random_radius).all())
+        self.assertLess(float(coverage_radius(distance_matrix[0], list(range(200)))), 1e-3)
+
+
+class TestAccuracyReport(unittest.TestCase):
+    """Test depth accuracy metrics"""
+
+    def test_identical_depth(self):
+        depth = [np.full((4, 4), 2.0), np.full((4, 4), 3.0)]
+        metrics = compare_depth_maps(depth, depth)
+        self.assertEqual(metrics['abs_rel'], 0.0)
+        self.assertEqual(metrics['delta_1'], 1.0)
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            compare_depth_maps([np.ones((4, 4))], [np.ones((4, 5))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tests for the shared, offline backbone registry
+"""
+
+import os
+import tempfile
+import unittest
+import torch
+import torch.nn as nn
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add src and the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.utils.backbones import BackboneRegistry, backbone_registry
+from vggt_mps.megaloc_mps import MegaLocMPS
+
+
+class TestBackboneRegistry(unittest.TestCase):
+    """Test lazy loading, sharing and reference counting"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.builds = 0
+
+        def build():
+            self.builds += 1
+            return nn.Linear(4, 2)
+
+        torch.save(nn.Linear(4, 2).state_dict(), Path(self.tmp.name) / "linear.pt")
+        self.registry = BackboneRegistry()
+        self.registry.register("linear", build, "linear.pt", url="https://example.com/linear.pt")
+        self.registry.add_weight_dir(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shared_lazy_loading(self):
+        self.assertEqual(self.registry.loaded(), {})
+        first = self.registry.acquire("linear")
+        second = self.registry.acquire("linear")
+        self.assertIs(first, second)
+        self.assertEqual(self.builds, 1)
+        self.assertFalse(first.training)
+        self.assertFalse(any(p.requires_grad for p in first.parameters()))
+
+        expected = torch.load(Path(self.tmp.name) / "linear.pt")
+        self.assertTrue(torch.equal(first.weight, expected["weight"]))
+
+        # Another dtype is a separate entry
+        half = self.registry.acquire("linear", dtype=torch.float64)
+        self.assertEqual(half.weight.dtype, torch.float64)
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(self.registry.loaded()[("linear", "cpu", None)], 2)
+
+    def test_release_and_evict(self):
+        model = self.registry.acquire("linear")
+        self.assertEqual(self.registry.evict_unused(), 0)
+        self.registry.release("linear")
+        # Released models stay cached until evicted
+        self.assertIs(self.registry.acquire("linear"), model)
+        self.registry.release("linear")
+        self.assertEqual(self.registry.evict_unused(), 1)
+        self.assertEqual(self.registry.loaded(), {})
+        with self.assertRaises(RuntimeError):
+            self.registry.release("linear")
+
+        self.registry.acquire("linear")
+        self.assertEqual(self.builds, 2)
+
+    def test_missing_weights(self):
+        self.registry.register("missing", nn.Identity, "missing.pt", url="https://example.com/m.pt")
+        with mock.patch.dict(os.environ, {"VGGT_WEIGHTS_DIR": self.tmp.name}):
+            with self.assertRaises(FileNotFoundError) as context:
+                self.registry.acquire("missing")
+        self.assertIn("https://example.com/m.pt", str(context.exception))
+        self.assertEqual(self.registry.loaded(), {})
+        with self.assertRaises(KeyError):
+            self.registry.acquire("unknown")
+
+    def test_dinov2_from_local_weights(self):
+        # A state dict in the layout of the official DINOv2 checkpoints loads without network access
+        build_fn, weight_file, _ = backbone_registry._specs["dinov2_vits14_reg"]
+        self.assertEqual(weight_file, "dinov2_vits14_reg4_pretrain.pth")
+        torch.save(build_fn().state_dict(), Path(self.tmp.name) / weight_file)
+
+        registry = BackboneRegistry()
+        registry.register("dinov2_vits14_reg", build_fn, weight_file)
+        with mock.patch.dict(os.environ, {"VGGT_WEIGHTS_DIR": self.tmp.name}):
+            model = registry.acquire("dinov2_vits14_reg")
+        with torch.no_grad():
+            features = model(torch.rand(2, 3, 56, 56), is_training=True)
+        self.assertEqual(features["x_norm_clstoken"].shape, (2, 384))
+        self.assertEqual(features["x_norm_patchtokens"].shape, (2, 16, 384))
+        registry.release("dinov2_vits14_reg")
+
+
+class TestMegaLocBackbone(unittest.TestCase):
+    """MegaLoc holds the shared DINOv2 without owning it"""
+
+    def test_handle_outside_module_tree(self):
+        shared = nn.Linear(4, 2)
+        with mock.patch.object(backbone_registry, "acquire", return_value=shared), \
+                mock.patch.object(backbone_registry, "release") as release:
+            megaloc = MegaLocMPS(device="cpu")
+            self.assertIs(megaloc.backbone, shared)
+            self.assertFalse(any(module is shared for module in megaloc.modules()))
+            self.assertFalse(any(key.startswith("backbone.") for key in megaloc.state_dict()))
+            megaloc.to(torch.float64)
+            self.assertEqual(shared.weight.dtype, torch.float32)
+
+            megaloc.close()
+            release.assert_called_once_with("dinov2_vitb14", megaloc.device)
+            self.assertIsInstance(megaloc.backbone, nn.Identity)
+            megaloc.close()
+            del megaloc
+            self.assertEqual(release.call_count, 1)
+
+    def test_released_on_delete(self):
+        with mock.patch.object(backbone_registry, "acquire", return_value=nn.Linear(4, 2)), \
+                mock.patch.object(backbone_registry, "release") as release:
+            megaloc = MegaLocMPS(device="cpu")
+            del megaloc
+            release.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Tests for the torch Levenberg-Marquardt bundle adjuster
+"""
+
+import unittest
+import numpy as np
+import torch
+import sys
+from pathlib import Path
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.dependency import bundle_adjustment
+from vggt.dependency.bundle_adjustment import build_observation_mask, bundle_adjust
+from vggt.utils.rotation import quat_to_mat
+
+
+def make_scene(N=5, P=300, camera_type="SIMPLE_PINHOLE", noise=0.3, seed=0):
+    """Cameras around a point cloud, exact and perturbed parameters and noisy tracks"""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-1, 1, (P, 3))
+    generator = torch.Generator().manual_seed(seed)
+    quats = torch.nn.functional.normalize(
+        torch.tensor([0.0, 0.0, 0.0, 1.0]) + 0.15 * torch.randn(N, 4, generator=generator), dim=-1
+    )
+    R = quat_to_mat(quats).double().numpy()
+    # Cameras about 5 units in front of the cloud, looking at it
+    t = np.array([0, 0, 5.0]) + 0.3 * rng.normal(size=(N, 3))
+    extrinsics = np.concatenate([R, t[..., None]], axis=-1)
+    intrinsics = np.tile(np.array([[500.0, 0, 320], [0, 500.0, 240], [0, 0, 1]]), (N, 1, 1))
+    extra_params = np.full((N, 1), 0.05) if camera_type == "SIMPLE_RADIAL" else None
+
+    cam = np.einsum("nij,pj->npi", R, points) + t[:, None]
+    uv = cam[..., :2] / cam[..., 2:]
+    if extra_params is not None:
+        uv = uv * (1 + extra_params[:, None] * (uv**2).sum(-1, keepdims=True))
+    tracks = uv * 500.0 + np.array([320, 240]) + noise * rng.normal(size=uv.shape)
+    masks = rng.random((N, P)) < 0.8
+
+    # The first pose is the gauge and stays exact; the principal point is not refined by default
+    perturbed_intrinsics = intrinsics.copy()
+    perturbed_intrinsics[:, [0, 1], [0, 1]] *= 1.02
+    perturbed_quats = torch.nn.functional.normalize(
+        quats + 0.01 * torch.randn(N, 4, generator=generator), dim=-1
+    )
+    perturbed_t = t + 0.05 * rng.normal(size=(N, 3))
+    perturbed_extrinsics = np.concatenate(
+        [quat_to_mat(perturbed_quats).double().numpy(), perturbed_t[..., None]], axis=-1
+    )
+    perturbed_extrinsics[0] = extrinsics[0]
+    perturbed_points = points + 0.02 * rng.normal(size=points.shape)
+    perturbed = (perturbed_points, perturbed_extrinsics, perturbed_intrinsics)
+    return (points, extrinsics, intrinsics, extra_params), perturbed, tracks, masks
+
+
+def reprojection_errors(points, extrinsics, intrinsics, tracks, extra_params=None):
+    cam = np.einsum("nij,pj->npi", extrinsics[..., :3], points) + extrinsics[:, None, :, 3]
+    uv = cam[..., :2] / cam[..., 2:]
+    if extra_params is not None:
+        uv = uv * (1 + extra_params[:, None] * (uv**2).sum(-1, keepdims=True))
+    focal = np.stack([intrinsics[:, 0, 0], intrinsics[:, 1, 1]], axis=-1)
+    pixels = uv * focal[:, None] + intrinsics[:, None, :2, 2]
+    return np.linalg.norm(pixels - tracks, axis=-1)
+
+
+class TestBundleAdjustment(unittest.TestCase):
+    """Test the Schur-complement LM solver on synthetic scenes"""
+
+    def test_recovers_scene(self):
+        for camera_type in ("SIMPLE_PINHOLE", "PINHOLE", "SIMPLE_RADIAL"):
+            with self.subTest(camera_type=camera_type):
+                scene, perturbed, tracks, masks = make_scene(camera_type=camera_type)
+                _, _, intrinsics, extra_params = scene
+                points, extrinsics, refined_intrinsics, refined_extra, summary = bundle_adjust(
+                    *perturbed, tracks, masks, camera_type=camera_type
+                )
+                self.assertIsInstance(points, np.ndarray)
+                self.assertLess(summary["final_cost"], 0.01 * summary["initial_cost"])
+
+                # Residuals are at the noise level and the intrinsics are recovered
+                errors = reprojection_errors(
+                    points, extrinsics, refined_intrinsics, tracks, refined_extra
+                )
+                self.assertLess(np.median(errors[masks]), 0.5)
+                np.testing.assert_allclose(refined_intrinsics[:, 0, 0], 500.0, rtol=0.02)
+                np.testing.assert_array_equal(refined_intrinsics[:, :2, 2], intrinsics[:, :2, 2])
+                if camera_type == "SIMPLE_RADIAL":
+                    np.testing.assert_allclose(refined_extra, extra_params, atol=0.04)
+                else:
+                    self.assertIsNone(refined_extra)
+
+                # The first pose is the gauge
+                np.testing.assert_array_equal(extrinsics[0], perturbed[1][0])
+
+    def test_shared_camera_and_torch_inputs(self):
+        _, perturbed, tracks, masks = make_scene()
+        inputs = [torch.from_numpy(x) for x in (*perturbed, tracks)]
+        points, extrinsics, intrinsics, _, _ = bundle_adjust(*inputs, torch.from_numpy(masks),
+                                                              shared_camera=True)
+        self.assertIsInstance(points, torch.Tensor)
+        self.assertTrue(torch.equal(intrinsics, intrinsics[:1].expand_as(intrinsics)))
+        self.assertAlmostEqual(intrinsics[0, 0, 0].item(), 500.0, delta=5.0)
+
+    def test_huber_downweights_outliers(self):
+        _, perturbed, tracks, masks = make_scene(seed=1)
+        outliers = np.random.default_rng(1).random(masks.shape) < 0.05
+        tracks = tracks + 40.0 * outliers[..., None]
+        points, extrinsics, intrinsics, _, _ = bundle_adjust(*perturbed, tracks, masks)
+        errors = reprojection_errors(points, extrinsics, intrinsics, tracks)
+        self.assertLess(np.median(errors[masks & ~outliers]), 0.5)
+        self.assertGreater(np.median(errors[masks & outliers]), 30.0)
+
+    def test_schur_step_matches_dense_solve(self):
+        _, (points, extrinsics, intrinsics), tracks, _ = make_scene(N=3, P=20)
+        problem = {
+            "tracks": torch.from_numpy(tracks),
+            "masks": torch.ones(3, 20, dtype=torch.bool),
+            "camera_type": "SIMPLE_RADIAL",
+            "huber_scale": 1.0,
+            "chunks": [slice(0, 8), slice(8, 20)],
+        }
+        state = {
+            "R": torch.from_numpy(extrinsics[:, :, :3]),
+            "t": torch.from_numpy(extrinsics[:, :, 3]),
+            "points": torch.from_numpy(points),
+            "params": bundle_adjustment._intrinsics_to_params(
+                torch.from_numpy(intrinsics), "SIMPLE_RADIAL"
+            ),
+        }
+        selection = bundle_adjustment._parameter_selection(
+            3, "SIMPLE_RADIAL", False, (0,), True, False, True
+        )
+        linearization = bundle_adjustment._linearize(problem, state)
+        delta_cam, delta_points = bundle_adjustment._solve_step(linearization, selection, 1e-3)
+
+        # Dense damped system over [free camera parameters, points]
+        residuals, weights, _, J_cam, J_points = bundle_adjustment._residuals(
+            problem, state, slice(0, 20), with_jacobians=True
+        )
+        D = selection.shape[1]
+        J = torch.zeros(3, 20, 2, D + 60, dtype=torch.float64)
+        J[..., :D] = J_cam @ selection.reshape(3, 10, D)[:, None]
+        for p in range(20):
+            J[:, p, :, D + 3 * p: D + 3 * p + 3] = J_points[:, p]
+        J = J.reshape(-1, D + 60)
+        w = weights[..., None].expand(-1, -1, 2).reshape(-1)
+        H = J.T @ (w[:, None] * J)
+        H = H + 1e-3 * torch.diag(H.diagonal())
+        delta = torch.linalg.solve(H, -J.T @ (w * residuals.reshape(-1)))
+
+        expected_cam = (selection @ delta[:D]).reshape(3, 10)
+        self.assertTrue(torch.allclose(delta_cam, expected_cam, atol=1e-8))
+        self.assertTrue(torch.allclose(delta_points, delta[D:].reshape(20, 3), atol=1e-8))
+
+    def test_build_observation_mask(self):
+        (points, extrinsics, intrinsics, _), _, tracks, masks = make_scene(N=3, P=50)
+        tracks[1, :10] += 100
+        used, valid = build_observation_mask(
+            points, extrinsics, intrinsics, tracks, masks, max_reproj_error=8
+        )
+        self.assertFalse(used[1, :10].any())
+        inliers = masks.copy()
+        inliers[1, :10] = False
+        np.testing.assert_array_equal(valid, inliers.sum(0) >= 2)
+        np.testing.assert_array_equal(used, inliers & valid)
+        self.assertTrue((used.sum(0)[valid] >= 2).all())
+        self.assertFalse(used[:, ~valid].any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+"""
+Tests for the pycolmap-free COLMAP writer
+"""
+
+import struct
+import tempfile
+import unittest
+import numpy as np
+import torch
+import sys
+from pathlib import Path
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.dependency.colmap_writer import rotmat_to_qvec, write_colmap, write_colmap_wo_track
+from vggt.utils.helper import create_pixel_coordinate_grid
+from vggt.utils.rotation import quat_to_mat
+
+
+def read_images_binary(path):
+    """Minimal images.bin reader: {image_id: (qvec, tvec, camera_id, name, xys, point3D_ids)}"""
+    images = {}
+    with open(path, "rb") as fid:
+        (num_images,) = struct.unpack("<Q", fid.read(8))
+        for _ in range(num_images):
+            values = struct.unpack("<I7dI", fid.read(64))
+            name = b""
+            while not name.endswith(b"\x00"):
+                name += fid.read(1)
+            (num_points,) = struct.unpack("<Q", fid.read(8))
+            dtype = [("xy", "<f8", 2), ("id", "<u8")]
+            points = np.frombuffer(fid.read(24 * num_points), dtype=dtype)
+            images[values[0]] = (
+                np.array(values[1:5]), np.array(values[5:8]), values[8], name[:-1].decode(),
+                points["xy"], points["id"],
+            )
+    return images
+
+
+def read_points3D_binary(path):
+    """Minimal points3D.bin reader: {point3D_id: (xyz, rgb, [(image_id, point2D_idx), ...])}"""
+    points = {}
+    with open(path, "rb") as fid:
+        (num_points,) = struct.unpack("<Q", fid.read(8))
+        for _ in range(num_points):
+            values = struct.unpack("<Q3d3BdQ", fid.read(51))
+            track = struct.unpack(f"<{2 * values[-1]}I", fid.read(8 * values[-1]))
+            elements = list(zip(track[::2], track[1::2]))
+            points[values[0]] = (np.array(values[1:4]), values[4:7], elements)
+    return points
+
+
+class TestColmapWriter(unittest.TestCase):
+    """Test the binary and text COLMAP models written from numpy arrays"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # 5x4 (width x height) frames
+        self.N, H, W = 3, 4, 5
+        generator = torch.Generator().manual_seed(0)
+        quats = torch.nn.functional.normalize(torch.randn(self.N, 4, generator=generator))
+        self.extrinsics = np.concatenate(
+            [quat_to_mat(quats).numpy(), rng.normal(size=(self.N, 3, 1))], axis=-1
+        ).astype(np.float32)
+        intrinsic = np.array([[300.0, 0, 2.5], [0, 310.0, 2.0], [0, 0, 1]])
+        self.intrinsics = np.tile(intrinsic, (self.N, 1, 1))
+
+        # Drop some pixels so frames own different numbers of points
+        mask = rng.random((self.N, H, W)) < 0.6
+        self.points_xyf = create_pixel_coordinate_grid(self.N, H, W)[mask]
+        self.points3d = rng.normal(size=(len(self.points_xyf), 3))
+        self.points_rgb = rng.integers(0, 256, (len(self.points_xyf), 3), dtype=np.uint8)
+
+    def write(self, tmp, **kwargs):
+        return write_colmap_wo_track(
+            tmp, self.points3d, self.points_xyf, self.points_rgb, self.extrinsics, self.intrinsics,
+            np.array([5, 4]), **kwargs,
+        )
+
+    def test_rotmat_to_qvec(self):
+        generator = torch.Generator().manual_seed(1)
+        quats = torch.nn.functional.normalize(torch.randn(10, 4, generator=generator))
+        qvec = rotmat_to_qvec(quat_to_mat(quats).numpy())
+        # vggt quaternions are scalar-last
+        expected = quats[:, [3, 0, 1, 2]].numpy().astype(np.float64)
+        expected *= np.sign(expected[:, :1])
+        np.testing.assert_allclose(qvec, expected, atol=1e-5)
+
+    def test_binary_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            counts = self.write(tmp)
+            with open(Path(tmp) / "cameras.bin", "rb") as fid:
+                self.assertEqual(struct.unpack("<Q", fid.read(8))[0], self.N)
+                camera = struct.unpack("<iiQQ4d", fid.read(56))
+            images = read_images_binary(Path(tmp) / "images.bin")
+            raw = (Path(tmp) / "points3D.bin").read_bytes()
+
+        P = len(self.points3d)
+        self.assertEqual(counts, {
+            "num_cameras": self.N, "num_images": self.N, "num_points3D": P, "num_observations": P,
+        })
+        self.assertEqual(camera, (1, 1, 5, 4, 300.0, 310.0, 2.5, 2.0))
+
+        self.assertEqual(struct.unpack("<Q", raw[:8])[0], P)
+        self.assertEqual(len(raw), 8 + P * 59)
+        dtype = [("id", "<u8"), ("xyz", "<f8", 3), ("rgb", "u1", 3), ("error", "<f8"),
+                 ("track_length", "<u8"), ("image_id", "<u4"), ("point2D_idx", "<u4")]
+        points = np.frombuffer(raw[8:], dtype=dtype)
+        np.testing.assert_array_equal(points["id"], np.arange(1, P + 1))
+        np.testing.assert_array_equal(points["xyz"], self.points3d)
+        np.testing.assert_array_equal(points["rgb"], self.points_rgb)
+        self.assertTrue((points["track_length"] == 1).all())
+
+        # Every track element points back at the 2D observation of the same point
+        for point in points:
+            qvec, tvec, camera_id, name, xys, point3D_ids = images[point["image_id"]]
+            self.assertEqual(point3D_ids[point["point2D_idx"]], point["id"])
+            expected_xy = self.points_xyf[point["id"] - 1, :2]
+            np.testing.assert_array_equal(xys[point["point2D_idx"]], expected_xy)
+        qvec, tvec, camera_id, name, _, _ = images[2]
+        self.assertEqual((camera_id, name), (2, "image_2"))
+        R = quat_to_mat(torch.from_numpy(qvec[[1, 2, 3, 0]]).float()).numpy()
+        np.testing.assert_allclose(R, self.extrinsics[1, :, :3], atol=1e-5)
+        np.testing.assert_allclose(tvec, self.extrinsics[1, :, 3], atol=1e-6)
+
+    def test_text_model_shared_camera(self):
+        names = ["a.png", "b.png", "c.png"]
+        with tempfile.TemporaryDirectory() as tmp:
+            self.write(tmp, binary=False, shared_camera=True, camera_type="SIMPLE_PINHOLE",
+                       image_names=names)
+            cameras = [line for line in open(Path(tmp) / "cameras.txt") if not line.startswith("#")]
+            images = [line for line in open(Path(tmp) / "images.txt") if not line.startswith("#")]
+            points = np.loadtxt(Path(tmp) / "points3D.txt", ndmin=2)
+
+        self.assertEqual(cameras, ["1 SIMPLE_PINHOLE 5 4 305 2.5 2\n"])
+        self.assertEqual(len(images), 2 * self.N)
+        self.assertEqual([line.split()[-1] for line in images[::2]], names)
+        self.assertTrue(all(line.split()[8] == "1" for line in images[::2]))
+
+        np.testing.assert_allclose(points[:, 1:4], self.points3d)
+        frame_of_point = self.points_xyf[:, 2].astype(int)
+        np.testing.assert_array_equal(points[:, 8], frame_of_point + 1)
+        for fidx in range(self.N):
+            observations = np.array(images[2 * fidx + 1].split(), dtype=np.float64).reshape(-1, 3)
+            owned = np.nonzero(frame_of_point == fidx)[0]
+            np.testing.assert_array_equal(observations[:, 2], owned + 1)
+            np.testing.assert_array_equal(points[owned, 9], np.arange(len(owned)))
+
+    def test_model_with_tracks(self):
+        rng = np.random.default_rng(1)
+        P = 40
+        tracks = rng.uniform(0, 5, (self.N, P, 2))
+        masks = rng.random((self.N, P)) < 0.6
+        masks[:, 0] = False  # a point without observations is still written
+        points3d = rng.normal(size=(P, 3))
+        extra_params = np.array([[0.1], [0.2], [0.3]])
+        with tempfile.TemporaryDirectory() as tmp:
+            counts = write_colmap(
+                tmp, points3d, self.extrinsics, self.intrinsics, tracks, masks, np.array([5, 4]),
+                camera_type="SIMPLE_RADIAL", extra_params=extra_params,
+            )
+            with open(Path(tmp) / "cameras.bin", "rb") as fid:
+                fid.read(8)
+                cameras = [struct.unpack("<iiQQ4d", fid.read(56)) for _ in range(self.N)]
+            images = read_images_binary(Path(tmp) / "images.bin")
+            points = read_points3D_binary(Path(tmp) / "points3D.bin")
+
+        self.assertEqual(counts["num_observations"], masks.sum())
+        self.assertEqual([camera[:2] for camera in cameras], [(1, 2), (2, 2), (3, 2)])
+        self.assertEqual([camera[-1] for camera in cameras], [0.1, 0.2, 0.3])
+        self.assertEqual(sorted(points), list(range(1, P + 1)))
+        self.assertEqual(points[1][2], [])
+
+        for point3D_id, (xyz, rgb, track) in points.items():
+            np.testing.assert_array_equal(xyz, points3d[point3D_id - 1])
+            self.assertEqual(rgb, (0, 0, 0))
+            self.assertEqual([image_id - 1 for image_id, _ in track],
+                             np.nonzero(masks[:, point3D_id - 1])[0].tolist())
+            for image_id, point2D_idx in track:
+                _, _, _, _, xys, point3D_ids = images[image_id]
+                self.assertEqual(point3D_ids[point2D_idx], point3D_id)
+                expected_xy = tracks[image_id - 1, point3D_id - 1]
+                np.testing.assert_array_equal(xys[point2D_idx], expected_xy)
+        # Within a frame, observations follow the track order
+        for image_id, (_, _, _, _, _, point3D_ids) in images.items():
+            expected_ids = np.nonzero(masks[image_id - 1])[0] + 1
+            np.testing.assert_array_equal(point3D_ids, expected_ids)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            write_colmap(tmp, points3d, self.extrinsics, self.intrinsics, tracks, masks,
+                         np.array([5, 4]), binary=False)
+            with open(Path(tmp) / "points3D.txt") as fid:
+                lines = [line.split() for line in fid if not line.startswith("#")]
+        for line in lines:
+            point3D_id = int(line[0])
+            self.assertEqual(len(line), 8 + 2 * masks[:, point3D_id - 1].sum())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for compiled VGGT execution
+"""
+
+import tempfile
+import unittest
+import torch
+from pathlib import Path
+from unittest import mock
+
+from tests.tiny_models import make_tiny_vggt
+from vggt_mps.compiled import CompiledVGGT, bucket_key, frame_bucket
+
+
+class TestCompiledExecution(unittest.TestCase):
+    """Test bucketing and compiled aggregator parity"""
+
+    def test_frame_buckets(self):
+        self.assertEqual(frame_bucket(1), 1)
+        self.assertEqual(frame_bucket(3), 4)
+        self.assertEqual(frame_bucket(8), 8)
+        self.assertEqual(frame_bucket(300), 512)
+        with self.assertRaises(ValueError):
+            frame_bucket(0)
+
+    def test_bucket_key(self):
+        self.assertEqual(bucket_key(5, 392, 518), bucket_key(7, 392, 518))
+        self.assertNotEqual(bucket_key(5, 392, 518), bucket_key(9, 392, 518))
+        self.assertNotEqual(bucket_key(5, 392, 518, "bf16"), bucket_key(5, 392, 518))
+        self.assertRegex(bucket_key(5, 392, 518), r"^[A-Za-z0-9_.-]+$")
+
+    def test_compiled_matches_eager(self):
+        model = make_tiny_vggt(camera=False, dense=False)
+        images = torch.rand(3, 3, 56, 56)
+        with torch.no_grad():
+            reference, _ = model.aggregator(images.unsqueeze(0))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            compiled = CompiledVGGT(model, cache_dir=Path(cache_dir), backend="eager")
+            batched, key = compiled.prepare(images)
+            with torch.no_grad():
+                output, _ = model.aggregator(batched)
+            compiled.save(key)
+
+        self.assertEqual(batched.shape, (1, 3, 3, 56, 56))
+        self.assertTrue(torch.allclose(reference[-1], output[-1], atol=1e-5))
+
+    def test_artifact_cache_roundtrip(self):
+        """Artifacts are saved once per bucket and loaded by a later process"""
+        images = torch.rand(3, 3, 56, 56)
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                mock.patch.object(torch.compiler, "save_cache_artifacts", create=True,
+                                  return_value=(b"artifacts", None)) as save, \
+                mock.patch.object(torch.compiler, "load_cache_artifacts", create=True) as load:
+            first = CompiledVGGT(make_tiny_vggt(), cache_dir=Path(cache_dir), backend="eager")
+            _, key = first.prepare(images)
+            path = first.save(key)
+            self.assertEqual(path.read_bytes(), b"artifacts")
+            self.assertIsNone(first.save(key))
+            load.assert_not_called()
+
+            # 4 frames fall in the same bucket as 3
+            second = CompiledVGGT(make_tiny_vggt(), cache_dir=Path(cache_dir), backend="eager")
+            _, second_key = second.prepare(torch.rand(4, 3, 56, 56))
+            self.assertEqual(second_key, key)
+            load.assert_called_once_with(b"artifacts")
+            self.assertIsNone(second.save(key))
+            self.assertEqual(save.call_count, 1)
+
+    def test_without_artifact_cache(self):
+        """Older torch versions compile without caching"""
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                mock.patch("vggt_mps.compiled.has_artifact_cache", return_value=False):
+            compiled = CompiledVGGT(make_tiny_vggt(), cache_dir=Path(cache_dir), backend="eager")
+            _, key = compiled.prepare(torch.rand(3, 3, 56, 56))
+            self.assertIsNone(compiled.save(key))
+            self.assertEqual(list(Path(cache_dir).iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for low-rank compression of the aggregator blocks
+"""
+
+import tempfile
+import unittest
+import torch
+from pathlib import Path
+from unittest import mock
+
+from tests.tiny_models import TINY_VGGT_KWARGS, make_tiny_vggt
+from vggt.models.vggt import VGGT
+from vggt_mps.compression import (
+    LOW_RANK_KEY, LowRankLinear, compress_low_rank, factorize, load_low_rank_checkpoint,
+    low_rank_linear_names, save_low_rank_checkpoint, select_rank,
+)
+from vggt_mps.vggt_core import VGGTProcessor
+from vggt_mps.weight_streaming import load_streamed_vggt
+
+# A tiny VGGT without heads, as rebuilt by load_streamed_vggt
+NO_HEADS = dict(enable_camera=False, enable_point=False, enable_depth=False, enable_track=False)
+
+
+def make_tiny_model():
+    """Small aggregator under the same state dict prefix as VGGT"""
+    return make_tiny_vggt(camera=False, dense=False)
+
+
+class TestLowRankCompression(unittest.TestCase):
+    """Test rank selection, factoring and compressed checkpoints"""
+
+    def setUp(self):
+        torch.manual_seed(1)
+        self.images = torch.rand(1, 3, 3, 56, 56)
+
+    def test_select_rank(self):
+        energies = torch.tensor([10.0, 5.0, 1.0, 0.01])
+        self.assertEqual(select_rank(energies, 0.0), 4)
+        # Dropping the last component costs sqrt(0.01 / 16.01) ~ 0.025
+        self.assertEqual(select_rank(energies, 0.03), 3)
+        self.assertEqual(select_rank(energies, 1.0), 1)
+
+    def test_factorize_low_rank_weight(self):
+        weight = torch.randn(96, 5) @ torch.randn(5, 64)
+        down, up = factorize(weight, torch.randn(200, 64), error_budget=1e-4)
+        self.assertEqual(down.shape, (5, 64))
+        self.assertTrue(torch.allclose(up @ down, weight, atol=1e-4))
+        # A full-rank weight at a zero budget cannot get smaller
+        self.assertIsNone(factorize(torch.randn(64, 64), torch.randn(200, 64), error_budget=0.0))
+
+    def test_layer_error_within_budget(self):
+        model = make_tiny_model()
+        name = "aggregator.frame_blocks.0.mlp.fc1"
+        linear = model.get_submodule(name)
+        inputs = []
+        handle = linear.register_forward_hook(lambda m, i, o: inputs.append(i[0]))
+        with torch.no_grad():
+            model.aggregator(self.images)
+        handle.remove()
+        x = inputs[0].reshape(-1, 64)
+        dense = torch.nn.functional.linear(x, linear.weight)
+
+        down, up = factorize(linear.weight, x, error_budget=0.5)
+        error = (x @ down.T @ up.T - dense).norm() / dense.norm()
+        self.assertLessEqual(error.item(), 0.5 + 1e-5)
+
+    def test_compress_and_reload(self):
+        model = make_tiny_model()
+        with torch.no_grad():
+            reference = model.aggregator(self.images)[0][-1]
+        ranks = compress_low_rank(model, self.images, error_budget=0.3)
+
+        self.assertGreater(len(ranks), 0)
+        self.assertEqual(len(ranks) + len(low_rank_linear_names(model)), 16)
+        for name, rank in ranks.items():
+            self.assertIsInstance(model.get_submodule(name), LowRankLinear)
+            self.assertEqual(model.get_submodule(name).rank, rank)
+        with torch.no_grad():
+            compressed = model.aggregator(self.images)[0][-1]
+        self.assertLess(((compressed - reference).norm() / reference.norm()).item(), 0.5)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "lowrank.pt"
+            save_low_rank_checkpoint(model, ranks, path, error_budget=0.3)
+            checkpoint = torch.load(path, weights_only=True)
+        self.assertEqual(checkpoint[LOW_RANK_KEY]["ranks"], ranks)
+
+        reloaded = load_low_rank_checkpoint(make_tiny_model(), checkpoint)
+        with torch.no_grad():
+            self.assertTrue(torch.equal(reloaded.aggregator(self.images)[0][-1], compressed))
+
+    def test_streamed_low_rank(self):
+        # Streaming factors the meta model first, so the factored block weights are streamed
+        model = make_tiny_model()
+        ranks = compress_low_rank(model, self.images, error_budget=0.3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "lowrank.pt"
+            save_low_rank_checkpoint(model, ranks, path, error_budget=0.3)
+            streamed, streamer = load_streamed_vggt(path, **TINY_VGGT_KWARGS, **NO_HEADS)
+            self.addCleanup(streamer.close)
+            name = next(iter(ranks))
+            self.assertIsInstance(streamed.get_submodule(name), LowRankLinear)
+            with torch.no_grad():
+                expected = model.aggregator(self.images)[0][-1]
+                output = streamed.aggregator(self.images)[0][-1]
+        self.assertTrue(torch.allclose(output, expected, atol=1e-6))
+        self.assertGreater(streamer.unit_loads, 0)
+
+    def test_streamed_mismatch_raises(self):
+        # A checkpoint that cannot be streamed is an error, not a reason to load other weights
+        model = make_tiny_model()
+        ranks = compress_low_rank(model, self.images, error_budget=0.3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "lowrank.pt"
+            save_low_rank_checkpoint(model, ranks, path, error_budget=0.3)
+            processor = VGGTProcessor(device="cpu", stream_weights=True)
+            with mock.patch.object(VGGT, "from_pretrained") as from_pretrained:
+                with self.assertRaises(RuntimeError):
+                    processor.load_model(path)
+        from_pretrained.assert_not_called()
+        self.assertIsNone(processor.model)
+
+    def test_unknown_layer(self):
+        ranks = {"aggregator.frame_blocks.9.mlp.fc1": 4}
+        checkpoint = {"model": {}, LOW_RANK_KEY: {"ranks": ranks}}
+        with self.assertRaises(KeyError):
+            load_low_rank_checkpoint(make_tiny_model(), checkpoint)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for the VGGT inference cost model
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# Add src to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from vggt_mps.cost_model import CostModel, DEFAULT_COEFFICIENTS, preprocessed_size
+
+GB = 1024 ** 3
+
+
+class TestCostModel(unittest.TestCase):
+    """Test analytical cost predictions and configuration recommendation"""
+
+    def setUp(self):
+        self.model = CostModel(coefficients=DEFAULT_COEFFICIENTS, threads=1)
+
+    def test_preprocessed_size(self):
+        self.assertEqual(preprocessed_size(640, 480), (392, 518))
+        self.assertEqual(preprocessed_size(480, 640), (518, 518))
+
+    def test_cost_grows_with_frames(self):
+        small = self.model.predict(4, 392, 518)
+        large = self.model.predict(16, 392, 518)
+        self.assertGreater(large["total_seconds"], small["total_seconds"])
+        self.assertGreater(large["peak_memory_bytes"], small["peak_memory_bytes"])
+
+    def test_sparse_modes_are_cheaper(self):
+        dense = self.model.predict(32, 392, 518)
+        pooled = self.model.predict(32, 392, 518, global_mode="pooled2")
+        anchors = self.model.predict(32, 392, 518, global_mode="anchors4")
+        dense_seconds = dense["stages"]["aggregator"]["seconds"]
+        self.assertLess(pooled["stages"]["aggregator"]["seconds"], dense_seconds)
+        self.assertLess(anchors["stages"]["aggregator"]["seconds"], dense_seconds)
+
+    def test_sparse_adds_covisibility_stage(self):
+        dense = self.model.predict(16, 392, 518)
+        sparse = self.model.predict(16, 392, 518, sparse=True)
+        self.assertEqual(list(sparse["stages"])[0], "covisibility")
+        self.assertNotIn("covisibility", dense["stages"])
+        # The mask does not skip attention work, while MegaLoc adds time and weights
+        self.assertEqual(sparse["stages"]["aggregator"]["seconds"],
+                         dense["stages"]["aggregator"]["seconds"])
+        self.assertGreater(sparse["total_seconds"], dense["total_seconds"])
+        self.assertGreater(sparse["peak_memory_bytes"], dense["peak_memory_bytes"])
+        best = self.model.recommend(16, 392, 518, memory_budget=64 * GB, sparse=True)
+        self.assertTrue(best["config"]["sparse"])
+
+    def test_smaller_chunks_use_less_memory(self):
+        big = self.model.predict(16, 392, 518, frames_chunk_size=8)
+        small = self.model.predict(16, 392, 518, frames_chunk_size=1)
+        self.assertLess(small["peak_memory_bytes"], big["peak_memory_bytes"])
+
+    def test_recommend_respects_budget(self):
+        best = self.model.recommend(16, 392, 518, memory_budget=64 * GB)
+        self.assertTrue(best["fits"])
+        self.assertLessEqual(best["peak_memory_bytes"], 64 * GB)
+
+        tight = self.model.recommend(16, 392, 518, memory_budget=1 * GB)
+        self.assertFalse(tight["fits"])
+
+    def test_recommend_searches_chunk_size(self):
+        # Tight enough that only smaller DPT head chunks fit
+        default = self.model.predict(64, 392, 518, global_mode="anchors8")
+        budget = default["peak_memory_bytes"] - 1
+        best = self.model.recommend(64, 392, 518, memory_budget=budget)
+        self.assertTrue(best["fits"])
+        self.assertLess(best["config"]["frames_chunk_size"], 8)
+
+    def test_invalid_dtype(self):
+        with self.assertRaises(ValueError):
+            CostModel(coefficients=DEFAULT_COEFFICIENTS, dtype="int4")
+
+
+class TestPlanCommand(unittest.TestCase):
+    """Test the plan command against the input reconstruct actually runs"""
+
+    def test_plans_for_resized_images(self):
+        # The commands package imports the plotting dependencies of the other commands
+        from vggt_mps.commands.plan import run_plan
+
+        # reconstruct resizes every image to 640x480, so a 16:9 input still runs at 392x518
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(2):
+                Image.new("RGB", (1280, 720)).save(Path(tmp) / f"frame_{i}.png")
+            args = argparse.Namespace(images=[tmp], dtype="fp32", calibrate=False,
+                                      memory_gb=64.0, sparse=False)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                run_plan(args)
+        self.assertIn("model input 2x3x392x518", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests for the batched torch geometry backend against per-frame numpy references
+"""
+
+import unittest
+import numpy as np
+import torch
+import sys
+from pathlib import Path
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.utils.geometry import (
+    closed_form_inverse_se3,
+    depth_to_world_coords_points,
+    depth_to_world_points_batch,
+    img_from_cam,
+    project_world_points_to_cam,
+    project_world_points_to_camera_points_batch,
+    unproject_depth_map_to_point_map,
+)
+from vggt.utils.rotation import quat_to_mat
+
+
+def reference_unproject(depth, extrinsic, intrinsic):
+    """Per-frame numpy unprojection (the previous implementation)"""
+    H, W = depth.shape
+    u, v = np.meshgrid(np.arange(W), np.arange(H))
+    x = (u - intrinsic[0, 2]) * depth / intrinsic[0, 0]
+    y = (v - intrinsic[1, 2]) * depth / intrinsic[1, 1]
+    cam = np.stack((x, y, depth), axis=-1).astype(np.float32)
+    R, t = extrinsic[:3, :3], extrinsic[:3, 3]
+    return np.dot(cam, R) - R.T @ t, cam
+
+
+def random_cameras(S, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    quats = torch.nn.functional.normalize(torch.randn(S, 4, generator=generator), dim=-1)
+    extrinsics = torch.cat([quat_to_mat(quats), torch.randn(S, 3, 1, generator=generator)], dim=-1)
+    intrinsics = torch.zeros(S, 3, 3)
+    intrinsics[:, 0, 0] = 300 + 50 * torch.rand(S, generator=generator)
+    intrinsics[:, 1, 1] = 300 + 50 * torch.rand(S, generator=generator)
+    intrinsics[:, 0, 2], intrinsics[:, 1, 2], intrinsics[:, 2, 2] = 40, 30, 1
+    return extrinsics, intrinsics
+
+
+class TestGeometry(unittest.TestCase):
+    """Test batched unprojection, projection and SE3 inversion"""
+
+    def setUp(self):
+        self.S, self.H, self.W = 3, 24, 32
+        self.extrinsics, self.intrinsics = random_cameras(self.S)
+        generator = torch.Generator().manual_seed(1)
+        self.depth = 1 + 4 * torch.rand(self.S, self.H, self.W, generator=generator)
+
+    def test_unproject_matches_reference(self):
+        expected = np.stack([
+            reference_unproject(d, e, k)[0]
+            for d, e, k in zip(self.depth.numpy(), self.extrinsics.numpy(), self.intrinsics.numpy())
+        ])
+        for depth in (self.depth[..., None], self.depth[..., None].numpy()):
+            actual = unproject_depth_map_to_point_map(
+                depth, self.extrinsics, self.intrinsics.numpy()
+            )
+            self.assertIsInstance(actual, np.ndarray)
+            self.assertEqual(actual.dtype, np.float32)
+            np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-4)
+
+    def test_single_frame_wrapper_dtypes(self):
+        extrinsic = self.extrinsics[0].double().numpy()
+        depth, intrinsic = self.depth[0].numpy(), self.intrinsics[0].numpy()
+        world, cam, mask = depth_to_world_coords_points(depth, extrinsic, intrinsic)
+        expected_world, expected_cam = reference_unproject(depth, extrinsic, intrinsic)
+        self.assertEqual(cam.dtype, np.float32)
+        self.assertEqual(world.dtype, np.float64)
+        np.testing.assert_allclose(cam, expected_cam, rtol=1e-5)
+        np.testing.assert_allclose(world, expected_world, rtol=1e-4, atol=1e-4)
+        self.assertTrue(mask.all())
+
+    def test_batch_conf_mask_and_roundtrip(self):
+        conf = torch.rand(self.S, self.H, self.W)
+        depth = self.depth.clone()
+        depth[:, 0, 0] = 0
+        world, cam, mask = depth_to_world_points_batch(
+            depth[None], self.extrinsics[None], self.intrinsics[None],
+            conf=conf[None], conf_threshold=0.5,
+        )
+        self.assertEqual(world.shape, (1, self.S, self.H, self.W, 3))
+        self.assertTrue(torch.equal(mask[0], (depth > 1e-8) & (conf >= 0.5)))
+
+        # Projecting the world points back lands on the camera points and the pixel grid
+        cam_again = project_world_points_to_camera_points_batch(world, self.extrinsics[None])
+        self.assertTrue(torch.allclose(cam_again, cam, atol=1e-4))
+        pixels = img_from_cam(self.intrinsics, cam[0].flatten(1, 2).transpose(1, 2))
+        v, u = torch.meshgrid(torch.arange(self.H), torch.arange(self.W), indexing="ij")
+        grid = torch.stack([u, v], dim=-1).reshape(1, -1, 2).float()
+        # Pixel 0 has zero depth and projects to NaN (replaced by the default)
+        expected = grid.expand(self.S, -1, -1)
+        self.assertTrue(torch.allclose(pixels[:, 1:], expected[:, 1:], atol=1e-3))
+
+    def test_project_world_points_to_cam(self):
+        points = torch.randn(50, 3) + torch.tensor([0.0, 0.0, 5.0])
+        image_points, cam_points = project_world_points_to_cam(
+            points, self.extrinsics, self.intrinsics
+        )
+        homogeneous = torch.cat([points, torch.ones(50, 1)], dim=-1)
+        expected_cam = self.extrinsics @ homogeneous.T
+        self.assertTrue(torch.allclose(cam_points, expected_cam, atol=1e-5))
+        expected_image = self.intrinsics @ (expected_cam / expected_cam[:, 2:3])
+        expected_image = expected_image[:, :2].transpose(1, 2)
+        self.assertTrue(torch.allclose(image_points, expected_image, atol=1e-3))
+
+    def test_closed_form_inverse_batched(self):
+        inverse = closed_form_inverse_se3(self.extrinsics)
+        bottom = torch.tensor([[[0.0, 0, 0, 1]]]).expand(self.S, -1, -1)
+        homogeneous = torch.cat([self.extrinsics, bottom], dim=1)
+        identity = torch.eye(4).expand(self.S, -1, -1)
+        self.assertTrue(torch.allclose(inverse @ homogeneous, identity, atol=1e-5))
+
+        # Extra leading dimensions, numpy and torch
+        nested = closed_form_inverse_se3(self.extrinsics.reshape(1, self.S, 3, 4))
+        self.assertTrue(torch.allclose(nested[0], inverse))
+        inverse_np = closed_form_inverse_se3(self.extrinsics.numpy())
+        np.testing.assert_allclose(inverse_np, inverse.numpy(), atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
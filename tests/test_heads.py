@@ -0,0 +1,107 @@
+"""
+Tests for VGGT prediction heads
+"""
+
+import unittest
+import torch
+import sys
+from pathlib import Path
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.dependency.track_modules.blocks import CorrBlock as DependencyCorrBlock
+from vggt.heads.camera_head import CameraHead
+from vggt.heads.track_modules.base_track_predictor import BaseTrackerPredictor
+from vggt.heads.track_modules.blocks import CorrBlock
+
+
+class TestCameraHeadRefinement(unittest.TestCase):
+    """Test adaptive camera head refinement"""
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.head = CameraHead(dim_in=64, trunk_depth=1, num_heads=4).eval()
+        self.tokens_list = [torch.randn(1, 3, 6, 64)]
+
+    def test_default_iterations(self):
+        with torch.no_grad():
+            pose_enc_list = self.head(self.tokens_list)
+        self.assertEqual(len(pose_enc_list), 4)
+        self.assertEqual(pose_enc_list[-1].shape, (1, 3, 9))
+
+    def test_final_only(self):
+        """return_all=False keeps only the last encoding, which is unchanged"""
+        with torch.no_grad():
+            full = self.head(self.tokens_list)
+            final = self.head(self.tokens_list, return_all=False)
+        self.assertEqual(len(final), 1)
+        self.assertTrue(torch.equal(full[-1], final[-1]))
+
+    def test_convergence_early_exit(self):
+        """A loose tolerance stops after the first refinement step"""
+        with torch.no_grad():
+            pose_enc_list = self.head(self.tokens_list, num_iterations=8, convergence_tol=1e9)
+        self.assertEqual(len(pose_enc_list), 2)
+
+    def test_configurable_iterations(self):
+        with torch.no_grad():
+            pose_enc_list = self.head(self.tokens_list, num_iterations=2)
+        self.assertEqual(len(pose_enc_list), 2)
+        with self.assertRaises(ValueError):
+            self.head(self.tokens_list, num_iterations=0)
+
+
+class TestLocalCorrelation(unittest.TestCase):
+    """Local window correlations equal sampling the full correlation volumes"""
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.fmaps = torch.randn(2, 3, 16, 20, 24)
+        self.targets = torch.randn(2, 3, 7, 16)
+        # Include tracks outside the feature maps to exercise the padding
+        self.coords = torch.rand(2, 3, 7, 2) * 30 - 3
+
+    def test_head_corr_block(self):
+        for padding_mode in ["zeros", "border"]:
+            volume = CorrBlock(self.fmaps, num_levels=3, radius=2, padding_mode=padding_mode)
+            local = CorrBlock(
+                self.fmaps, num_levels=3, radius=2, padding_mode=padding_mode, corr_mode="local"
+            )
+            expected = volume.corr_sample(self.targets, self.coords)
+            result = local.corr_sample(self.targets, self.coords)
+            self.assertEqual(result.shape, (2, 3, 7, 3 * 25))
+            self.assertTrue(torch.allclose(result, expected, atol=1e-5))
+
+    def test_dependency_corr_block(self):
+        fmaps = torch.randn(2, 3, 8, 20, 24)
+        for multiple_track_feats in [False, True]:
+            kwargs = dict(num_levels=2, radius=3, multiple_track_feats=multiple_track_feats)
+            volume = DependencyCorrBlock(fmaps, **kwargs)
+            local = DependencyCorrBlock(fmaps, corr_mode="local", **kwargs)
+            volume.corr(self.targets[..., : 16 if multiple_track_feats else 8])
+            local.corr(self.targets[..., : 16 if multiple_track_feats else 8])
+            expected = volume.sample(self.coords)
+            self.assertTrue(torch.allclose(local.sample(self.coords), expected, atol=1e-5))
+
+    def test_tracker_outputs_match(self):
+        tracker = BaseTrackerPredictor(
+            latent_dim=16, corr_levels=2, corr_radius=2, hidden_size=32, depth=1
+        ).eval()
+        query_points = torch.rand(1, 5, 2) * 23
+        with torch.no_grad():
+            expected = tracker(query_points, self.fmaps[:1], iters=2)
+            tracker.corr_mode = "local"
+            result = tracker(query_points, self.fmaps[:1], iters=2)
+        for r, e in zip(result[0], expected[0]):
+            self.assertTrue(torch.allclose(r, e, atol=1e-4))
+        self.assertTrue(torch.allclose(result[1], expected[1], atol=1e-4))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            CorrBlock(self.fmaps, corr_mode="sparse")
+
+
+if __name__ == '__main__':
+    unittest.main()
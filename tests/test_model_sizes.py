@@ -0,0 +1,74 @@
+"""
+Tests for the smaller (distilled) VGGT model sizes
+"""
+
+import tempfile
+import unittest
+import torch
+import sys
+from pathlib import Path
+
+# Add src and the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.models.vggt import VGGT
+from vggt_mps.config import MODEL_SIZES
+from vggt_mps.vggt_core import VGGTProcessor
+
+
+class TestModelSizes(unittest.TestCase):
+    """Test building and loading student models"""
+
+    @classmethod
+    def setUpClass(cls):
+        torch.manual_seed(0)
+        cls.student = VGGT(**MODEL_SIZES["small"]["kwargs"]).eval()
+
+    def test_student_shapes(self):
+        self.assertEqual(len(self.student.aggregator.frame_blocks), 8)
+        # DPT heads read the same relative depths as [4, 11, 17, 23] of the 24-block model
+        self.assertEqual(self.student.depth_head.intermediate_layer_idx, [1, 3, 5, 7])
+        self.assertIsNone(self.student.track_head)
+
+        with torch.no_grad():
+            predictions = self.student(torch.rand(2, 3, 56, 56))
+        self.assertEqual(predictions["pose_enc"].shape, (1, 2, 9))
+        self.assertEqual(predictions["depth"].shape, (1, 2, 56, 56, 1))
+        self.assertEqual(predictions["world_points"].shape, (1, 2, 56, 56, 3))
+
+    def test_processor_loads_training_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "vggt_small.pt"
+            torch.save({"model": self.student.state_dict(), "steps": {"train": 1}}, path)
+            processor = VGGTProcessor(device="cpu", model_size="small")
+            processor.load_model(path)
+
+        self.assertIsNotNone(processor.model)
+        weight = processor.model.aggregator.global_blocks[3].attn.qkv.weight
+        expected = self.student.aggregator.global_blocks[3].attn.qkv.weight
+        self.assertTrue(torch.equal(weight, expected))
+
+    def test_processor_streams_training_checkpoint(self):
+        images = torch.rand(2, 3, 56, 56)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "vggt_small.pt"
+            torch.save({"model": self.student.state_dict(), "steps": {"train": 1}}, path)
+            processor = VGGTProcessor(device="cpu", model_size="small", stream_weights=True)
+            processor.load_model(path)
+            self.assertIsNotNone(processor._weight_streamer)
+            self.addCleanup(processor._weight_streamer.close)
+            self.assertEqual(len(processor.model.aggregator.frame_blocks), 8)
+            with torch.no_grad():
+                streamed = processor.model(images)
+                expected = self.student(images)
+        self.assertTrue(torch.allclose(streamed["depth"], expected["depth"], atol=1e-5))
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            VGGTProcessor(device="cpu", model_size="tiny")
+
+
+if __name__ == "__main__":
+    unittest.main()
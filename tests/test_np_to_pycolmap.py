@@ -0,0 +1,124 @@
+"""
+Tests for the vectorized numpy to pycolmap builders against the original per-point loops
+"""
+
+import unittest
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+pycolmap = pytest.importorskip("pycolmap")
+
+from vggt.dependency.np_to_pycolmap import (
+    batch_np_matrix_to_pycolmap, batch_np_matrix_to_pycolmap_wo_track,
+)
+
+
+def loop_observations(points3d, tracks, masks, max_points3D_val):
+    """
+    Points2D and track elements as built by the original loop over frames and 3D points
+
+    Returns:
+        points2D: {image_id: [(x, y, point3D_id), ...]} in point2D order
+        elements: {point3D_id: [(image_id, point2D_idx), ...]} in element order
+    """
+    valid_idx = np.nonzero(masks.sum(0) >= 2)[0]
+    points2D, elements = {}, {point3D_id: [] for point3D_id in range(1, len(valid_idx) + 1)}
+    for fidx in range(len(tracks)):
+        points2D[fidx + 1] = []
+        for point3D_id in range(1, len(valid_idx) + 1):
+            track_idx = valid_idx[point3D_id - 1]
+            if (points3d[track_idx] < max_points3D_val).all() and masks[fidx][track_idx]:
+                x, y = tracks[fidx][track_idx]
+                elements[point3D_id].append((fidx + 1, len(points2D[fidx + 1])))
+                points2D[fidx + 1].append((x, y, point3D_id))
+    return points2D, elements
+
+
+def loop_observations_wo_track(points_xyf, num_frames):
+    """Points2D and track elements as built by the original loop of the track-free builder"""
+    points2D, elements = {}, {point3D_id: [] for point3D_id in range(1, len(points_xyf) + 1)}
+    for fidx in range(num_frames):
+        points2D[fidx + 1] = []
+        for point_idx in np.nonzero(points_xyf[:, 2].astype(np.int32) == fidx)[0]:
+            x, y = points_xyf[point_idx, :2]
+            elements[point_idx + 1].append((fidx + 1, len(points2D[fidx + 1])))
+            points2D[fidx + 1].append((x, y, point_idx + 1))
+    return points2D, elements
+
+
+def reconstruction_observations(reconstruction):
+    """Points2D and track elements of a pycolmap reconstruction, in the same layout"""
+    points2D = {
+        image_id: [(p.xy[0], p.xy[1], p.point3D_id) for p in image.points2D]
+        for image_id, image in reconstruction.images.items()
+    }
+    elements = {
+        point3D_id: [(e.image_id, e.point2D_idx) for e in point3D.track.elements]
+        for point3D_id, point3D in reconstruction.points3D.items()
+    }
+    return points2D, elements
+
+
+class TestNpToPycolmap(unittest.TestCase):
+    """Test that the vectorized builders reproduce the original reconstructions"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.N, self.P = 5, 200
+        self.extrinsics = np.tile(np.eye(4)[:3], (self.N, 1, 1))
+        self.intrinsics = np.tile(np.array([[50.0, 0, 32], [0, 50.0, 24], [0, 0, 1]]),
+                                  (self.N, 1, 1))
+        self.image_size = np.array([64, 48])
+
+    def assert_same_observations(self, reconstruction, expected):
+        points2D, elements = reconstruction_observations(reconstruction)
+        expected_points2D, expected_elements = expected
+        self.assertEqual(sorted(points2D), sorted(expected_points2D))
+        for image_id, points in expected_points2D.items():
+            np.testing.assert_allclose(np.array([p[:2] for p in points2D[image_id]]).reshape(-1, 2),
+                                       np.array([p[:2] for p in points]).reshape(-1, 2))
+            self.assertEqual([p[2] for p in points2D[image_id]], [p[2] for p in points])
+        self.assertEqual(elements, expected_elements)
+
+    def test_matches_loop(self):
+        points3d = self.rng.uniform(-10, 10, (self.P, 3))
+        points3d[::7, 1] = 5000  # outside max_points3D_val: kept but never observed
+        tracks = self.rng.uniform(0, 64, (self.N, self.P, 2))
+        masks = self.rng.random((self.N, self.P)) < 0.4
+
+        reconstruction, valid_mask = batch_np_matrix_to_pycolmap(
+            points3d, self.extrinsics, self.intrinsics, tracks, self.image_size, masks=masks,
+            max_points3D_val=3000, min_inlier_per_frame=1,
+        )
+        np.testing.assert_array_equal(valid_mask, masks.sum(0) >= 2)
+        self.assertEqual(sorted(reconstruction.points3D), list(range(1, valid_mask.sum() + 1)))
+        for point3D_id, track_idx in enumerate(np.nonzero(valid_mask)[0], start=1):
+            np.testing.assert_allclose(reconstruction.points3D[point3D_id].xyz, points3d[track_idx])
+        self.assert_same_observations(
+            reconstruction, loop_observations(points3d, tracks, masks, max_points3D_val=3000)
+        )
+
+    def test_matches_loop_wo_track(self):
+        points3d = self.rng.uniform(-10, 10, (self.P, 3))
+        points_rgb = self.rng.integers(0, 256, (self.P, 3))
+        points_xyf = np.concatenate([
+            self.rng.uniform(0, 64, (self.P, 2)),
+            self.rng.integers(-1, self.N + 1, (self.P, 1)),  # some frames out of range
+        ], axis=1)
+
+        reconstruction = batch_np_matrix_to_pycolmap_wo_track(
+            points3d, points_xyf, points_rgb, self.extrinsics, self.intrinsics, self.image_size,
+        )
+        self.assertEqual(sorted(reconstruction.points3D), list(range(1, self.P + 1)))
+        self.assert_same_observations(reconstruction,
+                                      loop_observations_wo_track(points_xyf, self.N))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Parity tests for the ONNX Runtime backend
+"""
+
+import importlib.util
+import os
+import tempfile
+import unittest
+import torch
+from pathlib import Path
+from unittest import mock
+
+from tests.tiny_models import make_tiny_vggt
+from vggt_mps.onnx_backend import MANIFEST_NAME, export_vggt_onnx, onnx_dir_for
+from vggt_mps.resilient import run_vggt_resilient
+from vggt_mps.vggt_core import VGGTProcessor
+
+HAS_ONNX = all(importlib.util.find_spec(name) for name in ("onnx", "onnxruntime", "onnxscript"))
+
+
+@unittest.skipUnless(HAS_ONNX, "onnx, onnxruntime and onnxscript are required")
+class TestOnnxBackend(unittest.TestCase):
+    """Exported graphs must match the torch backend"""
+
+    @classmethod
+    def setUpClass(cls):
+        from vggt_mps.onnx_backend import OnnxVGGT, export_vggt_onnx
+
+        cls.model = make_tiny_vggt()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.onnx_dir = export_vggt_onnx(cls.model, 56, 70, output_root=Path(cls.tmp.name))
+        cls.runner = OnnxVGGT(cls.onnx_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def assert_parity(self, num_frames, frames_chunk_size=8):
+        images = torch.rand(num_frames, 3, 56, 70)
+        with torch.no_grad():
+            reference, _ = run_vggt_resilient(self.model, images)
+        output = self.runner(images, frames_chunk_size=frames_chunk_size)
+
+        for key in ("pose_enc", "depth", "depth_conf", "world_points", "world_points_conf"):
+            self.assertEqual(output[key].shape, reference[key].shape, key)
+            self.assertTrue(torch.allclose(output[key], reference[key], atol=1e-4, rtol=1e-4), key)
+
+    def test_parity_export_frame_count(self):
+        self.assert_parity(2)
+
+    def test_parity_dynamic_frame_count(self):
+        """Graphs exported with 2 frames run any frame count, with chunked DPT heads"""
+        self.assert_parity(5, frames_chunk_size=2)
+
+    def test_manifest(self):
+        self.assertEqual(self.runner.manifest["layers"], [0, 1])
+        self.assertEqual(set(self.runner.sessions),
+                         {"aggregator", "camera_head", "depth_head", "point_head"})
+
+
+class TestOnnxCacheKey(unittest.TestCase):
+    """Exported graphs are reused only for the configuration they were exported with"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.exports = []
+        self.images = torch.rand(1, 2, 3, 56, 70)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fake_export(self, model, height, width, output_root, camera_iterations, config):
+        self.exports.append(config)
+        out_dir = onnx_dir_for(height, width, output_root, config)
+        out_dir.mkdir(parents=True)
+        (out_dir / MANIFEST_NAME).write_text("{}")
+        return out_dir
+
+    def run_processor(self, processor):
+        with mock.patch("vggt_mps.onnx_backend.ONNX_DIR", self.root), \
+                mock.patch("vggt_mps.onnx_backend.export_vggt_onnx", self.fake_export), \
+                mock.patch("vggt_mps.onnx_backend.OnnxVGGT") as runner:
+            runner.return_value.return_value = {}
+            processor._run_onnxruntime(self.images)
+        return len(self.exports)
+
+    def test_reexport_on_change(self):
+        checkpoint, other, adapter = (self.root / f"{n}.pt" for n in ("model", "other", "adapter"))
+        for path in (checkpoint, other, adapter):
+            path.write_bytes(path.name.encode())
+        processor = VGGTProcessor(device="cpu", backend="onnxruntime")
+        processor.model = make_tiny_vggt()
+        processor._checkpoint_source = checkpoint
+
+        self.assertEqual(self.run_processor(processor), 1)
+        self.assertEqual(self.run_processor(processor), 1)
+
+        changes = [
+            ("camera_iterations", 2),
+            ("model_size", "small"),
+            ("adapter_path", adapter),
+            ("_checkpoint_source", other),
+            ("_checkpoint_source", "facebook/VGGT-1B"),
+        ]
+        for exports, (name, value) in enumerate(changes, start=2):
+            setattr(processor, name, value)
+            self.assertEqual(self.run_processor(processor), exports, name)
+
+        # Earlier configurations reuse their graphs, unless the checkpoint was re-saved
+        processor._checkpoint_source = other
+        self.assertEqual(self.run_processor(processor), len(changes) + 1)
+        os.utime(other, ns=(0, 0))
+        self.assertEqual(self.run_processor(processor), len(changes) + 2)
+        self.assertEqual(len({str(onnx_dir_for(56, 70, self.root, c)) for c in self.exports}),
+                         len(self.exports))
+
+
+
+class TestOnnxGlobalAttention(unittest.TestCase):
+    """Only dense global attention is exported"""
+
+    def test_rejects_approximate_attention(self):
+        for options in ({"global_pool_size": 2}, {"global_num_anchors": 2}):
+            with self.assertRaises(ValueError):
+                VGGTProcessor(device="cpu", backend="onnxruntime", **options)
+
+        model = make_tiny_vggt()
+        model.aggregator.global_num_anchors = 2
+        with tempfile.TemporaryDirectory() as tmp, self.assertRaises(ValueError):
+            export_vggt_onnx(model, 56, 70, output_root=Path(tmp))
+
+
+if __name__ == '__main__':
+    unittest.main()
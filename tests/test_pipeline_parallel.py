@@ -0,0 +1,140 @@
+"""
+Tests for pipeline-parallel multi-process inference
+"""
+
+import os
+import tempfile
+import unittest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from collections.abc import Mapping
+from pathlib import Path
+
+from tests.tiny_models import make_tiny_vggt
+from vggt_mps.pipeline_parallel import partition_units, prune_to_stage, run_vggt_pipeline
+from vggt_mps.resilient import run_vggt_resilient
+from vggt_mps.weight_streaming import assign_weights, open_checkpoint
+
+WORLD_SIZE = 3
+
+
+class RecordingCheckpoint(Mapping):
+    """Checkpoint that records which weights were read"""
+
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+        self.read = set()
+
+    def __getitem__(self, key):
+        self.read.add(key)
+        return self.checkpoint[key]
+
+    def __contains__(self, key):
+        return key in self.checkpoint
+
+    def __iter__(self):
+        return iter(self.checkpoint)
+
+    def __len__(self):
+        return len(self.checkpoint)
+
+
+def stage_keys(units):
+    """State dict keys owned by a stage: its units plus the aggregator's special tokens"""
+    prefixes = []
+    for unit in units:
+        if unit == "embed":
+            prefixes.append("aggregator.patch_embed.")
+        elif unit == "heads":
+            prefixes += ["camera_head.", "depth_head.", "point_head."]
+        else:
+            # One frame and one global block per layer in the tiny model
+            i = unit[len("layer"):]
+            prefixes += [f"aggregator.frame_blocks.{i}.", f"aggregator.global_blocks.{i}."]
+    shared = ("aggregator.camera_token", "aggregator.register_token")
+    keys = make_tiny_vggt().state_dict()
+    return {key for key in keys if key.startswith(tuple(prefixes)) or key in shared}
+
+
+def make_scenes():
+    torch.manual_seed(2)
+    return [torch.rand(3, 3, 56, 70), torch.rand(2, 3, 42, 56), torch.rand(4, 3, 56, 70)]
+
+
+def _worker(rank, world_size, tmp):
+    dist.init_process_group("gloo", init_method=f"file://{os.path.join(tmp, 'init')}", rank=rank,
+                            world_size=world_size)
+    try:
+        torch.set_num_threads(1)
+        # Every rank builds the model without weights and reads only its stage
+        with torch.device("meta"):
+            model = make_tiny_vggt()
+        checkpoint = RecordingCheckpoint(open_checkpoint(os.path.join(tmp, "model.pt")))
+        results = run_vggt_pipeline(model, make_scenes() if rank == 0 else None,
+                                    frames_chunk_size=2, checkpoint=checkpoint)
+        assert checkpoint.read == stage_keys(partition_units(make_tiny_vggt(), world_size)[rank])
+
+        if rank != 0:
+            assert results is None
+            return
+        reference_model = make_tiny_vggt()
+        assert len(results) == 3
+        for images, predictions in zip(make_scenes(), results):
+            with torch.no_grad():
+                reference, _ = run_vggt_resilient(reference_model, images)
+            for key in ("pose_enc", "depth", "depth_conf", "world_points", "world_points_conf"):
+                assert torch.allclose(predictions[key], reference[key], atol=1e-5), key
+    finally:
+        dist.destroy_process_group()
+
+
+class TestPipelineParallel(unittest.TestCase):
+    """Test stage partitioning and multi-process parity"""
+
+    def test_partition_units(self):
+        model = make_tiny_vggt()
+        self.assertEqual(partition_units(model, 1), [["embed", "layer0", "layer1", "heads"]])
+        stages = partition_units(model, 3)
+        self.assertEqual(len(stages), 3)
+        self.assertEqual(sum(stages, []), ["embed", "layer0", "layer1", "heads"])
+        self.assertTrue(all(stages))
+        with self.assertRaises(ValueError):
+            partition_units(model, 5)
+
+    def test_prune_releases_weights(self):
+        model = make_tiny_vggt()
+        total = sum(p.numel() for p in model.parameters())
+        prune_to_stage(model, ["layer0"])
+        self.assertIsNone(model.depth_head)
+        self.assertLess(sum(p.numel() for p in model.parameters()), total / 2)
+
+    def test_stage_reads_only_its_weights(self):
+        reference = make_tiny_vggt()
+        stages = partition_units(reference, WORLD_SIZE)
+        for units in stages:
+            with torch.device("meta"):
+                model = make_tiny_vggt()
+            prune_to_stage(model, units)
+            # Some torch versions also build the normalization buffers on meta
+            model.aggregator._resnet_mean = torch.empty(1, 1, 3, 1, 1, device="meta")
+            checkpoint = RecordingCheckpoint(reference.state_dict())
+            assign_weights(model, checkpoint)
+
+            self.assertEqual(checkpoint.read, stage_keys(units))
+            tensors = list(model.state_dict().values()) + list(model.buffers())
+            self.assertFalse(any(t.is_meta for t in tensors))
+            self.assertTrue(torch.equal(model.aggregator._resnet_mean,
+                                        reference.aggregator._resnet_mean))
+
+        # Every weight belongs to exactly one stage, apart from the shared special tokens
+        self.assertEqual(set().union(*map(stage_keys, stages)), set(reference.state_dict()))
+
+    def test_matches_single_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            torch.save(make_tiny_vggt().state_dict(), Path(tmp) / "model.pt")
+            mp.spawn(_worker, args=(WORLD_SIZE, tmp), nprocs=WORLD_SIZE, join=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
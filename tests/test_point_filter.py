@@ -0,0 +1,72 @@
+"""
+Tests for on-device point filtering
+"""
+
+import unittest
+import numpy as np
+import torch
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from vggt_mps.utils.point_filter import select_confident_points
+from vggt_mps.vggt_core import VGGTProcessor
+
+
+class TestSelectConfidentPoints(unittest.TestCase):
+    """Test confidence filtering and subsampling"""
+
+    def setUp(self):
+        self.points = torch.randn(2, 8, 8, 3)
+        self.conf = torch.arange(2 * 8 * 8, dtype=torch.float32).view(2, 8, 8)
+
+    def test_keep_all(self):
+        result = select_confident_points(self.points, self.conf)
+        self.assertEqual(result['points'].shape, (128, 3))
+        self.assertEqual(result['points'].dtype, np.float32)
+
+    def test_threshold_and_percentile(self):
+        result = select_confident_points(self.points, self.conf, conf_threshold=100)
+        self.assertEqual(len(result['points']), 28)
+        result = select_confident_points(self.points, self.conf, conf_percentile=50)
+        self.assertEqual(len(result['points']), 64)
+        self.assertTrue((result['conf'] >= 64).all())
+
+    def test_percentile_range(self):
+        result = select_confident_points(self.points, self.conf, conf_percentile=100)
+        self.assertEqual(len(result['points']), 0)
+        for conf_percentile in (-1, 101):
+            with self.assertRaises(ValueError):
+                select_confident_points(self.points, self.conf, conf_percentile=conf_percentile)
+            with self.assertRaises(ValueError):
+                VGGTProcessor(device="cpu", conf_percentile=conf_percentile)
+
+    def test_percentile_with_ties(self):
+        conf = torch.ones(2, 8, 8)
+        result = select_confident_points(self.points, conf, conf_percentile=25)
+        self.assertEqual(len(result['points']), 96)
+
+    def test_stride_and_max_points(self):
+        result = select_confident_points(self.points, self.conf, stride=2)
+        self.assertEqual(len(result['points']), 32)
+        result = select_confident_points(self.points, self.conf, max_points=10)
+        self.assertEqual(len(result['points']), 10)
+
+    def test_fp16_points_and_colors(self):
+        images = torch.rand(2, 3, 8, 8)
+        result = select_confident_points(self.points.half(), self.conf, images=images, stride=4)
+        self.assertEqual(result['points'].dtype, np.float32)
+        self.assertEqual(result['colors'].shape, (8, 3))
+        self.assertEqual(result['colors'].dtype, np.uint8)
+
+    def test_non_finite_points_dropped(self):
+        points = self.points.clone()
+        points[0, 0, 0, 0] = float('nan')
+        result = select_confident_points(points, self.conf)
+        self.assertEqual(len(result['points']), 127)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for reduced-precision CPU inference modes
+"""
+
+import unittest
+import torch
+
+from tests.tiny_models import TINY_VGGT_KWARGS
+from vggt.models.aggregator import Aggregator
+from vggt_mps.utils.precision import (
+    autocast_context, int8_linear_names, quantize_int8, resolve_precision,
+)
+
+
+def make_tiny_aggregator() -> Aggregator:
+    torch.manual_seed(0)
+    return Aggregator(**TINY_VGGT_KWARGS).eval()
+
+
+def relative_error(reference: torch.Tensor, candidate: torch.Tensor) -> float:
+    return ((candidate.float() - reference).norm() / reference.norm()).item()
+
+
+class TestPrecisionModes(unittest.TestCase):
+    """Test bf16 autocast and int8 dynamic quantization"""
+
+    def setUp(self):
+        self.images = torch.rand(1, 2, 3, 56, 56)
+        self.cpu = torch.device("cpu")
+
+    def test_resolve_precision(self):
+        self.assertEqual(resolve_precision("auto", self.cpu), "fp32")
+        self.assertEqual(resolve_precision("auto", torch.device("cuda")), "fp16")
+        with self.assertRaises(ValueError):
+            resolve_precision("int4", self.cpu)
+        with self.assertRaises(ValueError):
+            resolve_precision("int8", torch.device("mps"))
+
+    def test_bf16_autocast(self):
+        aggregator = make_tiny_aggregator()
+        with torch.no_grad():
+            reference, _ = aggregator(self.images)
+            with autocast_context("bf16", self.cpu):
+                output, _ = aggregator(self.images)
+        error = relative_error(reference[-1], output[-1])
+        self.assertGreater(error, 0.0)  # linears really ran in bf16
+        self.assertLess(error, 0.05)
+
+    def test_int8_quantizes_block_linears(self):
+        aggregator = make_tiny_aggregator()
+        names = int8_linear_names(aggregator)
+        # qkv, fc1 and fc2 of every frame and global block
+        self.assertEqual(len(names), 3 * 2 * 2)
+        self.assertTrue(all(name.endswith(("attn.qkv", "mlp.fc1", "mlp.fc2")) for name in names))
+
+        with torch.no_grad():
+            reference, _ = aggregator(self.images)
+            quantize_int8(aggregator)
+            output, _ = aggregator(self.images)
+
+        self.assertEqual(int8_linear_names(aggregator), [])
+        self.assertIsInstance(aggregator.frame_blocks[0].attn.proj, torch.nn.Linear)
+        self.assertLess(relative_error(reference[-1], output[-1]), 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
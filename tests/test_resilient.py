@@ -0,0 +1,156 @@
+"""
+Tests for OOM-resilient staged execution
+"""
+
+import unittest
+import torch
+import torch.nn as nn
+from unittest import mock
+
+from tests.tiny_models import make_tiny_vggt
+from vggt_mps.resilient import InferenceOOMError, is_oom_error, run_vggt_resilient
+from vggt_mps.vggt_core import VGGTProcessor
+
+
+class MockAggregator(nn.Module):
+    """Runs out of memory unless global attention is restricted to anchors"""
+
+    def __init__(self):
+        super().__init__()
+        self.global_pool_size = 1
+        self.global_num_anchors = 0
+        self.calls = []
+
+    def forward(self, images):
+        self.calls.append((self.global_pool_size, self.global_num_anchors))
+        if self.global_num_anchors == 0:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 20.00 GiB")
+        B, S = images.shape[:2]
+        return [torch.zeros(B, S, 6, 8)], 5
+
+
+class MockDPTHead(nn.Module):
+    """Runs out of memory for frame chunks larger than max_chunk"""
+
+    def __init__(self, max_chunk):
+        super().__init__()
+        self.max_chunk = max_chunk
+
+    def forward(self, tokens_list, images, patch_start_idx, frames_chunk_size=8):
+        if frames_chunk_size > self.max_chunk:
+            raise RuntimeError(
+                "[enforce fail at alloc_cpu.cpp] DefaultCPUAllocator: can't allocate memory"
+            )
+        B, S, _, H, W = images.shape
+        return torch.ones(B, S, H, W, 1), torch.ones(B, S, H, W)
+
+
+class MockVGGT(nn.Module):
+    def __init__(self, max_chunk=2):
+        super().__init__()
+        self.aggregator = MockAggregator()
+        self.camera_head = None
+        self.depth_head = MockDPTHead(max_chunk)
+        self.point_head = None
+        self.track_head = None
+        self.lean_outputs = True
+
+
+class TestResilientExecution(unittest.TestCase):
+    """Test split-and-retry on allocation failures"""
+
+    def test_is_oom_error(self):
+        self.assertTrue(is_oom_error(RuntimeError("MPS backend out of memory")))
+        self.assertTrue(is_oom_error(MemoryError()))
+        self.assertFalse(is_oom_error(RuntimeError("shape mismatch")))
+        self.assertFalse(is_oom_error(ValueError("out of memory")))
+
+    def test_degraded_modes_reported(self):
+        model = MockVGGT(max_chunk=2)
+        images = torch.rand(1, 10, 3, 14, 14)
+        predictions, report = run_vggt_resilient(model, images)
+
+        self.assertEqual(predictions['depth'].shape, (1, 10, 14, 14, 1))
+        self.assertEqual(report['aggregator'], {'mode': 'anchors=8', 'degraded': True})
+        self.assertEqual(report['depth_head'], {'mode': 'frames_chunk=2', 'degraded': True})
+        self.assertNotIn('images', predictions)
+        # The aggregator settings are restored after the attempts
+        self.assertEqual(model.aggregator.global_num_anchors, 0)
+        self.assertEqual(model.aggregator.calls[:2], [(1, 0), (2, 0)])
+
+    def test_configured_chunk_size(self):
+        model = MockVGGT(max_chunk=2)
+        images = torch.rand(1, 4, 3, 14, 14)
+        model.aggregator.global_num_anchors = 2
+        _, report = run_vggt_resilient(model, images, frames_chunk_size=2)
+        self.assertEqual(report['depth_head'], {'mode': 'frames_chunk=2', 'degraded': False})
+
+    def test_all_modes_fail(self):
+        model = MockVGGT(max_chunk=0)
+        images = torch.rand(1, 3, 3, 14, 14)
+        with self.assertRaises(InferenceOOMError) as ctx:
+            run_vggt_resilient(model, images)
+        self.assertEqual(ctx.exception.stage, 'depth_head')
+
+    def test_processor_never_simulates_by_default(self):
+        processor = VGGTProcessor(device="cpu")
+        processor.load_model = lambda model_path=None: None  # model stays unavailable
+        images = [torch.randint(0, 255, (32, 32, 3), dtype=torch.uint8).numpy()]
+        with self.assertRaises(RuntimeError):
+            processor.process_images(images)
+
+        processor.allow_simulated = True
+        depth_maps = processor.process_images(images)
+        self.assertEqual(depth_maps[0].shape, (32, 32))
+
+
+class TestMatchesForward(unittest.TestCase):
+    """Staged execution must give the same outputs as VGGT.forward"""
+
+    def setUp(self):
+        self.model = make_tiny_vggt(track=True)
+        self.images = torch.rand(3, 3, 56, 70)
+        self.query_points = torch.rand(5, 2) * 50
+
+    def assert_same_predictions(self):
+        with torch.no_grad():
+            expected = self.model(self.images, self.query_points)
+            predictions, report = run_vggt_resilient(self.model, self.images, self.query_points)
+
+        self.assertEqual(report['track_head'], {'mode': 'all_queries', 'degraded': False})
+        self.assertEqual(predictions.keys(), expected.keys())
+        for key, value in expected.items():
+            if key == "pose_enc_list":
+                self.assertEqual(len(predictions[key]), len(value))
+                for actual, reference in zip(predictions[key], value):
+                    self.assertTrue(torch.allclose(actual, reference, atol=1e-5))
+                continue
+            self.assertEqual(predictions[key].dtype, value.dtype, key)
+            self.assertTrue(torch.allclose(predictions[key], value, atol=1e-5), key)
+
+    def test_default_outputs(self):
+        self.assert_same_predictions()
+
+    def test_inference_options(self):
+        self.model.lean_outputs = True
+        self.model.output_dtype = torch.float16
+        self.model.camera_num_iterations = 2
+        self.assert_same_predictions()
+
+        self.model.lean_outputs = False
+        self.model.keep_pose_enc_list = False
+        self.assert_same_predictions()
+
+    def test_query_chunks(self):
+        """Chunked tracking shares the feature maps; tracks only attend within their chunk"""
+        with torch.no_grad(), mock.patch("vggt_mps.resilient.TRACK_CHUNK_SIZES", [2]):
+            predictions, report = run_vggt_resilient(self.model, self.images, self.query_points)
+        self.assertEqual(report['track_head'], {'mode': 'query_chunk=2', 'degraded': False})
+        self.assertEqual(predictions['track'].shape, (1, 3, 5, 2))
+        self.assertEqual(predictions['vis'].shape, (1, 3, 5))
+        # Query points are tracked from the first frame
+        self.assertTrue(torch.allclose(predictions['track'][0, 0], self.query_points, atol=1e-4))
+
+
+if __name__ == '__main__':
+    unittest.main()
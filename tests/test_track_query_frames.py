@@ -0,0 +1,134 @@
+"""
+Tests for per-query reference frames in the tracker, without reordering the frames
+"""
+
+import importlib.util
+import unittest
+import numpy as np
+import torch
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.dependency import BaseTrackerPredictor, ShallowEncoder, refine_track
+
+# track_predict imports the keypoint extractors of lightglue, pycolmap and the hydra tracker config
+HAS_TRACK_DEPS = all(importlib.util.find_spec(name) for name in ("lightglue", "pycolmap", "hydra"))
+
+
+def swap_to_front(tensor, query_frame, dim):
+    """Swap query_frame and frame 0, as the per-query-frame tracking used to do"""
+    order = torch.arange(tensor.shape[dim])
+    order[0], order[query_frame] = query_frame, 0
+    return tensor.index_select(dim, order)
+
+
+class TestTrackQueryFrames(unittest.TestCase):
+    """Per-query reference frames match moving each query frame to the front"""
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.S, self.N = 4, 6
+        # Untrained weights amplify float32 round-off every iteration, so keep the iterations few
+        self.iters = 2
+
+    def test_coarse_predictor(self):
+        # Space attention mixes the tracks of a frame, so all queries share one frame here
+        predictor = BaseTrackerPredictor(
+            stride=1, corr_levels=2, corr_radius=2, latent_dim=32, hidden_size=64, depth=2
+        ).eval()
+        fmaps = torch.randn(1, self.S, 32, 16, 16)
+        query_points = torch.rand(1, self.N, 2) * 15
+
+        with torch.no_grad():
+            for query_frame in range(self.S):
+                query_index = torch.full((1, self.N), query_frame)
+                tracks, vis = predictor(
+                    query_points, fmaps, iters=self.iters, query_index=query_index
+                )
+                expected_tracks, expected_vis = predictor(
+                    query_points, swap_to_front(fmaps, query_frame, dim=1), iters=self.iters
+                )
+                expected = swap_to_front(expected_tracks[-1], query_frame, dim=1)
+                self.assertTrue(torch.allclose(tracks[-1], expected, atol=1e-3))
+                expected_vis = swap_to_front(expected_vis, query_frame, dim=1)
+                self.assertTrue(torch.allclose(vis, expected_vis, atol=1e-4))
+                self.assertTrue(torch.equal(tracks[-1][0, query_frame], query_points[0]))
+
+    def test_refine_mixed_query_frames(self):
+        # The fine predictor tracks every query on its own, so query frames can be mixed freely
+        fine_fnet = ShallowEncoder(stride=1).eval()
+        fine_tracker = BaseTrackerPredictor(
+            stride=1, depth=2, corr_levels=3, corr_radius=3, latent_dim=32, hidden_size=64,
+            fine=True, use_spaceatt=False,
+        ).eval()
+        images = torch.rand(1, self.S, 3, 48, 48)
+        coarse_pred = 8 + torch.rand(1, self.S, self.N, 2) * 31
+        query_index = torch.tensor([[0, 2, 1, 3, 2, 0]])
+
+        with torch.no_grad():
+            refined, _ = refine_track(
+                images, fine_fnet, fine_tracker, coarse_pred, pradius=7, fine_iters=self.iters,
+                query_index=query_index,
+            )
+            for n, query_frame in enumerate(query_index[0].tolist()):
+                expected, _ = refine_track(
+                    swap_to_front(images, query_frame, dim=1), fine_fnet, fine_tracker,
+                    swap_to_front(coarse_pred[:, :, n: n + 1], query_frame, dim=1),
+                    pradius=7, fine_iters=self.iters,
+                )
+                expected = swap_to_front(expected, query_frame, dim=1)
+                self.assertTrue(torch.allclose(refined[:, :, n: n + 1], expected, atol=1e-3))
+                query_point = coarse_pred[0, query_frame, n]
+                self.assertTrue(torch.equal(refined[0, query_frame, n], query_point))
+
+
+@unittest.skipUnless(HAS_TRACK_DEPS, "lightglue, pycolmap and hydra are required")
+class TestForwardOnQueries(unittest.TestCase):
+    """_forward_on_queries shares the feature maps but never mixes query frames in a call"""
+
+    def test_one_query_frame_per_call(self):
+        from vggt.dependency import track_predict
+
+        S = 4
+        images = torch.rand(S, 3, 32, 32)
+        fmaps = torch.rand(S, 8, 8, 8)
+        queries = {frame: torch.rand(1, num, 2) * 31 for frame, num in ((0, 5), (2, 3), (3, 7))}
+
+        def extract_queries(query_index, images, conf, points_3d, extractors, device):
+            query_points = queries[query_index]
+            return query_points, None, None, np.zeros((query_points.shape[1], 3), np.uint8)
+
+        calls = []
+
+        def tracker(images_feed, query_points, fmaps, fine_tracking, fine_chunk, query_index):
+            self.assertEqual(fmaps.shape, (1, S, 8, 8, 8))
+            calls.append(query_index)
+            tracks = query_points[:, None] + query_index[:, None, :, None]
+            tracks = tracks + torch.arange(S)[None, :, None, None]
+            vis = torch.ones(query_points.shape[:1] + (S,) + query_points.shape[1:2])
+            return tracks, None, vis, None
+
+        with mock.patch.object(track_predict, "_extract_queries", extract_queries):
+            tracks, vis, _, _, colors = track_predict._forward_on_queries(
+                list(queries), images, None, None, fmaps, None, tracker,
+                max_points_num=S * 4, fine_tracking=False, device="cpu",
+            )
+
+        # A budget of 4 queries per call: 5 -> 3 + 2, 3 -> 3, 7 -> 4 + 3
+        self.assertEqual([call.shape[1] for call in calls], [3, 2, 3, 4, 3])
+        for call in calls:
+            self.assertEqual(len(call.unique()), 1)
+        for (frame, query_points), track in zip(queries.items(), tracks):
+            expected = query_points[0] + frame + torch.arange(S)[:, None, None]
+            self.assertTrue(torch.allclose(torch.from_numpy(track), expected))
+        self.assertEqual([v.shape for v in vis], [(S, 5), (S, 3), (S, 7)])
+        self.assertEqual([len(c) for c in colors], [5, 3, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Tests for gather-based patch extraction in track refinement
+"""
+
+import unittest
+import torch
+import sys
+from pathlib import Path
+
+# Add the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.dependency import BaseTrackerPredictor, ShallowEncoder, refine_track
+from vggt.dependency.track_modules.track_refine import extract_patches
+
+
+class TestTrackRefine(unittest.TestCase):
+    """Patches are gathered directly instead of indexing an unfolded image"""
+
+    def setUp(self):
+        torch.manual_seed(0)
+
+    def test_extract_patches_matches_unfold(self):
+        images = torch.rand(3, 3, 40, 56)  # H != W
+        psize = 7
+        frame_indices = torch.tensor([0, 2, 2, 1, 0])
+        topleft = torch.stack([torch.randint(0, 56 - psize + 1, (5,)),
+                               torch.randint(0, 40 - psize + 1, (5,))], dim=-1).int()
+        topleft[0] = torch.tensor([56 - psize, 40 - psize])
+
+        patches = extract_patches(images, frame_indices, topleft, psize)
+        unfolded = images.unfold(2, psize, 1).unfold(3, psize, 1)
+        expected = unfolded[frame_indices, :, topleft[:, 1].long(), topleft[:, 0].long()]
+        self.assertEqual(patches.shape, (5, 3, psize, psize))
+        self.assertTrue(torch.equal(patches, expected))
+
+    def test_chunking_does_not_change_tracks(self):
+        fine_fnet = ShallowEncoder(stride=1).eval()
+        fine_tracker = BaseTrackerPredictor(
+            stride=1, depth=1, corr_levels=3, corr_radius=3, latent_dim=32, hidden_size=64,
+            fine=True, use_spaceatt=False,
+        ).eval()
+        images = torch.rand(1, 3, 3, 40, 64)
+        # Tracks near the right border stay inside non-square images
+        coarse_pred = torch.rand(1, 3, 5, 2) * torch.tensor([63.0, 39.0])
+        coarse_pred[0, :, 0] = torch.tensor([62.5, 20.0])
+
+        with torch.no_grad():
+            whole, _ = refine_track(images, fine_fnet, fine_tracker, coarse_pred, pradius=7,
+                                    fine_iters=2, chunk=-1)
+            chunked, _ = refine_track(images, fine_fnet, fine_tracker, coarse_pred, pradius=7,
+                                      fine_iters=2, chunk=4)
+        self.assertTrue(torch.allclose(whole, chunked, atol=1e-5))
+        self.assertTrue(torch.equal(whole[:, 0], coarse_pred[:, 0]))
+        self.assertTrue(torch.isfinite(whole).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for reusing the scene feature maps of the track head across query batches
+"""
+
+import unittest
+import torch
+
+from tests.tiny_models import make_tiny_vggt
+from vggt.models.track_session import TrackSession
+
+
+class TestTrackSession(unittest.TestCase):
+    """Test the cached track feature maps"""
+
+    def setUp(self):
+        self.model = make_tiny_vggt(camera=False, dense=False, track=True)
+        self.images = torch.rand(3, 3, 56, 70)
+        self.aggregator_calls = 0
+
+        def count(*_):
+            self.aggregator_calls += 1
+
+        self.model.aggregator.register_forward_hook(count)
+
+    def test_matches_full_forward(self):
+        session = TrackSession(self.model, self.images)
+        first_points = torch.tensor([[10.0, 20.0], [40.5, 30.25]])
+        second_points = torch.rand(1, 5, 2) * 50
+
+        with torch.no_grad():
+            for query_points in (first_points, second_points):
+                track_list, vis, conf = session.track(query_points)
+                expected = self.model(self.images, query_points)
+                self.assertTrue(torch.allclose(track_list[-1], expected["track"], atol=1e-5))
+                self.assertTrue(torch.allclose(vis, expected["vis"], atol=1e-5))
+                self.assertTrue(torch.allclose(conf, expected["conf"], atol=1e-5))
+
+        self.assertEqual(track_list[-1].shape, (1, 3, 5, 2))
+        # One aggregator run for the session, one per full forward
+        self.assertEqual(self.aggregator_calls, 1 + 2)
+
+    def test_features_are_cached(self):
+        session = TrackSession(self.model, self.images)
+        with torch.no_grad():
+            for _ in range(3):
+                session.track(torch.rand(4, 2) * 50, iters=1)
+        self.assertEqual(self.aggregator_calls, 1)
+        self.assertEqual(session.feature_maps.shape, (1, 3, 32, 28, 35))
+
+        session.clear()
+        with torch.no_grad():
+            session.track(torch.rand(4, 2) * 50)
+        self.assertEqual(self.aggregator_calls, 2)
+
+    def test_requires_track_head(self):
+        self.model.track_head = None
+        with self.assertRaises(ValueError):
+            TrackSession(self.model, self.images)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests for streaming aggregator block weights from a checkpoint
+"""
+
+import tempfile
+import unittest
+import torch
+from pathlib import Path
+
+from tests.tiny_models import TINY_VGGT_KWARGS, make_tiny_vggt
+from vggt.models.vggt import VGGT
+from vggt_mps.weight_streaming import WeightStreamer, load_streamed_vggt, open_checkpoint
+
+
+def make_tiny_model(seed=0):
+    """Small aggregator under the same state dict prefix as VGGT"""
+    return make_tiny_vggt(camera=False, dense=False, seed=seed)
+
+
+class TestWeightStreaming(unittest.TestCase):
+    """Test streamed execution against resident weights"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reference = make_tiny_model()
+        self.path = Path(self.tmp.name) / "model.pt"
+        torch.save(self.reference.state_dict(), self.path)
+        torch.manual_seed(1)
+        self.images = torch.rand(1, 3, 3, 56, 70)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _streamed_model(self, path=None, prefetch=True):
+        checkpoint = open_checkpoint(path or self.path)
+        model = make_tiny_model(seed=1)
+        streamer = WeightStreamer(model.aggregator, checkpoint, prefetch=prefetch)
+        # Everything outside the blocks is loaded normally
+        resident = {k: v for k, v in checkpoint.items() if "_blocks." not in k}
+        model.load_state_dict(resident, strict=False)
+        self.addCleanup(streamer.close)
+        return model, streamer
+
+    def _assert_same_outputs(self, model):
+        with torch.no_grad():
+            expected, _ = self.reference.aggregator(self.images)
+            actual, _ = model.aggregator(self.images)
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(actual, expected):
+            self.assertTrue(torch.allclose(a, e, atol=1e-6))
+
+    def test_matches_resident_weights(self):
+        model, streamer = self._streamed_model()
+        self._assert_same_outputs(model)
+        # A second pass reuses the wrapped-around prefetch of the first unit
+        self._assert_same_outputs(model)
+
+        self.assertEqual(streamer.unit_loads, 8)
+        self.assertEqual(streamer.resident_bytes, 0)
+        block = self.reference.aggregator.frame_blocks[0]
+        unit_bytes = sum(p.numel() * p.element_size() for p in block.parameters())
+        self.assertEqual(streamer.peak_resident_bytes, unit_bytes)
+
+    def test_weights_released_after_forward(self):
+        model, _ = self._streamed_model()
+        self._assert_same_outputs(model)
+        for blocks in (model.aggregator.frame_blocks, model.aggregator.global_blocks):
+            self.assertTrue(all(p.numel() == 0 for p in blocks.parameters()))
+
+    def test_pooled_global_attention(self):
+        model, _ = self._streamed_model(prefetch=False)
+        self.reference.aggregator.global_pool_size = 2
+        model.aggregator.global_pool_size = 2
+        self._assert_same_outputs(model)
+
+    def test_safetensors_checkpoint(self):
+        from safetensors.torch import save_file
+
+        path = Path(self.tmp.name) / "model.safetensors"
+        save_file({k: v.contiguous() for k, v in self.reference.state_dict().items()}, str(path))
+        model, _ = self._streamed_model(path)
+        self._assert_same_outputs(model)
+
+    def test_close_restores_aggregator(self):
+        model, streamer = self._streamed_model()
+        streamer.close()
+        self.assertNotIn("_process_frame_attention", vars(model.aggregator))
+
+    def test_missing_block_weights(self):
+        state_dict = self.reference.state_dict()
+        del state_dict["aggregator.global_blocks.1.mlp.fc1.weight"]
+        with self.assertRaises(KeyError):
+            WeightStreamer(make_tiny_model().aggregator, state_dict)
+
+    def test_load_streamed_vggt(self):
+        """The meta-device model matches the resident one, buffers included"""
+        kwargs = dict(TINY_VGGT_KWARGS, enable_point=False, enable_depth=False, enable_track=False)
+        torch.manual_seed(0)
+        reference = VGGT(**kwargs).eval()
+        path = Path(self.tmp.name) / "vggt.pt"
+        torch.save(reference.state_dict(), path)
+
+        model, streamer = load_streamed_vggt(path, **kwargs)
+        self.addCleanup(streamer.close)
+        tensors = list(model.parameters()) + list(model.buffers())
+        self.assertFalse(any(t.is_meta for t in tensors))
+        self.assertTrue(torch.equal(model.aggregator._resnet_std, reference.aggregator._resnet_std))
+        with torch.no_grad():
+            expected = reference(self.images)
+            actual = model(self.images)
+        self.assertTrue(torch.allclose(actual["pose_enc"], expected["pose_enc"], atol=1e-5))
+        self.assertEqual(streamer.resident_bytes, 0)
+
+        # Model settings that do not match the checkpoint are rejected
+        with self.assertRaises(RuntimeError):
+            load_streamed_vggt(path, **dict(kwargs, enable_depth=True))
+        with self.assertRaises(RuntimeError):
+            load_streamed_vggt(path, **dict(kwargs, enable_camera=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Small VGGT models shared by the tests
+
+Importing this module also puts src and the vendored VGGT repo on the path.
+"""
+
+import torch
+import sys
+from pathlib import Path
+
+# Add src and the vendored VGGT repo to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT / "repo" / "vggt"))
+
+from vggt.heads.camera_head import CameraHead
+from vggt.heads.dpt_head import DPTHead
+from vggt.heads.track_head import TrackHead
+from vggt.models.vggt import VGGT
+
+# Conv-embed aggregator that runs quickly on CPU; heads read 2 * embed_dim = 128 channels
+TINY_VGGT_KWARGS = dict(img_size=56, patch_size=14, embed_dim=64, depth=2, num_heads=4,
+                        patch_embed="conv")
+TINY_DPT_KWARGS = dict(dim_in=128, features=32, out_channels=[16, 32, 64, 64],
+                       intermediate_layer_idx=[0, 1, 1, 1])
+
+
+def make_tiny_vggt(camera=True, dense=True, track=False, seed=0) -> VGGT:
+    """
+    Small VGGT with the same module layout and state dict prefixes as the full model
+
+    Args:
+        camera: Build a camera head
+        dense: Build the depth and point heads
+        track: Build a track head
+        seed: Seed for the weight initialization
+    """
+    torch.manual_seed(seed)
+    model = VGGT(**TINY_VGGT_KWARGS, enable_camera=False, enable_point=False, enable_depth=False,
+                 enable_track=False)
+    if camera:
+        model.camera_head = CameraHead(dim_in=128, trunk_depth=1, num_heads=4)
+    if dense:
+        model.depth_head = DPTHead(output_dim=2, activation="exp", **TINY_DPT_KWARGS)
+        model.point_head = DPTHead(output_dim=4, activation="inv_log", **TINY_DPT_KWARGS)
+    if track:
+        model.track_head = TrackHead(dim_in=128, features=32, iters=2, corr_levels=3,
+                                     hidden_size=32, intermediate_layer_idx=[0, 1, 1, 1])
+    return model.eval()